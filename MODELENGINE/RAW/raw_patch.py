@@ -3,10 +3,16 @@
 # 1. build_daily_from_pykrx 등 누락된 함수 복구
 # 2. 이미 최신 데이터(target_date == last_date)가 있으면 수집 SKIP 기능 추가
 # 3. 파일 저장 시 날짜 태그 규칙 준수
+# 4. 단계별 계측(load_raw/소스별 수집/merge/save) → LOG/PROFILE/profile_runs.jsonl
+# 5. 기존 행이 바뀐 (date, code) 키를 stocks/LOGS/raw_changes.jsonl 에 기록 (incremental_update.py 입력)
+#    (일일 실행의 새 날짜 키는 기록하지 않음 → 전체 파이프라인이 처리)
+#    늦은 보정: python raw_patch.py --fix 20251121 --codes 005930,000660
+#    → 해당 종목만 재수집 → 최신 RAW 파일에 덮어쓰기 (같은 날짜라 새 태그 파일을 만들지 않음)
 
 import os
 import sys
 import time
+import argparse
 import math
 import datetime as dt
 from functools import lru_cache
@@ -55,6 +61,8 @@ if PROJECT_ROOT not in sys.path:
 
 from UTIL.config_paths import versioned_filename
 from UTIL.version_utils import save_dataframe_with_date, find_latest_file
+from UTIL.profiling import RunProfiler
+from UTIL import raw_changes
 
 def print_header():
     print("┌──────────────────────────────────────────────┐")
@@ -389,15 +397,74 @@ def build_daily_from_fallback_sources(date, tickers):
     return df, unresolved
 
 
+# =====================================================================================
+# [추가] 늦은 보정: 이미 RAW 에 있는 날짜의 일부 종목 재수집
+# =====================================================================================
+def patch_codes(raw_df: pd.DataFrame, date: dt.date, codes: List[str], prof=None) -> pd.DataFrame:
+    """KIWOOM → FDR/Yahoo/Naver 순으로 codes 재수집, 값이 바뀐 키만 RAW 에 반영하고 변경 기록."""
+    codes = list(dict.fromkeys(str(c).zfill(6) for c in codes))
+    log(f"[FIX] {date} 보정 재수집: {len(codes)}개 종목")
+    try:
+        daily_df, bad_codes = build_daily_from_kiwoom(date, tickers=codes)
+    except Exception as e:
+        log(f"[WARN] KIWOOM 실패 → {e}")
+        daily_df, bad_codes = pd.DataFrame(), codes
+    if bad_codes:
+        fb_df, unresolved = build_daily_from_fallback_sources(date, bad_codes)
+        fb_df = fb_df[~fb_df["Code"].isin(unresolved)]
+        daily_df = fb_df if daily_df is None or daily_df.empty else merge_daily_into_raw(daily_df, fb_df)
+        if unresolved:
+            log(f"[WARN] 보정 실패 종목: {unresolved}")
+    if daily_df is None or daily_df.empty:
+        log("[FIX] 수집된 보정 데이터 없음")
+        return raw_df
+    daily_df = daily_df[~_invalid_ohlcv_mask(daily_df)]
+
+    keys = raw_changes.diff_keys(raw_df, daily_df)
+    if keys.empty:
+        log("[FIX] RAW 와 값이 같음 → 변경 없음")
+        return raw_df
+    # Name/Market 등 수집 소스에 없는 값은 기존 RAW 유지
+    fix = daily_df[daily_df["Code"].isin(keys["Code"])].copy()
+    prev = raw_df[(raw_df["Date"] == date) & raw_df["Code"].isin(fix["Code"])].set_index("Code")
+    for col in ("Name", "Market"):
+        if col in prev.columns and col in fix.columns:
+            old = fix["Code"].map(prev[col])
+            fix[col] = fix[col].where(fix[col].notna() & (fix[col] != ""), old)
+    raw_df = merge_daily_into_raw(raw_df, fix[[c for c in raw_df.columns if c in fix.columns]])
+
+    latest_path = find_latest_file(STOCKS_DIR, "all_stocks_cumulative") or RAW_MAIN
+    tmp = str(latest_path) + ".tmp"
+    raw_df.to_parquet(tmp, index=False)
+    os.replace(tmp, latest_path)
+    raw_changes.record_changes(keys, "raw_patch_fix", raw_changes.changelog_path(LOG_DIR))
+    log(f"[FIX] {len(keys)}개 키 반영 → {os.path.basename(str(latest_path))} 덮어씀 (변경 기록: {raw_changes.CHANGELOG})")
+    return raw_df
+
+
 # =====================================================================================
 # ⭐ 메인 실행부
 # =====================================================================================
 if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--fix", default=None, help="늦은 보정 날짜 (YYYYMMDD, 이미 RAW 에 있는 날짜)")
+    ap.add_argument("--codes", default="", help="--fix 대상 종목 (쉼표 구분)")
+    args = ap.parse_args()
     print_header()
 
     now_dt = dt.datetime.now()
     today = now_dt.date()
-    raw_df = load_raw_main()
+    prof = RunProfiler("raw_patch")
+    with prof.stage("load_raw") as st:
+        raw_df = load_raw_main()
+        st["rows"] = len(raw_df)
+
+    if args.fix:
+        with prof.stage("fix") as st:
+            patch_codes(raw_df, parse_date(args.fix), [c for c in args.codes.split(",") if c.strip()])
+        prof.write({"status": "fix", "dates": [args.fix]})
+        log("[DONE] RAW 보정 끝. (변경 종목 재계산: python UTIL/incremental_update.py run)")
+        sys.exit(0)
 
     last_date = raw_df["Date"].max()
     log(f"[STEP 1] RAW 최신 날짜: {last_date}")
@@ -470,6 +537,7 @@ if __name__ == "__main__":
 
     # ----------------------- 메인 처리 루프 -----------------------
     # 원본 daily 처리 블록을 그대로 유지하면서 for-loop 적용
+    changed_keys = []
     for date in dates_to_update:
         log(f"[LOOP] {date} 업데이트 시작")
 
@@ -477,7 +545,9 @@ if __name__ == "__main__":
         # ⭐⭐ 1순위: pykrx
         # ===========================
         try:
-            daily_df, bad_codes = build_daily_from_pykrx(date)
+            with prof.stage("pykrx") as st:
+                daily_df, bad_codes = build_daily_from_pykrx(date)
+                st["rows"] = len(daily_df)
             log("[OK] KRX(pykrx) 데이터 사용")
         except Exception as e:
             log(f"[WARN] KRX(pykrx) 실패 → {e}")
@@ -489,7 +559,9 @@ if __name__ == "__main__":
         # ===========================
         if daily_df is None or daily_df.empty:
             try:
-                daily_df, bad_codes = build_daily_from_kiwoom(date)
+                with prof.stage("kiwoom") as st:
+                    daily_df, bad_codes = build_daily_from_kiwoom(date)
+                    st["rows"] = len(daily_df)
                 log("[OK] KIWOOM 데이터 수집 성공. 2순위 소스로 사용.")
             except Exception as e:
                 log(f"[WARN] KIWOOM 실패 → {e}")
@@ -499,7 +571,8 @@ if __name__ == "__main__":
         # ⭐⭐ 3순위: fallback
         if daily_df is None or daily_df.empty:
             tickers = raw_df["Code"].unique().tolist()
-            daily_df, bad_codes = build_daily_from_fallback_sources(date, tickers)
+            with prof.stage("fallback", rows=len(tickers)):
+                daily_df, bad_codes = build_daily_from_fallback_sources(date, tickers)
             if daily_df is None or daily_df.empty:
                 log("[ERROR] FDR/Yahoo/Naver fallback 실패")
                 continue
@@ -509,7 +582,8 @@ if __name__ == "__main__":
         # 부족분 보조 수집
         if bad_codes:
             try:
-                kiw_df, _ = build_daily_from_kiwoom(date, tickers=bad_codes)
+                with prof.stage("kiwoom_fill", rows=len(bad_codes)):
+                    kiw_df, _ = build_daily_from_kiwoom(date, tickers=bad_codes)
                 if kiw_df is not None and not kiw_df.empty:
                     kiw_sub = kiw_df[kiw_df["Code"].isin(bad_codes)]
                     if not kiw_sub.empty:
@@ -523,15 +597,25 @@ if __name__ == "__main__":
         daily_df.to_parquet(out_path)
         log(f"[SAVE] DAILY 저장 완료: {out_path}")
 
-        # RAW 병합
-        raw_df = merge_daily_into_raw(raw_df, daily_df)
+        # RAW 병합 (바뀐 키는 저장 성공 후 변경 기록)
+        with prof.stage("merge", rows=len(daily_df)):
+            keys = raw_changes.diff_keys(raw_df, daily_df)
+            changed_keys.append(keys[keys["kind"] == "fix"])   # 새 날짜(new)는 전체 파이프라인 몫
+            raw_df = merge_daily_into_raw(raw_df, daily_df)
 
         # (변경) RAW 최신본 저장은 루프 종료 후 1회 수행
 
     # 루프 종료 후 RAW 최신본을 1회 저장 (누적 병합 결과)
-    saved_path = save_dataframe_with_date(raw_df, STOCKS_DIR, "all_stocks_cumulative", date_col="Date")
+    with prof.stage("save", rows=len(raw_df)):
+        saved_path = save_dataframe_with_date(raw_df, STOCKS_DIR, "all_stocks_cumulative", date_col="Date")
+    prof.write({"status": "done" if saved_path else "skip", "dates": [str(d) for d in dates_to_update],
+                "output": os.path.basename(saved_path) if saved_path else None})
     if saved_path:
         log(f"[SAVE] RAW 최신본 저장: {os.path.basename(saved_path)}")
+        if changed_keys:
+            # 기존 행 값이 바뀐 키만 기록 (없으면 record_changes 가 기록 생략)
+            raw_changes.record_changes(pd.concat(changed_keys, ignore_index=True), "raw_patch",
+                                       raw_changes.changelog_path(LOG_DIR))
     else:
         log("[SKIP] RAW 최신본 저장 건너뜀 (동일 날짜 파일 존재)")
 
@@ -0,0 +1,313 @@
+# ============================================================
+# ai_commentary.py
+#  - 일일 리포트의 AI 해석(Gemini) 단계를 비동기로 분리
+#    (기존: list_models() + generate_content() 를 동기 호출 → CSV/TXT/XLSX 저장이 네트워크 왕복을 기다림)
+#  - start_commentary(df, provider) → 백그라운드 스레드에서 생성, 호출 측은 즉시 리포트 저장
+#    job.wait(timeout) 으로 상한 시간만 기다리고, 도착하면 add_done_callback 으로 리포트 AI 섹션을 채움
+#  - 캐시 (LOG/AI_CACHE)
+#      gemini_models.json    : 모델 목록 (MODEL_LIST_TTL 동안 list_models() 재호출 없음)
+#      responses/{key}.json  : 응답 (key = sha1(공급자 | 프롬프트 버전 | Top-K 표 문자열))
+#                              같은 Top-K 표로 다시 실행하면 네트워크 없이 즉시 반환
+#  - 공급자
+#      gemini : google.generativeai (미설치/키 없음 → 안내 문구만 반환)
+#      stub   : 오프라인 테스트/벤치용 (지연 시간 / 실패 재현 가능, 표 상위 3종목으로 고정 형식 응답)
+#
+#  사용 예)
+#    python ai_commentary.py bench --delay 3 --timeout 1
+# ============================================================
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+
+import pandas as pd
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+modelengine_dir = os.path.dirname(current_dir)
+root_dir = os.path.dirname(modelengine_dir)
+sys.path.extend([root_dir, modelengine_dir])
+
+try:
+    from MODELENGINE.UTIL.config_paths import get_path
+except ImportError:
+    from config_paths import get_path
+
+try:
+    import google.generativeai as genai  # Gemini API
+except ImportError:
+    genai = None
+
+CACHE_DIR = get_path("LOG", "AI_CACHE")
+PROMPT_VERSION = "v1"
+MODEL_LIST_TTL = 24 * 3600
+DEFAULT_MODEL = "models/gemini-1.5-flash"
+DEFAULT_TIMEOUT = 30.0
+PROVIDERS = ("gemini", "stub", "off")
+
+PENDING_TEXT = "(AI 분석 대기 중 — 응답이 도착하면 이 섹션이 자동으로 채워집니다)"
+TIMEOUT_TEXT = "(AI 분석 시간 초과 — {sec:.0f}초 내 응답 없음)"
+
+PROMPT_TEMPLATE = """
+아래는 오늘의 HOJ Top10 종목 리스트입니다.
+이 종목들을 기반으로 상승 가능성이 높은 종목을 3개 추천해 주세요.
+
+[Top10 종목 데이터]
+{table}
+
+[요구사항]
+- 추천 사유 1~2줄 포함
+- 상승 가능성이 높은 순서대로 3개만 제시
+
+[형식]
+=== Gemini's Pick ===
+1. 종목명: 사유
+2. 종목명: 사유
+3. 종목명: 사유
+"""
+
+
+def build_prompt(df: pd.DataFrame) -> str:
+    return PROMPT_TEMPLATE.format(table=df.to_string(index=False))
+
+
+def table_key(df: pd.DataFrame, provider_name: str) -> str:
+    s = f"{provider_name}|{PROMPT_VERSION}|{df.to_string(index=False)}"
+    return hashlib.sha1(s.encode("utf-8")).hexdigest()[:20]
+
+
+# ------------------------------------------------------------
+# 1) 응답 캐시
+# ------------------------------------------------------------
+def _response_path(key: str, cache_dir: str = None) -> str:
+    return os.path.join(cache_dir or CACHE_DIR, "responses", f"{key}.json")
+
+def cached_response(key: str, cache_dir: str = None):
+    try:
+        with open(_response_path(key, cache_dir), "r", encoding="utf-8") as f:
+            return json.load(f).get("text")
+    except (OSError, ValueError):
+        return None
+
+def save_response(key: str, text: str, provider_name: str, cache_dir: str = None):
+    path = _response_path(key, cache_dir)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"provider": provider_name, "saved_at": time.strftime("%Y-%m-%d %H:%M:%S"), "text": text},
+                      f, ensure_ascii=False, indent=1)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"[AI] 응답 캐시 저장 실패: {e}")
+
+# ------------------------------------------------------------
+# 2) 공급자
+# ------------------------------------------------------------
+class StubProvider:
+    """오프라인 공급자. delay 초 후 표 상위 3종목으로 고정 형식 응답 (fail=True 면 예외)."""
+    name = "stub"
+
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.delay, self.fail = float(delay), bool(fail)
+
+    def generate(self, prompt: str, df: pd.DataFrame) -> str:
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("stub 공급자 실패 (재현용)")
+        name_col = "종목명" if "종목명" in df.columns else df.columns[0]
+        lines = ["=== Gemini's Pick ==="]
+        for i, name in enumerate(df[name_col].astype(str).head(3), 1):
+            lines.append(f"{i}. {name}: (stub) 모델 점수 상위 종목")
+        return "\n".join(lines)
+
+
+class GeminiProvider:
+    """Gemini 공급자. 모델 목록은 cache_dir/gemini_models.json 에 TTL 동안 보관."""
+    name = "gemini"
+
+    def __init__(self, api_key: str, cache_dir: str = None, ttl: float = MODEL_LIST_TTL,
+                 request_timeout: float = None):
+        self.api_key = api_key
+        self.cache_dir = cache_dir or CACHE_DIR
+        self.ttl = ttl
+        self.request_timeout = request_timeout
+
+    def _list_models(self) -> list:
+        path = os.path.join(self.cache_dir, "gemini_models.json")
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            if time.time() - float(cached["fetched_at"]) < self.ttl:
+                return cached["models"]
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        models = [{"name": m.name, "methods": list(m.supported_generation_methods)}
+                  for m in genai.list_models()]
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"fetched_at": time.time(), "models": models}, f, ensure_ascii=False, indent=1)
+        except OSError:
+            pass
+        return models
+
+    def model_name(self) -> str:
+        models = [m for m in self._list_models() if "generateContent" in m["methods"]]
+        # 1순위: Flash (빠름) → 2순위: Pro → 기본값
+        for tag in ("flash", "pro"):
+            for m in models:
+                if tag in m["name"]:
+                    return m["name"]
+        return DEFAULT_MODEL
+
+    def generate(self, prompt: str, df: pd.DataFrame) -> str:
+        genai.configure(api_key=self.api_key)
+        name = self.model_name()
+        print(f"[AI] Gemini 모델 '{name}' 분석 요청 (백그라운드)")
+        kw = {"request_options": {"timeout": self.request_timeout}} if self.request_timeout else {}
+        return genai.GenerativeModel(name).generate_content(prompt, **kw).text
+
+
+def make_provider(name: str = "gemini", api_key: str = None, delay: float = 0.0,
+                  request_timeout: float = None):
+    """
+    name: gemini | stub | off. gemini 를 쓸 수 없으면 (미설치 / 키 없음) (None, 안내 문구).
+    반환: (provider or None, 생략 사유 or None)
+    """
+    if name == "off":
+        return None, "[AI] 분석 생략 (--ai_provider off)"
+    if name == "stub":
+        return StubProvider(delay=delay), None
+    if name != "gemini":
+        raise ValueError(f"ai provider 는 {PROVIDERS} 중 하나")
+    if genai is None:
+        return None, "[Gemini] google-generativeai 미설치로 분석을 생략합니다."
+    if not api_key:
+        return None, "[Gemini] API Key가 없어 분석을 생략합니다."
+    return GeminiProvider(api_key, request_timeout=request_timeout), None
+
+
+# ------------------------------------------------------------
+# 3) 비동기 작업
+# ------------------------------------------------------------
+class CommentaryJob:
+    """
+    status: cached (캐시 적중, 즉시 완료) | pending | done | error | skipped
+    text  : 완료 시 응답 (error 면 오류 문구, 미완료면 None)
+    """
+
+    def __init__(self, df: pd.DataFrame, provider, cache_dir: str = None, skip_reason: str = None):
+        self.df = df.copy()
+        self.provider = provider
+        self.cache_dir = cache_dir
+        self.key = table_key(self.df, provider.name) if provider is not None else None
+        self.status, self.text = "pending", None
+        self.started = time.perf_counter()
+        self.elapsed = None
+        self._event = threading.Event()
+        self._finished = False
+        self._lock = threading.Lock()
+        self._callbacks = []
+        self._thread = None
+
+        if provider is None:
+            self._finish("skipped", skip_reason or "[AI] 분석 생략")
+            return
+        hit = cached_response(self.key, cache_dir)
+        if hit is not None:
+            self._finish("cached", hit)
+            return
+        self._thread = threading.Thread(target=self._run, name="ai-commentary", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            text = self.provider.generate(build_prompt(self.df), self.df)
+            save_response(self.key, text, self.provider.name, self.cache_dir)
+            self._finish("done", text)
+        except Exception as e:
+            self._finish("error", f"⚠ {self.provider.name} 분석 중 오류 발생: {e}")
+
+    def _finish(self, status: str, text: str):
+        with self._lock:
+            self.status, self.text = status, text
+            self.elapsed = time.perf_counter() - self.started
+            self._finished = True
+            callbacks = list(self._callbacks)
+        # 콜백(리포트 AI 섹션 저장)이 끝난 뒤에 완료 신호 → wait() 반환 직후 종료해도 파일이 완성된 상태
+        for fn in callbacks:
+            try:
+                fn(self)
+            except Exception as e:
+                print(f"[AI] 완료 콜백 오류: {e}")
+        self._event.set()
+
+    def done(self) -> bool:
+        return self._event.is_set()
+
+    def wait(self, timeout: float = None) -> bool:
+        """완료 시 True. timeout 초가 지나면 False (작업은 계속 진행, 완료 시 캐시 저장 + 콜백)."""
+        return self._event.wait(timeout)
+
+    def add_done_callback(self, fn):
+        """fn(job). 이미 완료됐으면 즉시 호출."""
+        with self._lock:
+            if not self._finished:
+                self._callbacks.append(fn)
+                return
+        fn(self)
+
+    def __repr__(self):
+        el = f"{self.elapsed:.2f}s" if self.elapsed is not None else "-"
+        return f"CommentaryJob(provider={getattr(self.provider, 'name', None)}, status={self.status}, elapsed={el})"
+
+
+def start_commentary(df: pd.DataFrame, provider, cache_dir: str = None,
+                     skip_reason: str = None) -> CommentaryJob:
+    return CommentaryJob(df, provider, cache_dir, skip_reason)
+
+
+def commentary_text(job: CommentaryJob, timeout: float = DEFAULT_TIMEOUT) -> str:
+    """동기 호환용: 최대 timeout 초 기다린 결과 (미도착 시 시간 초과 안내)."""
+    if job.wait(timeout):
+        return job.text
+    return TIMEOUT_TEXT.format(sec=timeout)
+
+
+# ------------------------------------------------------------
+# 4) 벤치 (stub, 오프라인)
+# ------------------------------------------------------------
+def bench(delay: float, timeout: float, cache_dir: str):
+    df = pd.DataFrame({"종목명": [f"종목{i}" for i in range(10)],
+                       "종목코드": [f"{i:06d}" for i in range(10)],
+                       "동시적용 기대수익(%)": [round(3.0 - i * 0.2, 2) for i in range(10)]})
+    df["run"] = time.time()   # 매 실행 새 표 → 콜드 캐시
+    provider = StubProvider(delay=delay)
+
+    t0 = time.perf_counter()
+    job = start_commentary(df, provider, cache_dir)
+    t_start = time.perf_counter() - t0
+    arrived = job.wait(timeout)
+    t_wait = time.perf_counter() - t0
+    print(f"[AI] 콜드: 시작 반환 {t_start * 1000:.1f}ms (리포트 저장 가능 시점) | "
+          f"{'도착' if arrived else '시간 초과'} {t_wait:.2f}s | {job}")
+    job.wait()
+    t0 = time.perf_counter()
+    warm = start_commentary(df, provider, cache_dir)
+    print(f"[AI] 캐시: {(time.perf_counter() - t0) * 1000:.1f}ms | {warm}")
+    print(f"[AI] 동기 방식이었다면 리포트 저장까지 {delay:.2f}s 대기")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("bench", help="stub 공급자로 비동기/캐시 지연시간 측정")
+    b.add_argument("--delay", type=float, default=3.0)
+    b.add_argument("--timeout", type=float, default=1.0)
+    b.add_argument("--cache_dir", default=None)
+    args = ap.parse_args()
+    bench(args.delay, args.timeout, args.cache_dir)
@@ -0,0 +1,496 @@
+# ============================================================
+# backtester.py
+#  - 예측 점수 기반 포트폴리오 백테스트 (벡터 연산)
+#    (기존: pipeline/run_pipeline_v6.py::backtest_model_v6 의 혼동 행렬 출력뿐)
+#  - 입력
+#      점수 : 예측 큐브(prediction_cube.load_cube) 또는 엔진 직접 예측 (source="auto" → 큐브 우선)
+#      가격 : HOJ DB 의 Date / Code / Close → 날짜 × 종목 종가 행렬 (거래정지/상장폐지 구간은 직전 종가 유지)
+#      벤치 : DB 의 KOSPI_종가 (없으면 KOSPI_수익률 누적)
+#  - 규칙
+#      매일 종가에 점수 상위 K 종목 진입 → h 거래일 후 종가 청산 (학습 타겟 Close(t+h)/Close(t) - 1 과 같은 기준)
+#      자금은 h 개 슬리브로 나눠 슬리브 s 가 s, s+h, s+2h ... 일에 교체 (겹치는 보유 = 매일 1/h 씩 회전)
+#      가중: equal (균등) / score (점수 양수 부분 비례)
+#      비용: 매수 = fee + slippage, 매도 = fee + tax + slippage (교체 시 전량 매도 후 매수로 가정)
+#      손절/익절(선택): 보유 중 종가 수익률이 -SL 이하 / TP 이상이면 그날 종가 청산 → 코호트 종료일까지 현금
+#  - 계산: Market(행렬) → pick_top(상위 K) → position_ratios(보유 배수) → simulate 단계로 나뉨
+#          (날짜 × K) 선택 인덱스로 코호트별 h 일 평가배수 M[t, j] 를 한 번에 구하고
+#          슬리브 자산은 (회차 × h) 누적곱 → 일별 평가액 = 슬리브 평균 (종목/날짜 루프 없음)
+#          strategy_sweep 은 같은 행렬/선택/배수를 여러 파라미터 조합에 재사용
+#  - 결과: 일별 자산 곡선 / 코호트(진입일별) 수익 / 체결 목록 / 연도별 수익 / 요약 지표 (P2 '백테스트' 탭)
+#
+#  사용 예)
+#    python backtester.py run --engine F:\...\HOJ_ENGINE_REAL_V31_h5_w60_n1000_251126.hoj --k 10 --start 2016-01-01
+#    python backtester.py bench --years 10 --codes 2500
+# ============================================================
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+modelengine_dir = os.path.dirname(current_dir)
+root_dir = os.path.dirname(modelengine_dir)
+sys.path.extend([root_dir, modelengine_dir])
+
+try:
+    from MODELENGINE.UTIL import train_engine_unified as T
+    from MODELENGINE.UTIL import engine_bundle, prediction_cube, ensemble_scorer
+    from MODELENGINE.UTIL.prediction_service import score_frame, BASE_COLS
+except ImportError:
+    import train_engine_unified as T
+    import engine_bundle
+    import prediction_cube
+    import ensemble_scorer
+    from prediction_service import score_frame, BASE_COLS
+
+TRADING_DAYS = 252
+FEE = 0.00015          # 매수/매도 각각 위탁 수수료
+TAX = 0.0018           # 매도 거래세
+SLIPPAGE = 0.0005      # 매수/매도 각각
+WEIGHTINGS = ("equal", "score")
+METRICS = ("combo", "score", "prob")
+SOURCES = ("auto", "cube", "engine")
+BENCH_COLS = ("KOSPI_종가", "KOSPI_수익률")
+
+
+# ------------------------------------------------------------
+# 1) 입력: 점수 / 가격
+# ------------------------------------------------------------
+def _read_range(db_path: str, cols: list, start=None, end=None) -> pd.DataFrame:
+    filters = []
+    if start is not None:
+        filters.append(("Date", ">=", pd.Timestamp(start)))
+    if end is not None:
+        filters.append(("Date", "<=", pd.Timestamp(end)))
+    try:
+        df = pd.read_parquet(db_path, columns=cols, filters=filters or None)
+    except Exception:
+        df = pd.read_parquet(db_path, columns=cols)
+    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+    if start is not None:
+        df = df[df["Date"] >= pd.Timestamp(start)]
+    if end is not None:
+        df = df[df["Date"] <= pd.Timestamp(end)]
+    df["Code"] = df["Code"].astype(str).str.zfill(6)
+    return df.dropna(subset=["Date"])
+
+def load_prices(db_path: str = None, start=None, end=None) -> pd.DataFrame:
+    """Date / Code / Close (+ KOSPI 컬럼) 만 읽음."""
+    db_path = db_path or T.find_latest_db_path()
+    have = set(T.schema_frame(db_path).columns)
+    cols = ["Date", "Code", "Close"] + [c for c in BENCH_COLS if c in have]
+    return _read_range(db_path, cols, start, end)
+
+def _cube_fresh(engine_path: str, root: str = None) -> bool:
+    man = prediction_cube.read_manifest(prediction_cube.cube_dir(engine_path, root))
+    return man is not None and os.path.exists(engine_path) and man.get("engine_fp") == T.db_fingerprint(engine_path)
+
+def load_scores(engine_path: str, start=None, end=None, metric="combo", source: str = "auto",
+                db_path: str = None, cube_root: str = None) -> pd.DataFrame:
+    """
+    Date / Code / {metric} (metric 은 1개 또는 목록). source=auto: 최신 큐브가 있으면 큐브, 없으면 엔진으로 기간 전체 예측.
+    SLE 엔진은 SLE 스냅샷을 붙여야 하므로 ensemble_scorer 로 예측 (큐브 미사용).
+    """
+    metrics = [metric] if isinstance(metric, str) else list(metric)
+    if any(m not in METRICS for m in metrics):
+        raise ValueError(f"metric 은 {METRICS} 중 하나")
+    if source not in SOURCES:
+        raise ValueError(f"source 는 {SOURCES} 중 하나")
+    if source in ("auto", "cube") and _cube_fresh(engine_path, cube_root):
+        df = prediction_cube.load_cube(engine_path, start, end, columns=metrics, root=cube_root)
+        print(f"[BT] 점수: 예측 큐브 ({len(df):,}행)")
+        return df[["Date", "Code"] + metrics]
+    if source == "cube":
+        raise FileNotFoundError(f"최신 예측 큐브가 없습니다: {os.path.basename(engine_path)}")
+    db_path = db_path or T.find_latest_db_path()
+    meta = (engine_bundle.read_header(engine_path) or {}).get("meta") or {}
+    if meta.get("family") == "SLE" or os.path.basename(engine_path).upper().startswith("SLE_ENGINE"):
+        days = sorted(_read_range(db_path, ["Date", "Code"], start, end)["Date"].unique())
+        df = ensemble_scorer.EnsembleScorer([engine_path]).score(days, db_path)
+        print(f"[BT] 점수: SLE 엔진 예측 ({len(df):,}행)")
+        return df[["Date", "Code"] + metrics]
+    payload = engine_bundle.load_engine(engine_path)
+    have = set(T.schema_frame(db_path).columns)
+    cols = [c for c in dict.fromkeys(BASE_COLS + list(payload.get("features") or [])) if c in have]
+    df = score_frame(payload, _read_range(db_path, cols, start, end))
+    print(f"[BT] 점수: 엔진 직접 예측 ({len(df):,}행)")
+    return df[["Date", "Code"] + metrics]
+
+
+def _grid(df: pd.DataFrame, col: str, d_idx: np.ndarray, c_idx: np.ndarray, shape) -> np.ndarray:
+    out = np.full(shape, np.nan)
+    out[d_idx, c_idx] = df[col].to_numpy(dtype=np.float64)
+    return out
+
+def benchmark_series(prices: pd.DataFrame) -> pd.Series:
+    """날짜별 KOSPI 지수 수준 (KOSPI_종가, 없으면 KOSPI_수익률 누적). 둘 다 없으면 None."""
+    for col in BENCH_COLS:
+        if col in prices.columns:
+            s = prices.groupby("Date", sort=True)[col].first()
+            if col == "KOSPI_수익률":
+                s = (1.0 + s.fillna(0.0)).cumprod()
+            s = s.ffill()
+            if s.notna().any():
+                return s
+    return None
+
+
+# ------------------------------------------------------------
+# 2) 결과
+# ------------------------------------------------------------
+class BacktestResult:
+    """
+    equity  : Date / strategy / benchmark (시작 1.0) / invested (투자 슬리브 비율)
+    cohorts : 진입일별 Date / n_picks / gross / net / complete (h일 경과 여부)
+    trades  : 완료 코호트의 Date / Code / weight / ret (청산 종가 수익률, 비용 전) / exit_day (detail=False 면 None)
+    yearly  : 연도 / 전략 / KOSPI / 초과 (수익률)
+    metrics : 요약 지표 dict
+    """
+
+    def __init__(self, equity, cohorts, trades, params: dict):
+        self.equity = equity
+        self.cohorts = cohorts
+        self.trades = trades
+        self.params = params
+        self.yearly = _yearly(equity)
+        self.metrics = _metrics(equity, cohorts)
+
+    def __repr__(self):
+        m = self.metrics
+        return (f"BacktestResult({m['start']}~{m['end']}, total={m['total_return']:.2%}, "
+                f"cagr={m['cagr']:.2%}, mdd={m['mdd']:.2%})")
+
+    def summary(self) -> str:
+        m, p = self.metrics, self.params
+        lines = [
+            f"기간: {m['start']} ~ {m['end']} ({m['days']:,} 거래일)",
+            f"규칙: Top {p['k']} / 보유 {p['hold']}일 / 가중 {p['weighting']} / 기준 {p['metric']}",
+            f"비용: 수수료 {p['fee']:.3%} × 2 + 거래세 {p['tax']:.3%} + 슬리피지 {p['slippage']:.3%} × 2",
+            f"청산: 손절 {p.get('stop_loss') or '-'} / 익절 {p.get('take_profit') or '-'}",
+            "-" * 50,
+            f"총수익률   {m['total_return']:>9.2%}   | KOSPI {m['bench_total']:>9.2%}" if m["bench_total"] is not None
+            else f"총수익률   {m['total_return']:>9.2%}",
+            f"CAGR       {m['cagr']:>9.2%}   | KOSPI {m['bench_cagr']:>9.2%}" if m["bench_cagr"] is not None
+            else f"CAGR       {m['cagr']:>9.2%}",
+            f"MDD        {m['mdd']:>9.2%}   | KOSPI {m['bench_mdd']:>9.2%}" if m["bench_mdd"] is not None
+            else f"MDD        {m['mdd']:>9.2%}",
+            f"변동성(연) {m['vol']:>9.2%}   | Sharpe {m['sharpe']:.2f}",
+            f"코호트     {m['n_cohorts']:,}회 | 승률 {m['hit_rate']:.1%} | 평균 순수익 {m['avg_net']:.3%}",
+        ]
+        if m["excess_cagr"] is not None:
+            lines.append(f"초과 CAGR  {m['excess_cagr']:>9.2%}")
+        return "\n".join(lines)
+
+
+def _mdd(x: np.ndarray) -> float:
+    if len(x) == 0:
+        return 0.0
+    return float(np.min(x / np.maximum.accumulate(x) - 1.0))
+
+def _cagr(x: np.ndarray) -> float:
+    if len(x) < 2 or x[0] <= 0:
+        return 0.0
+    return float((x[-1] / x[0]) ** (TRADING_DAYS / (len(x) - 1)) - 1.0)
+
+def _metrics(equity: pd.DataFrame, cohorts: pd.DataFrame) -> dict:
+    x = equity["strategy"].to_numpy()
+    r = np.diff(x) / x[:-1] if len(x) > 1 else np.zeros(0)
+    vol = float(r.std(ddof=0) * np.sqrt(TRADING_DAYS)) if len(r) else 0.0
+    done = cohorts[cohorts["complete"] & (cohorts["n_picks"] > 0)]
+    b = equity["benchmark"].to_numpy() if equity["benchmark"].notna().all() else None
+    m = {
+        "start": str(equity["Date"].iloc[0].date()) if len(equity) else None,
+        "end": str(equity["Date"].iloc[-1].date()) if len(equity) else None,
+        "days": len(equity),
+        "total_return": float(x[-1] / x[0] - 1.0) if len(x) else 0.0,
+        "cagr": _cagr(x),
+        "vol": vol,
+        "sharpe": float(r.mean() * TRADING_DAYS / vol) if vol > 0 else 0.0,
+        "mdd": _mdd(x),
+        "n_cohorts": len(done),
+        "hit_rate": float((done["net"] > 0).mean()) if len(done) else 0.0,
+        "avg_net": float(done["net"].mean()) if len(done) else 0.0,
+        "exposure": float(equity["invested"].mean()) if len(equity) else 0.0,
+        "bench_total": float(b[-1] / b[0] - 1.0) if b is not None and len(b) else None,
+        "bench_cagr": _cagr(b) if b is not None else None,
+        "bench_mdd": _mdd(b) if b is not None else None,
+    }
+    m["excess_cagr"] = m["cagr"] - m["bench_cagr"] if m["bench_cagr"] is not None else None
+    return m
+
+def _yearly(equity: pd.DataFrame) -> pd.DataFrame:
+    if equity.empty:
+        return pd.DataFrame(columns=["year", "strategy", "benchmark", "excess"])
+    e = equity.set_index("Date")[["strategy", "benchmark"]]
+    g = e.groupby(e.index.year)
+    # 연도 수익률 = 연말 / 전년 말 - 1 (첫 해는 시작값 기준)
+    last = g.last()
+    prev = last.shift(1)
+    prev.iloc[0] = e.iloc[0]
+    out = (last / prev - 1.0).reset_index().rename(columns={"Date": "year"})
+    out["excess"] = out["strategy"] - out["benchmark"]
+    return out
+
+
+# ------------------------------------------------------------
+# 3) 시뮬레이션 (행렬 준비 → 상위 K 선택 → 보유 평가, 단계별로 나눠 스윕에서 중간 배열 재사용)
+# ------------------------------------------------------------
+class Market:
+    """
+    날짜 × 종목 행렬 묶음. P_raw = 원 종가 (없는 날 NaN), P = 직전 종가 유지, bench = KOSPI (시작 1.0),
+    scores[이름] = 점수 행렬. 스윕 워커에서는 공유 메모리 배열로 그대로 재구성.
+    """
+
+    def __init__(self, date_index, codes, P_raw, P=None, bench=None, scores=None):
+        self.date_index = pd.DatetimeIndex(date_index)
+        self.codes = np.asarray(codes)
+        self.P_raw = P_raw
+        self.P = P if P is not None else pd.DataFrame(P_raw).ffill().to_numpy()
+        self.bench = bench if bench is not None else np.full(len(self.date_index), np.nan)
+        self.scores = dict(scores or {})
+
+    @classmethod
+    def from_frames(cls, prices: pd.DataFrame):
+        """prices: Date / Code / Close (+ KOSPI 컬럼). 위치는 해시 인덱스(get_indexer)로 계산."""
+        date_index = pd.DatetimeIndex(np.sort(prices["Date"].unique()))
+        code_index = pd.Index(np.sort(prices["Code"].unique()))
+        if len(date_index) == 0:
+            raise ValueError("가격 데이터가 없습니다.")
+        P_raw = _grid(prices, "Close", date_index.get_indexer(prices["Date"]),
+                      code_index.get_indexer(prices["Code"]), (len(date_index), len(code_index)))
+        P_raw[P_raw <= 0] = np.nan
+        bench = benchmark_series(prices)
+        if bench is not None:
+            bench = bench.reindex(date_index).ffill().bfill().to_numpy()
+            bench = bench / bench[0]
+        return cls(date_index, code_index.to_numpy(), P_raw, bench=bench)
+
+    @property
+    def shape(self):
+        return self.P_raw.shape
+
+    def add_scores(self, name: str, scores: pd.DataFrame, col: str) -> np.ndarray:
+        """scores: Date / Code / col → 날짜 × 종목 행렬 (가격 축 밖 행은 버림)."""
+        sd = self.date_index.get_indexer(scores["Date"])
+        sc = pd.Index(self.codes).get_indexer(scores["Code"])
+        keep = (sd >= 0) & (sc >= 0)
+        self.scores[name] = _grid(scores[keep], col, sd[keep], sc[keep], self.shape)
+        return self.scores[name]
+
+
+def pick_top(market: Market, S: np.ndarray, k: int, min_score: float = None):
+    """
+    날짜별 점수 상위 k 종목 (내림차순). 반환: sel (D×k 종목 위치), s_sel (점수), valid (선택 유효).
+    상위 k 의 앞 k' 열이 곧 상위 k' 이므로 스윕은 최대 k 로 1회 선택 후 열만 잘라 씀.
+    """
+    ok = ~np.isnan(S) & ~np.isnan(market.P_raw)
+    if min_score is not None:
+        ok &= S >= min_score
+    S_e = np.where(ok, S, -np.inf)
+    K = min(int(k), S.shape[1])
+    sel = np.argpartition(-S_e, K - 1, axis=1)[:, :K]
+    s_sel = np.take_along_axis(S_e, sel, axis=1)
+    order = np.argsort(-s_sel, axis=1, kind="stable")
+    sel, s_sel = np.take_along_axis(sel, order, axis=1), np.take_along_axis(s_sel, order, axis=1)
+    return sel, s_sel, np.isfinite(s_sel)
+
+def position_ratios(market: Market, sel: np.ndarray, max_hold: int) -> np.ndarray:
+    """R[j, t, k] = P[t+j, sel] / P[t, sel] (j = 0..max_hold, t+j 가 범위 밖이면 NaN)."""
+    D = market.shape[0]
+    rows = np.arange(D)
+    entry = market.P[rows[:, None], sel]
+    R = np.empty((max_hold + 1,) + sel.shape)
+    for j in range(max_hold + 1):
+        R[j] = market.P[np.minimum(rows + j, D - 1)[:, None], sel] / entry
+        R[j, rows + j >= D] = np.nan
+    return R
+
+def simulate(market: Market, sel, s_sel, valid, hold: int = 5, weighting: str = "equal",
+             fee: float = FEE, tax: float = TAX, slippage: float = SLIPPAGE,
+             stop_loss: float = None, take_profit: float = None, ratios: np.ndarray = None,
+             detail: bool = True, params: dict = None) -> BacktestResult:
+    """
+    선택 결과 → 슬리브 회전 시뮬레이션.
+    stop_loss / take_profit (양수 비율, 예: 0.05): 보유 1..h-1 일 종가 수익률이 -SL 이하 / TP 이상이면
+    그날 종가 청산 (매도 비용 차감) 후 코호트 종료일까지 현금. ratios 는 position_ratios 결과 (hold 이상, 열 = sel).
+    detail=False 면 체결 목록 생략 (스윕용).
+    """
+    if weighting not in WEIGHTINGS:
+        raise ValueError(f"weighting 은 {WEIGHTINGS} 중 하나")
+    h = int(hold)
+    if h < 1 or sel.shape[1] < 1:
+        raise ValueError("k, hold 는 1 이상")
+    D = market.shape[0]
+    rows = np.arange(D)
+    n_picks = valid.sum(axis=1)
+    invested = n_picks > 0
+
+    w = valid.astype(np.float64)
+    if weighting == "score":
+        sw = np.where(valid, np.clip(s_sel, 0.0, None), 0.0)
+        pos = sw.sum(axis=1) > 0
+        w[pos] = sw[pos]
+    tot = w.sum(axis=1, keepdims=True)
+    w = np.divide(w, tot, out=np.zeros_like(w), where=tot > 0)
+
+    # (a) 종목별 보유 배수 V[j] (j = 0..h). 손절/익절 청산 종목은 청산일 배수 × (1 - 매도비용) 로 고정
+    R = ratios[:h + 1, :, :sel.shape[1]] if ratios is not None else position_ratios(market, sel, h)
+    cost_buy, cost_sell = fee + slippage, fee + tax + slippage
+    V = R.copy()
+    exit_day = np.full(sel.shape, h)
+    if (stop_loss or take_profit) and h > 1:
+        r = R[1:h] - 1.0
+        hit = np.zeros(r.shape, dtype=bool)
+        if stop_loss:
+            hit |= r <= -abs(stop_loss)
+        if take_profit:
+            hit |= r >= abs(take_profit)
+        any_hit = hit.any(axis=0)
+        first = np.argmax(hit, axis=0) + 1
+        exit_day = np.where(any_hit, first, h)
+        r_exit = np.take_along_axis(R, exit_day[None], axis=0)[0]
+        after = np.arange(h + 1)[:, None, None] >= exit_day[None]
+        V = np.where(after & any_hit[None], (r_exit * (1.0 - cost_sell))[None], V)
+        V[h] = np.where(any_hit, r_exit * (1.0 - cost_sell), R[h] * (1.0 - cost_sell))
+        gross_ratio = r_exit
+    else:
+        V[h] = R[h] * (1.0 - cost_sell)
+        gross_ratio = R[h]
+
+    # (b) 코호트 평가배수 M[t, j] = Σ w · V[j]  (현금 코호트 = 1, t+j 범위 밖 = NaN)
+    M = np.where(valid[None], w[None] * V, 0.0).sum(axis=2).T
+    M = np.where(invested[:, None], M, 1.0)
+    M[rows[:, None] + np.arange(h + 1)[None, :] >= D] = np.nan
+    complete = rows + h < D
+    net = np.where(complete, np.where(invested, (1.0 - cost_buy) * M[:, h], 1.0), np.nan)
+
+    # (c) 슬리브 자산: 슬리브 s 는 s, s+h, ... 일에 교체 → (회차 × h) 누적곱
+    L = -(-D // h) * h
+    Rs = np.ones(L)
+    Rs[:D] = np.where(complete, net, 1.0)
+    Rs = Rs.reshape(-1, h)
+    before = np.vstack([np.ones((1, h)), np.cumprod(Rs, axis=0)[:-1]]).ravel()[:D]
+
+    # (d) 일별 평가액: 날짜 u, 슬리브 s 의 현재 코호트 t = u - ((u - s) mod h), 경과 j = u - t (< h)
+    U = rows[:, None]
+    t0 = U - ((U - np.arange(h)[None, :]) % h)
+    started = t0 >= 0
+    tc = np.clip(t0, 0, None)
+    mark = np.where(invested[tc], (1.0 - cost_buy) * M[tc, U - tc], 1.0)
+    val = np.where(started, before[tc] * mark, 1.0)
+
+    equity = pd.DataFrame({"Date": market.date_index, "strategy": val.mean(axis=1), "benchmark": market.bench,
+                           "invested": np.where(started, invested[tc], False).mean(axis=1)})
+    gsum = np.where(valid, w * gross_ratio, 0.0).sum(axis=1)
+    gross = np.where(complete, np.where(invested, gsum - 1.0, 0.0), np.nan)
+    cohorts = pd.DataFrame({"Date": market.date_index, "n_picks": n_picks, "gross": gross,
+                            "net": net - 1.0, "complete": complete})
+    trades = None
+    if detail:
+        tr = valid & complete[:, None]
+        trades = pd.DataFrame({"Date": np.broadcast_to(market.date_index.to_numpy()[:, None], sel.shape)[tr],
+                               "Code": market.codes[sel[tr]], "weight": w[tr],
+                               "ret": (gross_ratio - 1.0)[tr], "exit_day": exit_day[tr]})
+
+    out = {"k": sel.shape[1], "hold": h, "weighting": weighting, "fee": fee, "tax": tax,
+           "slippage": slippage, "stop_loss": stop_loss, "take_profit": take_profit}
+    out.update(params or {})
+    return BacktestResult(equity, cohorts, trades, out)
+
+
+def run_backtest(scores: pd.DataFrame, prices: pd.DataFrame, k: int = 10, hold: int = 5,
+                 weighting: str = "equal", metric: str = "combo", fee: float = FEE, tax: float = TAX,
+                 slippage: float = SLIPPAGE, min_score: float = None, stop_loss: float = None,
+                 take_profit: float = None) -> BacktestResult:
+    """
+    scores: Date / Code / {metric}, prices: Date / Code / Close (+ KOSPI 컬럼).
+    날짜 축 = 가격의 거래일, 점수가 없는 날은 해당 슬리브 현금 보유.
+    """
+    if hold < 1 or k < 1:
+        raise ValueError("k, hold 는 1 이상")
+    market = Market.from_frames(prices)
+    S = market.add_scores(metric, scores, metric)
+    sel, s_sel, valid = pick_top(market, S, k, min_score)
+    return simulate(market, sel, s_sel, valid, hold, weighting, fee, tax, slippage, stop_loss, take_profit,
+                    params={"metric": metric, "min_score": min_score})
+
+
+def backtest_engine(engine_path: str, start=None, end=None, k: int = 10, hold: int = None,
+                    weighting: str = "equal", metric: str = "combo", source: str = "auto",
+                    db_path: str = None, cube_root: str = None, **costs) -> BacktestResult:
+    """엔진 1개 백테스트. hold 미지정 시 엔진 meta horizon (없으면 5). costs: fee/tax/slippage/stop_loss/take_profit."""
+    if hold is None:
+        meta = (engine_bundle.read_header(engine_path) or {}).get("meta") or {}
+        hold = int(meta.get("horizon") or 5)
+    t0 = time.perf_counter()
+    scores = load_scores(engine_path, start, end, metric, source, db_path, cube_root)
+    prices = load_prices(db_path, start, end)
+    t1 = time.perf_counter()
+    res = run_backtest(scores, prices, k, hold, weighting, metric, **costs)
+    t2 = time.perf_counter()
+    print(f"[BT] {os.path.basename(engine_path)} | 입력 {t1 - t0:.2f}s | 시뮬레이션 {t2 - t1:.3f}s | {res}")
+    return res
+
+
+# ------------------------------------------------------------
+# 4) 합성 데이터 벤치 (DB 없이 지연시간 확인)
+# ------------------------------------------------------------
+def synthetic(years: int = 10, n_codes: int = 2500, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2015-01-01", periods=years * TRADING_DAYS)
+    D = len(dates)
+    mkt = rng.normal(0.0003, 0.01, D)
+    r = mkt[:, None] + rng.normal(0, 0.02, (D, n_codes))
+    close = 10000 * np.exp(np.cumsum(r, axis=0))
+    codes = np.array([f"{i:06d}" for i in range(n_codes)])
+    d = np.repeat(dates.to_numpy(), n_codes)
+    c = np.tile(codes, D)
+    prices = pd.DataFrame({"Date": d, "Code": c, "Close": close.ravel(),
+                           "KOSPI_수익률": np.repeat(mkt, n_codes)})
+    scores = pd.DataFrame({"Date": d, "Code": c, "combo": rng.normal(size=D * n_codes)})
+    return scores, prices
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("run", help="엔진 백테스트")
+    r.add_argument("--engine", required=True)
+    r.add_argument("--start", default=None)
+    r.add_argument("--end", default=None)
+    r.add_argument("--source", default="auto", choices=list(SOURCES))
+    r.add_argument("--db", default=None)
+    r.add_argument("--stop_loss", type=float, default=None, help="예: 0.05 (-5%% 손절)")
+    r.add_argument("--take_profit", type=float, default=None, help="예: 0.10 (+10%% 익절)")
+    b = sub.add_parser("bench", help="합성 데이터 지연시간")
+    b.add_argument("--years", type=int, default=10)
+    b.add_argument("--codes", type=int, default=2500)
+    for p in (r, b):
+        p.add_argument("--k", type=int, default=10)
+        p.add_argument("--hold", type=int, default=None)
+        p.add_argument("--weighting", default="equal", choices=list(WEIGHTINGS))
+        p.add_argument("--metric", default="combo", choices=list(METRICS))
+        p.add_argument("--fee", type=float, default=FEE)
+        p.add_argument("--tax", type=float, default=TAX)
+        p.add_argument("--slippage", type=float, default=SLIPPAGE)
+    args = ap.parse_args()
+    costs = {"fee": args.fee, "tax": args.tax, "slippage": args.slippage}
+
+    if args.cmd == "run":
+        res = backtest_engine(args.engine, args.start, args.end, args.k, args.hold, args.weighting,
+                              args.metric, args.source, args.db, stop_loss=args.stop_loss,
+                              take_profit=args.take_profit, **costs)
+    else:
+        t0 = time.perf_counter()
+        scores, prices = synthetic(args.years, args.codes)
+        print(f"[BT] 합성 {args.years}년 × {args.codes:,}종목 ({len(prices):,}행) 생성 {time.perf_counter() - t0:.2f}s")
+        t0 = time.perf_counter()
+        res = run_backtest(scores, prices, args.k, args.hold or 5, args.weighting, args.metric, **costs)
+        print(f"[BT] 시뮬레이션 {time.perf_counter() - t0:.2f}s")
+    print(res.summary())
+    with pd.option_context("display.width", 200):
+        print(res.yearly.round(4).to_string(index=False))
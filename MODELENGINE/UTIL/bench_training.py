@@ -0,0 +1,235 @@
+# ============================================================
+# bench_training.py
+#  - 합성 패널(HOJ_DB 와 같은 컬럼 구조)로 학습 경로 벤치마크
+#  - head_layout: 회귀/분류 sequential vs concurrent(코어 반씩) 비교
+#  - subsample: 층화 샘플 research 지표(AUC/RMSE)가 전체 실행을 얼마나 따라가는지 비교
+#  - 결과: OUTPUT/BENCH/{head_layout|subsample}_{yymmdd_HHMMSS}.csv
+#
+#  사용 예)
+#    python bench_training.py --codes 800 --days 1500 --n_estimators 300
+#    python bench_training.py --task subsample --configs 5x20,5x60,10x60 --fracs 0.1,0.25 --seeds 42,7
+# ============================================================
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+modelengine_dir = os.path.dirname(current_dir)
+root_dir = os.path.dirname(modelengine_dir)
+sys.path.extend([root_dir, modelengine_dir])
+
+try:
+    from MODELENGINE.UTIL import train_engine_unified as T
+except ImportError:
+    import train_engine_unified as T
+
+# ------------------------------------------------------------
+# 1) 합성 패널
+# ------------------------------------------------------------
+def synthetic_panel(n_codes: int = 500, n_days: int = 1500, seed: int = 42) -> pd.DataFrame:
+    """
+    HOJ_DB 축소판: Date/Code/OHLCV/Name/Market + SMA/RSI/VOL_SMA/MACD/KOSPI 피처.
+    종목별 상장일을 달리해 A안 마스크(앞구간 제거)가 실제처럼 동작하게 한다.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2015-01-02", periods=n_days)
+    kospi_ret = rng.normal(0, 0.01, n_days)
+
+    frames = []
+    for i in range(n_codes):
+        start = int(rng.integers(0, max(n_days // 5, 1)))
+        n = n_days - start
+        ret = 0.3 * kospi_ret[start:] + rng.normal(0, 0.02, n)
+        close = 10000 * np.exp(np.cumsum(ret))
+        vol = rng.lognormal(10, 1, n)
+        c = pd.Series(close)
+        ema12, ema26 = c.ewm(span=12).mean(), c.ewm(span=26).mean()
+        diff = c.diff()
+        up = diff.clip(lower=0).rolling(14).mean()
+        dn = (-diff.clip(upper=0)).rolling(14).mean()
+        frames.append(pd.DataFrame({
+            "Date": dates[start:], "Code": f"{i:06d}",
+            "Open": close * (1 + rng.normal(0, 0.005, n)), "High": close * 1.01,
+            "Low": close * 0.99, "Close": close, "Volume": vol,
+            "Name": f"종목{i}", "Market": "KOSPI" if i % 3 else "KOSDAQ",
+            "SMA_5": c.rolling(5).mean().to_numpy(),
+            "SMA_20": c.rolling(20).mean().to_numpy(),
+            "SMA_60": c.rolling(60).mean().to_numpy(),
+            "RSI_14": (100 - 100 / (1 + up / dn)).to_numpy(),
+            "VOL_SMA_20": pd.Series(vol).rolling(20).mean().to_numpy(),
+            "MACD": (ema12 - ema26).to_numpy(),
+            "KOSPI_수익률": kospi_ret[start:],
+        }))
+    df = pd.concat(frames, ignore_index=True)
+    return df.sort_values(["Date", "Code"]).reset_index(drop=True)
+
+def write_panel(df: pd.DataFrame, folder: str) -> str:
+    tag = pd.Timestamp(df["Date"].max()).strftime("%y%m%d")
+    path = os.path.join(folder, f"HOJ_DB_V31_{tag}.parquet")
+    df.to_parquet(path, index=False)
+    return path
+
+# ------------------------------------------------------------
+# 2) 헤드 배치 벤치마크
+# ------------------------------------------------------------
+def benchmark_head_layout(n_codes: int = 500, n_days: int = 1500, n_estimators: int = 300,
+                          input_window: int = 60, horizon: int = 5, repeat: int = 2,
+                          num_threads: int = 0, save: bool = True) -> pd.DataFrame:
+    tmp = tempfile.mkdtemp(prefix="hoj_bench_")
+    try:
+        db_path = write_panel(synthetic_panel(n_codes, n_days), tmp)
+        prep = T.prepare_training_set("V31", horizon, input_window, use_cache=False, db_path=db_path)
+        t = time.perf_counter()
+        T.build_lgb_dataset(prep)
+        t_bin = time.perf_counter() - t
+        idx = np.arange(len(prep["df_m"]))
+
+        rows = []
+        for layout in ("sequential", "concurrent"):
+            for r in range(repeat):
+                t = time.perf_counter()
+                _, _, info = T.train_models(prep, idx, None, n_estimators=n_estimators,
+                                            num_threads=num_threads, head_layout=layout)
+                rows.append({
+                    "layout": layout, "run": r, "rows": len(idx),
+                    "features": len(prep["features"]), "n_estimators": n_estimators,
+                    "cpu": os.cpu_count(), "head_threads": info["layout"]["num_threads"],
+                    "t_reg": info["reg"]["seconds"], "t_cls": info["cls"]["seconds"],
+                    "t_total": round(time.perf_counter() - t, 3), "t_bin": round(t_bin, 3),
+                })
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    res = pd.DataFrame(rows)
+    summ = res.groupby("layout")["t_total"].median()
+    print("----------------------------------------")
+    print(f"[BENCH] rows={rows[0]['rows']:,} features={rows[0]['features']} cpu={os.cpu_count()}")
+    for k, v in summ.items():
+        print(f"[BENCH] {k:<10} median {v:.2f}s")
+    print(f"[BENCH] 권장 layout = {summ.idxmin()} (sequential 대비 {summ['sequential'] / summ['concurrent']:.2f}x)")
+
+    if save:
+        out_dir = T.ensure_dir(os.path.join(T.get_path("OUTPUT"), "BENCH"))
+        out = os.path.join(out_dir, f"head_layout_{datetime.now().strftime('%y%m%d_%H%M%S')}.csv")
+        res.to_csv(out, index=False, encoding="utf-8-sig")
+        print(f"[BENCH] 저장: {out}")
+    return res
+
+# ------------------------------------------------------------
+# 3) 서브샘플 신뢰도: 샘플 research 지표가 전체 지표를 얼마나 따라가는지
+# ------------------------------------------------------------
+def _research_fit(prep: dict, tr_idx, va_idx, n_estimators: int, early_stopping_rounds: int) -> dict:
+    t = time.perf_counter()
+    model_reg, model_cls, info = T.train_models(prep, tr_idx, va_idx, n_estimators=n_estimators,
+                                                early_stopping_rounds=early_stopping_rounds)
+    X_va = prep["df_m"][prep["features"]].iloc[va_idx]
+    auc, rmse = T.evaluate_heads(model_reg, model_cls, X_va, prep["y_reg"][va_idx], prep["y_cls"][va_idx])
+    return {"auc": auc, "rmse": rmse, "rows_train": len(tr_idx), "rows_valid": len(va_idx),
+            "best_iter_reg": info["reg"]["trees"], "best_iter_cls": info["cls"]["trees"],
+            "t_train": round(time.perf_counter() - t, 3)}
+
+def benchmark_subsample(configs: list, fracs: list = (0.1, 0.25), seeds: list = (42,),
+                        by_sign: bool = False, valid_days: int = 365, n_estimators: int = 500,
+                        early_stopping_rounds: int = 50, db_path: str = None,
+                        synthetic: tuple = None, save: bool = True) -> pd.DataFrame:
+    """
+    configs: [(horizon, input_window), ...] 조합마다 전체 research 1회 + frac×seed 샘플 research.
+    synthetic=(n_codes, n_days) 이면 합성 패널, 아니면 db_path(기본 최신 HOJ_DB) 사용.
+    요약: frac 별 |ΔAUC|, |ΔRMSE|/RMSE, 설정 간 AUC 순위 상관(spearman), 속도 배율.
+    """
+    tmp = None
+    if synthetic:
+        tmp = tempfile.mkdtemp(prefix="hoj_bench_")
+        db_path = write_panel(synthetic_panel(*synthetic), tmp)
+    db_path = db_path or T.find_latest_db_path("V31")
+
+    rows = []
+    try:
+        for h, w in configs:
+            prep = T.prepare_training_set("V31", h, w, use_cache=not synthetic, db_path=db_path)
+            tr, va, _, _ = T.split_indices(prep["df_m"]["Date"], valid_days)
+            base = {"horizon": h, "input_window": w, "features": len(prep["features"])}
+            rows.append(dict(base, frac=1.0, seed=None,
+                             **_research_fit(prep, tr, va, n_estimators, early_stopping_rounds)))
+            print(f"[BENCH] h={h} w={w} 전체  AUC={rows[-1]['auc']} RMSE={rows[-1]['rmse']:.5f} "
+                  f"({rows[-1]['t_train']:.1f}s)")
+            for frac in fracs:
+                for seed in seeds:
+                    s_tr = T.stratified_sample(prep, tr, frac, seed, by_sign)
+                    s_va = T.stratified_sample(prep, va, frac, seed + 1, by_sign)
+                    rows.append(dict(base, frac=float(frac), seed=seed,
+                                     **_research_fit(prep, s_tr, s_va, n_estimators, early_stopping_rounds)))
+                    print(f"[BENCH] h={h} w={w} frac={frac:g} seed={seed} AUC={rows[-1]['auc']} "
+                          f"RMSE={rows[-1]['rmse']:.5f} ({rows[-1]['t_train']:.1f}s)")
+            del prep
+            T._MASK_MEMO.clear()
+    finally:
+        if tmp:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    res = pd.DataFrame(rows)
+    full = res[res["frac"] == 1.0].set_index(["horizon", "input_window"])[["auc", "rmse", "t_train"]]
+    samp = res[res["frac"] < 1.0].join(full, on=["horizon", "input_window"], rsuffix="_full")
+    res = res.join(full, on=["horizon", "input_window"], rsuffix="_full")
+    res["d_auc"] = res["auc"] - res["auc_full"]
+    res["d_rmse_pct"] = (res["rmse"] / res["rmse_full"] - 1.0) * 100
+    res["speedup"] = res["t_train_full"] / res["t_train"]
+
+    print("----------------------------------------")
+    print(f"[BENCH] 서브샘플 신뢰도 | configs={len(configs)} seeds={len(seeds)} by_sign={by_sign}")
+    for frac, g in samp.groupby("frac"):
+        mean_auc = g.groupby(["horizon", "input_window"])["auc"].mean()
+        rho = mean_auc.rank().corr(full["auc"].reindex(mean_auc.index).rank()) if len(mean_auc) > 2 else float("nan")
+        print(f"[BENCH] frac={frac:g}  |ΔAUC| 평균 {(g['auc'] - g['auc_full']).abs().mean():.4f}  "
+              f"|ΔRMSE| 평균 {((g['rmse'] / g['rmse_full'] - 1).abs().mean() * 100):.2f}%  "
+              f"AUC 순위상관 {rho:.2f}  속도 {(g['t_train_full'] / g['t_train']).median():.1f}x")
+
+    if save:
+        out_dir = T.ensure_dir(os.path.join(T.get_path("OUTPUT"), "BENCH"))
+        out = os.path.join(out_dir, f"subsample_{datetime.now().strftime('%y%m%d_%H%M%S')}.csv")
+        res.to_csv(out, index=False, encoding="utf-8-sig")
+        print(f"[BENCH] 저장: {out}")
+    return res
+
+def _pairs(text: str) -> list:
+    """'5x20,5x60,10x60' → [(5, 20), (5, 60), (10, 60)]"""
+    return [tuple(int(v) for v in p.split("x")) for p in str(text).split(",") if p.strip()]
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--task", default="head_layout", choices=["head_layout", "subsample"])
+    ap.add_argument("--codes", type=int, default=500)
+    ap.add_argument("--days", type=int, default=1500)
+    ap.add_argument("--n_estimators", type=int, default=300)
+    ap.add_argument("--input_window", type=int, default=60)
+    ap.add_argument("--horizon", type=int, default=5)
+    ap.add_argument("--repeat", type=int, default=2)
+    ap.add_argument("--num_threads", type=int, default=0)
+    # subsample
+    ap.add_argument("--configs", default="5x20,5x60,10x60,20x60", help="horizon x input_window 목록")
+    ap.add_argument("--fracs", default="0.1,0.25")
+    ap.add_argument("--seeds", default="42")
+    ap.add_argument("--by_sign", action="store_true")
+    ap.add_argument("--valid_days", type=int, default=365)
+    ap.add_argument("--synthetic", action="store_true", help="최신 HOJ_DB 대신 합성 패널(--codes/--days) 사용")
+    ap.add_argument("--no_save", action="store_true")
+    args = ap.parse_args()
+
+    if args.task == "subsample":
+        benchmark_subsample(
+            _pairs(args.configs), [float(x) for x in args.fracs.split(",")],
+            [int(x) for x in args.seeds.split(",")], by_sign=args.by_sign,
+            valid_days=args.valid_days, n_estimators=args.n_estimators,
+            synthetic=(args.codes, args.days) if args.synthetic else None, save=not args.no_save,
+        )
+    else:
+        benchmark_head_layout(args.codes, args.days, args.n_estimators, args.input_window,
+                              args.horizon, args.repeat, args.num_threads, save=not args.no_save)
@@ -2,6 +2,7 @@
 # Unified DB Builder (V32)
 #   - Feature 파일을 로드하여 통합 DB(HOJ_DB_V31.parquet) 생성
 #   - 기존 REAL/RESEARCH 분리 방식을 폐기하고 단일 파일로 관리
+#   - 단계별 계측(load/sort/save) → LOG/PROFILE/profile_runs.jsonl
 # ============================================================
 
 import os
@@ -13,6 +14,7 @@ import numpy as np
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from config_paths import get_path, versioned_filename
 from version_utils import find_latest_file, save_dataframe_with_date
+from profiling import RunProfiler
 
 def build_unified_db():
     # 1. 경로 설정
@@ -31,8 +33,11 @@ def build_unified_db():
         print("❌ [Error] 피처 파일이 없습니다. build_features.py를 먼저 실행하세요.")
         return
 
+    prof = RunProfiler("build_unified_db", tags={"feature": os.path.basename(feat_path)})
     try:
-        df = pd.read_parquet(feat_path)
+        with prof.stage("load") as st:
+            df = pd.read_parquet(feat_path)
+            st["rows"] = len(df)
         print(f"  ✅ 피처 로드 성공: {len(df):,} rows")
     except Exception as e:
         print(f"❌ 피처 로드 실패: {e}")
@@ -44,12 +49,13 @@ def build_unified_db():
         print(f"❌ 필수 컬럼 누락: {set(required_cols) - set(df.columns)}")
         return
 
-    # 날짜 형식 보장
-    if not np.issubdtype(df["Date"].dtype, np.datetime64):
-        df["Date"] = pd.to_datetime(df["Date"])
+    with prof.stage("sort", rows=len(df)):
+        # 날짜 형식 보장
+        if not np.issubdtype(df["Date"].dtype, np.datetime64):
+            df["Date"] = pd.to_datetime(df["Date"])
 
-    # 정렬 (날짜 오름차순)
-    df = df.sort_values(["Date", "Code"]).reset_index(drop=True)
+        # 정렬 (날짜 오름차순)
+        df = df.sort_values(["Date", "Code"]).reset_index(drop=True)
 
     # 데이터 기간 확인
     min_date = df["Date"].min().date()
@@ -60,7 +66,10 @@ def build_unified_db():
     os.makedirs(db_dir, exist_ok=True)
     try:
         # Date 컬럼에서 마지막 날짜를 자동 추출하여 HOJ_DB_V3_YYMMDD.parquet 형태로 저장
-        save_dataframe_with_date(df, db_dir, "HOJ_DB_V31", date_col="Date")
+        with prof.stage("save", rows=len(df)):
+            saved = save_dataframe_with_date(df, db_dir, "HOJ_DB_V31", date_col="Date")
+        prof.write({"status": "done" if saved else "skip", "output": os.path.basename(saved) if saved else None,
+                    "data_date": str(max_date)})
         print("  🎉 [완료] 통합 DB 저장 성공 (날짜 태그 파일)")
     except Exception as e:
         print(f"❌ DB 저장 실패: {e}")
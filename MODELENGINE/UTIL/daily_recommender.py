@@ -4,18 +4,16 @@
 # [Patch] 엑셀 자동 서식 및 통합 리포트 생성 기능 추가
 # [FIXED] find_engine_real() - 날짜 형식(4자리/6자리) 비교 오류 수정 및 cands NameError 수정
 # [FIXED] load_latest_db() - NameError 수정 (정의 누락 복구)
+# [Update] find_engine_real() - 파일명 파싱 대신 엔진 색인(engine_registry) 조회
+# [Update] 예측 상주 서비스(prediction_service)가 떠 있으면 Top-K 를 서비스에서 조회 (DB 전체 로드 생략)
+# [Update] --ensemble 엔진1,엔진2 : 여러 엔진을 한 번의 피처 행렬로 채점 후 혼합 (ensemble_scorer)
+# [Update] AI 해석 비동기화 (ai_commentary): 리포트 즉시 저장 → AI 섹션은 도착 시 채움 (--ai_timeout 상한)
+#          모델 목록 / Top-K 표 기준 응답 캐시, --ai_provider stub 으로 오프라인 테스트
+# [Update] CSV/TXT/XLSX 작성을 report_writer 로 이전 (메모리 결과 1개 → 1회 작성, 서식은 쓰는 시점에 적용)
 # ============================================================
-import os, sys, argparse, pickle, warnings
+import os, sys, argparse, warnings, threading
 import numpy as np
 import pandas as pd
-from datetime import datetime
-import google.generativeai as genai  # Gemini API
-import re # [추가]: 정규표현식 사용을 위해 import
-
-# [Patch] 엑셀 서식 관련 라이브러리 추가
-from openpyxl import load_workbook
-from openpyxl.utils import get_column_letter
-from openpyxl.styles import Alignment, Font, PatternFill
 
 # 경로 설정
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -25,10 +23,12 @@ sys.path.append(root_dir)
 try:
     from MODELENGINE.UTIL.config_paths import get_path
     from MODELENGINE.UTIL.version_utils import find_latest_file
+    from MODELENGINE.UTIL import engine_registry, engine_bundle, prediction_service, ensemble_scorer, ai_commentary, report_writer
 except:
     sys.path.append(parent_dir)
     from UTIL.config_paths import get_path
     from UTIL.version_utils import find_latest_file
+    from UTIL import engine_registry, engine_bundle, prediction_service, ensemble_scorer, ai_commentary, report_writer
 
 
 # ==========================================
@@ -73,13 +73,13 @@ def pick_close_col(df):
 
 
 
-def find_engine_real():
+def find_engine_real(horizon=5, input_window=60, n_estimators=1000):
     """
-    [수정] 엔진 파일 선택 로직 (Strict Mode)
-    1. 목표 옵션(h, w, n)과 '정확히 일치'하는 파일만 필터링 (타협 없음)
-    2. 일치하는 파일들 중 '데이터 날짜(YYMMDD)가 가장 최신'인 파일 선택
-    3. 날짜도 같으면 '생성 시간(mtime)'이 최신인 파일 선택
-    4. 조건에 맞는 파일이 없으면 명확하게 에러 발생 (FileNotFoundError)
+    [수정] 엔진 파일 선택 로직 (Strict Mode, 엔진 색인 조회 — pickle/파일명 파싱 없음)
+    1. 목표 옵션(h, w, n)과 '정확히 일치'하는 REAL 엔진만 대상 (타협 없음)
+    2. 일치하는 엔진 중 '데이터 날짜가 가장 최신'인 엔진 선택
+    3. 날짜도 같으면 '생성 시간(mtime)'이 최신인 엔진 선택
+    4. 조건에 맞는 엔진이 없으면 명확하게 에러 발생 (FileNotFoundError)
     """
     base_root = get_path("HOJ_ENGINE")
     if os.path.isfile(base_root):
@@ -88,340 +88,193 @@ def find_engine_real():
     if not os.path.isdir(real_dir):
         raise FileNotFoundError("REAL 폴더 없음: " + real_dir)
 
-    cands = []
-    for fn in os.listdir(real_dir):
-        if fn.startswith("HOJ_ENGINE_REAL") and fn.endswith(".pkl"):
-            cands.append(fn)
-    if not cands:
-        raise FileNotFoundError("REAL 폴더에 엔진 파일이 하나도 없습니다.")
-
-    # ---------------------------------------------------------
-    # [설정] 찾고자 하는 엔진의 목표 옵션 (Strict Target)
-    # 추후 UI 연동 시 이 부분을 인자로 받게 수정 가능
-    # ---------------------------------------------------------
-    TARGET_H = 5      # Horizon
-    TARGET_W = 60     # Input Window
-    TARGET_N = 1000   # Estimators
-
-    valid_candidates = []
-
-    for fn in cands:
-        # 1. 날짜 파싱 (YYMMDD 6자리 통일)
-        parts = fn.split("_")
-        date_token = parts[-1].replace(".pkl","")
-        d = -1
-        try:
-            if len(date_token) == 6 and date_token.startswith("25"):
-                d = int(date_token)
-            elif len(date_token) == 4:
-                d = int("25" + date_token)
-            elif len(date_token) == 8 and date_token.startswith("20"):
-                d = int(date_token[2:])
-            else:
-                 # t251125 등 복잡한 패턴 처리
-                 match = re.search(r'(\d{6})\.pkl$', fn)
-                 if match and match.group(1).startswith("25"):
-                     d = int(match.group(1))
-                 elif len(date_token) >= 6 and date_token.startswith("25"):
-                     d = int(date_token)
-        except:
-            d = -1
-
-        # 2. 옵션(h, w, n) 파싱
-        h=w=n=None
-        for p in parts:
-            if p.startswith("h"):
-                try: h=int(p[1:])
-                except: pass
-            
-            if p.startswith("w"):
-                if "full" in p.lower():
-                    w = 0  # wFull은 0으로 간주
-                else:
-                    try: w=int(p[1:])
-                    except: pass
-                    
-            if p.startswith("n"):
-                try: n=int(p[1:])
-                except: pass
-        
-        # 3. [핵심] 옵션 완전 일치 여부 검사 (Strict Check)
-        # 하나라도 다르면 후보에서 즉시 제외
-        if h == TARGET_H and w == TARGET_W and n == TARGET_N:
-            # 파일 수정 시간(mtime) - 동점자 처리용
-            full_path = os.path.join(real_dir, fn)
-            try:
-                mtime = os.path.getmtime(full_path)
-            except:
-                mtime = 0
-            
-            # (날짜, 생성시간, 파일명) 튜플 저장
-            valid_candidates.append((d, mtime, fn))
-
-    # 4. 결과 처리
-    if not valid_candidates:
-        # 일치하는 파일이 없으면 에러 발생 (대충 아무거나 주지 않음)
+    entry = engine_registry.latest_engine("REAL", horizon, input_window, n_estimators, base=base_root)
+    if entry is None:
+        # 일치하는 엔진이 없으면 에러 발생 (대충 아무거나 주지 않음)
         msg = (f"❌ [Error] 조건에 맞는 엔진 파일을 찾을 수 없습니다.\n"
-               f"   - 요청 조건: h={TARGET_H}, w={TARGET_W}, n={TARGET_N}\n"
+               f"   - 요청 조건: h={horizon}, w={input_window}, n={n_estimators}\n"
                f"   - 대상 폴더: {real_dir}")
         raise FileNotFoundError(msg)
 
-    # 5. 정렬: 날짜(d) 내림차순 -> 생성시간(mtime) 내림차순
-    # 가장 최신 날짜, 가장 최근에 만들어진 파일을 0번으로 가져옴
-    valid_candidates.sort(key=lambda x: (x[0], x[1]), reverse=True)
-    
-    best_file = valid_candidates[0][2]
-    print(f"[Engine Selector] 조건 일치 파일 발견: {best_file} (Date: {valid_candidates[0][0]})")
-    
-    return os.path.join(real_dir, best_file)
+    print(f"[Engine Selector] 조건 일치 파일 발견: {entry['name']} (Date: {entry['data_date']})")
+    return entry["path"]
 
-def load_latest_db(version="V31"): # [FIXED] NameError 해결을 위해 함수 정의 복구
-    """DB 디렉토리에서 최신 통합 DB 파일을 찾아 로드합니다."""
+def find_latest_db(version="V31"):
+    """DB 디렉토리에서 최신 통합 DB 파일 경로."""
     db_dir = get_path("HOJ_DB")
     latest = find_latest_file(db_dir, f"HOJ_DB_{version}")
     if not latest:
         raise FileNotFoundError("DB를 찾지 못했습니다.")
+    return latest
+
+def select_engines_by_version(engines, version="V31"):
+    """앙상블 엔진 중 version 이 맞는 것만 (meta → 파일명 순으로 확인). 하나도 없으면 에러."""
+    keep = []
+    for p in engines:
+        try:
+            ver = (engine_bundle.read_header(p).get("meta") or {}).get("version")
+        except Exception:
+            ver = None
+        ver = ver or engine_registry.parse_engine_name(p)["version"]
+        if ver and ver != version:
+            print(f"[ENSEMBLE] 버전 불일치 제외: {os.path.basename(p)} ({ver} ≠ {version})")
+            continue
+        keep.append(p)
+    if not keep:
+        raise FileNotFoundError(f"❌ [Error] {version} 엔진이 없습니다: {engines}")
+    return keep
+
+def load_latest_db(version="V31"): # [FIXED] NameError 해결을 위해 함수 정의 복구
+    """DB 디렉토리에서 최신 통합 DB 파일을 찾아 로드합니다."""
+    latest = find_latest_db(version)
 
     df = pd.read_parquet(latest)
     df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
     return df, latest
 
 
-# ============================================================
-# [패치 추가] 엑셀 서식 자동 조정 함수
-# ============================================================
-def auto_adjust_column_width(worksheet):
-    """ 엑셀 컬럼 너비 자동 맞춤 및 헤더 스타일링 """
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill(start_color="4F81BD", end_color="4F81BD", fill_type="solid")
-    
-    for col in worksheet.columns:
-        max_length = 0
-        column = col[0].column_letter 
-        
-        # 헤더 스타일 적용
-        col[0].font = header_font
-        col[0].fill = header_fill
-        col[0].alignment = Alignment(horizontal='center')
-
-        for cell in col:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(str(cell.value))
-            except:
-                pass
-        
-        # 너비 조정
-        adjusted_width = (max_length + 2) * 1.1
-        adjusted_width = min(adjusted_width, 50) # 최대 50
-        adjusted_width = max(adjusted_width, 10) # 최소 10
-        worksheet.column_dimensions[column].width = adjusted_width
-
-
 # ============================================================
 # [수정] Gemini 분석 함수 (결과 텍스트 반환하도록 변경)
 # ============================================================
-def get_gemini_analysis(df):
-    """Gemini를 이용해 Top10 분석 텍스트를 생성하여 반환"""
-    
-    if not GEMINI_API_KEY:
-        return "\n[Gemini] API Key가 없어 분석을 생략합니다.\n"
-
-    try:
-        genai.configure(api_key=GEMINI_API_KEY)
-
-        # 모델 자동 선택 로직
-        all_models = list(genai.list_models())
-        valid_model_name = None
-        
-        # 1순위: Flash (빠름)
-        for m in all_models:
-            if 'generateContent' in m.supported_generation_methods and 'flash' in m.name:
-                valid_model_name = m.name
-                break
-        
-        # 2순위: Pro
-        if valid_model_name is None:
-            for m in all_models:
-                if 'generateContent' in m.supported_generation_methods and 'pro' in m.name:
-                    valid_model_name = m.name
-                    break
-        
-        # 기본값
-        if valid_model_name is None:
-            valid_model_name = "models/gemini-1.5-flash"
-
-        model = genai.GenerativeModel(valid_model_name)
-        target_list_str = df.to_string(index=False)
-        
-        prompt = f"""
-아래는 오늘의 HOJ Top10 종목 리스트입니다. 
-이 종목들을 기반으로 상승 가능성이 높은 종목을 3개 추천해 주세요.
-
-[Top10 종목 데이터]
-{target_list_str}
-
-[요구사항]
-- 추천 사유 1~2줄 포함
-- 상승 가능성이 높은 순서대로 3개만 제시
-
-[형식]
-=== Gemini's Pick ===
-1. 종목명: 사유
-2. 종목명: 사유
-3. 종목명: 사유
-"""
-        print(f"[Gemini] 모델 '{valid_model_name}' 분석 실행 중...", end="\r") # 진행중 표시
-        response = model.generate_content(prompt)
-        print(f"[Gemini] 분석 완료.                                 ") # 지우기
-
-        return response.text
-
-    except Exception as e:
-        return f"\n⚠ Gemini 분석 중 오류 발생: {e}\n"
+def get_gemini_analysis(df, timeout=ai_commentary.DEFAULT_TIMEOUT):
+    """Gemini를 이용해 Top10 분석 텍스트를 생성하여 반환 (동기 호환용, 최대 timeout 초)"""
+    provider, skip = ai_commentary.make_provider("gemini", GEMINI_API_KEY, request_timeout=timeout)
+    job = ai_commentary.start_commentary(df, provider, skip_reason=skip)
+    return ai_commentary.commentary_text(job, timeout)
 
 
 # ============================================================
 # 메인 로직
 # ============================================================
-def main(rank_by="combo", topk=10, version="V31"):
-
-    # 1. 엔진 및 DB 로드
-    eng_path = find_engine_real()
-    with open(eng_path, "rb") as f:
-        payload = pickle.load(f)
-    model_cls = payload["model_cls"]
-    model_reg = payload["model_reg"]
-    features  = payload["features"]
-    
-    df, db_path = load_latest_db(version) # [FIXED] 이제 load_latest_db가 정의되어 오류 발생 안함
-    max_date = df["Date"].max()
-    df_d = df[df["Date"] == max_date].copy()
-    close_col = pick_close_col(df_d)
-
-    # 2. 피처 확인 및 예측
-    db_features = [c for c in features if c in df_d.columns]
-    X = df_d[db_features].copy()
-    mask = X.notnull().all(axis=1)
-    df_d = df_d.loc[mask].copy()
-    X = X.loc[mask]
-
-    prob = model_cls.predict_proba(X)[:,1]
-    ret  = model_reg.predict(X)
-    ret_clip = np.clip(ret, -0.10, None)
-    combo = prob * ret_clip
+def main(rank_by="combo", topk=10, version="V31", engines=None, blend="rank",
+         ai_provider="gemini", ai_timeout=ai_commentary.DEFAULT_TIMEOUT, ai_delay=0.0):
+
+    # 1. 엔진 선택 → (앙상블) / 예측 상주 서비스 조회 / 엔진·DB 직접 로드
+    keymap = {"combo":"동시적용 기대수익(%)", "prob":"상승확률(%)", "ret":"예측수익률(%)"}
+    metric = {"ret": "score", "prob": "prob"}.get(rank_by, "combo")
+    eng_path = ",".join(os.path.basename(p) for p in engines) if engines else find_engine_real()
+    # 서비스 / 앙상블 응답은 요청 version 의 최신 DB 최신일로 고정 (다르면 직접 경로)
+    latest_db = find_latest_db(version)
+    latest_date = pd.to_datetime(pd.read_parquet(latest_db, columns=["Date"])["Date"]).max()
+    served = None if engines else prediction_service.query_topk(topk, date=latest_date, engine=eng_path,
+                                                                 rank_by=metric)
+    if served is not None and not served.empty:
+        got_date, got_db = pd.Timestamp(served["date"].iloc[0]), served.attrs.get("db")
+        if got_date != latest_date or got_db != os.path.basename(latest_db):
+            print(f"[SERVE] 서비스 응답 제외: {got_date.date()} / {got_db or '-'} ≠ "
+                  f"{latest_date.date()} / {os.path.basename(latest_db)} → 직접 예측")
+            served = None
+    blend_col = None
+    if engines:
+        engines = select_engines_by_version(engines, version)
+        eng_path = ",".join(os.path.basename(p) for p in engines)
+        db_path, max_date = latest_db, latest_date
+        es = ensemble_scorer.EnsembleScorer(engines)
+        res = es.score(dates=max_date, db_path=db_path, metric=metric)
+        print(f"[ENSEMBLE] 엔진 {len(engines)}개 혼합 (blend={blend}, 기준={metric})")
+        if res.empty or res["Date"].max() != max_date:
+            raise ValueError(f"앙상블 채점일이 DB 최신일({max_date.date()})과 다릅니다: "
+                             f"{None if res.empty else res['Date'].max().date()}")
+        print(f"[ENSEMBLE] 채점일 {max_date.date()} (DB 최신일) | {os.path.basename(db_path)}")
+        names, codes, closes = res.get("Name"), res["Code"], res["Close"]
+        prob, ret, combo = res["prob"].to_numpy(), res["score"].to_numpy(), res["combo"].to_numpy()
+        blend_col = res[f"blend_{blend}"].to_numpy()
+    elif served is not None and not served.empty:
+        print(f"[SERVE] 예측 상주 서비스 응답 사용 ({len(served)}종목) | 기준일 {latest_date.date()} "
+              f"| {os.path.basename(latest_db)}")
+        max_date = latest_date
+        db_path = "prediction_service"
+        names, codes, closes = served["name"], served["code"], served["close"]
+        prob, ret, combo = served["prob"].to_numpy(), served["score"].to_numpy(), served["combo"].to_numpy()
+    else:
+        payload = engine_bundle.load_engine(eng_path)
+        model_cls = payload["model_cls"]
+        model_reg = payload["model_reg"]
+        features  = payload["features"]
+
+        df, db_path = load_latest_db(version) # [FIXED] 이제 load_latest_db가 정의되어 오류 발생 안함
+        max_date = df["Date"].max()
+        df_d = df[df["Date"] == max_date].copy()
+        close_col = pick_close_col(df_d)
+
+        # 2. 피처 확인 및 예측
+        db_features = [c for c in features if c in df_d.columns]
+        X = df_d[db_features].copy()
+        mask = X.notnull().all(axis=1)
+        df_d = df_d.loc[mask].copy()
+        X = X.loc[mask]
+
+        prob = model_cls.predict_proba(X)[:,1]
+        ret  = model_reg.predict(X)
+        ret_clip = np.clip(ret, -0.10, None)
+        combo = prob * ret_clip
+        names, codes, closes = df_d.get("Name", df_d.get("name")), df_d.get("Code", df_d.get("code")), df_d[close_col]
 
     # 3. 결과 DataFrame 생성
-    df_out = pd.DataFrame({
-        "종목명": df_d.get("Name", df_d.get("name")),
-        "종목코드": df_d.get("Code", df_d.get("code")),
-        "현재가": df_d[close_col],
-        "상승확률(%)": (prob*100).round(2),
-        "예측수익률(%)": (ret*100).round(2),
-        "동시적용 기대수익(%)": (combo*100).round(2),
-    })
+    df_out = report_writer.build_table(names, codes, closes, prob, ret, combo)
+    if blend_col is not None:
+        df_out[f"앙상블({blend})"] = blend_col.round(4)
+        keymap[rank_by] = f"앙상블({blend})"
 
     # 정렬
-    keymap = {"combo":"동시적용 기대수익(%)", "prob":"상승확률(%)", "ret":"예측수익률(%)"}
     sort_key = keymap.get(rank_by, "동시적용 기대수익(%)")
     df_out = df_out.sort_values(sort_key, ascending=False).head(topk)
 
     # ------------------------------------------------------------
-    # 4. [변경] AI 분석 먼저 실행
+    # 4. [변경] AI 분석 시작 (백그라운드) — 리포트는 기다리지 않고 바로 저장
     # ------------------------------------------------------------
-    ai_result_text = get_gemini_analysis(df_out)
+    provider, skip = ai_commentary.make_provider(ai_provider, GEMINI_API_KEY, delay=ai_delay,
+                                                 request_timeout=ai_timeout)
+    job = ai_commentary.start_commentary(df_out, provider, skip_reason=skip)
+    result = report_writer.ReportResult(max_date, df_out, rank_by, topk, engine=eng_path, db=db_path,
+                                        ai_text=job.text if job.done() else ai_commentary.PENDING_TEXT)
 
     # ------------------------------------------------------------
-    # 5. [변경] 통합 리포트 생성 (출력 및 저장용)
-    # ------------------------------------------------------------
-    report_content = []
-    report_content.append("=" * 60)
-    report_content.append(f"📈 HOJ AI Daily Report [{max_date.date()}]")
-    report_content.append("=" * 60)
-    report_content.append(f"\n[1] 예측 Top {topk} (기준: {rank_by})")
-    report_content.append("-" * 60)
-    report_content.append(df_out.to_string(index=False))
-    report_content.append("-" * 60)
-    report_content.append("\n[2] Gemini AI Investment Opinion")
-    report_content.append("-" * 60)
-    report_content.append(ai_result_text.strip())
-    report_content.append("=" * 60)
-    
-    full_report_str = "\n".join(report_content)
-
+    # 5. 화면 출력
     # ------------------------------------------------------------
-    # 6. 화면 출력
-    # ------------------------------------------------------------
-    print(full_report_str)
+    print(result.render_text())
     print(f"\n[ENGINE] {os.path.basename(eng_path)}")
     print(f"[DB]     {os.path.basename(db_path)}")
 
     # ------------------------------------------------------------
-    # 7. 파일 저장 (CSV + TXT 리포트)
+    # 6. 파일 저장 (CSV + TXT + Excel, 한 번에)
     # ------------------------------------------------------------
     out_dir = get_path("OUTPUT")
-    os.makedirs(out_dir, exist_ok=True)
-    
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    
-    # (1) CSV 저장 (데이터용)
-    csv_name = f"recommendation_HOJ_V34_{max_date.date()}_{timestamp}_{rank_by}.csv"
-    csv_path = os.path.join(out_dir, csv_name)
-    df_out.to_csv(csv_path, index=False, encoding="utf-8-sig")
-
-    # (2) TXT 리포트 저장 (보기 편한 용도, AI의견 포함)
-    txt_name = f"Report_HOJ_V34_{max_date.date()}_{timestamp}.txt"
-    txt_path = os.path.join(out_dir, txt_name)
-    
-    with open(txt_path, "w", encoding="utf-8") as f:
-        f.write(full_report_str)
-        f.write(f"\n\n[File Info]\nCSV Data: {csv_name}\nEngine: {os.path.basename(eng_path)}")
-
-    print(f"[SAVE]   CSV: {csv_name}")
-    print(f"[SAVE]   TXT: {txt_name} (AI 분석 포함)")
+    try:
+        paths = report_writer.write_reports(result, out_dir)
+    except Exception as e:
+        print(f"[Error] 리포트 저장 실패: {e}")
+        return
+    print(f"[SAVE]   CSV: {os.path.basename(paths['csv'])}")
+    print(f"[SAVE]   TXT: {os.path.basename(paths['txt'])} ({'AI 분석 포함' if job.done() else 'AI 분석 대기 중'})")
+    print(f"[SAVE]   Excel: {os.path.basename(paths['xlsx'])} (서식 적용 완료)")
 
     # ------------------------------------------------------------
-    # 8. [패치] 엑셀 리포트 자동 생성 (Format + AI Text)
+    # 7. AI 섹션 채우기 (도착 시 TXT / Excel 다시 저장, 최대 ai_timeout 초 대기)
     # ------------------------------------------------------------
-    excel_name = f"Final_Report_HOJ_{max_date.date()}_{timestamp}.xlsx"
-    excel_path = os.path.join(out_dir, excel_name)
-    
-    try:
-        print(f"\n[*] Generating Formatted Excel: {excel_name}...")
-        
-        # (1) Pandas로 데이터 쓰기
-        with pd.ExcelWriter(excel_path, engine='openpyxl') as writer:
-            # Sheet 1: Top 10 추천
-            df_out.to_excel(writer, sheet_name='Top 10 추천', index=False)
-            
-            # Sheet 2: AI 해석 (텍스트)
-            df_report = pd.DataFrame({'AI 분석 리포트': [full_report_str]})
-            df_report.to_excel(writer, sheet_name='AI 해석', index=False)
-
-        # (2) OpenPyXL로 서식 다듬기
-        wb = load_workbook(excel_path)
-        
-        # Sheet 1 서식 (컬럼 너비 자동, 헤더 스타일)
-        if 'Top 10 추천' in wb.sheetnames:
-            ws = wb['Top 10 추천']
-            auto_adjust_column_width(ws)
-            
-        # Sheet 2 서식 (줄바꿈, 너비 확장)
-        if 'AI 해석' in wb.sheetnames:
-            ws = wb['AI 해석']
-            cell = ws['A2'] # 본문 셀
-            cell.alignment = Alignment(wrap_text=True, vertical='top') # 줄바꿈 허용
-            ws.column_dimensions['A'].width = 100 # 넓게 잡기
-            
-            # 행 높이 늘리기 (내용 길이에 비례)
-            line_count = full_report_str.count('\n') + (len(full_report_str) // 100)
-            ws.row_dimensions[2].height = max(line_count * 15, 400)
-
-        wb.save(excel_path)
-        print(f"[SAVE]   Excel: {excel_name} (서식 적용 완료)")
-        
-    except Exception as e:
-        print(f"[Error] 엑셀 생성 실패: {e}")
+    if job.done():
+        return
+    fill_lock = threading.Lock()
+
+    def fill_ai_section(text, if_pending=False):
+        with fill_lock:
+            if if_pending and result.ai_text != ai_commentary.PENDING_TEXT:
+                return   # 시간 초과 직후 도착한 응답을 덮어쓰지 않음
+            result.ai_text = text
+            try:
+                report_writer.write_reports(result, out_dir, formats=("txt", "xlsx"), paths=paths)
+            except Exception as e:
+                print(f"[Error] AI 섹션 갱신 실패: {e}")
+
+    job.add_done_callback(lambda j: fill_ai_section(j.text))
+    if job.wait(ai_timeout):
+        print("\n[2] Gemini AI Investment Opinion")
+        print("-" * 60)
+        print(job.text.strip())
+        print(f"[SAVE]   AI 분석 도착 ({job.elapsed:.1f}s) → TXT / Excel AI 섹션 갱신")
+    else:
+        fill_ai_section(ai_commentary.TIMEOUT_TEXT.format(sec=ai_timeout), if_pending=True)
+        print(f"[AI] {ai_timeout:.0f}초 내 응답 없음 → 리포트에 시간 초과 표시")
 
 
 # ============================================================
@@ -432,5 +285,12 @@ if __name__ == "__main__":
     ap.add_argument("--rank_by", default="combo", help="combo | prob | ret")
     ap.add_argument("--topk", type=int, default=10)
     ap.add_argument("--version", default="V31")
+    ap.add_argument("--ensemble", default=None, help="엔진 경로 (쉼표 구분) → 혼합 점수로 정렬")
+    ap.add_argument("--blend", default="rank", choices=["mean", "rank", "weighted"])
+    ap.add_argument("--ai_provider", default="gemini", choices=list(ai_commentary.PROVIDERS))
+    ap.add_argument("--ai_timeout", type=float, default=ai_commentary.DEFAULT_TIMEOUT, help="AI 해석 최대 대기(초)")
+    ap.add_argument("--ai_delay", type=float, default=0.0, help="stub 공급자 지연(초, 테스트용)")
     args = ap.parse_args()
-    main(rank_by=args.rank_by, topk=args.topk, version=args.version)
\ No newline at end of file
+    main(rank_by=args.rank_by, topk=args.topk, version=args.version,
+         engines=args.ensemble.split(",") if args.ensemble else None, blend=args.blend,
+         ai_provider=args.ai_provider, ai_timeout=args.ai_timeout, ai_delay=args.ai_delay)
\ No newline at end of file
@@ -0,0 +1,272 @@
+# ============================================================
+# engine_bundle.py
+#  - 엔진 번들 포맷 (.hoj = zip): 전체 payload pickle 대신
+#      header.json    : meta / features / 피처 중요도 / 지표 / 헤드 정보  (수 KB)
+#      model_reg.txt  : LightGBM 네이티브 모델 (Booster.model_to_string)
+#      model_cls.txt
+#  - read_header(path)  : 헤더만 읽음 (P2 중요도, P3/색인 meta) → 모델 파싱 없음
+#  - load_engine(path)  : 기존 payload dict 와 같은 모양. model_reg/model_cls 는 처음 접근할 때 로드
+#                         .pkl 도 그대로 지원 (기존 호출부 호환)
+#  - convert_pkl / convert_all : 기존 .pkl 엔진 → .hoj 변환 (+ 엔진 색인 등록)
+#
+#  사용 예)
+#    python engine_bundle.py convert --all                # HOJ_ENGINE/{REAL,RESEARCH}/*.pkl
+#    python engine_bundle.py convert F:\...\HOJ_ENGINE_REAL_V31_h5_w60_n1000_251128.pkl
+#    python engine_bundle.py header  F:\...\HOJ_ENGINE_REAL_V31_h5_w60_n1000_251128.hoj
+# ============================================================
+
+import os
+import sys
+import json
+import pickle
+import zipfile
+import argparse
+from datetime import datetime
+
+import numpy as np
+import lightgbm as lgb
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+modelengine_dir = os.path.dirname(current_dir)
+root_dir = os.path.dirname(modelengine_dir)
+sys.path.extend([root_dir, modelengine_dir])
+
+try:
+    from MODELENGINE.UTIL.engine_models import BoosterRegressor, BoosterClassifier
+except ImportError:
+    from engine_models import BoosterRegressor, BoosterClassifier
+
+BUNDLE_EXT = ".hoj"
+ENGINE_EXTS = (".pkl", BUNDLE_EXT)
+BUNDLE_VERSION = 1
+HEADER_NAME = "header.json"
+HEADS = {"model_reg": BoosterRegressor, "model_cls": BoosterClassifier}
+_WRAPPERS = {cls.__name__: cls for cls in HEADS.values()}
+
+
+def is_bundle(path: str) -> bool:
+    return str(path).lower().endswith(BUNDLE_EXT)
+
+def bundle_path_of(path: str) -> str:
+    """xxx.pkl → xxx.hoj (확장자만 교체)."""
+    return os.path.splitext(path)[0] + BUNDLE_EXT
+
+# ------------------------------------------------------------
+# 1) 모델 → (Booster, params, best_iteration)
+# ------------------------------------------------------------
+def _booster_parts(model):
+    """BoosterRegressor/Classifier, LGBMRegressor/Classifier, lgb.Booster 모두 지원."""
+    if isinstance(model, lgb.Booster):
+        return model, dict(model.params or {}), None
+    booster = getattr(model, "booster_", None)
+    if booster is None:
+        raise TypeError(f"LightGBM 모델이 아님: {type(model).__name__}")
+    params = getattr(model, "params_", None)
+    if params is None and hasattr(model, "get_params"):
+        params = {k: v for k, v in model.get_params().items() if v is not None}
+    best = getattr(model, "best_iteration_", None)
+    return booster, dict(params or {}), (int(best) if best else None)
+
+def _importances(booster: lgb.Booster) -> dict:
+    names = booster.feature_name()
+    return {
+        "split": dict(zip(names, booster.feature_importance("split").astype(int).tolist())),
+        "gain": dict(zip(names, np.round(booster.feature_importance("gain"), 6).tolist())),
+    }
+
+# ------------------------------------------------------------
+# 2) 저장
+# ------------------------------------------------------------
+def save_bundle(path: str, payload: dict) -> str:
+    """payload({"model_reg","model_cls","features","meta"}) → .hoj 번들. 반환: 저장 경로."""
+    meta = dict(payload.get("meta") or {})
+    header = {
+        "bundle_version": BUNDLE_VERSION,
+        "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "lightgbm": lgb.__version__,
+        "meta": meta,
+        "features": list(payload.get("features") or []),
+        "metrics": meta.get("metrics") or {},
+        "heads": {},
+        "importances": {},
+    }
+    models = {}
+    for key, default_cls in HEADS.items():
+        model = payload.get(key)
+        if model is None:
+            continue
+        booster, params, best = _booster_parts(model)
+        cls_name = type(model).__name__ if type(model).__name__ in _WRAPPERS else default_cls.__name__
+        header["heads"][key] = {
+            "file": f"{key}.txt", "class": cls_name, "params": params,
+            "best_iteration": best, "num_trees": booster.num_trees(),
+        }
+        header["importances"][key] = _importances(booster)
+        models[key] = booster.model_to_string(num_iteration=-1)
+
+    tmp = path + ".tmp"
+    with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr(HEADER_NAME, json.dumps(header, ensure_ascii=False, indent=1, default=str))
+        for key, text in models.items():
+            zf.writestr(header["heads"][key]["file"], text)
+    os.replace(tmp, path)
+    return path
+
+# ------------------------------------------------------------
+# 3) 읽기
+# ------------------------------------------------------------
+def _header_from_payload(payload: dict) -> dict:
+    """구버전 .pkl payload → 번들 헤더와 같은 모양 (pickle 을 이미 연 경우)."""
+    meta = dict(payload.get("meta") or {}) if isinstance(payload, dict) else {}
+    header = {"bundle_version": 0, "meta": meta, "features": list(payload.get("features") or []),
+              "metrics": meta.get("metrics") or {}, "heads": {}, "importances": {}}
+    for key in HEADS:
+        model = payload.get(key)
+        if model is None:
+            continue
+        try:
+            booster, params, best = _booster_parts(model)
+            header["heads"][key] = {"class": type(model).__name__, "params": params,
+                                    "best_iteration": best, "num_trees": booster.num_trees()}
+            header["importances"][key] = _importances(booster)
+        except TypeError:
+            pass
+    return header
+
+def read_header(path: str) -> dict:
+    """헤더(meta/features/importances/metrics/heads)만 읽음. .pkl 은 호환을 위해 unpickle 후 변환."""
+    if is_bundle(path):
+        with zipfile.ZipFile(path) as zf:
+            return json.loads(zf.read(HEADER_NAME).decode("utf-8"))
+    with open(path, "rb") as f:
+        return _header_from_payload(pickle.load(f))
+
+
+class LazyEngine(dict):
+    """
+    payload dict 호환 객체. features/meta 는 즉시, model_reg/model_cls 는 첫 접근 시 로드.
+    data["model_cls"], data.get("model_reg"), isinstance(data, dict) 모두 기존과 동일하게 동작.
+    """
+
+    def __init__(self, path: str, header: dict):
+        super().__init__(features=header.get("features", []), meta=header.get("meta", {}))
+        self.path = path
+        self.header = header
+
+    def _load(self, key: str):
+        info = self.header["heads"][key]
+        with zipfile.ZipFile(self.path) as zf:
+            booster = lgb.Booster(model_str=zf.read(info["file"]).decode("utf-8"))
+        model = _WRAPPERS.get(info.get("class"), HEADS[key])(
+            booster, params=info.get("params"), best_iteration=info.get("best_iteration"))
+        dict.__setitem__(self, key, model)
+        return model
+
+    def __missing__(self, key):
+        if key in self.header.get("heads", {}):
+            return self._load(key)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or key in self.header.get("heads", {})
+
+    def keys(self):
+        return list(dict.keys(self)) + [k for k in self.header.get("heads", {}) if not dict.__contains__(self, k)]
+
+    def __repr__(self):
+        loaded = [k for k in HEADS if dict.__contains__(self, k)]
+        return f"LazyEngine({os.path.basename(self.path)}, loaded={loaded})"
+
+
+def load_engine(path: str):
+    """엔진 로드 (.hoj → LazyEngine, .pkl → 기존 payload dict)."""
+    if is_bundle(path):
+        return LazyEngine(path, read_header(path))
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+# ------------------------------------------------------------
+# 4) 변환 (.pkl → .hoj)
+# ------------------------------------------------------------
+def convert_pkl(path: str, out_path: str = None, remove: bool = False, register: bool = True) -> str:
+    """기존 .pkl 엔진을 번들로 변환. 예측값이 같은지 피처 0 행렬로 확인 후 저장."""
+    with open(path, "rb") as f:
+        payload = pickle.load(f)
+    if not isinstance(payload, dict) or "model_reg" not in payload:
+        raise ValueError(f"엔진 payload 형식 아님: {os.path.basename(path)}")
+    out_path = out_path or bundle_path_of(path)
+    save_bundle(out_path, payload)
+
+    # 검증: 같은 입력에 같은 예측
+    eng = load_engine(out_path)
+    X = np.zeros((4, len(payload["features"]) or eng["model_reg"].n_features_in_))
+    ok = np.allclose(payload["model_reg"].predict(X), eng["model_reg"].predict(X)) and \
+        np.allclose(payload["model_cls"].predict_proba(X)[:, 1], eng["model_cls"].predict_proba(X)[:, 1])
+    if not ok:
+        os.remove(out_path)
+        raise RuntimeError(f"변환 검증 실패 (예측 불일치): {os.path.basename(path)}")
+
+    if register:
+        try:
+            try:
+                from MODELENGINE.UTIL import engine_registry
+            except ImportError:
+                import engine_registry
+            engine_registry.register_engine(out_path, payload)
+        except Exception as e:
+            print(f"[REGISTRY] 등록 실패: {e}")
+    if remove:
+        os.remove(path)
+    kb = os.path.getsize(out_path) / 1024
+    print(f"[BUNDLE] 변환: {os.path.basename(path)} → {os.path.basename(out_path)} ({kb:,.0f} KB)")
+    return out_path
+
+def convert_all(base: str = None, remove: bool = False) -> list:
+    """HOJ_ENGINE/{REAL,RESEARCH}/*.pkl 중 번들이 없는 파일 일괄 변환. 실패는 건너뜀."""
+    base = base or os.path.join(modelengine_dir, "HOJ_ENGINE")
+    done = []
+    for mode in ("REAL", "RESEARCH"):
+        d = os.path.join(base, mode)
+        if not os.path.isdir(d):
+            continue
+        for fn in sorted(os.listdir(d)):
+            p = os.path.join(d, fn)
+            if not fn.endswith(".pkl") or os.path.exists(bundle_path_of(p)):
+                continue
+            try:
+                done.append(convert_pkl(p, remove=remove))
+            except Exception as e:
+                print(f"[BUNDLE] 건너뜀: {fn} ({e})")
+    print(f"[BUNDLE] 변환 완료 {len(done)}개")
+    return done
+
+# ------------------------------------------------------------
+# 5) CLI
+# ------------------------------------------------------------
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p_cv = sub.add_parser("convert")
+    p_cv.add_argument("paths", nargs="*")
+    p_cv.add_argument("--all", action="store_true", help="HOJ_ENGINE/{REAL,RESEARCH} 전체")
+    p_cv.add_argument("--base", default=None)
+    p_cv.add_argument("--remove", action="store_true", help="변환 성공 시 원본 .pkl 삭제")
+    p_hd = sub.add_parser("header")
+    p_hd.add_argument("path")
+    args = ap.parse_args()
+
+    if args.cmd == "convert":
+        if args.all:
+            convert_all(args.base, remove=args.remove)
+        for p in args.paths:
+            convert_pkl(p, remove=args.remove)
+    else:
+        h = read_header(args.path)
+        print(json.dumps({k: h[k] for k in ("meta", "metrics", "heads")}, ensure_ascii=False, indent=2, default=str))
+        print(f"features: {len(h['features'])}개")
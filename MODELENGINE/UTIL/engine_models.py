@@ -0,0 +1,70 @@
+# ============================================================
+# engine_models.py
+#  - lgb.train(Booster) 결과를 기존 엔진 pkl 인터페이스로 감싸는 래퍼
+#  - LGBMRegressor/LGBMClassifier 와 동일하게 사용:
+#       model_reg.predict(X)
+#       model_cls.predict_proba(X)[:, 1]
+#       model.feature_importances_
+#  - 학습은 lgb.Dataset(바이닝 1회)을 여러 모델이 공유하기 위해 lgb.train 사용
+#  - 주의: 엔진 pkl 로드 측에서 MODELENGINE.UTIL.engine_models 가 import 가능해야 함
+#          (프로젝트 루트가 sys.path 에 있어야 함)
+# ============================================================
+
+import numpy as np
+import pandas as pd
+
+
+class _BoosterModel:
+    """lgb.Booster 래퍼 (pickle 가능, sklearn 예측 인터페이스 일부 제공)."""
+
+    def __init__(self, booster, params: dict = None, best_iteration: int = None):
+        self.booster_ = booster
+        self.params_ = dict(params or {})
+        self.best_iteration_ = int(best_iteration) if best_iteration else None
+
+    # --- 정보 ---
+    @property
+    def feature_name_(self) -> list:
+        return self.booster_.feature_name()
+
+    @property
+    def n_features_in_(self) -> int:
+        return self.booster_.num_feature()
+
+    @property
+    def n_estimators_(self) -> int:
+        return self.booster_.current_iteration()
+
+    @property
+    def feature_importances_(self) -> np.ndarray:
+        return self.booster_.feature_importance(importance_type="split")
+
+    def num_trees(self) -> int:
+        return self.booster_.num_trees()
+
+    # --- 예측 ---
+    def _raw_predict(self, X, **kwargs):
+        if isinstance(X, pd.DataFrame):
+            X = X[self.feature_name_] if set(self.feature_name_) <= set(X.columns) else X
+        num_iteration = kwargs.pop("num_iteration", self.best_iteration_)
+        return self.booster_.predict(X, num_iteration=num_iteration, **kwargs)
+
+    def __repr__(self):
+        return (f"{type(self).__name__}(trees={self.n_estimators_}, "
+                f"features={self.n_features_in_}, best_iteration={self.best_iteration_})")
+
+
+class BoosterRegressor(_BoosterModel):
+    def predict(self, X, **kwargs) -> np.ndarray:
+        return self._raw_predict(X, **kwargs)
+
+
+class BoosterClassifier(_BoosterModel):
+    classes_ = np.array([0, 1])
+
+    def predict_proba(self, X, **kwargs) -> np.ndarray:
+        p = np.asarray(self._raw_predict(X, **kwargs), dtype="float64")
+        return np.column_stack([1.0 - p, p])
+
+    def predict(self, X, **kwargs) -> np.ndarray:
+        return (self.predict_proba(X, **kwargs)[:, 1] > 0.5).astype(int)
@@ -0,0 +1,381 @@
+# ============================================================
+# engine_registry.py
+#  - 엔진 색인(sqlite): HOJ_ENGINE/engine_registry.sqlite
+#  - 저장 시점(save_engine)에 meta/피처/지표/데이터 날짜/파일 해시·크기 기록
+#    → 목록/선택/달력 표시는 pickle 을 열지 않고 색인만 조회
+#  - 조회 API
+#      latest_engine("REAL", horizon=5, input_window=60, n_estimators=1000)
+#      engines_for_date(date)          : 해당 예측일(target_date)에 쓰는 엔진
+#      list_engines(mode=None)         : REAL → RESEARCH, 최신순
+#  - 색인에 없는 기존 파일(수동 복사/구버전)은 sync() 에서 파일명으로 등록 (pickle 미개봉)
+#    .hoj 번들(engine_bundle)은 header.json 만 읽어 meta 까지 등록
+#    python engine_registry.py rebuild --deep  → pickle meta 로 1회 정밀 재등록
+#  - 파일명 해석은 parse_engine_name 한 곳에서만 수행
+#  - SLE 엔진은 SLE_ENGINE/engine_registry.sqlite (base 만 다르고 같은 API)
+#  - 조회 시 동기화는 REAL/RESEARCH 폴더 수정시각이 바뀐 경우에만 (같은 프로세스 기준)
+#    같은 이름 덮어쓰기 등 폴더 시각이 그대로인 변경은 sync() / rebuild 로 직접 반영
+# ============================================================
+
+import os
+import re
+import sys
+import json
+import sqlite3
+import hashlib
+import argparse
+from contextlib import contextmanager
+from datetime import datetime, date
+
+import pandas as pd
+from pandas.tseries.offsets import BDay
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+modelengine_dir = os.path.dirname(current_dir)
+root_dir = os.path.dirname(modelengine_dir)
+sys.path.extend([root_dir, modelengine_dir])
+
+try:
+    from MODELENGINE.UTIL import engine_bundle
+    from MODELENGINE.UTIL.config_paths import get_path
+except ImportError:
+    import engine_bundle
+    from config_paths import get_path
+
+REGISTRY_NAME = "engine_registry.sqlite"
+MODES = ("REAL", "RESEARCH")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS engines (
+    rel_path      TEXT PRIMARY KEY,
+    name          TEXT NOT NULL,
+    mode          TEXT,
+    version       TEXT,
+    horizon       INTEGER,
+    input_window  INTEGER,
+    n_estimators  INTEGER,
+    data_date     TEXT,
+    target_date   TEXT,
+    trained_at    TEXT,
+    n_features    INTEGER,
+    feature_hash  TEXT,
+    features      TEXT,
+    metrics       TEXT,
+    meta          TEXT,
+    file_size     INTEGER,
+    file_mtime    REAL,
+    file_sha1     TEXT,
+    source        TEXT,
+    registered_at TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_engines_cfg ON engines (mode, horizon, input_window, n_estimators, data_date);
+CREATE INDEX IF NOT EXISTS ix_engines_target ON engines (target_date);
+"""
+
+# ------------------------------------------------------------
+# 1) 경로/연결
+# ------------------------------------------------------------
+def default_engine_base() -> str:
+    """HOJ_ENGINE 루트 (config_paths 기준 — 엔진 저장 위치와 같음)."""
+    base = get_path("HOJ_ENGINE")
+    if os.path.isfile(base):
+        base = os.path.dirname(base)
+    return base
+
+def _connect(base: str = None) -> sqlite3.Connection:
+    base = base or default_engine_base()
+    os.makedirs(base, exist_ok=True)
+    con = sqlite3.connect(os.path.join(base, REGISTRY_NAME), timeout=30)
+    con.row_factory = sqlite3.Row
+    con.executescript(SCHEMA)
+    return con
+
+@contextmanager
+def _db(base: str = None):
+    """연결 → 트랜잭션(commit/rollback) → close."""
+    con = _connect(base)
+    try:
+        with con:
+            yield con
+    finally:
+        con.close()
+
+def _base_of(path: str) -> str:
+    """HOJ_ENGINE/{REAL|RESEARCH}/xxx.pkl → HOJ_ENGINE"""
+    return os.path.dirname(os.path.dirname(os.path.abspath(path)))
+
+def _rel(path: str, base: str) -> str:
+    return os.path.relpath(os.path.abspath(path), base).replace("\\", "/")
+
+def file_sha1(path: str, chunk: int = 1 << 20) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for blk in iter(lambda: f.read(chunk), b""):
+            h.update(blk)
+    return h.hexdigest()
+
+# ------------------------------------------------------------
+# 2) 파일명 해석 (레거시 파일 등록용, 유일한 파서)
+# ------------------------------------------------------------
+_NAME_PATS = {
+    "mode": re.compile(r"(?:HOJ|SLE)_ENGINE_(REAL|RESEARCH)", re.I),
+    "version": re.compile(r"_(V\d+)(?:_|\.(?:pkl|hoj)$)"),
+    "d_token": re.compile(r"_d(\d{6,8})_"),
+    "iso_date": re.compile(r"_(\d{4}-\d{2}-\d{2})_"),
+    "tail_date": re.compile(r"_(\d{8}|\d{6})(?:_\d+)?\.(?:pkl|hoj)$"),
+    "short_date": re.compile(r"_(\d{4})\.(?:pkl|hoj)$"),
+    "h": re.compile(r"_h(\d+)(?=_|\.(?:pkl|hoj)$)"),
+    "w": re.compile(r"_w(\d+|full)(?=_|\.(?:pkl|hoj)$)", re.I),
+    "n": re.compile(r"_n(\d+)(?=_|\.(?:pkl|hoj)$)"),
+}
+
+def _to_date(token: str):
+    try:
+        if len(token) == 10:
+            return datetime.strptime(token, "%Y-%m-%d").date()
+        if len(token) == 8:
+            return datetime.strptime(token, "%Y%m%d").date()
+        if len(token) == 6:
+            return datetime.strptime("20" + token, "%Y%m%d").date()
+        if len(token) == 4:
+            return datetime.strptime("2025" + token, "%Y%m%d").date()
+    except ValueError:
+        pass
+    return None
+
+def parse_engine_name(filename: str) -> dict:
+    """파일명 → {mode, version, horizon, input_window, n_estimators, data_date}. 없는 항목은 None."""
+    fn = os.path.basename(filename)
+    P = _NAME_PATS
+    out = {"mode": None, "version": None, "horizon": None, "input_window": None,
+           "n_estimators": None, "data_date": None}
+    if m := P["mode"].search(fn):
+        out["mode"] = m.group(1).upper()
+    if m := P["version"].search(fn):
+        out["version"] = m.group(1)
+    if m := P["h"].search(fn):
+        out["horizon"] = int(m.group(1))
+    if m := P["w"].search(fn):
+        out["input_window"] = 0 if m.group(1).lower() == "full" else int(m.group(1))
+    if m := P["n"].search(fn):
+        out["n_estimators"] = int(m.group(1))
+    m = (P["d_token"].search(fn) or P["iso_date"].search(fn)
+         or P["tail_date"].search(fn) or P["short_date"].search(fn))
+    if m:
+        out["data_date"] = _to_date(m.group(1))
+    return out
+
+def target_date_of(data_date) -> date:
+    """데이터 마지막 날 다음 영업일 = 이 엔진으로 예측하는 기준일."""
+    if data_date is None:
+        return None
+    return (pd.Timestamp(data_date) + BDay(1)).date()
+
+# ------------------------------------------------------------
+# 3) 등록
+# ------------------------------------------------------------
+def _row_from_meta(path: str, base: str, meta: dict, features: list, metrics: dict, source: str) -> dict:
+    st = os.stat(path)
+    parsed = parse_engine_name(path)
+    folder = os.path.basename(os.path.dirname(path)).upper()
+    mode = folder if folder in MODES else str(meta.get("mode") or parsed["mode"] or folder).upper()
+    data_date = meta.get("data_date") or parsed["data_date"]
+    if data_date is not None and not isinstance(data_date, date):
+        data_date = pd.Timestamp(data_date).date()
+    iw = meta.get("input_window", parsed["input_window"])
+    return {
+        "rel_path": _rel(path, base),
+        "name": os.path.basename(path),
+        "mode": mode,
+        "version": meta.get("version") or parsed["version"],
+        "horizon": meta.get("horizon", parsed["horizon"]),
+        "input_window": iw,
+        "n_estimators": meta.get("n_estimators", parsed["n_estimators"]),
+        "data_date": str(data_date) if data_date else None,
+        "target_date": str(target_date_of(data_date)) if data_date else None,
+        "trained_at": meta.get("trained_at") or meta.get("train_date"),
+        "n_features": len(features) if features is not None else None,
+        "feature_hash": meta.get("feature_hash"),
+        "features": json.dumps(list(features), ensure_ascii=False) if features is not None else None,
+        "metrics": json.dumps(metrics or meta.get("metrics") or {}, ensure_ascii=False, default=str),
+        "meta": json.dumps(meta, ensure_ascii=False, default=str),
+        "file_size": st.st_size,
+        "file_mtime": st.st_mtime,
+        "file_sha1": file_sha1(path),
+        "source": source,
+        "registered_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+def _upsert(con: sqlite3.Connection, row: dict):
+    cols = list(row)
+    con.execute(
+        f"INSERT OR REPLACE INTO engines ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})",
+        [row[c] for c in cols],
+    )
+
+def register_engine(path: str, payload: dict, metrics: dict = None, base: str = None) -> dict:
+    """저장 직후 호출: payload(meta/features)로 색인 기록. 반환: 등록 행."""
+    base = base or _base_of(path)
+    meta = dict(payload.get("meta") or {})
+    row = _row_from_meta(path, base, meta, payload.get("features"), metrics, source="save")
+    with _db(base) as con:
+        _upsert(con, row)
+    print(f"[REGISTRY] 등록: {row['name']} (data_date={row['data_date']})")
+    return row
+
+def _register_file(con: sqlite3.Connection, path: str, base: str, deep: bool = False):
+    meta, features, metrics, source = {}, None, None, "name"
+    if engine_bundle.is_bundle(path):
+        # 번들은 헤더(json)만 읽으면 되므로 항상 정밀 등록
+        try:
+            header = engine_bundle.read_header(path)
+            meta, features, metrics, source = header["meta"], header["features"], header["metrics"], "header"
+        except Exception as e:
+            print(f"[REGISTRY] 번들 헤더 읽기 실패 → 파일명 등록: {os.path.basename(path)} ({e})")
+    elif deep:
+        import pickle
+        try:
+            with open(path, "rb") as f:
+                payload = pickle.load(f)
+            if isinstance(payload, dict):
+                meta = dict(payload.get("meta") or {})
+                features = payload.get("features")
+                source = "pickle"
+        except Exception as e:
+            print(f"[REGISTRY] pickle 읽기 실패 → 파일명 등록: {os.path.basename(path)} ({e})")
+    _upsert(con, _row_from_meta(path, base, meta, features, metrics, source))
+
+_SYNC_SIG = {}   # base → 마지막 동기화 시점의 (REAL, RESEARCH) 폴더 수정시각
+
+def _folder_sig(base: str) -> tuple:
+    d = [os.path.join(base, mode) for mode in MODES]
+    return tuple(os.stat(p).st_mtime if os.path.isdir(p) else None for p in d)
+
+def sync_if_changed(base: str = None) -> dict:
+    """폴더 수정시각이 마지막 동기화 이후 바뀐 경우에만 sync. 반환: sync 결과 또는 None."""
+    base = os.path.abspath(base or default_engine_base())
+    sig = _folder_sig(base)
+    if _SYNC_SIG.get(base) == sig:
+        return None
+    stats = sync(base)
+    _SYNC_SIG[base] = sig
+    return stats
+
+def sync(base: str = None, deep: bool = False) -> dict:
+    """
+    폴더와 색인 동기화 (pickle 미개봉, deep=True 일 때만 개봉).
+      - 색인에 없거나 크기/수정시각이 바뀐 파일 → 등록
+      - 사라진 파일 → 삭제
+    반환: {"added", "updated", "removed"}
+    """
+    base = base or default_engine_base()
+    stats = {"added": 0, "updated": 0, "removed": 0}
+    with _db(base) as con:
+        known = {r["rel_path"]: r for r in con.execute(
+            "SELECT rel_path, file_size, file_mtime, source FROM engines")}
+        seen = set()
+        for mode in MODES:
+            d = os.path.join(base, mode)
+            if not os.path.isdir(d):
+                continue
+            for fn in os.listdir(d):
+                if not fn.endswith(engine_bundle.ENGINE_EXTS):
+                    continue
+                path = os.path.join(d, fn)
+                rel = _rel(path, base)
+                seen.add(rel)
+                st = os.stat(path)
+                r = known.get(rel)
+                if r is not None and r["file_size"] == st.st_size and r["file_mtime"] == st.st_mtime \
+                        and not (deep and r["source"] == "name"):
+                    continue
+                _register_file(con, path, base, deep=deep)
+                stats["updated" if r is not None else "added"] += 1
+        for rel in set(known) - seen:
+            con.execute("DELETE FROM engines WHERE rel_path = ?", (rel,))
+            stats["removed"] += 1
+    if any(stats.values()):
+        print(f"[REGISTRY] 동기화: 추가 {stats['added']} / 갱신 {stats['updated']} / 삭제 {stats['removed']}")
+    return stats
+
+# ------------------------------------------------------------
+# 4) 조회
+# ------------------------------------------------------------
+def _to_entry(row: sqlite3.Row, base: str) -> dict:
+    e = dict(row)
+    e["path"] = os.path.join(base, *e["rel_path"].split("/"))
+    for k in ("data_date", "target_date"):
+        e[k] = datetime.strptime(e[k], "%Y-%m-%d").date() if e[k] else None
+    for k in ("features", "metrics", "meta"):
+        e[k] = json.loads(e[k]) if e[k] else None
+    return e
+
+def _query(sql: str, args: tuple = (), base: str = None, do_sync: bool = True) -> list:
+    base = base or default_engine_base()
+    if do_sync:
+        sync_if_changed(base)
+    with _db(base) as con:
+        return [_to_entry(r, base) for r in con.execute(sql, args)]
+
+_ORDER = "ORDER BY data_date IS NULL, data_date DESC, file_mtime DESC"
+
+def list_engines(mode: str = None, base: str = None, do_sync: bool = True) -> list:
+    """엔진 목록 (REAL → RESEARCH, 각 최신 데이터 날짜/수정시각 순)."""
+    if mode:
+        return _query(f"SELECT * FROM engines WHERE mode = ? {_ORDER}", (mode.upper(),), base, do_sync)
+    return _query("SELECT * FROM engines ORDER BY mode = 'RESEARCH', "
+                  "data_date IS NULL, data_date DESC, file_mtime DESC", (), base, do_sync)
+
+def latest_engine(mode: str = "REAL", horizon: int = None, input_window: int = None,
+                  n_estimators: int = None, before=None, base: str = None, do_sync: bool = True):
+    """
+    조건(h/w/n, None 이면 무시)에 맞는 엔진 중 데이터 날짜 최신(동일하면 수정시각 최신) 1개.
+    before: 이 날짜(미포함) 이전 데이터로 학습한 엔진만. 없으면 None.
+    '@' 로 시작하는 파일(보관/비활성 표시)은 자동 선택에서 제외.
+    """
+    where, args = ["mode = ?", "name NOT LIKE '@%'"], [mode.upper()]
+    for col, val in (("horizon", horizon), ("input_window", input_window), ("n_estimators", n_estimators)):
+        if val is not None:
+            where.append(f"{col} = ?")
+            args.append(int(val))
+    if before is not None:
+        where.append("data_date < ?")
+        args.append(str(pd.Timestamp(before).date()))
+    rows = _query(f"SELECT * FROM engines WHERE {' AND '.join(where)} {_ORDER} LIMIT 1",
+                  tuple(args), base, do_sync)
+    return rows[0] if rows else None
+
+def engines_for_date(target, mode: str = None, base: str = None, do_sync: bool = True) -> list:
+    """target(예측 기준일)에 맞는 엔진 = 데이터 마지막 날 다음 영업일이 target 인 엔진."""
+    target = str(pd.Timestamp(target).date())
+    if mode:
+        return _query(f"SELECT * FROM engines WHERE target_date = ? AND mode = ? {_ORDER}",
+                      (target, mode.upper()), base, do_sync)
+    return _query("SELECT * FROM engines WHERE target_date = ? ORDER BY mode = 'RESEARCH', "
+                  "file_mtime DESC", (target,), base, do_sync)
+
+def get_entry(path: str, base: str = None, do_sync: bool = False):
+    """경로로 색인 행 조회 (없으면 None)."""
+    base = base or _base_of(path)
+    rows = _query("SELECT * FROM engines WHERE rel_path = ?", (_rel(path, base),), base, do_sync)
+    return rows[0] if rows else None
+
+# ------------------------------------------------------------
+# 5) CLI
+# ------------------------------------------------------------
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p_ls = sub.add_parser("list")
+    p_ls.add_argument("--mode", default=None, choices=list(MODES))
+    p_rb = sub.add_parser("rebuild")
+    p_rb.add_argument("--deep", action="store_true", help="pickle meta 로 정밀 등록 (1회성)")
+    for p in (p_ls, p_rb):
+        p.add_argument("--base", default=None, help="HOJ_ENGINE 폴더 (기본 config_paths 의 HOJ_ENGINE)")
+    args = ap.parse_args()
+
+    if args.cmd == "rebuild":
+        sync(args.base, deep=args.deep)
+    else:
+        for e in list_engines(args.mode, base=args.base):
+            print(f"{e['mode']:<8} {str(e['data_date']):<10} h={e['horizon']} w={e['input_window']} "
+                  f"n={e['n_estimators']} [{e['source']}] {e['name']}")
@@ -0,0 +1,213 @@
+# ============================================================
+# ensemble_scorer.py
+#  - 엔진 여러 개(h/w 변형, REAL vs RESEARCH, HOJ + SLE)를 한 번의 피처 행렬로 채점 + 혼합
+#    (기존: 엔진마다 DB 다시 로드 → X 다시 생성 → predict)
+#  - 대상 날짜 행만, 모든 엔진 피처의 합집합 컬럼만 1회 읽어 float64 행렬 X 생성
+#    → 엔진별로 X 의 열 부분(피처가 연속 구간이면 복사 없는 view)만 넘겨 예측
+#  - SLE 피처(PBR/PER/수급)는 SLE DB 스냅샷을 (Code 별) 대상일 이전 최신값으로 붙임 (학습 시 ffill 과 동일)
+#  - 엔진별 score / prob / combo (combo = prob × clip(score, -10%)) + 혼합 점수
+#      mean     : 엔진 값 평균
+#      rank     : 날짜별 백분위 순위 평균 (엔진 간 점수 척도 차이 제거)
+#      weighted : 가중 평균 (weights 미지정 시 균등)
+#    피처 결측으로 일부 엔진만 예측된 종목은 예측된 엔진만으로 혼합 (n_engines 컬럼)
+#  - tree_compiler 로 컴파일 가능하면 컴파일 모델 사용
+#
+#  사용 예)
+#    python ensemble_scorer.py --engines A.hoj,B.hoj,SLE_ENGINE_REAL_...hoj --blend rank --k 10
+#    python ensemble_scorer.py --engines A.hoj,B.hoj --date 2025-11-20 --weights 2,1
+# ============================================================
+
+import os
+import sys
+import argparse
+import warnings
+
+import numpy as np
+import pandas as pd
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+modelengine_dir = os.path.dirname(current_dir)
+root_dir = os.path.dirname(modelengine_dir)
+sys.path.extend([root_dir, modelengine_dir])
+
+try:
+    from MODELENGINE.UTIL import train_engine_unified as T
+    from MODELENGINE.UTIL import engine_bundle
+    from MODELENGINE.UTIL.tree_compiler import compile_engine
+except ImportError:
+    import train_engine_unified as T
+    import engine_bundle
+    from tree_compiler import compile_engine
+
+BLENDS = ("mean", "rank", "weighted")
+METRICS = ("combo", "score", "prob")
+KEY_COLS = ["Date", "Code", "Name", "Close"]
+
+
+def _family_of(payload, path: str) -> str:
+    fam = (payload.get("meta") or {}).get("family")
+    if fam:
+        return fam
+    return "SLE" if os.path.basename(path).upper().startswith("SLE_ENGINE") else "HOJ"
+
+
+class EnsembleScorer:
+    """
+    engines: 엔진 경로 목록. labels 미지정 시 파일명(확장자 제외)을 엔진 라벨로 사용.
+    weights: 엔진 순서대로 가중치 (weighted 혼합용, 미지정 시 균등).
+    """
+
+    def __init__(self, engines: list, weights: list = None, labels: list = None,
+                 sle_path: str = None, compiled: bool = True):
+        if not engines:
+            raise ValueError("엔진이 없습니다.")
+        self.paths = list(engines)
+        self.labels = list(labels) if labels else [os.path.splitext(os.path.basename(p))[0] for p in self.paths]
+        if len(set(self.labels)) != len(self.labels):
+            raise ValueError(f"엔진 라벨 중복: {self.labels}")
+        w = np.ones(len(self.paths)) if weights is None else np.asarray(weights, dtype=float)
+        if len(w) != len(self.paths) or w.sum() <= 0:
+            raise ValueError("weights 는 엔진 수와 같은 길이의 양수 목록")
+        self.weights = w / w.sum()
+        self.sle_path = sle_path
+
+        self.engines = []
+        for path, label in zip(self.paths, self.labels):
+            payload = engine_bundle.load_engine(path)
+            scorer = payload
+            if compiled:
+                try:
+                    scorer = compile_engine(payload)
+                except NotImplementedError as e:
+                    print(f"[ENSEMBLE] 트리 컴파일 미지원 → LightGBM 예측: {label} ({e})")
+            self.engines.append({"label": label, "path": path, "family": _family_of(payload, path),
+                                 "features": list(payload.get("features") or []), "scorer": scorer})
+
+        # 합집합 피처 순서: 엔진 순서대로 이어 붙임 → 앞 엔진(및 부분집합 엔진)은 연속 구간 view
+        self.features = list(dict.fromkeys(f for e in self.engines for f in e["features"]))
+        pos = {f: i for i, f in enumerate(self.features)}
+        for e in self.engines:
+            idx = np.array([pos[f] for f in e["features"]], dtype=np.int64)
+            contiguous = len(idx) > 0 and np.array_equal(idx, np.arange(idx[0], idx[0] + len(idx)))
+            e["cols"] = slice(int(idx[0]), int(idx[0]) + len(idx)) if contiguous else idx
+        self.sle_features = [f for f in self.features if f in T.SLE_FEATURES
+                             and any(e["family"] == "SLE" and f in e["features"] for e in self.engines)]
+
+    def __repr__(self):
+        return f"EnsembleScorer(engines={self.labels}, features={len(self.features)})"
+
+    # ---- 1) 피처 행렬 (1회) ----
+    def feature_matrix(self, dates=None, db_path: str = None):
+        """
+        dates: 날짜 1개 / 목록 / None(DB 최신일). 반환: (keys DataFrame[Date, Code, Name, Close], X ndarray)
+        """
+        db_path = db_path or T.find_latest_db_path()
+        have = set(T.schema_frame(db_path).columns)
+        hoj_feats = [f for f in self.features if f not in self.sle_features]
+        missing = [f for f in hoj_feats if f not in have]
+        if missing:
+            raise KeyError(f"필수 피처가 DB에 없습니다: {missing[:5]}...")
+
+        if dates is None:
+            d = pd.to_datetime(pd.read_parquet(db_path, columns=["Date"])["Date"])
+            days = [d.max()]
+        else:
+            many = isinstance(dates, (list, tuple, np.ndarray, pd.Index, pd.Series))
+            days = [pd.Timestamp(x).normalize() for x in (dates if many else [dates])]
+        cols = [c for c in dict.fromkeys(KEY_COLS + hoj_feats) if c in have]
+        try:
+            df = pd.read_parquet(db_path, columns=cols, filters=[("Date", "in", days)])
+        except Exception:
+            df = pd.read_parquet(db_path, columns=cols)
+        df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+        df = df[df["Date"].isin(days)]
+        df["Code"] = df["Code"].astype(str).str.zfill(6)
+        df = df.sort_values(["Date", "Code"], kind="mergesort").reset_index(drop=True)
+
+        if self.sle_features and not df.empty:
+            df = self._attach_sle(df)
+        X = np.ascontiguousarray(df[self.features].to_numpy(dtype=np.float64))
+        keys = df[[c for c in KEY_COLS if c in df.columns]]
+        return keys, X
+
+    def _attach_sle(self, df: pd.DataFrame) -> pd.DataFrame:
+        sle_path = self.sle_path or T.find_latest_sle_db_path()
+        sle = T.load_sle_frame(sle_path)
+        sle = sle[sle["Date"] <= df["Date"].max()].sort_values("Date", kind="mergesort")
+        out = pd.merge_asof(df.sort_values("Date", kind="mergesort"), sle, on="Date", by="Code",
+                            direction="backward")
+        return out.sort_values(["Date", "Code"], kind="mergesort").reset_index(drop=True)
+
+    # ---- 2) 채점 + 혼합 ----
+    def score(self, dates=None, db_path: str = None, metric: str = "combo") -> pd.DataFrame:
+        """
+        반환 컬럼: Date/Code/Name/Close, {라벨}:score|prob|combo (엔진별),
+                   score/prob/combo (엔진 평균), blend_mean / blend_rank / blend_weighted (metric 기준), n_engines
+        """
+        if metric not in METRICS:
+            raise ValueError(f"metric 은 {METRICS} 중 하나")
+        keys, X = self.feature_matrix(dates, db_path)
+        out = keys.copy()
+        n = len(out)
+        vals = {m: np.full((n, len(self.engines)), np.nan) for m in METRICS}
+        for j, e in enumerate(self.engines):
+            Xe = X[:, e["cols"]]
+            ok = ~np.isnan(Xe).any(axis=1)
+            if not ok.any():
+                continue
+            Xv = Xe[ok]
+            reg, cls = e["scorer"].get("model_reg"), e["scorer"].get("model_cls")
+            s = np.asarray(reg.predict(Xv), dtype=float) if reg is not None else np.zeros(len(Xv))
+            p = np.asarray(cls.predict_proba(Xv)[:, 1], dtype=float) if cls is not None else np.zeros(len(Xv))
+            vals["score"][ok, j], vals["prob"][ok, j] = s, p
+            vals["combo"][ok, j] = p * np.clip(s, -0.10, None)
+        per_engine = {f"{e['label']}:{m}": vals[m][:, j] for j, e in enumerate(self.engines) for m in METRICS}
+        out = pd.concat([out, pd.DataFrame(per_engine, index=out.index)], axis=1)
+
+        has = ~np.isnan(vals[metric])
+        out["n_engines"] = has.sum(axis=1)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)      # 예측 엔진 0개 행 (아래에서 제외)
+            for m in METRICS:
+                out[m] = np.nanmean(vals[m], axis=1)
+            v = vals[metric]
+            out["blend_mean"] = out[metric]
+            w = np.where(has, self.weights, 0.0)
+            out["blend_weighted"] = (np.nan_to_num(v) * w).sum(axis=1) / w.sum(axis=1)
+            # 날짜별 엔진 백분위 순위 평균
+            ranks = pd.DataFrame(v).groupby(out["Date"].to_numpy()).rank(pct=True).to_numpy()
+            out["blend_rank"] = np.nanmean(ranks, axis=1)
+        return out[out["n_engines"] > 0].reset_index(drop=True)
+
+    def topk(self, k: int = 10, date=None, blend: str = "rank", metric: str = "combo",
+             code: str = None, db_path: str = None) -> pd.DataFrame:
+        if blend not in BLENDS:
+            raise ValueError(f"blend 는 {BLENDS} 중 하나")
+        df = self.score(date, db_path, metric)
+        if code is not None:
+            return df[df["Code"] == str(code).zfill(6)].reset_index(drop=True)
+        col = f"blend_{blend}"
+        return df.sort_values(["Date", col], ascending=[True, False], kind="mergesort") \
+                 .groupby("Date", sort=True).head(int(k)).reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--engines", required=True, help="엔진 경로 (쉼표 구분)")
+    ap.add_argument("--weights", default=None, help="가중치 (쉼표 구분, 엔진 순서)")
+    ap.add_argument("--date", default=None, help="YYYY-MM-DD (쉼표로 여러 날짜, 미지정 시 DB 최신일)")
+    ap.add_argument("--blend", default="rank", choices=list(BLENDS))
+    ap.add_argument("--metric", default="combo", choices=list(METRICS))
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--db", default=None)
+    ap.add_argument("--sle_db", default=None)
+    args = ap.parse_args()
+
+    es = EnsembleScorer(args.engines.split(","),
+                        weights=[float(x) for x in args.weights.split(",")] if args.weights else None,
+                        sle_path=args.sle_db)
+    print(f"[ENSEMBLE] {es}")
+    res = es.topk(args.k, args.date.split(",") if args.date else None, args.blend, args.metric, db_path=args.db)
+    show = ["Date", "Code", "Name", "Close", "n_engines", "score", "prob", "combo", f"blend_{args.blend}"]
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print(res[[c for c in show if c in res.columns]].to_string(index=False))
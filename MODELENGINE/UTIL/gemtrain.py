@@ -28,12 +28,16 @@ sys.path.append(root_dir)
 
 try:
     from MODELENGINE.UTIL.config_paths import get_path
-    from MODELENGINE.UTIL.version_utils import backup_existing_file
 except ImportError:
     # UTIL 폴더 내부에서 실행될 경우 대비
     sys.path.append(parent_dir)
     from UTIL.config_paths import get_path
-    from UTIL.version_utils import backup_existing_file
+
+# 바이닝 캐시(lgb.Dataset 공유) + 엔진 모델 래퍼
+from MODELENGINE.UTIL.lgb_cache import load_or_build_dataset, train_head
+from MODELENGINE.UTIL.engine_models import BoosterRegressor, BoosterClassifier
+from MODELENGINE.UTIL.train_engine_unified import db_fingerprint
+from MODELENGINE.UTIL import engine_registry
 
 # 최신 날짜 태그가 붙은 DB 파일 자동 탐색 (기존 동작 유지)
 from MODELENGINE.UTIL.version_utils import find_latest_file
@@ -66,24 +70,36 @@ def ensure_datetime(df: pd.DataFrame, col: str = "Date") -> pd.DataFrame:
     return df
 
 
-def build_dynamic_target(df: pd.DataFrame, horizon: int) -> pd.DataFrame:
+def build_dynamic_targets(df: pd.DataFrame, horizons: list) -> pd.DataFrame:
     """
-    요청한 Horizon(예: 5일)에 맞는 정답지(Return_{h}d, Label_{h}d)가 없으면 즉시 생성.
+    여러 Horizon 의 정답지(Return_{h}d, Label_{h}d)를 1회 정렬 + 1회 groupby 로 한꺼번에 생성.
+    이미 있는 컬럼은 건너뜀.
     """
-    ret_col = f"Return_{horizon}d"
-    lab_col = f"Label_{horizon}d"
-
-    if ret_col in df.columns and lab_col in df.columns:
+    todo = [int(h) for h in dict.fromkeys(horizons)
+            if f"Return_{int(h)}d" not in df.columns or f"Label_{int(h)}d" not in df.columns]
+    if not todo:
         return df
 
-    print(f"[Target] '{ret_col}' 생성 중 (Horizon={horizon})...")
+    print(f"[Target] Return_{{h}}d 생성 중 (Horizons={todo})...")
     if "Close" not in df.columns:
         raise KeyError("DB에 'Close' 컬럼이 없어 타겟을 생성할 수 없습니다.")
 
     df = df.sort_values(["Code", "Date"]).copy()
-    df[ret_col] = df.groupby("Code")["Close"].shift(-horizon) / df["Close"] - 1.0
-    df[lab_col] = (df[ret_col] > 0).astype(int)
-    return df
+    close = df["Close"]
+    g = close.groupby(df["Code"], sort=False)
+    new_cols = {}
+    for h in todo:
+        ret = g.shift(-h) / close - 1.0
+        new_cols[f"Return_{h}d"] = ret
+        new_cols[f"Label_{h}d"] = (ret > 0).astype(int)
+    return df.assign(**new_cols)
+
+
+def build_dynamic_target(df: pd.DataFrame, horizon: int) -> pd.DataFrame:
+    """
+    요청한 Horizon(예: 5일)에 맞는 정답지(Return_{h}d, Label_{h}d)가 없으면 즉시 생성.
+    """
+    return build_dynamic_targets(df, [horizon])
 
 
 def get_save_filename(
@@ -122,6 +138,7 @@ def run_unified_training(
     valid_days: int = 365,
     n_estimators: int = 1000,
     version: str = "V31",
+    use_cache: bool = True,
 ) -> None:
     mode = mode.lower()
     print("\n=== [HOJ Engine Factory V33] 시작 =========================")
@@ -219,43 +236,52 @@ def run_unified_training(
     df_train = df[mask].copy()
     print(f"[Data] NaN 제거 후 학습 데이터: {len(df_train):,} rows (From {df_train['Date'].min().date()})")
 
-    # [F] 모델 파라미터 및 학습 (원본 동일)
+    # [F] 모델 파라미터 및 학습 (원본 동일 파라미터, lgb.train 이름으로 표기)
+    #     바이닝은 1회(디스크 캐시) → 회귀/분류가 같은 Dataset 공유
     params_common = {
-        "n_estimators": n_estimators,
         "learning_rate": 0.03,
         "num_leaves": 63,
         "feature_fraction": 0.9,
         "bagging_fraction": 0.9,
         "bagging_freq": 3,
-        "n_jobs": -1,
+        "num_threads": 0,
         "verbose": -1,
-        "random_state": 42,
+        "seed": 42,
     }
+    params_reg = dict(params_common, objective="regression", metric="rmse")
+    params_cls = dict(params_common, objective="binary", metric="binary_logloss")
+
+    y_reg = df_train[ret_col].to_numpy(dtype="float64")
+    y_cls = df_train[lab_col].to_numpy(dtype="float64")
+    full, hit = load_or_build_dataset(
+        lambda: (df_train[feature_cols], y_reg),
+        feature_cols, db_path, db_fingerprint(db_path),
+        {"trainer": "gemtrain", "horizon": horizon, "input_window": input_window, "rows": len(df_train)},
+        use_cache=use_cache,
+    )
+    print(f"[Bin] lgb.Dataset {'캐시 로드' if hit else '구성'} 완료 (rows={full.num_data():,})")
 
     metrics = {}
     if mode == "research":
         split_date = max_date_obj - timedelta(days=valid_days)
         print(f"[Split] Research 모드 검증 분리: split={split_date.date()}")
 
-        mask_tr = df_train["Date"] < split_date
-        mask_va = df_train["Date"] >= split_date
+        is_va = (df_train["Date"] >= split_date).to_numpy()
+        tr_idx, va_idx = np.flatnonzero(~is_va), np.flatnonzero(is_va)
 
-        X_tr = df_train.loc[mask_tr, feature_cols]
-        y_tr_reg = df_train.loc[mask_tr, ret_col]
-        y_tr_cls = df_train.loc[mask_tr, lab_col]
+        X_va = df_train[feature_cols].iloc[va_idx]
+        y_va_reg = y_reg[va_idx]
+        y_va_cls = y_cls[va_idx]
 
-        X_va = df_train.loc[mask_va, feature_cols]
-        y_va_reg = df_train.loc[mask_va, ret_col]
-        y_va_cls = df_train.loc[mask_va, lab_col]
-
-        print(f"[Size] Train={len(X_tr):,} | Valid={len(X_va):,}")
+        print(f"[Size] Train={len(tr_idx):,} | Valid={len(va_idx):,}")
 
         print("[Train] 회귀(Reg) & 분류(Cls) 학습...")
-        model_reg = lgb.LGBMRegressor(objective="regression", metric="rmse", **params_common)
-        model_reg.fit(X_tr, y_tr_reg, eval_set=[(X_va, y_va_reg)], callbacks=[lgb.early_stopping(100, verbose=False)])
+        es = [lgb.early_stopping(100, verbose=False)]
+        booster = train_head(params_reg, full, y_reg, tr_idx, va_idx, n_estimators, callbacks=es)
+        model_reg = BoosterRegressor(booster, params=params_reg, best_iteration=booster.best_iteration)
 
-        model_cls = lgb.LGBMClassifier(objective="binary", metric="binary_logloss", **params_common)
-        model_cls.fit(X_tr, y_tr_cls, eval_set=[(X_va, y_va_cls)], callbacks=[lgb.early_stopping(100, verbose=False)])
+        booster = train_head(params_cls, full, y_cls, tr_idx, va_idx, n_estimators, callbacks=es)
+        model_cls = BoosterClassifier(booster, params=params_cls, best_iteration=booster.best_iteration)
 
         rmse = np.sqrt(np.mean((model_reg.predict(X_va) - y_va_reg) ** 2))
         acc = np.mean(model_cls.predict(X_va) == y_va_cls)
@@ -264,15 +290,12 @@ def run_unified_training(
 
     else:
         print("[Train] Real 모드: 전체 데이터로 학습...")
-        X_tr = df_train[feature_cols]
-        y_tr_reg = df_train[ret_col]
-        y_tr_cls = df_train[lab_col]
-
-        model_reg = lgb.LGBMRegressor(objective="regression", metric="rmse", **params_common)
-        model_reg.fit(X_tr, y_tr_reg)
+        all_idx = np.arange(len(df_train))
 
-        model_cls = lgb.LGBMClassifier(objective="binary", metric="binary_logloss", **params_common)
-        model_cls.fit(X_tr, y_tr_cls)
+        model_reg = BoosterRegressor(
+            train_head(params_reg, full, y_reg, all_idx, num_boost_round=n_estimators), params=params_reg)
+        model_cls = BoosterClassifier(
+            train_head(params_cls, full, y_cls, all_idx, num_boost_round=n_estimators), params=params_cls)
 
         metrics = {"note": "Real mode full train"}
 
@@ -311,6 +334,10 @@ def run_unified_training(
         pickle.dump(payload, f)
 
     print(f"[Save] 엔진 저장 완료: {save_name}")
+    try:
+        engine_registry.register_engine(save_path, payload, metrics=metrics)
+    except Exception as e:
+        print(f"[REGISTRY] 등록 실패 (다음 조회 시 파일명으로 동기화): {e}")
     print("=== [HOJ Engine Factory V33] 완료 =========================\n")
 
 
@@ -325,6 +352,7 @@ if __name__ == "__main__":
     parser.add_argument("--valid_days", type=int, default=365)
     parser.add_argument("--n_estimators", type=int, default=1000)
     parser.add_argument("--version", type=str, default="V31")
+    parser.add_argument("--no_cache", action="store_true", help="바이닝 캐시 미사용 (항상 재바이닝)")
 
     args = parser.parse_args()
 
@@ -348,6 +376,7 @@ if __name__ == "__main__":
                 valid_days=args.valid_days,
                 n_estimators=args.n_estimators,
                 version=args.version,
+                use_cache=not args.no_cache,
             )
             
     except Exception as e:
@@ -0,0 +1,267 @@
+# ============================================================
+# grid_search.py
+#  - horizon × input_window × n_estimators 그리드를 run_unified_training 위에서 병렬 실행
+#  - 베이스 DB 1회 로드 → (horizon, input_window) 조합별 마스크/바이닝을 부모에서 1회 생성
+#    (HOJ_DB/CACHE/mask, CACHE/lgb) → 워커는 캐시를 읽기 전용으로 공유
+#  - 워커별 LightGBM 스레드 고정: num_threads = CPU // workers (코어 과점유 방지)
+#  - 결과: OUTPUT/GRID/hoj_grid_result.csv (1포인트 완료마다 append) + .xlsx + 마스터 리포트 txt
+#  - 재실행 시 결과표에 done 으로 기록된 포인트는 건너뜀 (중단 후 이어하기)
+#  - 같은 이름 엔진이 있으면 그 엔진의 검증 지표를 사용 (skip). 엔진 이름에 없는 valid_days 가 다르거나
+#    지표가 없으면 저장 없이 재학습해 평가 (save=False) → 지표 없는 skip 행은 완료로 보지 않음
+#
+#  사용 예)
+#    python grid_search.py --horizons 1,5,10,20 --windows 20,40,60 --n_estimators 500,1000 --workers 4
+# ============================================================
+
+import os
+import sys
+import time
+import argparse
+import itertools
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+modelengine_dir = os.path.dirname(current_dir)
+root_dir = os.path.dirname(modelengine_dir)
+sys.path.extend([root_dir, modelengine_dir])
+
+try:
+    from MODELENGINE.UTIL import train_engine_unified as T
+except ImportError:
+    import train_engine_unified as T
+
+RESULT_COLS = [
+    "point_id", "mode", "horizon", "input_window", "n_estimators", "valid_days",
+    "status", "auc", "rmse", "best_iter_reg", "best_iter_cls", "t_prepare", "t_train", "t_total",
+    "num_threads", "db_fp", "engine_path", "finished_at", "error",
+]
+
+# ------------------------------------------------------------
+# 1) 그리드/결과표
+# ------------------------------------------------------------
+def _int_list(text: str) -> list:
+    return [int(x) for x in str(text).split(",") if x.strip()]
+
+def point_id(mode: str, horizon: int, input_window: int, n_estimators: int,
+             valid_days: int, db_fp: str) -> str:
+    return f"{mode}|h{horizon}|w{input_window}|n{n_estimators}|v{valid_days}|{db_fp}"
+
+def build_grid(horizons: list, windows: list, n_estimators: list) -> list:
+    # (h, w) 순으로 묶어 같은 마스크 캐시를 연속 사용
+    return [
+        {"horizon": h, "input_window": w, "n_estimators": n}
+        for h, w, n in itertools.product(horizons, windows, n_estimators)
+    ]
+
+def load_results(path: str) -> pd.DataFrame:
+    if os.path.exists(path):
+        try:
+            return pd.read_csv(path, dtype={"point_id": str})
+        except Exception as e:
+            print(f"[GRID] 결과표 읽기 실패 → 새로 작성 ({e})")
+    return pd.DataFrame(columns=RESULT_COLS)
+
+def append_result(path: str, row: dict):
+    """1포인트 완료마다 즉시 기록 (중단되어도 완료분 보존)."""
+    first = not os.path.exists(path)
+    pd.DataFrame([row], columns=RESULT_COLS).to_csv(
+        path, mode="a", header=first, index=False, encoding="utf-8-sig"
+    )
+
+# ------------------------------------------------------------
+# 2) 베이스 데이터셋 1회 준비 (부모 프로세스)
+# ------------------------------------------------------------
+def prepare_shared_caches(points: list, version: str, db_path: str):
+    """
+    DB를 1회만 읽고 (horizon, input_window) 조합별 마스크 프레임 + 바이닝 Dataset 을
+    캐시에 만들어 둔다. 워커는 이 캐시를 읽기만 한다.
+    """
+    combos = sorted({(p["horizon"], p["input_window"]) for p in points})
+    df0 = T.schema_frame(db_path)
+    close_col = T.pick_close_column(df0)
+    cand = [c for c in T.select_feature_columns(df0) if c != close_col]
+
+    db_fp = T.db_fingerprint(db_path)
+    mask_dir = T._mask_cache_dir(db_path)
+
+    base = None
+    for h, w in combos:
+        t0 = time.perf_counter()
+        key = T.mask_cache_key(db_fp, cand, w, h, close_col)
+        cached = os.path.exists(os.path.join(mask_dir, f"mask_{db_fp}_{key}.parquet"))
+        if base is None and not cached:
+            base = pd.read_parquet(db_path, columns=list(dict.fromkeys(["Date", "Code", close_col] + cand)))
+            if not pd.api.types.is_datetime64_any_dtype(base["Date"]):
+                base["Date"] = pd.to_datetime(base["Date"])
+            print(f"[GRID] 베이스 DB 로드: rows={len(base):,}, cols={base.shape[1]}")
+        prep = T.prepare_training_set(version, h, w, use_cache=True, db_path=db_path, base_df=base)
+        T.build_lgb_dataset(prep)
+        print(f"[GRID] 캐시 준비 h={h} w={w} ({time.perf_counter() - t0:.1f}s)")
+        del prep
+        T._MASK_MEMO.clear()
+    del base
+
+# ------------------------------------------------------------
+# 3) 워커
+# ------------------------------------------------------------
+_LAST_COMBO = None
+
+def _init_worker(num_threads: int):
+    os.environ["OMP_NUM_THREADS"] = str(num_threads)
+
+def _reusable(res: dict, pt: dict) -> bool:
+    """SKIP 된 기존 엔진을 이 포인트의 결과로 쓸 수 있는지 (같은 valid_days + 검증 지표 있음)."""
+    if pt["mode"] == "real":
+        return True   # REAL 은 전체 행 학습 → valid_days 무관, 검증 지표 없음
+    return res.get("valid_days") == pt["valid_days"] and res.get("rmse") is not None
+
+def _run_point(pt: dict) -> dict:
+    global _LAST_COMBO
+    t0 = time.perf_counter()
+    # 워커 메모리: 현재 (horizon, input_window) 마스크 프레임만 유지
+    combo = (pt["horizon"], pt["input_window"])
+    if combo != _LAST_COMBO:
+        T._MASK_MEMO.clear()
+        _LAST_COMBO = combo
+    row = {c: None for c in RESULT_COLS}
+    row.update({k: pt[k] for k in ("point_id", "mode", "horizon", "input_window",
+                                   "n_estimators", "valid_days", "num_threads", "db_fp")})
+    try:
+        kw = dict(
+            mode=pt["mode"], horizon=pt["horizon"], input_window=pt["input_window"],
+            valid_days=pt["valid_days"], n_estimators=pt["n_estimators"],
+            version=pt["version"], use_cache=True, num_threads=pt["num_threads"],
+        )
+        res = T.run_unified_training(**kw)
+        if res["status"] == "skip" and not _reusable(res, pt):
+            print(f"[GRID] {pt['point_id']}: 같은 이름 엔진의 valid_days={res.get('valid_days')} / "
+                  f"지표 없음 → 저장 없이 재학습")
+            res = T.run_unified_training(save=False, **kw)
+        res.pop("prep", None)
+        row.update({k: res.get(k) for k in ("status", "auc", "rmse", "t_prepare", "t_train", "engine_path")})
+        bi = res.get("best_iteration") or {}
+        row.update({"best_iter_reg": bi.get("reg"), "best_iter_cls": bi.get("cls")})
+    except Exception as e:
+        row.update({"status": "error", "error": str(e)})
+    row["t_total"] = round(time.perf_counter() - t0, 3)
+    row["finished_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return row
+
+# ------------------------------------------------------------
+# 4) 리포트
+# ------------------------------------------------------------
+def write_reports(csv_path: str):
+    df = load_results(csv_path)
+    if df.empty:
+        return
+    df = df.drop_duplicates("point_id", keep="last")
+    done = df[df["status"] == "done"].copy()
+
+    xlsx_path = csv_path.replace(".csv", ".xlsx")
+    try:
+        with pd.ExcelWriter(xlsx_path) as writer:
+            if not done.empty:
+                summary = (done.groupby(["horizon", "input_window"])
+                           .agg(best_auc=("auc", "max"), min_rmse=("rmse", "min"),
+                                mean_t_train=("t_train", "mean"), points=("point_id", "count"))
+                           .reset_index())
+                summary.to_excel(writer, sheet_name="요약결과", index=False)
+            df.to_excel(writer, sheet_name="상세기록", index=False)
+        print(f"[GRID] 엑셀 저장: {xlsx_path}")
+    except Exception as e:
+        print(f"[GRID] 엑셀 저장 실패: {e}")
+
+    txt_path = os.path.join(os.path.dirname(csv_path), "그리드서치 마스터 리포트.txt")
+    lines = [
+        "=== HOJ 그리드서치 마스터 리포트 ===",
+        f"생성: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+        f"포인트: 완료 {len(done)} / 전체 {len(df)} (오류 {int((df['status'] == 'error').sum())})",
+        "",
+    ]
+    if not done.empty:
+        top = done.sort_values("auc", ascending=False).head(10)
+        lines.append("[AUC 상위 10]")
+        for _, r in top.iterrows():
+            lines.append(
+                f"  h={int(r['horizon'])} w={int(r['input_window'])} n={int(r['n_estimators'])}"
+                f"  AUC={r['auc']:.4f}  RMSE={r['rmse']:.5f}  train={r['t_train']:.1f}s"
+            )
+    with open(txt_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    print(f"[GRID] 리포트 저장: {txt_path}")
+
+# ------------------------------------------------------------
+# 5) 메인
+# ------------------------------------------------------------
+def run_grid(horizons: list, windows: list, n_estimators: list, mode: str = "research",
+             valid_days: int = 365, version: str = "V31", workers: int = 2,
+             out_path: str = None) -> pd.DataFrame:
+    db_path = T.find_latest_db_path(version)
+    db_fp = T.db_fingerprint(db_path)
+
+    if out_path is None:
+        out_dir = T.ensure_dir(os.path.join(T.get_path("OUTPUT"), "GRID"))
+        out_path = os.path.join(out_dir, "hoj_grid_result.csv")
+    else:
+        T.ensure_dir(os.path.dirname(os.path.abspath(out_path)))
+
+    workers = max(1, int(workers))
+    num_threads = max(1, (os.cpu_count() or 1) // workers)
+
+    points = []
+    for p in build_grid(horizons, windows, n_estimators):
+        p.update({"mode": mode, "valid_days": valid_days, "version": version,
+                  "num_threads": num_threads, "db_fp": db_fp})
+        p["point_id"] = point_id(mode, p["horizon"], p["input_window"], p["n_estimators"], valid_days, db_fp)
+        points.append(p)
+
+    prev = load_results(out_path)
+    finished = (prev["status"] == "done") | ((prev["status"] == "skip") &
+                                             ((prev["mode"] == "real") | prev["rmse"].notna()))
+    done_ids = set(prev.loc[finished, "point_id"].astype(str))
+    todo = [p for p in points if p["point_id"] not in done_ids]
+
+    print(f"=== 🔎 HOJ Grid Search ({mode.upper()}) ===")
+    print(f"[GRID] DB={os.path.basename(db_path)} | 전체 {len(points)} / 완료 {len(points) - len(todo)} / 남음 {len(todo)}")
+    print(f"[GRID] workers={workers} × num_threads={num_threads} | 결과표: {out_path}")
+
+    if todo:
+        prepare_shared_caches(todo, version, db_path)
+
+        if workers == 1:
+            for p in todo:
+                row = _run_point(p)
+                append_result(out_path, row)
+                print(f"[GRID] {row['point_id']} → {row['status']} AUC={row['auc']} ({row['t_total']}s)")
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(num_threads,)) as ex:
+                futs = {ex.submit(_run_point, p): p for p in todo}
+                for fut in as_completed(futs):
+                    row = fut.result()
+                    append_result(out_path, row)
+                    print(f"[GRID] {row['point_id']} → {row['status']} AUC={row['auc']} ({row['t_total']}s)")
+
+    write_reports(out_path)
+    return load_results(out_path)
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--horizons", default="1,5,10,20")
+    ap.add_argument("--windows", default="20,40,60,0", help="input_window 목록 (0=전체 피처)")
+    ap.add_argument("--n_estimators", default="1000")
+    ap.add_argument("--mode", default="research", choices=["research", "real"])
+    ap.add_argument("--valid_days", type=int, default=365)
+    ap.add_argument("--version", default="V31")
+    ap.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 4))
+    ap.add_argument("--out", default=None, help="결과 CSV 경로 (기본 OUTPUT/GRID/hoj_grid_result.csv)")
+    args = ap.parse_args()
+
+    run_grid(
+        _int_list(args.horizons), _int_list(args.windows), _int_list(args.n_estimators),
+        mode=args.mode, valid_days=args.valid_days, version=args.version,
+        workers=args.workers, out_path=args.out,
+    )
@@ -0,0 +1,345 @@
+# ============================================================
+# incremental_update.py
+#  - RAW 늦은 보정 → 바뀐 종목만 피처 / DB / 예측 큐브 / 당일 Top-K 다시 계산
+#    (기존: 몇 종목 보정에도 build_features 전체 → DB 재생성 → daily_recommender 전 종목 재예측)
+#  - 입력: raw_changes.jsonl 의 미반영 늦은 보정 키 (raw_patch --fix 전체 + 기존 행 값 변경 fix) 또는 --date / --codes 직접 지정
+#  - 종속 구간
+#      피처: 모든 지표가 과거→현재 방향 → 종목별 최초 변경일 이후 행만 바뀜
+#            (MACD 의 EWM 은 전 이력 의존이라 계산은 종목 전체 이력으로, 교체는 변경일 이후 행만)
+#      큐브 fwd_ret(t) = Close(t+h)/Close(t)-1 → 변경일 h 거래일 앞 행까지 다시 붙임 (prediction_cube.patch_cube)
+#  - 반영
+#      FEATURE / DB 파일: 해당 (종목, 변경일 이후) 행 교체 후 같은 경로에 원자적 덮어쓰기
+#      큐브: 교체 행만 재예측 → 파티션 행 교체, manifest.db_fp 갱신 (update_all 이 다시 돌지 않음)
+#      Top-K: 보정일 리포트(CSV/TXT/XLSX) 를 같은 파일명으로 다시 쓰고 변경 요약(진입/이탈/순위) 을 TXT 에 덧붙임
+#  - DB 최신일 이후 날짜(새 거래일)는 대상 아님 → 기존 전체 파이프라인
+#    (RAW 가 DB 보다 앞서 있어도 재계산 행은 DB / FEATURE 파일 각자의 최신일까지만 교체, 최신일은 그대로)
+#  - 처리 결과는 raw_changes.jsonl 에 applied 로 기록
+#
+#  사용 예)
+#    python incremental_update.py pending
+#    python incremental_update.py run
+#    python incremental_update.py run --date 2025-11-21 --codes 005930,000660
+# ============================================================
+
+import os
+import re
+import sys
+import glob
+import time
+import argparse
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+modelengine_dir = os.path.dirname(current_dir)
+root_dir = os.path.dirname(modelengine_dir)
+sys.path.extend([root_dir, modelengine_dir])
+
+try:
+    from MODELENGINE.UTIL import train_engine_unified as T
+    from MODELENGINE.UTIL import build_features as BF
+    from MODELENGINE.UTIL import raw_changes, prediction_cube, engine_bundle, engine_registry, report_writer
+    from MODELENGINE.UTIL.prediction_service import score_frame
+    from MODELENGINE.UTIL.version_utils import find_latest_file, load_kospi_index
+    from MODELENGINE.UTIL.config_paths import get_path
+    from MODELENGINE.UTIL.profiling import RunProfiler
+except ImportError:
+    import train_engine_unified as T
+    import build_features as BF
+    import raw_changes
+    import prediction_cube
+    import engine_bundle
+    import engine_registry
+    import report_writer
+    from prediction_service import score_frame
+    from version_utils import find_latest_file, load_kospi_index
+    from config_paths import get_path
+    from profiling import RunProfiler
+
+CONSUMER = "incremental"
+FEATURE_PREFIX = "features_V31"
+REPORT_RE = re.compile(r"recommendation_HOJ_V34_(\d{4}-\d{2}-\d{2})_(\d{8}_\d{6})_(\w+)\.csv$")
+METRIC_OF = {"combo": "combo", "prob": "prob", "ret": "score"}
+
+# ------------------------------------------------------------
+# 1) 변경 종목 피처 재계산
+# ------------------------------------------------------------
+def _read_codes(path, codes: list) -> pd.DataFrame:
+    """parquet 에서 해당 종목 행만 (pyarrow 필터, 실패 시 전체 읽고 거름)."""
+    try:
+        df = pd.read_parquet(path, filters=[("Code", "in", list(codes))])
+    except Exception:
+        df = pd.read_parquet(path)
+        df = df[df["Code"].astype(str).isin(codes)]
+    return df.reset_index(drop=True)
+
+def recompute_features(codes: list, raw_path, kospi_path) -> pd.DataFrame:
+    """build_features 와 같은 함수로 codes 의 전체 이력 피처 (저장 컬럼명까지 동일)."""
+    raw = _read_codes(raw_path, codes)
+    if raw.empty:
+        return raw
+    raw["Date"] = pd.to_datetime(raw["Date"])
+    raw = raw.sort_values(["Date", "Code"], kind="mergesort").reset_index(drop=True)
+    kospi = BF.prepare_kospi(load_kospi_index(kospi_path))
+    return BF.finalize_columns(BF.compute_indicators(BF.merge_kospi(raw, kospi)))
+
+def _start_mask(df: pd.DataFrame, starts: dict) -> np.ndarray:
+    d0 = pd.to_datetime(df["Code"].astype(str).map(starts))
+    return (d0.notna() & (pd.to_datetime(df["Date"]) >= d0)).to_numpy()
+
+def patch_parquet(path, rows: pd.DataFrame, starts: dict, sort_cols: list) -> dict:
+    """
+    path 의 (종목, 시작일 이후) 행을 rows 로 교체 → 같은 경로에 원자적 덮어쓰기.
+    파일 최신일 이후 rows 는 버림 (새 거래일은 전체 파이프라인 몫, 일부 종목만 붙으면 최신일 단면이 깨짐).
+    """
+    df = pd.read_parquet(path)
+    last = pd.to_datetime(df["Date"]).max()
+    mask = _start_mask(df, starts)
+    new = rows[pd.to_datetime(rows["Date"]) <= last].reindex(columns=df.columns)
+    try:
+        new["Date"] = new["Date"].astype(df["Date"].dtype)
+    except (TypeError, ValueError):
+        pass
+    out = pd.concat([df[~mask], new], ignore_index=True).sort_values(sort_cols, kind="mergesort")
+    if pd.to_datetime(out["Date"]).max() != last:
+        raise ValueError(f"패치 후 최신일이 바뀜: {os.path.basename(str(path))} {last.date()} → "
+                         f"{pd.to_datetime(out['Date']).max().date()}")
+    tmp = str(path) + ".tmp"
+    out.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+    return {"file": os.path.basename(str(path)), "removed": int(mask.sum()), "added": int(len(new))}
+
+# ------------------------------------------------------------
+# 2) 당일 Top-K 리포트 패치
+# ------------------------------------------------------------
+def latest_report(day, out_dir: str):
+    """보정일의 가장 최근 추천 리포트 → {csv, txt, ts, rank_by} (없으면 None)."""
+    d = pd.Timestamp(day).date()
+    found = []
+    for p in glob.glob(os.path.join(out_dir, f"recommendation_HOJ_V34_{d}_*.csv")):
+        m = REPORT_RE.search(os.path.basename(p))
+        if m:
+            found.append((m.group(2), m.group(3), p))
+    if not found:
+        return None
+    ts, rank_by, csv = max(found)
+    txt = os.path.join(out_dir, f"Report_HOJ_V34_{d}_{ts}.txt")
+    return {"csv": csv, "txt": txt if os.path.exists(txt) else None, "ts": ts, "rank_by": rank_by}
+
+def _report_parts(txt_path: str):
+    """기존 TXT → (엔진 파일명, AI 섹션 텍스트)."""
+    if not txt_path:
+        return "", ""
+    with open(txt_path, encoding="utf-8") as f:
+        text = f.read()
+    m = re.search(r"^Engine: (.+)$", text, re.M)
+    ai = ""
+    if "[2] Gemini AI Investment Opinion" in text:
+        ai = text.split("[2] Gemini AI Investment Opinion", 1)[1]
+        ai = ai.split("\n", 2)[-1]                       # 구분선 줄 제거
+        ai = ai.split("\n" + "=" * 60, 1)[0]
+    return (m.group(1).strip() if m else ""), ai.strip()
+
+def _find_engine(name: str, engine_path: str = None):
+    if engine_path:
+        return engine_path
+    if not name or "," in name:
+        return None                                       # 앙상블/서비스 리포트
+    stem = os.path.splitext(name)[0]
+    for e in engine_registry.list_engines(base=T.engine_base("HOJ")):
+        if os.path.splitext(e["name"])[0] == stem:
+            return e["path"]
+    return None
+
+def _table(df: pd.DataFrame) -> pd.DataFrame:
+    return report_writer.build_table(df.get("Name"), df["Code"].astype(str).str.zfill(6), df["Close"],
+                                     df["prob"], df["score"], df["combo"])
+
+def patch_topk(day, codes: list, db_path: str, out_dir: str, rows: pd.DataFrame = None,
+               engine_path: str = None, root: str = None) -> dict:
+    """
+    보정일 리포트의 Top-K 를 다시 구함.
+      ① 큐브(패치 완료)가 있으면 큐브 조회
+      ② 없으면 바뀐 종목만 재예측해 기존 Top-K 표와 합침
+         (바뀐 종목이 기존 K 위 점수 밑으로 떨어지면 K+1 위를 알 수 없으므로 ③)
+      ③ 해당 날짜 단면만 읽어 전 종목 예측
+    """
+    rep = latest_report(day, out_dir)
+    if rep is None:
+        return {"status": "no_report"}
+    eng_name, ai_text = _report_parts(rep["txt"])
+    eng = _find_engine(eng_name, engine_path)
+    if eng is None or not os.path.exists(eng):
+        print(f"[INCR] Top-K 패치 생략: 리포트 엔진을 찾지 못함 ({eng_name or '-'}) → daily_recommender 재실행")
+        return {"status": "no_engine", "report": os.path.basename(rep["csv"])}
+
+    rank_by = rep["rank_by"]
+    sort_key = report_writer.SORT_KEYS.get(rank_by, report_writer.SORT_KEYS["combo"])
+    old = pd.read_csv(rep["csv"], dtype={"종목코드": str})
+    if sort_key not in old.columns:
+        return {"status": "unsupported_report", "report": os.path.basename(rep["csv"])}
+    topk = len(old)
+    day = pd.Timestamp(day).normalize()
+    codes = [str(c).zfill(6) for c in codes]
+
+    new, how = None, ""
+    man = prediction_cube.read_manifest(prediction_cube.cube_dir(eng, root))
+    fresh_cube = man is not None and man.get("db_fp") == T.db_fingerprint(db_path)
+    cube = prediction_cube.cube_topk(eng, day, topk, METRIC_OF.get(rank_by, "combo"), root=root) \
+        if fresh_cube else None
+    if cube is not None:
+        new, how = _table(cube), "cube"
+    else:
+        payload = engine_bundle.load_engine(eng)
+        if rows is not None:
+            sub = rows[(pd.to_datetime(rows["Date"]) == day) & rows["Code"].astype(str).isin(codes)]
+            fresh = _table(score_frame(payload, sub)) if not sub.empty else old.iloc[0:0]
+            merged = pd.concat([old[~old["종목코드"].isin(codes)], fresh], ignore_index=True)
+            merged = merged.sort_values(sort_key, ascending=False, kind="mergesort")
+            cut = old[sort_key].min() if len(old) >= topk else -np.inf
+            left_out = old["종목코드"].isin(codes) & ~old["종목코드"].isin(fresh["종목코드"][fresh[sort_key] >= cut])
+            if not left_out.any():
+                new, how = merged.head(topk), "merge"
+        if new is None:
+            cols = [c for c in dict.fromkeys(["Date", "Code", "Name", "Close"] + list(payload["features"]))]
+            day_df = pd.read_parquet(db_path, columns=[c for c in cols if c in T.schema_frame(db_path).columns],
+                                     filters=[("Date", "==", day)])
+            new = _table(score_frame(payload, day_df)).sort_values(sort_key, ascending=False, kind="mergesort")
+            new, how = new.head(topk), "day"
+    new = new.reset_index(drop=True)
+
+    # 변경 요약
+    before = {c: i + 1 for i, c in enumerate(old["종목코드"])}
+    after = {c: i + 1 for i, c in enumerate(new["종목코드"])}
+    entered = [c for c in after if c not in before]
+    dropped = [c for c in before if c not in after]
+    moves = [f"{c}: {before.get(c, '-')}위 → {after.get(c, '-')}위" for c in codes if c in before or c in after]
+    note = [f"[3] RAW 보정 반영 ({datetime.now():%Y-%m-%d %H:%M:%S}, {how})",
+            "-" * 60,
+            f"보정 종목: {', '.join(codes)}",
+            f"진입: {', '.join(entered) or '-'} | 이탈: {', '.join(dropped) or '-'}"] + moves
+    if ai_text and (entered or dropped):
+        ai_text += "\n\n(※ AI 해석은 보정 전 Top-K 기준)"
+
+    result = report_writer.ReportResult(day, new, rank_by, topk, engine=eng, db=db_path, ai_text=ai_text)
+    paths = report_writer.write_reports(result, out_dir, timestamp=rep["ts"])
+    with open(paths["txt"], "a", encoding="utf-8") as f:
+        f.write("\n\n" + "\n".join(note) + "\n")
+    print("\n".join(note))
+    return {"status": "patched", "how": how, "report": os.path.basename(paths["csv"]),
+            "entered": entered, "dropped": dropped}
+
+# ------------------------------------------------------------
+# 3) 실행
+# ------------------------------------------------------------
+def run(keys: pd.DataFrame = None, raw_dir: str = None, kospi_dir: str = None, feat_dir: str = None,
+        db_path: str = None, cube_root: str = None, out_dir: str = None, changelog: str = None,
+        engine_path: str = None, topk: bool = True) -> dict:
+    """
+    keys: Date / Code (None 이면 changelog 의 미반영 이벤트). 반환: 단계별 요약.
+    """
+    ids = []
+    if keys is None:
+        keys, ids = raw_changes.pending_changes(CONSUMER, changelog)
+    if keys.empty:
+        print("[INCR] 반영할 RAW 변경 없음")
+        return {"status": "empty"}
+
+    db_path = db_path or T.find_latest_db_path()
+    raw_path = find_latest_file(raw_dir or get_path("RAW", "stocks"), "all_stocks_cumulative")
+    kospi_path = find_latest_file(kospi_dir or get_path("RAW", "kospi_data"), "kospi_data")
+    feat_path = find_latest_file(feat_dir or get_path("FEATURE"), FEATURE_PREFIX)
+    if raw_path is None or kospi_path is None:
+        raise FileNotFoundError("RAW / KOSPI 파일을 찾을 수 없습니다.")
+
+    keys = keys.assign(Date=pd.to_datetime(keys["Date"]).dt.normalize(),
+                       Code=keys["Code"].astype(str).str.zfill(6))
+    db_last = T.db_max_date(db_path)
+    late = keys[keys["Date"].dt.date > db_last]
+    keys = keys[keys["Date"].dt.date <= db_last]
+    if not late.empty:
+        print(f"[INCR] DB 최신일({db_last}) 이후 {late['Date'].nunique()}일 {len(late)}건 → 전체 파이프라인 대상 (건너뜀)")
+    summary = {"keys": int(len(keys)), "skipped_new_dates": int(len(late))}
+    if keys.empty:
+        raw_changes.mark_applied(ids, CONSUMER, summary, changelog)
+        return dict(summary, status="skip")
+
+    starts = keys.groupby("Code")["Date"].min().to_dict()
+    codes = sorted(starts)
+    print(f"=== 🔧 Incremental Update: {len(codes)}종목 / {keys['Date'].nunique()}일 ===")
+    prof = RunProfiler("incremental_update", tags={"codes": len(codes)})
+    t0 = time.perf_counter()
+
+    with prof.stage("features") as st:
+        feat = recompute_features(codes, raw_path, kospi_path)
+        # RAW 가 DB 보다 앞서 있어도 DB 최신일까지만 (새 거래일은 전 종목 단면으로 전체 파이프라인이 붙임)
+        if not feat.empty:
+            feat = feat[pd.to_datetime(feat["Date"]).dt.date <= db_last].reset_index(drop=True)
+        rows = feat[_start_mask(feat, starts)]
+        st["rows"] = len(rows)
+    print(f"[INCR] 피처 재계산: {len(feat):,}행 (교체 대상 {len(rows):,}행)")
+
+    base_fp = T.db_fingerprint(db_path)
+    with prof.stage("patch_files") as st:
+        summary["db"] = patch_parquet(db_path, rows, starts, ["Date", "Code"])
+        if feat_path is not None:
+            summary["feature"] = patch_parquet(feat_path, rows, starts, ["Code", "Date"])
+        st["rows"] = len(rows)
+    print(f"[INCR] DB 패치: {summary['db']}")
+
+    with prof.stage("cube") as st:
+        root = cube_root or prediction_cube.cube_root(db_path)
+        cubes = []
+        for d in sorted(os.listdir(root)) if os.path.isdir(root) else []:
+            man = prediction_cube.read_manifest(os.path.join(root, d))
+            if man is None or not os.path.exists(man.get("engine_path", "")):
+                continue
+            try:
+                cubes.append(prediction_cube.patch_cube(man["engine_path"], feat, starts, db_path, base_fp, root))
+            except Exception as e:
+                print(f"[INCR] 큐브 패치 실패: {d} → {e}")
+                cubes.append({"engine": d, "status": f"error: {e}"})
+        summary["cubes"] = cubes
+        st["rows"] = sum(c.get("rows", 0) for c in cubes)
+
+    if topk:
+        with prof.stage("topk"):
+            last = pd.Timestamp(db_last)
+            if (keys["Date"] == last).any():
+                summary["topk"] = patch_topk(last, keys.loc[keys["Date"] == last, "Code"].tolist(), db_path,
+                                             out_dir or get_path("OUTPUT"), rows, engine_path, root)
+            else:
+                summary["topk"] = {"status": "not_latest_day"}
+
+    summary["sec"] = round(time.perf_counter() - t0, 3)
+    prof.write({"status": "done", "keys": len(keys)})
+    raw_changes.mark_applied(ids, CONSUMER, summary, changelog)
+    print(f"[INCR] 완료 {summary['sec']:.2f}s")
+    return dict(summary, status="done")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p_r = sub.add_parser("run", help="미반영 변경 (또는 지정 키) 반영")
+    p_r.add_argument("--date", default=None, help="직접 지정 날짜 (--codes 와 함께)")
+    p_r.add_argument("--codes", default=None, help="직접 지정 종목 (쉼표 구분)")
+    p_r.add_argument("--db", default=None)
+    p_r.add_argument("--engine", default=None, help="Top-K 패치 엔진 (기본: 리포트에 적힌 엔진)")
+    p_r.add_argument("--no_topk", action="store_true")
+    sub.add_parser("pending", help="미반영 변경 키 보기")
+    args = ap.parse_args()
+
+    if args.cmd == "pending":
+        keys, ids = raw_changes.pending_changes(CONSUMER)
+        print(f"[INCR] 미반영 이벤트 {len(ids)}개 / 키 {len(keys)}개")
+        if not keys.empty:
+            print(keys.groupby(keys["Date"].dt.date)["Code"].apply(lambda s: ",".join(s[:20])).to_string())
+    else:
+        keys = None
+        if args.date and args.codes:
+            codes = [c.strip() for c in args.codes.split(",") if c.strip()]
+            keys = pd.DataFrame({"Date": pd.Timestamp(args.date), "Code": codes, "kind": "fix"})
+        run(keys, db_path=args.db, engine_path=args.engine, topk=not args.no_topk)
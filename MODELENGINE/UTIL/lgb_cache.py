@@ -0,0 +1,106 @@
+# ============================================================
+# lgb_cache.py
+#  - LightGBM 바이닝 결과(lgb.Dataset.save_binary) 디스크 캐시
+#  - 키: DB 지문 + 피처 목록 + 마스크/타겟 파라미터 + bin 파라미터 + LightGBM 버전
+#  - 위치: {DB 폴더}/CACHE/lgb/lgbbin_{DB지문}_{키}.bin (+ .json 메타)
+#  - 회귀/분류는 같은 바이닝을 공유 (head_subset 으로 라벨만 교체)
+#  - research 반복/그리드 실행 시 재바이닝 없이 바로 학습 시작
+# ============================================================
+
+import os
+import json
+import hashlib
+
+import numpy as np
+import lightgbm as lgb
+
+BIN_PARAMS = {"max_bin": 255, "min_data_in_bin": 3, "verbose": -1}
+
+
+def binned_cache_key(db_fp: str, features: list, mask_params: dict, bin_params: dict = None) -> str:
+    raw = json.dumps(
+        [db_fp, list(features), mask_params or {}, bin_params or BIN_PARAMS, lgb.__version__],
+        sort_keys=True, ensure_ascii=False, default=str,
+    )
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def binned_cache_dir(db_path: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), "CACHE", "lgb")
+
+
+def _prune(cache_dir: str, db_fp: str):
+    """DB가 바뀌면(지문 불일치) 이전 바이너리 정리."""
+    for fn in os.listdir(cache_dir):
+        if fn.startswith("lgbbin_") and not fn.startswith(f"lgbbin_{db_fp}_"):
+            try:
+                os.remove(os.path.join(cache_dir, fn))
+            except OSError:
+                pass
+
+
+def load_or_build_dataset(make_data, features: list, db_path: str, db_fp: str,
+                          mask_params: dict, bin_params: dict = None, use_cache: bool = True):
+    """
+    캐시된 바이닝 Dataset 로드, 없으면 생성 후 save_binary.
+    make_data: () -> (X DataFrame[features], label ndarray)  (캐시 미스일 때만 호출)
+    반환: (constructed lgb.Dataset, cache_hit)
+    """
+    bin_params = dict(bin_params or BIN_PARAMS)
+    key = binned_cache_key(db_fp, features, mask_params, bin_params)
+    cache_dir = binned_cache_dir(db_path)
+    bin_path = os.path.join(cache_dir, f"lgbbin_{db_fp}_{key}.bin")
+    meta_path = bin_path.replace(".bin", ".json")
+
+    if use_cache and os.path.exists(bin_path) and os.path.exists(meta_path):
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            ds = lgb.Dataset(bin_path, params=bin_params, free_raw_data=True).construct()
+            if ds.num_data() == int(meta["rows"]) and ds.get_feature_name() == list(features):
+                print(f"[CACHE] 바이닝 캐시 사용: {os.path.basename(bin_path)}")
+                return ds, True
+            print("[CACHE] 바이닝 캐시 불일치 → 재생성")
+        except Exception as e:
+            print(f"[CACHE] 바이닝 캐시 읽기 실패 → 재생성 ({e})")
+
+    X, label = make_data()
+    ds = lgb.Dataset(
+        X, label=np.asarray(label, dtype="float64"), feature_name=list(features),
+        params=bin_params, free_raw_data=True,
+    ).construct()
+
+    if use_cache:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            _prune(cache_dir, db_fp)
+            tmp = bin_path + ".tmp"
+            ds.save_binary(tmp)
+            os.replace(tmp, bin_path)
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump({
+                    "rows": ds.num_data(), "features": list(features),
+                    "mask_params": mask_params, "bin_params": bin_params,
+                    "db_path": db_path, "lightgbm": lgb.__version__,
+                }, f, ensure_ascii=False, indent=2, default=str)
+        except Exception as e:
+            print(f"[CACHE] 바이닝 캐시 저장 실패: {e}")
+    return ds, False
+
+
+def head_subset(full: lgb.Dataset, idx, label: np.ndarray) -> lgb.Dataset:
+    """공유 Dataset 에서 행 subset + 헤드별 라벨 (바이닝 재사용)."""
+    idx = np.asarray(idx, dtype=np.int32)
+    sub = full.subset(idx).construct()
+    sub.set_label(np.asarray(label)[idx])
+    return sub
+
+
+def train_head(params: dict, full: lgb.Dataset, label: np.ndarray, train_idx, valid_idx=None,
+               num_boost_round: int = 1000, callbacks: list = None) -> lgb.Booster:
+    """공유 Dataset 위에서 헤드 1개(회귀/분류) 학습. valid_idx 가 있으면 검증셋으로 사용."""
+    dtr = head_subset(full, train_idx, label)
+    kw = {"callbacks": list(callbacks or [])}
+    if valid_idx is not None and len(valid_idx) > 0:
+        kw.update({"valid_sets": [head_subset(full, valid_idx, label)], "valid_names": ["valid"]})
+    return lgb.train(dict(params), dtr, num_boost_round=num_boost_round, **kw)
@@ -2,11 +2,11 @@
 # Predict Top 10 (Stage 3) - Inference Engine
 #   - 저장된 엔진(.pkl)을 로드하여 특정 날짜의 Top 10 종목 추천
 #   - 엔진 내부에 저장된 피처 리스트를 자동으로 사용하여 안전함
+#   - 예측 상주 서비스(prediction_service)가 이 엔진을 올려두고 있으면 서비스 조회로 대체
 # ============================================================
 
 import os
 import sys
-import pickle
 import argparse
 import pandas as pd
 import numpy as np
@@ -21,20 +21,21 @@ sys.path.append(root_dir)
 
 try:
     from MODELENGINE.UTIL.config_paths import get_path
+    from MODELENGINE.UTIL import engine_bundle, prediction_service
 except ImportError:
     sys.path.append(parent_dir)
     from UTIL.config_paths import get_path
+    from UTIL import engine_bundle, prediction_service
 
 # ------------------------------------------------------------
 # 2. 핵심 예측 함수
 # ------------------------------------------------------------
 def load_engine(engine_path):
-    """엔진 파일(.pkl)을 로드하고 모델과 메타데이터 반환"""
+    """엔진 파일(.pkl / .hoj 번들)을 로드하고 모델과 메타데이터 반환"""
     if not os.path.exists(engine_path):
         raise FileNotFoundError(f"❌ 엔진 파일을 찾을 수 없습니다: {engine_path}")
     
-    with open(engine_path, "rb") as f:
-        data = pickle.load(f)
+    data = engine_bundle.load_engine(engine_path)
     
     # 구버전/신버전 호환성 체크
     if "meta" not in data or "features" not in data:
@@ -59,6 +60,16 @@ def run_prediction(engine_path, target_date=None, top_n=10):
     print(f"\n=== 🔮 [Prediction] Top {top_n} 종목 추천 시작 ===")
     print(f"  ⚙️ 엔진: {os.path.basename(engine_path)}")
 
+    # [0] 예측 상주 서비스 (엔진/DB 로드 없이 메모리 조회)
+    served = prediction_service.query_topk(top_n, target_date, engine=engine_path, rank_by="score")
+    if served is not None and not served.empty:
+        results = served.rename(columns={"code": "Code", "name": "Name", "close": "Close",
+                                         "score": "Pred_Score", "prob": "Pred_Prob"})
+        results = results[["Code", "Name", "Close", "Pred_Score", "Pred_Prob"]]
+        print(f"\n🔥 [{served['date'].iloc[0]}] Top {top_n} 추천 종목 (prediction_service) 🔥")
+        print(results.to_string(index=False))
+        return results
+
     # [A] 엔진 로드
     engine_data = load_engine(engine_path)
     model_reg = engine_data.get("model_reg")
@@ -150,7 +161,7 @@ def run_prediction(engine_path, target_date=None, top_n=10):
 # ------------------------------------------------------------
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
-    parser.add_argument("--engine", type=str, required=True, help="엔진 파일 경로 (.pkl)")
+    parser.add_argument("--engine", type=str, required=True, help="엔진 파일 경로 (.pkl / .hoj)")
     parser.add_argument("--date", type=str, default=None, help="예측 날짜 (YYYY-MM-DD), 미입력시 최신일")
     parser.add_argument("--top", type=int, default=10, help="출력할 종목 수")
     
@@ -0,0 +1,353 @@
+# ============================================================
+# prediction_cube.py
+#  - 엔진 1개 × DB 전체 (date, code) 예측 큐브: score / prob / combo / 실현 수익률(fwd_ret)
+#    (기존: P3 과거 예측 클릭마다 DB 전체 read_parquet → 하루 필터 → 전 종목 재예측)
+#  - 빌드: 필요한 컬럼(Date/Code/Name/Close + 엔진 피처)만 읽고 월 파티션 단위로 벡터 예측
+#  - 저장: {DB 폴더}/CUBE/{엔진명}/ym=YYYY-MM.parquet + manifest.json
+#  - 증분: manifest.last_date 이후 날짜만 예측, 직전 h 거래일의 fwd_ret(당시 미래 미확정)만 다시 채움
+#          엔진 파일 지문/피처/horizon 이 바뀌거나 DB 가 과거로 돌아가면 전체 재빌드
+#  - fwd_ret = 종목별 Close(t+h)/Close(t) - 1 (학습 타겟과 같은 grouped_forward_return, h = 엔진 meta horizon)
+#  - 조회: cube_topk(엔진, 날짜) / load_cube(엔진, 기간, 종목) → 해당 월 파티션만 읽음 (백테스트 입력)
+#  - 행 패치: patch_cube(엔진, 종목 프레임, 종목별 시작일) → RAW 늦은 보정 종목만 재예측 (incremental_update.py)
+#
+#  사용 예)
+#    python prediction_cube.py build  --engine F:\...\HOJ_ENGINE_REAL_V31_h5_w60_n1000_251126.hoj
+#    python prediction_cube.py build  --real                 # 색인의 REAL 엔진 전체
+#    python prediction_cube.py update                        # 이미 있는 큐브 전부 증분 갱신
+#    python prediction_cube.py topk   --engine ... --date 2025-11-20 --k 10
+# ============================================================
+
+import os
+import sys
+import json
+import argparse
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+modelengine_dir = os.path.dirname(current_dir)
+root_dir = os.path.dirname(modelengine_dir)
+sys.path.extend([root_dir, modelengine_dir])
+
+try:
+    from MODELENGINE.UTIL import train_engine_unified as T
+    from MODELENGINE.UTIL import engine_registry, engine_bundle
+    from MODELENGINE.UTIL.prediction_service import score_frame, BASE_COLS, RANK_KEYS
+    from MODELENGINE.UTIL.profiling import RunProfiler
+except ImportError:
+    import train_engine_unified as T
+    import engine_registry
+    import engine_bundle
+    from prediction_service import score_frame, BASE_COLS, RANK_KEYS
+    from profiling import RunProfiler
+
+MANIFEST = "manifest.json"
+CUBE_VERSION = 1
+CUBE_COLS = BASE_COLS + ["score", "prob", "combo", "fwd_ret"]
+
+# ------------------------------------------------------------
+# 1) 위치 / manifest
+# ------------------------------------------------------------
+def cube_root(db_path: str = None) -> str:
+    """{DB 폴더}/CUBE (바이닝 캐시 CACHE/ 와 같은 기준)."""
+    db_path = db_path or T.find_latest_db_path()
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), "CUBE")
+
+def cube_dir(engine_path: str, root: str = None) -> str:
+    name = os.path.splitext(os.path.basename(engine_path))[0]
+    return os.path.join(root or cube_root(), name)
+
+def _part_name(month: str) -> str:
+    return f"ym={month}.parquet"
+
+def read_manifest(out_dir: str):
+    path = os.path.join(out_dir, MANIFEST)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+def _write_manifest(out_dir: str, man: dict):
+    tmp = os.path.join(out_dir, MANIFEST + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(man, f, ensure_ascii=False, indent=2, default=str)
+    os.replace(tmp, os.path.join(out_dir, MANIFEST))
+
+# ------------------------------------------------------------
+# 2) 빌드 / 증분 갱신
+# ------------------------------------------------------------
+def _read_db(db_path: str, features: list, horizon: int) -> pd.DataFrame:
+    """필요 컬럼만 읽고 (Code, Date) 정렬 → 종목별 h일 실현 수익률."""
+    have = set(T.schema_frame(db_path).columns)
+    missing = [c for c in features if c not in have]
+    if missing:
+        raise KeyError(f"필수 피처가 DB에 없습니다: {missing[:5]}...")
+    cols = [c for c in dict.fromkeys(BASE_COLS + list(features)) if c in have]
+    df = pd.read_parquet(db_path, columns=cols)
+    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+    df["Code"] = df["Code"].astype(str).str.zfill(6)
+    df = df.dropna(subset=["Date"]).sort_values(["Code", "Date"], kind="mergesort").reset_index(drop=True)
+    grp, _, _ = T.group_positions(df["Code"].to_numpy())
+    df["fwd_ret"] = T.grouped_forward_return(df["Close"].to_numpy(dtype="float64"), grp, horizon)
+    return df
+
+def build_cube(engine_path: str, db_path: str = None, root: str = None, full: bool = False,
+               verbose: bool = True) -> dict:
+    """
+    큐브 생성/증분 갱신. 반환: manifest (+ status: built | updated | skip, written: 다시 쓴 파티션 수)
+    """
+    db_path = db_path or T.find_latest_db_path()
+    out_dir = cube_dir(engine_path, root or cube_root(db_path))
+    payload = engine_bundle.load_engine(engine_path)
+    features = list(payload.get("features") or [])
+    meta = payload.get("meta") or {}
+    horizon = int(meta.get("horizon") or 5)
+    eng_fp, db_fp = T.db_fingerprint(engine_path), T.db_fingerprint(db_path)
+    name = os.path.basename(out_dir)
+
+    man = None if full else read_manifest(out_dir)
+    if man is not None and (man.get("cube_version") != CUBE_VERSION or man.get("engine_fp") != eng_fp
+                            or man.get("features") != features or man.get("horizon") != horizon):
+        print(f"[CUBE] 엔진/피처/horizon 변경 → 전체 재빌드: {name}")
+        man = None
+    if man is not None and man.get("db_fp") == db_fp:
+        if verbose:
+            print(f"[CUBE] SKIP (DB 변경 없음): {name} ~{man['last_date']}")
+        return dict(man, status="skip", written=0)
+
+    prof = RunProfiler("prediction_cube", tags={"engine": name, "horizon": horizon}, verbose=verbose)
+    with prof.stage("load") as st:
+        df = _read_db(db_path, features, horizon)
+        st["rows"] = len(df)
+    dates = np.sort(df["Date"].unique())
+
+    last = pd.Timestamp(man["last_date"]) if man is not None else None
+    if last is not None and pd.Timestamp(dates[-1]) < last:
+        print(f"[CUBE] DB 최신일({pd.Timestamp(dates[-1]).date()}) < 큐브 최신일({last.date()}) → 전체 재빌드")
+        last = None
+    if last is None:
+        refresh_from = pd.Timestamp(dates[0])
+        months = sorted(df["Date"].dt.strftime("%Y-%m").unique())
+    else:
+        # last 이전 h 거래일: 당시 fwd_ret 가 미확정(NaN)이었던 구간 → 이 월부터 다시 씀
+        pos = int(np.searchsorted(dates, np.datetime64(last), side="right"))
+        refresh_from = pd.Timestamp(dates[max(0, pos - horizon)])
+        months = sorted(df.loc[df["Date"] >= refresh_from, "Date"].dt.strftime("%Y-%m").unique())
+
+    os.makedirs(out_dir, exist_ok=True)
+    ym = df["Date"].dt.strftime("%Y-%m")
+    n_scored = 0
+    with prof.stage("score") as st:
+        for m in months:
+            sub = df[ym == m]
+            part = os.path.join(out_dir, _part_name(m))
+            if last is not None and os.path.exists(part):
+                old = pd.read_parquet(part)
+                old = old[old["Date"] <= last].drop(columns=["fwd_ret"])
+                new = score_frame(payload, sub[sub["Date"] > last])
+                scored = pd.concat([old, new], ignore_index=True)
+            else:
+                scored = score_frame(payload, sub)
+                new = scored
+            n_scored += len(new)
+            # 실현 수익률은 항상 현재 DB 기준으로 다시 붙임 (예측값은 재계산하지 않음)
+            scored = scored.drop(columns=["fwd_ret"], errors="ignore").merge(
+                sub[["Date", "Code", "fwd_ret"]], on=["Date", "Code"], how="left")
+            scored = scored.sort_values(["Date", "combo"], ascending=[True, False], kind="mergesort")
+            scored[[c for c in CUBE_COLS if c in scored.columns]].to_parquet(part, index=False)
+        st["rows"] = n_scored
+
+    parts = sorted(f for f in os.listdir(out_dir) if f.startswith("ym=") and f.endswith(".parquet"))
+    man_new = {
+        "cube_version": CUBE_VERSION,
+        "engine": name,
+        "engine_path": os.path.abspath(engine_path),
+        "engine_fp": eng_fp,
+        "features": features,
+        "horizon": horizon,
+        "db": os.path.basename(db_path),
+        "db_fp": db_fp,
+        "first_date": str(pd.Timestamp(dates[0]).date()) if man is None else man["first_date"],
+        "last_date": str(pd.Timestamp(dates[-1]).date()),
+        "partitions": parts,
+        "built_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    _write_manifest(out_dir, man_new)
+    status = "built" if man is None else "updated"
+    prof.write({"status": status})
+    if verbose:
+        print(f"[CUBE] {status}: {name} | 예측 {n_scored:,}행 | 파티션 {len(months)}/{len(parts)}개 다시 씀 "
+              f"| ~{man_new['last_date']}")
+    return dict(man_new, status=status, written=len(months))
+
+def patch_cube(engine_path: str, frame: pd.DataFrame, starts: dict, db_path: str, base_fp: str = None,
+               root: str = None, verbose: bool = True) -> dict:
+    """
+    일부 종목만 다시 예측해 파티션 행 교체 (큐브 전체/증분 빌드 없음).
+    frame : 패치된 DB 의 해당 종목 전체 이력 (피처 포함), starts : 종목 → 최초 변경일
+    예측/Close/Name 은 종목별 starts 이후 행, fwd_ret 은 그보다 h 거래일 앞 행부터 다시 계산.
+    base_fp: 패치 전 DB 지문. 큐브가 그 DB 기준이 아니면(이미 낡음) 건드리지 않고 status=stale.
+    """
+    out_dir = cube_dir(engine_path, root or cube_root(db_path))
+    name = os.path.basename(out_dir)
+    man = read_manifest(out_dir)
+    if man is None:
+        return {"engine": name, "status": "none", "rows": 0}
+    if man.get("engine_fp") != T.db_fingerprint(engine_path) or (base_fp and man.get("db_fp") != base_fp):
+        if verbose:
+            print(f"[CUBE] 패치 생략 (큐브가 현재 엔진/DB 기준 아님 → prediction_cube.py update): {name}")
+        return {"engine": name, "status": "stale", "rows": 0}
+
+    payload = engine_bundle.load_engine(engine_path)
+    horizon = int(man["horizon"])
+    df = frame.copy()
+    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+    df["Code"] = df["Code"].astype(str).str.zfill(6)
+    df = df.dropna(subset=["Date"]).sort_values(["Code", "Date"], kind="mergesort").reset_index(drop=True)
+    grp, pos, _ = T.group_positions(df["Code"].to_numpy())
+    df["fwd_ret"] = T.grouped_forward_return(df["Close"].to_numpy(dtype="float64"), grp, horizon)
+
+    d0 = pd.to_datetime(df["Code"].map({str(k).zfill(6): v for k, v in starts.items()}))
+    is_pred = (df["Date"] >= d0).to_numpy()
+    first = pd.Series(np.where(is_pred, pos, np.iinfo(np.int64).max)).groupby(grp).transform("min").to_numpy()
+    is_fwd = pos >= first - horizon
+    lo, hi = pd.Timestamp(man["first_date"]), pd.Timestamp(man["last_date"])
+    in_range = ((df["Date"] >= lo) & (df["Date"] <= hi)).to_numpy()
+    scored = score_frame(payload, df[is_pred & in_range])
+    fwd = df.loc[is_fwd & in_range, ["Date", "Code", "fwd_ret"]]
+    scored = scored.merge(fwd, on=["Date", "Code"], how="left")
+    code_start = d0.groupby(df["Code"]).first()
+
+    n_parts = 0
+    for m in sorted(fwd["Date"].dt.strftime("%Y-%m").unique()):
+        part = os.path.join(out_dir, _part_name(m))
+        if not os.path.exists(part):
+            continue
+        cur = pd.read_parquet(part)
+        c0 = pd.to_datetime(cur["Code"].map(code_start))
+        cur = cur[~(c0.notna() & (cur["Date"] >= c0)).to_numpy()]
+        cur = pd.concat([cur, scored[scored["Date"].dt.strftime("%Y-%m") == m]], ignore_index=True)
+        # 실현 수익률: 변경일 h 거래일 앞부터는 새 Close 기준 값으로
+        fm = fwd[fwd["Date"].dt.strftime("%Y-%m") == m]
+        hit = cur.merge(fm, on=["Date", "Code"], how="left", suffixes=("", "_new"), indicator=True)
+        cur["fwd_ret"] = np.where(hit["_merge"].to_numpy() == "both", hit["fwd_ret_new"], hit["fwd_ret"])
+        cur = cur.sort_values(["Date", "combo"], ascending=[True, False], kind="mergesort")
+        cur[[c for c in CUBE_COLS if c in cur.columns]].to_parquet(part, index=False)
+        n_parts += 1
+
+    man.update(db=os.path.basename(db_path), db_fp=T.db_fingerprint(db_path),
+               patched_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+               last_patch={"codes": sorted(code_start.index), "rows": int(len(scored)), "partitions": n_parts})
+    _write_manifest(out_dir, man)
+    if verbose:
+        print(f"[CUBE] patched: {name} | 재예측 {len(scored):,}행 | 파티션 {n_parts}개")
+    return {"engine": name, "status": "patched", "rows": int(len(scored)), "partitions": n_parts}
+
+def update_all(db_path: str = None, root: str = None) -> list:
+    """이미 만들어진 큐브 전부 증분 갱신 (엔진 파일이 없어진 큐브는 건너뜀)."""
+    root = root or cube_root(db_path)
+    if not os.path.isdir(root):
+        return []
+    out = []
+    for d in sorted(os.listdir(root)):
+        man = read_manifest(os.path.join(root, d))
+        if man is None:
+            continue
+        if not os.path.exists(man.get("engine_path", "")):
+            print(f"[CUBE] 엔진 파일 없음 → 건너뜀: {d}")
+            continue
+        try:
+            out.append(build_cube(man["engine_path"], db_path, root))
+        except Exception as e:
+            print(f"[CUBE] 갱신 실패: {d} → {e}")
+    return out
+
+# ------------------------------------------------------------
+# 3) 조회
+# ------------------------------------------------------------
+def load_cube(engine_path: str, start=None, end=None, codes=None, columns: list = None,
+              root: str = None) -> pd.DataFrame:
+    """기간/종목 조건의 큐브 행. 기간에 걸친 월 파티션만 읽음. 큐브가 없으면 None."""
+    out_dir = cube_dir(engine_path, root)
+    man = read_manifest(out_dir)
+    if man is None:
+        return None
+    lo = pd.Timestamp(start).strftime("%Y-%m") if start is not None else None
+    hi = pd.Timestamp(end).strftime("%Y-%m") if end is not None else None
+    parts = [p for p in man["partitions"]
+             if (lo is None or p[3:10] >= lo) and (hi is None or p[3:10] <= hi)]
+    if not parts:
+        return pd.DataFrame(columns=columns or CUBE_COLS)
+    df = pd.concat([pd.read_parquet(os.path.join(out_dir, p), columns=columns and
+                                    list(dict.fromkeys(["Date", "Code"] + list(columns))))
+                    for p in parts], ignore_index=True)
+    if start is not None:
+        df = df[df["Date"] >= pd.Timestamp(start)]
+    if end is not None:
+        df = df[df["Date"] <= pd.Timestamp(end)]
+    if codes is not None:
+        df = df[df["Code"].isin([str(c).zfill(6) for c in np.atleast_1d(codes)])]
+    return df.reset_index(drop=True)
+
+def cube_dates(engine_path: str, root: str = None):
+    """큐브 범위 (first_date, last_date). 없으면 None."""
+    man = read_manifest(cube_dir(engine_path, root))
+    return (man["first_date"], man["last_date"]) if man else None
+
+def cube_topk(engine_path: str, date, k: int = 10, rank_by: str = "combo", code: str = None,
+              root: str = None):
+    """
+    해당 날짜 top-K (code 지정 시 그 종목 1행). 큐브가 없거나 날짜가 큐브 밖이면 None → 호출 측 기존 경로.
+    엔진 파일이 큐브 생성 이후 바뀌었으면(지문 불일치) 역시 None.
+    """
+    if rank_by not in RANK_KEYS:
+        raise ValueError(f"rank_by 는 {RANK_KEYS} 중 하나")
+    man = read_manifest(cube_dir(engine_path, root))
+    if man is None or not os.path.exists(engine_path) or man.get("engine_fp") != T.db_fingerprint(engine_path):
+        return None
+    day = pd.Timestamp(date).normalize()
+    if not (pd.Timestamp(man["first_date"]) <= day <= pd.Timestamp(man["last_date"])):
+        return None
+    df = load_cube(engine_path, day, day, codes=code, root=root)
+    if df is None or df.empty:
+        return None
+    return df if code else df.nlargest(int(k), rank_by).reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p_b = sub.add_parser("build")
+    p_b.add_argument("--engine", default=None, help="엔진 경로 (.hoj / .pkl)")
+    p_b.add_argument("--real", action="store_true", help="엔진 색인의 REAL 엔진 전체")
+    p_b.add_argument("--db", default=None)
+    p_b.add_argument("--full", action="store_true", help="증분 무시, 전체 재빌드")
+    p_u = sub.add_parser("update")
+    p_u.add_argument("--db", default=None)
+    p_t = sub.add_parser("topk")
+    p_t.add_argument("--engine", required=True)
+    p_t.add_argument("--date", required=True)
+    p_t.add_argument("--k", type=int, default=10)
+    p_t.add_argument("--rank_by", default="combo", choices=list(RANK_KEYS))
+    args = ap.parse_args()
+
+    if args.cmd == "build":
+        if args.real:
+            engines = [e["path"] for e in engine_registry.list_engines("REAL", base=T.engine_base("HOJ"))
+                       if not e["name"].startswith("@")]
+        elif args.engine:
+            engines = [args.engine]
+        else:
+            ap.error("--engine 또는 --real 필요")
+        for p in engines:
+            build_cube(p, args.db, full=args.full)
+    elif args.cmd == "update":
+        update_all(args.db)
+    else:
+        df = cube_topk(args.engine, args.date, args.k, args.rank_by)
+        print("[CUBE] 큐브 없음/범위 밖" if df is None else df.to_string(index=False))
@@ -0,0 +1,461 @@
+# ============================================================
+# prediction_service.py
+#  - 로컬 예측 상주 서비스: 엔진 + 최근 N 거래일 피처를 메모리에 올려두고 HTTP(127.0.0.1)로 응답
+#    (기존: 요청마다 엔진 unpickle → HOJ DB 전체 read_parquet → 하루 필터 → predict)
+#  - 적재 시 N 일 × 종목 전체를 엔진별로 1회 벡터 예측 → score / prob / combo 미리 계산
+#    → top-K / 단일 종목 / 날짜 조회는 메모리 정렬·필터만 (ms 단위)
+#  - combo = prob × clip(ret, -10%) (daily_recommender 와 같은 식)
+#  - 핫 리로드: 엔진 색인(engine_registry.sqlite) 수정시각 + 엔진 폴더 목록 + 최신 DB 지문(db_fingerprint)
+#    변경 감지 시 새 상태를 백그라운드에서 만든 뒤 한 번에 교체 (조회는 끊기지 않음)
+#  - 상주 구간 밖 날짜는 그 날짜만 읽어 예측 (최근 몇 개 캐시)
+#  - 클라이언트(query_topk / query_code)는 서비스가 없으면 None → 호출 측은 기존 경로로 예측
+#  - 상주 엔진은 tree_compiler 로 평탄화해 보관 → 소배치(단일 종목/장중)는 NumPy/numba 경로, 대배치는 LightGBM
+#  - HOJ 계열 엔진만 (SLE 엔진은 SLE DB 병합이 필요해 상주 대상에서 제외)
+#
+#  엔드포인트 (GET, JSON)
+#    /health                                   상태/적재 시각/DB/엔진
+#    /engines                                  상주 엔진 목록
+#    /dates                                    상주 날짜 목록
+#    /topk?k=10&date=2025-11-26&engine=...&rank_by=combo|score|prob
+#    /code?code=005930&date=...&days=5&engine=...
+#    /reload                                   즉시 재적재
+#
+#  사용 예)
+#    python prediction_service.py serve --days 20                  # 최신 REAL 엔진 1개
+#    python prediction_service.py serve --engines A.hoj,B.hoj --port 8765
+#    python prediction_service.py topk --k 10 --rank_by combo
+#    python prediction_service.py code --code 005930
+# ============================================================
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+modelengine_dir = os.path.dirname(current_dir)
+root_dir = os.path.dirname(modelengine_dir)
+sys.path.extend([root_dir, modelengine_dir])
+
+try:
+    from MODELENGINE.UTIL import train_engine_unified as T
+    from MODELENGINE.UTIL import engine_registry, engine_bundle
+    from MODELENGINE.UTIL.tree_compiler import compile_engine
+except ImportError:
+    import train_engine_unified as T
+    import engine_registry
+    import engine_bundle
+    from tree_compiler import compile_engine
+
+HOST = "127.0.0.1"
+DEFAULT_PORT = int(os.environ.get("HOJ_PREDICT_PORT", "8765"))
+KEEP_DAYS = 20
+POLL_SEC = 10.0
+CLIENT_TIMEOUT = 0.5
+ON_DEMAND_CACHE = 8
+RANK_KEYS = ("combo", "score", "prob")
+BASE_COLS = ["Date", "Code", "Name", "Close"]
+
+# ------------------------------------------------------------
+# 1) 예측 (엔진 1개 × 프레임)
+# ------------------------------------------------------------
+def score_frame(payload, frame: pd.DataFrame) -> pd.DataFrame:
+    """피처 결측 없는 행만 예측 → Date/Code/Name/Close + score/prob/combo."""
+    features = list(payload.get("features") or [])
+    missing = [c for c in features if c not in frame.columns]
+    if missing:
+        raise KeyError(f"필수 피처가 DB에 없습니다: {missing[:5]}...")
+    X = frame[features]
+    mask = X.notnull().all(axis=1).to_numpy()
+    X = X[mask]
+    out = frame.loc[mask, [c for c in BASE_COLS if c in frame.columns]].copy()
+    if out.empty:
+        return out.assign(score=[], prob=[], combo=[])
+
+    model_reg, model_cls = payload.get("model_reg"), payload.get("model_cls")
+    score = model_reg.predict(X) if model_reg is not None else np.zeros(len(X))
+    prob = model_cls.predict_proba(X)[:, 1] if model_cls is not None else np.zeros(len(X))
+    out["score"] = np.asarray(score, dtype=float)
+    out["prob"] = np.asarray(prob, dtype=float)
+    out["combo"] = out["prob"] * np.clip(out["score"], -0.10, None)
+    return out.reset_index(drop=True)
+
+def _scorer(payload):
+    """score_frame 에 넘길 엔진: 컴파일 가능하면 CompiledModel (같은 predict / predict_proba), 아니면 원본."""
+    try:
+        return compile_engine(payload)
+    except NotImplementedError as e:
+        print(f"[SERVE] 트리 컴파일 미지원 → LightGBM 예측 사용: {e}")
+        return payload
+
+def _engine_key(path: str) -> str:
+    return os.path.splitext(os.path.basename(path))[0]
+
+def _rows(df: pd.DataFrame) -> list:
+    out = df.copy()
+    if "Date" in out.columns:
+        out["Date"] = out["Date"].dt.strftime("%Y-%m-%d")
+    out = out.rename(columns={"Date": "date", "Code": "code", "Name": "name", "Close": "close"})
+    return json.loads(out.to_json(orient="records", force_ascii=False))
+
+# ------------------------------------------------------------
+# 2) 상주 상태 (엔진 + 최근 N 일 예측)
+# ------------------------------------------------------------
+class ServiceState:
+    """한 번 만들어지면 읽기 전용. 리로드는 새 ServiceState 를 만들어 교체."""
+
+    def __init__(self, engine_paths: list, db_path: str, keep_days: int = KEEP_DAYS):
+        t0 = time.perf_counter()
+        self.db_path = db_path
+        self.db_fp = T.db_fingerprint(db_path)
+        self.keep_days = keep_days
+        self.engines = OrderedDict()
+        for p in engine_paths:
+            try:
+                payload = engine_bundle.load_engine(p)
+                self.engines[_engine_key(p)] = {"path": p, "payload": payload, "scorer": _scorer(payload)}
+            except Exception as e:
+                print(f"[SERVE] 엔진 로드 실패 (제외): {os.path.basename(p)} → {e}")
+        if not self.engines:
+            raise FileNotFoundError("상주할 엔진이 없습니다.")
+
+        feats = []
+        for e in self.engines.values():
+            feats.extend(e["payload"].get("features") or [])
+        self.columns = list(dict.fromkeys(BASE_COLS + feats))
+        frame = self._read_recent(db_path, self.columns, keep_days)
+        self.dates = sorted(frame["Date"].unique())
+
+        self.preds = {}
+        for key, e in list(self.engines.items()):
+            try:
+                pred = score_frame(e["scorer"], frame)
+            except Exception as ex:
+                print(f"[SERVE] 예측 실패 (제외): {key} → {ex}")
+                del self.engines[key]
+                continue
+            # 날짜별 조각 미리 분리 → 조회 시 정렬만
+            self.preds[key] = {d: g.reset_index(drop=True) for d, g in pred.groupby("Date", sort=False)}
+        if not self.preds:
+            raise RuntimeError("예측 가능한 엔진이 없습니다.")
+        self.loaded_at = time.strftime("%Y-%m-%d %H:%M:%S")
+        self.load_sec = round(time.perf_counter() - t0, 3)
+        self._on_demand = OrderedDict()
+        self._lock = threading.Lock()
+        print(f"[SERVE] 적재 완료: 엔진 {len(self.preds)}개 × {len(self.dates)}일 × {len(frame):,}행 "
+              f"({self.load_sec:.2f}s) | DB={os.path.basename(db_path)}")
+
+    @staticmethod
+    def _read_date_filtered(db_path: str, columns: list, op: str, value) -> pd.DataFrame:
+        cols = [c for c in columns if c in T.schema_frame(db_path).columns]
+        try:
+            df = pd.read_parquet(db_path, columns=cols, filters=[("Date", op, value)])
+        except Exception:
+            # Date 가 문자열로 저장된 DB 등 → 필요한 컬럼만 읽고 메모리에서 필터
+            df = pd.read_parquet(db_path, columns=cols)
+            df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+            df = df[df["Date"] >= value] if op == ">=" else df[df["Date"] == value]
+        df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+        if "Code" in df.columns:
+            df["Code"] = df["Code"].astype(str).str.zfill(6)
+        return df
+
+    @classmethod
+    def _read_recent(cls, db_path: str, columns: list, keep_days: int) -> pd.DataFrame:
+        d = pd.to_datetime(pd.read_parquet(db_path, columns=["Date"])["Date"], errors="coerce")
+        days = np.sort(d.dropna().unique())[-keep_days:]
+        if len(days) == 0:
+            raise ValueError(f"DB 에 날짜가 없습니다: {db_path}")
+        df = cls._read_date_filtered(db_path, columns, ">=", pd.Timestamp(days[0]))
+        return df[df["Date"].isin(days)].reset_index(drop=True)
+
+    # ---- 조회 ----
+    def resolve_engine(self, engine: str = None) -> str:
+        if not engine:
+            return next(iter(self.preds))
+        key = _engine_key(engine)
+        if key not in self.preds:
+            raise KeyError(f"상주하지 않는 엔진: {key} (상주: {list(self.preds)})")
+        return key
+
+    def day_frame(self, key: str, date=None) -> pd.DataFrame:
+        """date=None 이면 상주 최신일. 상주 구간 밖이면 그 날짜만 읽어 예측 (캐시)."""
+        day = pd.Timestamp(self.dates[-1] if date is None else date).normalize()
+        got = self.preds[key].get(day)
+        if got is not None:
+            return got
+        with self._lock:
+            ck = (key, day)
+            if ck in self._on_demand:
+                self._on_demand.move_to_end(ck)
+                return self._on_demand[ck]
+        frame = self._read_date_filtered(self.db_path, self.columns, "==", day)
+        got = score_frame(self.engines[key]["scorer"], frame) if not frame.empty else frame
+        with self._lock:
+            self._on_demand[ck] = got
+            while len(self._on_demand) > ON_DEMAND_CACHE:
+                self._on_demand.popitem(last=False)
+        return got
+
+    def topk(self, k: int = 10, date=None, engine: str = None, rank_by: str = "combo") -> pd.DataFrame:
+        if rank_by not in RANK_KEYS:
+            raise ValueError(f"rank_by 는 {RANK_KEYS} 중 하나")
+        day = self.day_frame(self.resolve_engine(engine), date)
+        if day.empty:
+            return day
+        return day.nlargest(int(k), rank_by).reset_index(drop=True)
+
+    def code(self, code: str, date=None, days: int = 1, engine: str = None) -> pd.DataFrame:
+        key = self.resolve_engine(engine)
+        code = str(code).zfill(6)
+        if date is None and days > 1:
+            parts = [self.preds[key].get(pd.Timestamp(d)) for d in self.dates[-int(days):]]
+        else:
+            parts = [self.day_frame(key, date)]
+        parts = [p[p["Code"] == code] for p in parts if p is not None and not p.empty]
+        if not parts:
+            return pd.DataFrame(columns=BASE_COLS + list(RANK_KEYS))
+        return pd.concat(parts, ignore_index=True)
+
+    def info(self) -> dict:
+        return {
+            "status": "ok", "loaded_at": self.loaded_at, "load_sec": self.load_sec,
+            "db": os.path.basename(self.db_path), "db_fp": self.db_fp,
+            "dates": [pd.Timestamp(d).strftime("%Y-%m-%d") for d in (self.dates[0], self.dates[-1])],
+            "engines": list(self.preds),
+        }
+
+# ------------------------------------------------------------
+# 3) 서비스 (상태 교체 + 변경 감시)
+# ------------------------------------------------------------
+class PredictionService:
+    """
+    engines: 상주할 엔진 경로/이름 목록 (None 이면 조건에 맞는 최신 REAL 1개, 리로드 때마다 다시 선택)
+    """
+
+    def __init__(self, engines: list = None, keep_days: int = KEEP_DAYS, version: str = "V31",
+                 horizon: int = None, input_window: int = None, n_estimators: int = None,
+                 poll_sec: float = POLL_SEC):
+        self.engine_args = list(engines or [])
+        self.keep_days = keep_days
+        self.version = version
+        self.select = {"horizon": horizon, "input_window": input_window, "n_estimators": n_estimators}
+        self.poll_sec = poll_sec
+        self.base = T.engine_base("HOJ")
+        self.state = None
+        self._sig = None
+        self._reload_lock = threading.Lock()
+        self._halt = threading.Event()
+
+    def _engine_paths(self) -> list:
+        if not self.engine_args:
+            entry = engine_registry.latest_engine("REAL", base=self.base, **self.select)
+            if entry is None:
+                raise FileNotFoundError(f"조건에 맞는 REAL 엔진 없음: {self.select} ({self.base})")
+            return [entry["path"]]
+        paths = []
+        for e in self.engine_args:
+            if os.path.exists(e):
+                paths.append(e)
+                continue
+            hits = [x["path"] for x in engine_registry.list_engines(base=self.base)
+                    if _engine_key(x["name"]) == _engine_key(e)]
+            if not hits:
+                print(f"[SERVE] 엔진을 찾지 못함 (제외): {e}")
+            paths.extend(hits[:1])
+        return paths
+
+    def _registry_mtime(self):
+        reg = os.path.join(self.base, engine_registry.REGISTRY_NAME)
+        return os.path.getmtime(reg) if os.path.exists(reg) else None
+
+    def signature(self) -> tuple:
+        """변경 감지용: 색인 sqlite 수정시각 + 엔진 폴더 목록 + 최신 DB 지문."""
+        reg_mtime = self._registry_mtime()
+        listing = []
+        for sub in ("REAL", "RESEARCH"):
+            d = os.path.join(self.base, sub)
+            if os.path.isdir(d):
+                listing.extend((sub, n, os.path.getmtime(os.path.join(d, n))) for n in sorted(os.listdir(d)))
+        db_path = T.find_latest_db_path(self.version)
+        return reg_mtime, tuple(listing), db_path, T.db_fingerprint(db_path)
+
+    def reload(self, force: bool = False) -> bool:
+        with self._reload_lock:
+            sig = self.signature()
+            if not force and sig == self._sig and self.state is not None:
+                return False
+            print("[SERVE] 변경 감지 → 재적재" if self.state is not None else "[SERVE] 초기 적재")
+            self.state = ServiceState(self._engine_paths(), sig[2], self.keep_days)
+            # 재적재 중 색인 sync 로 sqlite 가 갱신될 수 있으므로 적재 후 색인 수정시각만 다시 기록
+            #  (엔진 목록 / DB 경로·지문은 적재에 쓴 sig 그대로 → 적재 중 새로 생긴 DB/엔진은 다음 폴링에서 감지)
+            self._sig = (self._registry_mtime(),) + tuple(sig[1:])
+            return True
+
+    def _watch(self):
+        while not self._halt.wait(self.poll_sec):
+            try:
+                self.reload()
+            except Exception as e:
+                # 실패 시 기존 상태로 계속 응답
+                print(f"[SERVE] 재적재 실패 (기존 상태 유지): {e}")
+
+    def serve(self, host: str = HOST, port: int = DEFAULT_PORT):
+        self.reload(force=True)
+        httpd = ThreadingHTTPServer((host, port), _make_handler(self))
+        httpd.daemon_threads = True
+        watcher = threading.Thread(target=self._watch, daemon=True)
+        watcher.start()
+        print(f"[SERVE] http://{host}:{port} 대기 중 (감시 주기 {self.poll_sec:.0f}s, Ctrl+C 종료)")
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._halt.set()
+            httpd.server_close()
+            print("[SERVE] 종료")
+
+
+def _make_handler(service: PredictionService):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, fmt, *args):
+            pass
+
+        def _send(self, code: int, body: dict):
+            raw = json.dumps(body, ensure_ascii=False, default=str).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(raw)))
+            self.end_headers()
+            self.wfile.write(raw)
+
+        def do_GET(self):
+            url = urllib.parse.urlparse(self.path)
+            q = {k: v[-1] for k, v in urllib.parse.parse_qs(url.query).items()}
+            t0 = time.perf_counter()
+            try:
+                st = service.state
+                if url.path == "/health":
+                    body = st.info()
+                elif url.path == "/engines":
+                    body = {"engines": [{"name": k, "path": st.engines[k]["path"],
+                                         "features": len(st.engines[k]["payload"].get("features") or [])}
+                                        for k in st.preds]}
+                elif url.path == "/dates":
+                    body = {"dates": [pd.Timestamp(d).strftime("%Y-%m-%d") for d in st.dates]}
+                elif url.path == "/topk":
+                    df = st.topk(int(q.get("k", 10)), q.get("date"), q.get("engine"), q.get("rank_by", "combo"))
+                    body = {"engine": st.resolve_engine(q.get("engine")), "db": os.path.basename(st.db_path),
+                            "rows": _rows(df)}
+                elif url.path == "/code":
+                    if not q.get("code"):
+                        raise ValueError("code 파라미터 필요")
+                    df = st.code(q["code"], q.get("date"), int(q.get("days", 1)), q.get("engine"))
+                    body = {"engine": st.resolve_engine(q.get("engine")), "rows": _rows(df)}
+                elif url.path == "/reload":
+                    body = {"reloaded": service.reload(force=True), **service.state.info()}
+                else:
+                    return self._send(404, {"error": f"unknown path: {url.path}"})
+            except KeyError as e:
+                return self._send(404, {"error": e.args[0] if e.args else str(e)})
+            except ValueError as e:
+                return self._send(400, {"error": str(e)})
+            except Exception as e:
+                return self._send(500, {"error": f"{type(e).__name__}: {e}"})
+            body["elapsed_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+            self._send(200, body)
+
+    return Handler
+
+# ------------------------------------------------------------
+# 4) 클라이언트 (서비스 없으면 None → 호출 측은 기존 경로)
+# ------------------------------------------------------------
+def _get(path: str, params: dict = None, port: int = None, timeout: float = CLIENT_TIMEOUT):
+    params = {k: v for k, v in (params or {}).items() if v is not None}
+    url = f"http://{HOST}:{port or DEFAULT_PORT}{path}"
+    if params:
+        url += "?" + urllib.parse.urlencode(params)
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as r:
+            return json.loads(r.read().decode("utf-8"))
+    except urllib.error.HTTPError as e:
+        try:
+            msg = json.loads(e.read().decode("utf-8")).get("error")
+        except Exception:
+            msg = str(e)
+        print(f"[SERVE] 서비스 응답 오류 ({e.code}): {msg}")
+        return None
+    except Exception:
+        return None
+
+def _frame(body) -> pd.DataFrame:
+    if body is None:
+        return None
+    df = pd.DataFrame(body.get("rows") or [])
+    df.attrs.update({k: body[k] for k in ("engine", "db") if k in body})    # 응답한 엔진 / DB 파일명
+    return df
+
+def is_running(port: int = None) -> bool:
+    return _get("/health", port=port) is not None
+
+def query_topk(k: int = 10, date=None, engine: str = None, rank_by: str = "combo", port: int = None):
+    """top-K DataFrame(code/name/close/score/prob/combo/date, attrs: engine/db). 서비스 없음/오류면 None."""
+    date = pd.Timestamp(date).strftime("%Y-%m-%d") if date is not None else None
+    return _frame(_get("/topk", {"k": k, "date": date, "engine": engine, "rank_by": rank_by}, port))
+
+def query_code(code: str, date=None, days: int = 1, engine: str = None, port: int = None):
+    date = pd.Timestamp(date).strftime("%Y-%m-%d") if date is not None else None
+    return _frame(_get("/code", {"code": code, "date": date, "days": days, "engine": engine}, port))
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p_sv = sub.add_parser("serve")
+    p_sv.add_argument("--engines", default=None, help="엔진 경로/이름 (쉼표 구분, 미지정 시 최신 REAL)")
+    p_sv.add_argument("--days", type=int, default=KEEP_DAYS)
+    p_sv.add_argument("--version", default="V31")
+    p_sv.add_argument("--horizon", type=int, default=None)
+    p_sv.add_argument("--input_window", type=int, default=None)
+    p_sv.add_argument("--n_estimators", type=int, default=None)
+    p_sv.add_argument("--poll", type=float, default=POLL_SEC)
+    p_sv.add_argument("--port", type=int, default=DEFAULT_PORT)
+    p_tk = sub.add_parser("topk")
+    p_tk.add_argument("--k", type=int, default=10)
+    p_tk.add_argument("--date", default=None)
+    p_tk.add_argument("--engine", default=None)
+    p_tk.add_argument("--rank_by", default="combo", choices=list(RANK_KEYS))
+    p_tk.add_argument("--port", type=int, default=DEFAULT_PORT)
+    p_cd = sub.add_parser("code")
+    p_cd.add_argument("--code", required=True)
+    p_cd.add_argument("--date", default=None)
+    p_cd.add_argument("--days", type=int, default=5)
+    p_cd.add_argument("--engine", default=None)
+    p_cd.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = ap.parse_args()
+
+    if args.cmd == "serve":
+        PredictionService(args.engines.split(",") if args.engines else None, args.days, args.version,
+                          args.horizon, args.input_window, args.n_estimators, args.poll).serve(port=args.port)
+    else:
+        t0 = time.perf_counter()
+        if args.cmd == "topk":
+            df = query_topk(args.k, args.date, args.engine, args.rank_by, args.port)
+        else:
+            df = query_code(args.code, args.date, args.days, args.engine, args.port)
+        if df is None:
+            print(f"[SERVE] 서비스 응답 없음 (127.0.0.1:{args.port}) → serve 먼저 실행")
+        else:
+            print(df.to_string(index=False))
+            print(f"[SERVE] {(time.perf_counter() - t0) * 1000:.1f}ms")
@@ -0,0 +1,273 @@
+# ============================================================
+# profiling.py
+#  - 단계별 실행 계측 (가벼운 컨텍스트): 벽시계 / CPU 시간 / 최대 RSS / 행 수
+#      prof = RunProfiler("train_unified", tags={"mode": "research", "horizon": 5})
+#      with prof.stage("mask") as st:
+#          ...
+#          st["rows"] = len(df_m)
+#      meta["profile"] = prof.summary()      # 엔진 meta 에 포함
+#      prof.write()                          # LOG/PROFILE/profile_runs.jsonl 에 1줄 추가
+#  - CPU 시간: process_time (LightGBM 등 모든 스레드 합산) → cpu/wall 로 병렬도 확인
+#  - 최대 RSS: psutil 이 있으면 단계 동안 백그라운드 샘플링(기본 0.05s)한 최댓값
+#              psutil 이 없으면 resource.getrusage 의 프로세스 누적 최댓값 (Windows 는 None)
+#  - report: 같은 작업의 실행 기록을 단계별로 비교 (최근 실행 vs 이전 실행 중앙값)
+#
+#  사용 예)
+#    python profiling.py report --job train_unified --last 10
+#    python profiling.py report --job build_features --stage indicators
+# ============================================================
+
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+modelengine_dir = os.path.dirname(current_dir)
+root_dir = os.path.dirname(modelengine_dir)
+sys.path.extend([root_dir, modelengine_dir])
+
+try:
+    from MODELENGINE.UTIL.config_paths import get_path
+except ImportError:
+    from config_paths import get_path
+
+SAMPLE_INTERVAL = 0.05
+SLOW_RATIO = 1.5
+
+
+def default_log_path() -> str:
+    return get_path("LOG", "PROFILE", "profile_runs.jsonl")
+
+# ------------------------------------------------------------
+# 1) 메모리 측정
+# ------------------------------------------------------------
+def _rss_mb():
+    """현재 RSS (MB). psutil 없으면 None."""
+    if psutil is None:
+        return None
+    try:
+        return psutil.Process().memory_info().rss / 2**20
+    except Exception:
+        return None
+
+def _maxrss_mb():
+    """프로세스 시작 이후 최대 RSS (MB, psutil 없을 때 대체값)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+class _RssSampler(threading.Thread):
+    """단계 실행 중 RSS 최댓값 추적 (daemon). reset() 으로 단계 시작 시 초기화."""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = 0.0
+        self._halt = threading.Event()
+
+    def reset(self):
+        self.peak = _rss_mb() or 0.0
+
+    def run(self):
+        while not self._halt.wait(self.interval):
+            rss = _rss_mb()
+            if rss is not None and rss > self.peak:
+                self.peak = rss
+
+    def stop(self):
+        self._halt.set()
+
+# ------------------------------------------------------------
+# 2) 실행 계측
+# ------------------------------------------------------------
+class RunProfiler:
+    """
+    한 번의 실행(run) 안의 단계 기록. 단계는 중첩하지 않고 순서대로 사용.
+    stage() 가 넘겨주는 dict 에 rows 등 추가 값을 넣으면 그대로 기록된다.
+    """
+
+    def __init__(self, job: str, tags: dict = None, log_path: str = None, verbose: bool = True):
+        self.job = job
+        self.tags = dict(tags or {})
+        self.log_path = log_path or default_log_path()
+        self.verbose = verbose
+        self.run_id = datetime.now().strftime("%y%m%d%H%M%S") + "_" + uuid.uuid4().hex[:6]
+        self.started_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.stages = []
+        self._wall0 = time.perf_counter()
+        self._cpu0 = time.process_time()
+
+    @contextmanager
+    def stage(self, name: str, rows: int = None):
+        rec = {"stage": name, "rows": rows}
+        sampler = None
+        if psutil is not None:
+            sampler = _RssSampler()
+            sampler.reset()
+            sampler.start()
+        rss0 = _rss_mb()
+        w0, c0 = time.perf_counter(), time.process_time()
+        try:
+            yield rec
+        except BaseException as e:
+            rec["error"] = type(e).__name__
+            raise
+        finally:
+            wall, cpu = time.perf_counter() - w0, time.process_time() - c0
+            rss1 = _rss_mb()
+            if sampler is not None:
+                sampler.stop()
+                sampler.join(timeout=1)
+                peak = max(sampler.peak, rss1 or 0.0)
+            else:
+                peak = _maxrss_mb()
+            rec.update({
+                "wall": round(wall, 3),
+                "cpu": round(cpu, 3),
+                "peak_rss_mb": round(peak, 1) if peak else None,
+                "rss_delta_mb": round(rss1 - rss0, 1) if rss0 is not None and rss1 is not None else None,
+            })
+            if rec.get("rows") is not None:
+                rec["rows"] = int(rec["rows"])
+            self.stages.append(rec)
+            if self.verbose:
+                mem = f" | peak={rec['peak_rss_mb']:,.0f}MB" if rec["peak_rss_mb"] else ""
+                rows_txt = f" | rows={rec['rows']:,}" if rec.get("rows") is not None else ""
+                print(f"[PROF] {name}: wall={wall:.2f}s cpu={cpu:.2f}s{mem}{rows_txt}")
+
+    def summary(self) -> dict:
+        peaks = [s["peak_rss_mb"] for s in self.stages if s.get("peak_rss_mb")]
+        return {
+            "job": self.job,
+            "run_id": self.run_id,
+            "started_at": self.started_at,
+            "tags": self.tags,
+            "total_wall": round(time.perf_counter() - self._wall0, 3),
+            "total_cpu": round(time.process_time() - self._cpu0, 3),
+            "peak_rss_mb": max(peaks) if peaks else None,
+            "rss_source": "psutil" if psutil is not None else ("getrusage" if resource is not None else None),
+            "stages": list(self.stages),
+        }
+
+    def write(self, extra: dict = None) -> dict:
+        """실행 기록 1줄 append (JSONL). 기록 실패는 학습/빌드를 막지 않음."""
+        rec = self.summary()
+        if extra:
+            rec.update(extra)
+        try:
+            os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(rec, ensure_ascii=False, default=str) + "\n")
+        except Exception as e:
+            print(f"[PROF] 실행 기록 저장 실패: {e}")
+        return rec
+
+# ------------------------------------------------------------
+# 3) 실행 기록 비교
+# ------------------------------------------------------------
+def load_runs(job: str = None, log_path: str = None) -> list:
+    path = log_path or default_log_path()
+    if not os.path.exists(path):
+        return []
+    runs = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            if job is None or rec.get("job") == job:
+                runs.append(rec)
+    return runs
+
+def compare_runs(runs: list, metric: str = "wall"):
+    """실행 × 단계 표 (값: metric) + 마지막 실행 / 이전 중앙값 비율."""
+    import pandas as pd
+
+    rows = []
+    for r in runs:
+        row = {"run_id": r["run_id"], "started_at": r.get("started_at"),
+               "total_wall": r.get("total_wall"), "peak_rss_mb": r.get("peak_rss_mb")}
+        row.update({k: v for k, v in (r.get("tags") or {}).items() if not isinstance(v, (list, dict))})
+        # 같은 이름 단계가 여러 번(날짜 루프 등)이면 합산, 메모리는 최댓값
+        for s in r.get("stages", []):
+            v = s.get(metric)
+            if v is None:
+                continue
+            prev = row.get(s["stage"])
+            if prev is None:
+                row[s["stage"]] = v
+            else:
+                row[s["stage"]] = max(prev, v) if metric == "peak_rss_mb" else prev + v
+        rows.append(row)
+    table = pd.DataFrame(rows)
+
+    stages = list(dict.fromkeys(s["stage"] for r in runs for s in r.get("stages", [])))
+    ratio = pd.Series(dtype=float)
+    if len(table) >= 2 and stages:
+        st = table.reindex(columns=stages).astype(float)
+        prev = st.iloc[:-1].median()
+        ratio = (st.iloc[-1] / prev.where(prev > 0)).round(2).dropna()
+    return table, ratio
+
+def report(job: str = None, last: int = 10, stage: str = None, metric: str = "wall", log_path: str = None):
+    import pandas as pd
+
+    runs = load_runs(job, log_path)
+    if not runs:
+        print(f"[PROF] 실행 기록 없음: {log_path or default_log_path()}")
+        return None
+    jobs = sorted({r["job"] for r in runs})
+    if job is None and len(jobs) > 1:
+        print(f"[PROF] 작업 여러 개 {jobs} → --job 지정 필요 (마지막 작업 {runs[-1]['job']} 표시)")
+        runs = [r for r in runs if r["job"] == runs[-1]["job"]]
+    runs = runs[-last:]
+    table, ratio = compare_runs(runs, metric)
+    if stage:
+        keep = [c for c in table.columns if c in ("run_id", "started_at", "total_wall", "peak_rss_mb", stage)]
+        table = table[keep]
+        ratio = ratio.reindex([stage]).dropna()
+
+    with pd.option_context("display.max_columns", None, "display.width", 200):
+        print(f"=== [PROF] {runs[-1]['job']} 최근 {len(runs)}회 ({metric}) ===")
+        print(table.to_string(index=False))
+    if not ratio.empty:
+        print(f"\n[PROF] 마지막 실행 / 이전 중앙값 ({metric})")
+        for name, r in ratio.items():
+            flag = "  ← 느려짐" if r >= SLOW_RATIO else ""
+            print(f"  {name:<16} x{r:.2f}{flag}")
+    return table
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p_rp = sub.add_parser("report")
+    p_rp.add_argument("--job", default=None, help="train_unified | build_features | build_unified_db | raw_patch")
+    p_rp.add_argument("--last", type=int, default=10)
+    p_rp.add_argument("--stage", default=None)
+    p_rp.add_argument("--metric", default="wall", choices=["wall", "cpu", "peak_rss_mb", "rows"])
+    p_rp.add_argument("--log", default=None)
+    args = ap.parse_args()
+    report(args.job, args.last, args.stage, args.metric, args.log)
@@ -0,0 +1,468 @@
+# ============================================================
+# query_db.py  —  임베디드 SQL 쿼리 레이어 (RAW / FEATURE / HOJ_DB)
+#   - 최신 parquet 파일을 뷰(raw, features, hoj_db)로 등록해 SQL로 조회
+#   - DuckDB가 필요한 컬럼/조건만 파일에서 읽음 (projection/filter pushdown)
+#   - duckdb 미설치 시 pyarrow(columns/filters) 기반으로 같은 API 제공
+#   - 진단 스크립트(raw_checker, inspect_parquet, check_nulls_in_V25_DB, check_single_stock_V28 등)에서
+#     전체 로드 대신 사용
+#
+#   사용 예:
+#     python query_db.py counts --dataset raw --tail 10
+#     python query_db.py history 005930 --dataset hoj_db --columns Close,RSI_14
+#     python query_db.py nulls --dataset hoj_db --start 2024-11-01
+#     python query_db.py describe --dataset features
+#     python query_db.py sql "SELECT Code, COUNT(*) n FROM hoj_db GROUP BY 1 ORDER BY n LIMIT 5"
+# ============================================================
+
+import os
+import sys
+import argparse
+from typing import Optional, List, Dict
+
+import pandas as pd
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)   # MODELENGINE
+root_dir = os.path.dirname(parent_dir)      # Root
+sys.path.append(root_dir)
+
+try:
+    from MODELENGINE.UTIL.config_paths import get_path
+    from MODELENGINE.UTIL.version_utils import find_latest_file
+except ImportError:
+    sys.path.append(parent_dir)
+    from UTIL.config_paths import get_path
+    from UTIL.version_utils import find_latest_file
+
+try:
+    import duckdb
+    _HAS_DUCKDB = True
+except ImportError:
+    duckdb = None
+    _HAS_DUCKDB = False
+
+
+# ------------------------------------------------------------
+# 1. 데이터셋 정의 (뷰 이름 -> (폴더, 파일 prefix))
+# ------------------------------------------------------------
+DATASETS = {
+    "raw":      (("RAW", "stocks"), "all_stocks_cumulative"),
+    "features": (("FEATURE",), "features_V31"),
+    "hoj_db":   (("HOJ_DB",), "HOJ_DB_V31"),
+}
+
+
+def resolve_dataset_path(dataset: str, path: Optional[str] = None) -> str:
+    """뷰 이름에 해당하는 최신 parquet 경로를 반환 (path가 주어지면 그대로 사용)."""
+    if path:
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"파일 없음: {path}")
+        return str(path)
+
+    if dataset not in DATASETS:
+        raise KeyError(f"알 수 없는 데이터셋: {dataset} (가능: {', '.join(DATASETS)})")
+
+    folder_parts, prefix = DATASETS[dataset]
+    folder = get_path(*folder_parts)
+    latest = find_latest_file(folder, prefix)
+    if latest is None:
+        fallback = os.path.join(folder, f"{prefix}.parquet")
+        if not os.path.exists(fallback):
+            raise FileNotFoundError(f"{dataset} 파일 없음: {folder}/{prefix}*.parquet")
+        return fallback
+    return str(latest)
+
+
+def _q(name: str) -> str:
+    """SQL 식별자 인용 (한글/특수문자 컬럼 대응)."""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _lit(value: str) -> str:
+    """SQL 문자열 리터럴 (경로 등)."""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+# ------------------------------------------------------------
+# 2. 연결 / 뷰 등록
+# ------------------------------------------------------------
+def connect(paths: Optional[Dict[str, str]] = None, datasets=None, threads: Optional[int] = None):
+    """
+    DuckDB 인메모리 연결을 만들고 데이터셋 뷰를 등록한다.
+    paths: {"hoj_db": "...parquet"} 처럼 특정 파일을 지정할 때 사용
+    datasets: 등록할 뷰 목록 (기본: 존재하는 전체)
+    """
+    if not _HAS_DUCKDB:
+        raise ImportError("duckdb가 설치되어 있지 않습니다. (pip install duckdb)")
+
+    con = duckdb.connect(database=":memory:")
+    if threads:
+        con.execute(f"SET threads TO {int(threads)}")
+
+    paths = dict(paths or {})
+    names = list(datasets) if datasets else sorted(set(DATASETS) | set(paths))
+    for name in names:
+        try:
+            p = resolve_dataset_path(name, paths.get(name))
+        except (FileNotFoundError, KeyError):
+            continue
+        con.execute(f"CREATE OR REPLACE VIEW {_q(name)} AS SELECT * FROM read_parquet({_lit(p)})")
+    return con
+
+
+def query(sql: str, params: Optional[list] = None, con=None, paths: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+    """SQL 실행 후 DataFrame 반환. 뷰: raw, features, hoj_db"""
+    own = con is None
+    if own:
+        con = connect(paths)
+    try:
+        return con.execute(sql, params or []).df()
+    finally:
+        if own:
+            con.close()
+
+
+def _run(sql: str, params: Optional[list] = None) -> pd.DataFrame:
+    """뷰 등록 없이 파일 경로를 직접 읽는 단발 쿼리."""
+    con = duckdb.connect(database=":memory:")
+    try:
+        return con.execute(sql, params or []).df()
+    finally:
+        con.close()
+
+
+def _date_where(start, end, col: str = "Date") -> tuple:
+    conds, params = [], []
+    if start is not None:
+        conds.append(f"CAST({_q(col)} AS DATE) >= CAST(? AS DATE)")
+        params.append(str(pd.to_datetime(start).date()))
+    if end is not None:
+        conds.append(f"CAST({_q(col)} AS DATE) <= CAST(? AS DATE)")
+        params.append(str(pd.to_datetime(end).date()))
+    return conds, params
+
+
+def _read_columns(path: str, columns: Optional[List[str]], filters=None) -> pd.DataFrame:
+    """duckdb 미설치 시: pyarrow로 필요한 컬럼만 읽기."""
+    if columns is not None:
+        avail = parquet_columns(path)
+        columns = [c for c in columns if c in avail]
+    return pd.read_parquet(path, columns=columns, filters=filters)
+
+
+def _filter_dates(df: pd.DataFrame, start, end, col: str = "Date") -> pd.DataFrame:
+    if start is None and end is None:
+        return df
+    d = pd.to_datetime(df[col], errors="coerce")
+    m = pd.Series(True, index=df.index)
+    if start is not None:
+        m &= d >= pd.to_datetime(start)
+    if end is not None:
+        m &= d <= pd.to_datetime(end)
+    return df.loc[m]
+
+
+# ------------------------------------------------------------
+# 3. 자주 쓰는 진단 쿼리
+# ------------------------------------------------------------
+def parquet_columns(path: str) -> List[str]:
+    """파일 메타데이터에서 컬럼 목록만 읽음 (데이터 미로드)."""
+    import pyarrow.parquet as pq
+    return list(pq.ParquetFile(path).schema_arrow.names)
+
+
+def describe(dataset: str = "hoj_db", path: Optional[str] = None) -> dict:
+    """행 수, 컬럼 목록, 파일 크기 (parquet 푸터만 읽음)."""
+    import pyarrow.parquet as pq
+    p = resolve_dataset_path(dataset, path)
+    pf = pq.ParquetFile(p)
+    return {
+        "path": p,
+        "rows": int(pf.metadata.num_rows),
+        "columns": list(pf.schema_arrow.names),
+        "row_groups": int(pf.metadata.num_row_groups),
+        "size_mb": round(os.path.getsize(p) / 1024 / 1024, 2),
+    }
+
+
+def date_code_counts(dataset: str = "raw", start=None, end=None, path: Optional[str] = None) -> pd.DataFrame:
+    """날짜별 종목 수 (Date, n_codes)."""
+    p = resolve_dataset_path(dataset, path)
+    if _HAS_DUCKDB:
+        conds, params = _date_where(start, end)
+        where = ("WHERE " + " AND ".join(conds)) if conds else ""
+        sql = (
+            f"SELECT CAST(Date AS DATE) AS Date, COUNT(DISTINCT Code) AS n_codes "
+            f"FROM read_parquet({_lit(p)}) {where} GROUP BY 1 ORDER BY 1"
+        )
+        df = _run(sql, params)
+    else:
+        df = _filter_dates(_read_columns(p, ["Date", "Code"]), start, end)
+        df = df.groupby(pd.to_datetime(df["Date"]).dt.normalize())["Code"].nunique()
+        df = df.rename("n_codes").reset_index()
+    df["Date"] = pd.to_datetime(df["Date"])
+    return df
+
+
+def stock_history(code: str, dataset: str = "hoj_db", columns: Optional[List[str]] = None,
+                  start=None, end=None, path: Optional[str] = None,
+                  date_col: str = "Date", code_col: str = "Code") -> pd.DataFrame:
+    """단일 종목 이력 (Code 조건과 컬럼만 읽음). 구버전 DB 는 date_col="날짜", code_col="종목코드"."""
+    p = resolve_dataset_path(dataset, path)
+    cols = None
+    if columns:
+        cols = list(dict.fromkeys([date_col, code_col] + list(columns)))
+
+    if _HAS_DUCKDB:
+        sel = ", ".join(_q(c) for c in cols) if cols else "*"
+        conds, params = _date_where(start, end, date_col)
+        conds.insert(0, f"{_q(code_col)} = ?")
+        params.insert(0, str(code))
+        sql = f"SELECT {sel} FROM read_parquet({_lit(p)}) WHERE {' AND '.join(conds)} ORDER BY {_q(date_col)}"
+        df = _run(sql, params)
+    else:
+        df = _read_columns(p, cols, filters=[(code_col, "==", str(code))])
+        df = _filter_dates(df, start, end, date_col).sort_values(date_col)
+    if date_col in df.columns:
+        df[date_col] = pd.to_datetime(df[date_col])
+    return df.reset_index(drop=True)
+
+
+def day_slice(date=None, dataset: str = "hoj_db", columns: Optional[List[str]] = None,
+              codes: Optional[List[str]] = None, path: Optional[str] = None) -> pd.DataFrame:
+    """특정 날짜(없으면 최신일)의 단면. 예측용 피처만 읽을 때 사용."""
+    p = resolve_dataset_path(dataset, path)
+    cols = None
+    if columns:
+        cols = list(dict.fromkeys(["Date", "Code"] + list(columns)))
+
+    if _HAS_DUCKDB:
+        con = duckdb.connect(database=":memory:")
+        try:
+            src = f"read_parquet({_lit(p)})"
+            if date is None:
+                date = con.execute(f"SELECT MAX(CAST(Date AS DATE)) FROM {src}").fetchone()[0]
+            sel = ", ".join(_q(c) for c in cols) if cols else "*"
+            conds = ["CAST(Date AS DATE) = CAST(? AS DATE)"]
+            params = [str(pd.to_datetime(date).date())]
+            if codes:
+                conds.append("Code IN (" + ", ".join("?" for _ in codes) + ")")
+                params.extend(str(c) for c in codes)
+            df = con.execute(f"SELECT {sel} FROM {src} WHERE {' AND '.join(conds)}", params).df()
+        finally:
+            con.close()
+    else:
+        filters = [("Code", "in", [str(c) for c in codes])] if codes else None
+        df = _read_columns(p, cols, filters=filters)
+        d = pd.to_datetime(df["Date"])
+        date = d.max() if date is None else pd.to_datetime(date)
+        df = df.loc[d == date]
+    if "Date" in df.columns:
+        df["Date"] = pd.to_datetime(df["Date"])
+    return df.reset_index(drop=True)
+
+
+def null_summary(dataset: str = "hoj_db", columns: Optional[List[str]] = None,
+                 start=None, end=None, path: Optional[str] = None) -> pd.DataFrame:
+    """
+    컬럼별 결측 수 / 결측률(%) — 파일 안에서 집계하고 결과만 가져옴.
+    키 컬럼(Date/Code)도 포함 (Date 결측 행은 start/end 지정 시 조건에서 빠짐).
+    반환: column, n_null, n_rows, null_pct
+    """
+    p = resolve_dataset_path(dataset, path)
+    avail = parquet_columns(p)
+    cols = [c for c in dict.fromkeys(columns or avail) if c in avail]
+    if not cols:
+        return pd.DataFrame(columns=["column", "n_null", "n_rows", "null_pct"])
+
+    if _HAS_DUCKDB:
+        conds, params = _date_where(start, end)
+        where = ("WHERE " + " AND ".join(conds)) if conds else ""
+        aggs = ", ".join(f"SUM(CASE WHEN {_q(c)} IS NULL THEN 1 ELSE 0 END) AS {_q(c)}" for c in cols)
+        row = _run(f"SELECT COUNT(*) AS __n, {aggs} FROM read_parquet({_lit(p)}) {where}", params).iloc[0]
+        n_rows = int(row["__n"])
+        n_null = {c: int(row[c] or 0) for c in cols}
+    else:
+        df = _filter_dates(_read_columns(p, list(dict.fromkeys(["Date"] + cols))), start, end)
+        n_rows = len(df)
+        n_null = {c: int(v) for c, v in df[cols].isna().sum().items()}
+
+    out = pd.DataFrame({"column": cols, "n_null": [n_null[c] for c in cols], "n_rows": n_rows,
+                        "null_pct": [n_null[c] / n_rows * 100 if n_rows else 0.0 for c in cols]})
+    return out.sort_values("null_pct", ascending=False, kind="mergesort").reset_index(drop=True)
+
+
+def date_bounds(dataset: str = "hoj_db", start=None, end=None, path: Optional[str] = None) -> tuple:
+    """(최소 날짜, 최대 날짜) — Date 컬럼만 집계. 행이 없으면 (None, None)."""
+    p = resolve_dataset_path(dataset, path)
+    if _HAS_DUCKDB:
+        conds, params = _date_where(start, end)
+        where = ("WHERE " + " AND ".join(conds)) if conds else ""
+        row = _run(f"SELECT MIN(CAST(Date AS DATE)) AS lo, MAX(CAST(Date AS DATE)) AS hi "
+                   f"FROM read_parquet({_lit(p)}) {where}", params)
+        lo, hi = row["lo"].iloc[0], row["hi"].iloc[0]
+    else:
+        d = pd.to_datetime(_filter_dates(_read_columns(p, ["Date"]), start, end)["Date"], errors="coerce")
+        lo, hi = d.min(), d.max()
+    if lo is None or pd.isna(lo):
+        return None, None
+    return pd.Timestamp(lo), pd.Timestamp(hi)
+
+
+def first_complete_date(columns: List[str], dataset: str = "hoj_db", start=None, end=None,
+                        path: Optional[str] = None):
+    """columns 가 모든 행에서 결측 없는 첫 날짜 (없으면 None)."""
+    p = resolve_dataset_path(dataset, path)
+    avail = parquet_columns(p)
+    cols = [c for c in columns if c in avail]
+    if _HAS_DUCKDB:
+        conds, params = _date_where(start, end)
+        where = ("WHERE " + " AND ".join(conds)) if conds else ""
+        any_null = " OR ".join(f"{_q(c)} IS NULL" for c in cols) or "FALSE"
+        row = _run(
+            f"SELECT CAST(Date AS DATE) AS Date FROM read_parquet({_lit(p)}) {where} GROUP BY 1 "
+            f"HAVING SUM(CASE WHEN {any_null} THEN 1 ELSE 0 END) = 0 ORDER BY 1 LIMIT 1", params)
+        return pd.Timestamp(row["Date"].iloc[0]) if len(row) else None
+    df = _filter_dates(_read_columns(p, list(dict.fromkeys(["Date"] + cols))), start, end)
+    bad = df[cols].isna().any(axis=1).groupby(pd.to_datetime(df["Date"]).dt.normalize()).any()
+    ok = bad.index[~bad.to_numpy()]
+    return pd.Timestamp(ok.min()) if len(ok) else None
+
+
+def null_by_code(columns: List[str], dataset: str = "hoj_db", top: Optional[int] = 30,
+                 start=None, end=None, path: Optional[str] = None) -> pd.Series:
+    """종목별 평균 결측률(%) = 지정 컬럼 결측률의 평균, 높은 순 top 개."""
+    p = resolve_dataset_path(dataset, path)
+    avail = parquet_columns(p)
+    cols = [c for c in columns if c in avail]
+    if not cols:
+        return pd.Series(dtype=float, name="null_pct")
+    if _HAS_DUCKDB:
+        conds, params = _date_where(start, end)
+        where = ("WHERE " + " AND ".join(conds)) if conds else ""
+        avg = " + ".join(f"AVG(CASE WHEN {_q(c)} IS NULL THEN 1.0 ELSE 0.0 END)" for c in cols)
+        df = _run(f"SELECT Code, ({avg}) / {len(cols)} * 100 AS null_pct "
+                  f"FROM read_parquet({_lit(p)}) {where} GROUP BY 1", params)
+        out = df.set_index("Code")["null_pct"]
+    else:
+        df = _filter_dates(_read_columns(p, list(dict.fromkeys(["Date", "Code"] + cols))), start, end)
+        out = df[cols].isna().groupby(df["Code"], dropna=False).mean().mean(axis=1) * 100
+        out.name = "null_pct"
+    out = out.sort_values(ascending=False, kind="mergesort")
+    return out.head(top) if top else out
+
+
+def preview(dataset: str = "hoj_db", n: int = 3, path: Optional[str] = None) -> pd.DataFrame:
+    """상위 n행 미리보기 (첫 row group만 읽음)."""
+    p = resolve_dataset_path(dataset, path)
+    if _HAS_DUCKDB:
+        return _run(f"SELECT * FROM read_parquet({_lit(p)}) LIMIT {int(n)}")
+    import pyarrow.parquet as pq
+    pf = pq.ParquetFile(p)
+    return pf.read_row_group(0).slice(0, n).to_pandas() if pf.num_row_groups else pd.DataFrame()
+
+
+def bad_ohlcv_rows(dataset: str = "raw", limit: Optional[int] = None, path: Optional[str] = None) -> pd.DataFrame:
+    """OHLCV 결측/이상 행 (Close<=0, High<Low, Volume<=0, NaN)."""
+    p = resolve_dataset_path(dataset, path)
+    cols = ["Date", "Code", "Open", "High", "Low", "Close", "Volume"]
+    if _HAS_DUCKDB:
+        lim = f"LIMIT {int(limit)}" if limit else ""
+        sql = (
+            f"SELECT {', '.join(_q(c) for c in cols)} FROM read_parquet({_lit(p)}) "
+            "WHERE Close <= 0 OR High < Low OR Volume <= 0 "
+            "OR Open IS NULL OR High IS NULL OR Low IS NULL OR Close IS NULL OR Volume IS NULL "
+            f"ORDER BY Date, Code {lim}"
+        )
+        df = _run(sql)
+    else:
+        df = _read_columns(p, cols)
+        bad = (
+            (df["Close"] <= 0) | (df["High"] < df["Low"]) | (df["Volume"] <= 0)
+            | df[["Open", "High", "Low", "Close", "Volume"]].isna().any(axis=1)
+        )
+        df = df.loc[bad].sort_values(["Date", "Code"])
+        if limit:
+            df = df.head(limit)
+    if "Date" in df.columns:
+        df["Date"] = pd.to_datetime(df["Date"])
+    return df.reset_index(drop=True)
+
+
+# ------------------------------------------------------------
+# 4. CLI
+# ------------------------------------------------------------
+def _split_cols(s: Optional[str]) -> Optional[List[str]]:
+    if not s:
+        return None
+    return [c.strip() for c in s.split(",") if c.strip()]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="RAW/FEATURE/HOJ_DB 임베디드 쿼리")
+    ap.add_argument("--path", default=None, help="데이터셋 대신 특정 parquet 파일 지정")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p_cnt = sub.add_parser("counts", help="날짜별 종목 수")
+    p_cnt.add_argument("--dataset", default="raw", choices=list(DATASETS))
+    p_cnt.add_argument("--start", default=None)
+    p_cnt.add_argument("--end", default=None)
+    p_cnt.add_argument("--tail", type=int, default=20)
+    p_cnt.add_argument("--below", type=int, default=None, help="종목 수가 이 값 미만인 날짜만")
+
+    p_his = sub.add_parser("history", help="단일 종목 이력")
+    p_his.add_argument("code")
+    p_his.add_argument("--dataset", default="hoj_db", choices=list(DATASETS))
+    p_his.add_argument("--columns", default=None, help="콤마 구분 (예: Close,RSI_14)")
+    p_his.add_argument("--start", default=None)
+    p_his.add_argument("--end", default=None)
+    p_his.add_argument("--tail", type=int, default=20)
+
+    p_nul = sub.add_parser("nulls", help="컬럼별 결측률")
+    p_nul.add_argument("--dataset", default="hoj_db", choices=list(DATASETS))
+    p_nul.add_argument("--columns", default=None)
+    p_nul.add_argument("--start", default=None)
+    p_nul.add_argument("--end", default=None)
+
+    p_bad = sub.add_parser("bad", help="OHLCV 이상 행")
+    p_bad.add_argument("--dataset", default="raw", choices=list(DATASETS))
+    p_bad.add_argument("--limit", type=int, default=50)
+
+    p_des = sub.add_parser("describe", help="행/컬럼 정보 (메타데이터만)")
+    p_des.add_argument("--dataset", default="hoj_db", choices=list(DATASETS))
+
+    p_sql = sub.add_parser("sql", help="임의 SQL (뷰: raw, features, hoj_db)")
+    p_sql.add_argument("sql")
+
+    args = ap.parse_args(argv)
+    pd.set_option("display.width", 200)
+    pd.set_option("display.max_columns", 30)
+
+    if args.cmd == "counts":
+        df = date_code_counts(args.dataset, args.start, args.end, path=args.path)
+        if args.below is not None:
+            df = df[df["n_codes"] < args.below]
+        print(df.tail(args.tail).to_string(index=False))
+    elif args.cmd == "history":
+        df = stock_history(args.code, args.dataset, _split_cols(args.columns), args.start, args.end, path=args.path)
+        print(df.tail(args.tail).to_string(index=False))
+    elif args.cmd == "nulls":
+        df = null_summary(args.dataset, _split_cols(args.columns), args.start, args.end, path=args.path)
+        print(df.to_string(index=False, float_format=lambda v: f"{v:6.2f}"))
+    elif args.cmd == "bad":
+        df = bad_ohlcv_rows(args.dataset, args.limit, path=args.path)
+        print(f"이상 행 (최대 {args.limit}건): {len(df)}")
+        print(df.to_string(index=False))
+    elif args.cmd == "describe":
+        info = describe(args.dataset, path=args.path)
+        print(f"📂 {info['path']}")
+        print(f"   rows={info['rows']:,} | columns={len(info['columns'])} | "
+              f"row_groups={info['row_groups']} | {info['size_mb']} MB")
+        print(f"   {info['columns']}")
+    elif args.cmd == "sql":
+        paths = {"hoj_db": args.path} if args.path else None
+        print(query(args.sql, paths=paths).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
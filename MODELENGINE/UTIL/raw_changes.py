@@ -0,0 +1,149 @@
+# ============================================================
+# raw_changes.py
+#  - RAW 변경 키 기록 (append-only JSONL): raw_patch 가 병합/보정할 때 바뀐 (date, code) 를 남김
+#  - 위치: RAW/stocks/LOGS/raw_changes.jsonl (raw_patch 의 LOG_DIR)
+#  - 줄 형식
+#      {"type": "change", "id": ..., "at": ..., "source": ..., "n": 3,
+#       "changes": [{"date": "2025-11-21", "fix": ["005930", ...], "new": [...]}]}
+#      {"type": "applied", "consumer": "incremental", "ids": [...], "at": ..., "summary": {...}}
+#  - 소비자(incremental_update.py)는 자기 이름으로 applied 가 없는 change 만 읽음
+#  - 늦은 보정 키만 소비: raw_patch_fix 의 모든 키 + 그 외 소스의 fix 키
+#    (일일 패치의 새 날짜 new 키는 전체 파이프라인 몫 → 소비 대상 아님)
+#  - pandas 외 의존성 없음 (raw_patch 에서 가볍게 import)
+# ============================================================
+
+import os
+import sys
+import json
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+modelengine_dir = os.path.dirname(current_dir)
+root_dir = os.path.dirname(modelengine_dir)
+sys.path.extend([root_dir, modelengine_dir])
+
+try:
+    from MODELENGINE.UTIL.config_paths import get_path
+except ImportError:
+    from config_paths import get_path
+
+CHANGELOG = "raw_changes.jsonl"
+OHLCV_COLS = ["Open", "High", "Low", "Close", "Volume"]
+KEY_COLS = ["Date", "Code", "kind"]
+LATE_SOURCES = ("raw_patch_fix",)
+
+
+def changelog_path(log_dir: str = None) -> str:
+    return os.path.join(log_dir or get_path("RAW", "stocks", "LOGS"), CHANGELOG)
+
+# ------------------------------------------------------------
+# 1) 변경 키 계산
+# ------------------------------------------------------------
+def diff_keys(old: pd.DataFrame, new: pd.DataFrame, cols: list = None) -> pd.DataFrame:
+    """
+    new 의 (Date, Code) 중 old 에 없거나 값(OHLCV)이 다른 키 → Date / Code / kind(new|fix).
+    old 는 new 에 있는 날짜만 비교 (RAW 전체를 변환하지 않음). Date 타입(date/datetime) 혼용 허용.
+    """
+    if new is None or new.empty:
+        return pd.DataFrame(columns=KEY_COLS)
+    cols = [c for c in (cols or OHLCV_COLS) if c in new.columns and c in old.columns]
+    u = pd.unique(old["Date"])
+    wanted = pd.to_datetime(pd.unique(new["Date"])).normalize()
+    keep = u[np.isin(pd.to_datetime(u).normalize(), wanted)]
+    o = old.loc[old["Date"].isin(keep), ["Date", "Code"] + cols].copy()
+    n = new[["Date", "Code"] + cols].copy()
+    for d in (o, n):
+        d["Date"] = pd.to_datetime(d["Date"]).dt.normalize()
+        d["Code"] = d["Code"].astype(str).str.zfill(6)
+    n = n.drop_duplicates(["Date", "Code"], keep="last")
+    m = n.merge(o.drop_duplicates(["Date", "Code"], keep="last"), on=["Date", "Code"], how="left",
+                suffixes=("", "_old"), indicator=True)
+    is_new = (m["_merge"] == "left_only").to_numpy()
+    changed = np.zeros(len(m), dtype=bool)
+    for c in cols:
+        a = pd.to_numeric(m[c], errors="coerce").to_numpy(dtype=float)
+        b = pd.to_numeric(m[f"{c}_old"], errors="coerce").to_numpy(dtype=float)
+        same = np.isclose(a, b, rtol=1e-9, atol=0.0) | (np.isnan(a) & np.isnan(b))
+        changed |= ~same
+    m["kind"] = np.where(is_new, "new", "fix")
+    return m.loc[is_new | changed, KEY_COLS].sort_values(["Date", "Code"]).reset_index(drop=True)
+
+# ------------------------------------------------------------
+# 2) 기록 / 조회
+# ------------------------------------------------------------
+def _append(path: str, obj: dict):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(obj, ensure_ascii=False, default=str) + "\n")
+
+def record_changes(keys: pd.DataFrame, source: str, path: str = None, note: str = "") -> dict:
+    """변경 키 → change 이벤트 1줄. 키가 없으면 기록하지 않고 None."""
+    if keys is None or keys.empty:
+        return None
+    changes = []
+    for d, g in keys.groupby(pd.to_datetime(keys["Date"]).dt.normalize(), sort=True):
+        item = {"date": str(d.date())}
+        for kind in ("fix", "new"):
+            codes = sorted(g.loc[g["kind"] == kind, "Code"].astype(str).unique())
+            if codes:
+                item[kind] = codes
+        changes.append(item)
+    now = datetime.now()
+    event = {"type": "change", "id": f"{now:%Y%m%d_%H%M%S_%f}_{source}", "at": now.strftime("%Y-%m-%d %H:%M:%S"),
+             "source": source, "n": int(len(keys)), "changes": changes}
+    if note:
+        event["note"] = note
+    _append(path or changelog_path(), event)
+    return event
+
+def read_events(path: str = None) -> list:
+    path = path or changelog_path()
+    if not os.path.exists(path):
+        return []
+    out = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                out.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue   # 쓰다 끊긴 마지막 줄 등
+    return out
+
+def _kinds(event: dict, late_only: bool) -> tuple:
+    if not late_only or event.get("source") in LATE_SOURCES:
+        return ("fix", "new")
+    return ("fix",)
+
+def event_keys(events: list, late_only: bool = False) -> pd.DataFrame:
+    """change 이벤트 → Date / Code / kind. late_only: 늦은 보정 키만 (LATE_SOURCES 전체 + 나머지는 fix)."""
+    rows = [(c["date"], code, kind) for e in events for c in e.get("changes", [])
+            for kind in _kinds(e, late_only) for code in c.get(kind, [])]
+    df = pd.DataFrame(rows, columns=KEY_COLS)
+    df["Date"] = pd.to_datetime(df["Date"])
+    return df.drop_duplicates(["Date", "Code"], keep="first").reset_index(drop=True)
+
+def pending_changes(consumer: str, path: str = None, late_only: bool = True):
+    """
+    consumer 가 아직 반영하지 않은 change 이벤트 → (키 DataFrame, 이벤트 id 목록).
+    late_only=True 이면 늦은 보정 키가 하나도 없는 이벤트(일일 신규 날짜만)는 id 에서도 제외.
+    """
+    events = read_events(path)
+    done = {i for e in events if e.get("type") == "applied" and e.get("consumer") == consumer
+            for i in e.get("ids", [])}
+    todo = [e for e in events if e.get("type") == "change" and e.get("id") not in done]
+    if late_only:
+        todo = [e for e in todo if any(c.get(k) for c in e.get("changes", []) for k in _kinds(e, True))]
+    return event_keys(todo, late_only), [e["id"] for e in todo]
+
+def mark_applied(ids: list, consumer: str, summary: dict = None, path: str = None):
+    if not ids:
+        return
+    _append(path or changelog_path(), {"type": "applied", "consumer": consumer, "ids": list(ids),
+                                       "at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                                       "summary": summary or {}})
@@ -1,20 +1,20 @@
 # raw_checker.py
-import pandas as pd
-import numpy as np
+#  - 전체 RAW를 pandas로 올리지 않고 query_db(DuckDB)로 필요한 집계만 조회
 import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from query_db import date_code_counts, bad_ohlcv_rows
 
 RAW_PATH = r"F:\autostockG\MODELENGINE\RAW\all_stocks_cumulative.parquet"
 
 print("\n========= RAW 오염 진단 시작 =========")
 
-df = pd.read_parquet(RAW_PATH)
-
-# 기본 정규화
-df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-df = df.dropna(subset=["Date", "Code"])
+# 지정 파일이 없으면 RAW/stocks 최신 파일 사용
+raw_path = RAW_PATH if os.path.exists(RAW_PATH) else None
 
 # 날짜별 종목수
-cnt = df.groupby("Date")["Code"].nunique()
+cnt = date_code_counts("raw", path=raw_path).set_index("Date")["n_codes"]
 
 print("\n[1] 날짜별 종목수 체크 (정상=3200~3800)")
 print(cnt.tail(10))
@@ -32,16 +32,7 @@ print(bad_partial)
 # 각 날짜에서 종목 단위 결측/이상값 체크
 print("\n[2] 종목 단위 결측/이상값 검사]")
 
-bad_rows = df[
-    (df["Close"] <= 0) |
-    (df["High"] < df["Low"]) |
-    (df["Volume"] <= 0) |
-    (df["Open"].isna()) |
-    (df["High"].isna()) |
-    (df["Low"].isna()) |
-    (df["Close"].isna()) |
-    (df["Volume"].isna())
-]
+bad_rows = bad_ohlcv_rows("raw", path=raw_path)
 
 print(f"총 결측/이상 데이터 개수: {len(bad_rows)}")
 print(bad_rows.head(20))
@@ -0,0 +1,305 @@
+# ============================================================
+# report_writer.py
+#  - 추천 결과(하루치) 1개 = ReportResult (Top-K 표 + 날짜/기준/엔진/DB + AI 해석 텍스트)
+#    → CSV / TXT / XLSX 를 메모리 객체에서 한 번에 작성
+#    (기존: pd.ExcelWriter 저장 → openpyxl.load_workbook 로 다시 열기 → 모든 셀 순회(auto_adjust_column_width) → 재저장)
+#  - XLSX 서식은 쓰는 시점에 적용 (헤더 색/굵게, 열 너비 = 메모리 표의 최대 글자 수 기준, AI 시트 줄바꿈/행 높이)
+#      xlsxwriter 가 있으면 constant_memory 스트리밍 작성, 없으면 openpyxl write_only 로 같은 서식
+#  - write_batch: 여러 날짜 결과를 한 번에 (날짜별 CSV/TXT/XLSX + 선택적으로 요약 시트가 붙은 통합 XLSX 1개)
+#    서식 객체/열 너비 규칙은 통합 워크북 안에서 재사용
+#  - 파일명 규칙은 daily_recommender 기존 규칙 그대로
+#      recommendation_HOJ_V34_{날짜}_{ts}_{rank_by}.csv / Report_HOJ_V34_{날짜}_{ts}.txt / Final_Report_HOJ_{날짜}_{ts}.xlsx
+#
+#  사용 예)
+#    python report_writer.py batch --engine F:\...\HOJ_ENGINE_REAL_V31_h5_w60_n1000_251126.hoj --start 2025-01-01 --end 2025-11-20
+# ============================================================
+
+import os
+import sys
+import time
+import argparse
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+modelengine_dir = os.path.dirname(current_dir)
+root_dir = os.path.dirname(modelengine_dir)
+sys.path.extend([root_dir, modelengine_dir])
+
+try:
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+
+TOP_SHEET = "Top 10 추천"
+AI_SHEET = "AI 해석"
+AI_HEADER = "AI 분석 리포트"
+HEADER_COLOR = "4F81BD"
+WIDTH_MIN, WIDTH_MAX = 10, 50
+AI_WIDTH = 100
+FORMATS = ("csv", "txt", "xlsx")
+SORT_KEYS = {"combo": "동시적용 기대수익(%)", "prob": "상승확률(%)", "ret": "예측수익률(%)"}
+
+
+def build_table(names, codes, closes, prob, ret, combo) -> pd.DataFrame:
+    """예측 배열 → 리포트 표 (확률/수익률 % 단위, 소수 2자리)."""
+    return pd.DataFrame({
+        "종목명": names,
+        "종목코드": codes,
+        "현재가": closes,
+        "상승확률(%)": (np.asarray(prob) * 100).round(2),
+        "예측수익률(%)": (np.asarray(ret) * 100).round(2),
+        "동시적용 기대수익(%)": (np.asarray(combo) * 100).round(2),
+    })
+
+
+class ReportResult:
+    """하루치 추천 결과. ai_text 는 나중에 바꾼 뒤 write_reports(..., formats=("txt", "xlsx")) 로 다시 쓸 수 있음."""
+
+    def __init__(self, date, table: pd.DataFrame, rank_by: str = "combo", topk: int = 10,
+                 engine: str = "", db: str = "", ai_text: str = ""):
+        self.date = pd.Timestamp(date)
+        self.table = table.reset_index(drop=True)
+        self.rank_by = rank_by
+        self.topk = int(topk)
+        self.engine = os.path.basename(str(engine))
+        self.db = os.path.basename(str(db))
+        self.ai_text = ai_text or ""
+
+    def __repr__(self):
+        return f"ReportResult(date={self.date.date()}, rows={len(self.table)}, rank_by={self.rank_by})"
+
+    def render_text(self) -> str:
+        report_content = [
+            "=" * 60,
+            f"📈 HOJ AI Daily Report [{self.date.date()}]",
+            "=" * 60,
+            f"\n[1] 예측 Top {self.topk} (기준: {self.rank_by})",
+            "-" * 60,
+            self.table.to_string(index=False),
+            "-" * 60,
+            "\n[2] Gemini AI Investment Opinion",
+            "-" * 60,
+            self.ai_text.strip(),
+            "=" * 60,
+        ]
+        return "\n".join(report_content)
+
+    def names(self, timestamp: str) -> dict:
+        d = self.date.date()
+        return {"csv": f"recommendation_HOJ_V34_{d}_{timestamp}_{self.rank_by}.csv",
+                "txt": f"Report_HOJ_V34_{d}_{timestamp}.txt",
+                "xlsx": f"Final_Report_HOJ_{d}_{timestamp}.xlsx"}
+
+
+# ------------------------------------------------------------
+# 1) 서식 계산 (메모리 표 기준, 셀 재순회 없음)
+# ------------------------------------------------------------
+def column_widths(df: pd.DataFrame) -> list:
+    """열별 (최대 글자 수 + 2) × 1.1, [WIDTH_MIN, WIDTH_MAX] 범위 (기존 auto_adjust_column_width 규칙)."""
+    out = []
+    for c in df.columns:
+        n = len(str(c))
+        if len(df):
+            n = max(n, int(df[c].astype(str).str.len().max()))
+        out.append(min(max((n + 2) * 1.1, WIDTH_MIN), WIDTH_MAX))
+    return out
+
+def ai_row_height(text: str) -> float:
+    line_count = text.count("\n") + (len(text) // 100)
+    return max(line_count * 15, 400)
+
+def _rows(df: pd.DataFrame) -> list:
+    """셀 값 목록 (NaN → None = 빈 셀, numpy 스칼라 → 파이썬 기본형)."""
+    return df.astype(object).where(df.notna(), None).to_numpy().tolist()
+
+
+# ------------------------------------------------------------
+# 2) XLSX 작성기 (xlsxwriter / openpyxl write_only)
+# ------------------------------------------------------------
+class _XlsxBook:
+    """시트 단위 스트리밍 작성. 서식 객체는 워크북당 1회 생성."""
+
+    def __init__(self, path: str):
+        self.path = path
+        if xlsxwriter is not None:
+            self.wb = xlsxwriter.Workbook(path, {"constant_memory": True})
+            self.fmt_header = self.wb.add_format({"bold": True, "font_color": "#FFFFFF", "bg_color": f"#{HEADER_COLOR}",
+                                                  "align": "center"})
+            self.fmt_wrap = self.wb.add_format({"text_wrap": True, "valign": "top"})
+        else:
+            from openpyxl import Workbook
+            from openpyxl.styles import Alignment, Font, PatternFill
+            self.wb = Workbook(write_only=True)
+            self._style = {"font": Font(bold=True, color="FFFFFF"),
+                           "fill": PatternFill(start_color=HEADER_COLOR, end_color=HEADER_COLOR, fill_type="solid"),
+                           "alignment": Alignment(horizontal="center")}
+            self._wrap = Alignment(wrap_text=True, vertical="top")
+
+    def _header_cells(self, ws, values):
+        from openpyxl.cell import WriteOnlyCell
+        cells = []
+        for v in values:
+            cell = WriteOnlyCell(ws, value=v)
+            cell.font, cell.fill, cell.alignment = self._style["font"], self._style["fill"], self._style["alignment"]
+            cells.append(cell)
+        return cells
+
+    def table_sheet(self, name: str, df: pd.DataFrame):
+        widths = column_widths(df)
+        if xlsxwriter is not None:
+            ws = self.wb.add_worksheet(name)
+            for j, w in enumerate(widths):
+                ws.set_column(j, j, w)
+            ws.write_row(0, 0, [str(c) for c in df.columns], self.fmt_header)
+            for i, row in enumerate(_rows(df), 1):
+                ws.write_row(i, 0, row)
+            return
+        from openpyxl.utils import get_column_letter
+        ws = self.wb.create_sheet(name)
+        for j, w in enumerate(widths, 1):
+            ws.column_dimensions[get_column_letter(j)].width = w
+        ws.append(self._header_cells(ws, [str(c) for c in df.columns]))
+        for row in _rows(df):
+            ws.append(row)
+
+    def text_sheet(self, name: str, header: str, text: str):
+        if xlsxwriter is not None:
+            ws = self.wb.add_worksheet(name)
+            ws.set_column(0, 0, AI_WIDTH)
+            ws.write(0, 0, header, self.fmt_header)
+            ws.set_row(1, ai_row_height(text))
+            ws.write_string(1, 0, text, self.fmt_wrap)
+            return
+        from openpyxl.cell import WriteOnlyCell
+        ws = self.wb.create_sheet(name)
+        ws.column_dimensions["A"].width = AI_WIDTH
+        ws.append(self._header_cells(ws, [header]))
+        cell = WriteOnlyCell(ws, value=text)
+        cell.data_type = "s"          # "=" 로 시작하는 리포트가 수식으로 저장되지 않도록
+        cell.alignment = self._wrap
+        ws.append([cell])
+
+    def close(self):
+        if xlsxwriter is not None:
+            self.wb.close()
+        else:
+            self.wb.save(self.path)
+
+
+# ------------------------------------------------------------
+# 3) 하루치 / 여러 날짜
+# ------------------------------------------------------------
+def write_reports(result: ReportResult, out_dir: str, timestamp: str = None,
+                  formats=FORMATS, paths: dict = None) -> dict:
+    """
+    result → out_dir 에 formats 파일 작성. 반환: {"csv"|"txt"|"xlsx": 경로, "timestamp": ts}
+    paths 를 주면 그 경로에 다시 씀 (AI 섹션 back-fill 용).
+    """
+    timestamp = timestamp or (paths or {}).get("timestamp") or datetime.now().strftime("%Y%m%d_%H%M%S")
+    names = result.names(timestamp)
+    out = dict(paths or {}, timestamp=timestamp)
+    for k in formats:
+        out.setdefault(k, os.path.join(out_dir, names[k]))
+    os.makedirs(out_dir, exist_ok=True)
+
+    report = result.render_text() if ("txt" in formats or "xlsx" in formats) else None
+    if "csv" in formats:
+        result.table.to_csv(out["csv"], index=False, encoding="utf-8-sig")
+    if "txt" in formats:
+        with open(out["txt"], "w", encoding="utf-8") as f:
+            f.write(report)
+            f.write(f"\n\n[File Info]\nCSV Data: {os.path.basename(out.get('csv', names['csv']))}\n"
+                    f"Engine: {result.engine}")
+    if "xlsx" in formats:
+        book = _XlsxBook(out["xlsx"])
+        book.table_sheet(TOP_SHEET, result.table)
+        book.text_sheet(AI_SHEET, AI_HEADER, report)
+        book.close()
+    return out
+
+def write_batch(results: list, out_dir: str, timestamp: str = None, formats=FORMATS,
+                combined: bool = True) -> dict:
+    """
+    여러 날짜 결과 일괄 작성. formats 는 날짜별 파일 (빈 튜플이면 날짜별 파일 생략).
+    combined=True 면 Batch_Report_HOJ_{첫날}_{끝날}_{ts}.xlsx 1개 (요약 시트 + 날짜별 시트) 추가.
+    반환: {"reports": [날짜별 경로 dict], "combined": 통합 XLSX 경로 or None}
+    """
+    timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+    results = sorted(results, key=lambda r: r.date)
+    reports = [write_reports(r, out_dir, timestamp, formats) for r in results] if formats else []
+    combined_path = None
+    if combined and results:
+        os.makedirs(out_dir, exist_ok=True)
+        combined_path = os.path.join(
+            out_dir, f"Batch_Report_HOJ_{results[0].date.date()}_{results[-1].date.date()}_{timestamp}.xlsx")
+        book = _XlsxBook(combined_path)
+        book.table_sheet("요약", batch_summary(results))
+        for r in results:
+            book.table_sheet(str(r.date.date()), r.table)
+        book.close()
+    return {"reports": reports, "combined": combined_path}
+
+def batch_summary(results: list) -> pd.DataFrame:
+    rows = []
+    for r in results:
+        t = r.table
+        top = t.iloc[0] if len(t) else None
+        rows.append({"날짜": str(r.date.date()), "종목수": len(t),
+                     "1위 종목": top["종목명"] if top is not None and "종목명" in t.columns else None,
+                     "평균 기대수익(%)": round(float(t["동시적용 기대수익(%)"].mean()), 2)
+                     if len(t) and "동시적용 기대수익(%)" in t.columns else None})
+    return pd.DataFrame(rows)
+
+
+# ------------------------------------------------------------
+# 4) 예측 큐브 → 기간 일괄 리포트
+# ------------------------------------------------------------
+def results_from_cube(engine_path: str, start=None, end=None, topk: int = 10, rank_by: str = "combo",
+                      root: str = None) -> list:
+    try:
+        from MODELENGINE.UTIL import prediction_cube
+    except ImportError:
+        import prediction_cube
+    df = prediction_cube.load_cube(engine_path, start, end, root=root)
+    if df is None:
+        raise FileNotFoundError(f"예측 큐브가 없습니다: {os.path.basename(engine_path)} (prediction_cube.py build 먼저)")
+    metric = {"ret": "score", "prob": "prob"}.get(rank_by, "combo")
+    out = []
+    for day, g in df.groupby("Date", sort=True):
+        g = g.nlargest(int(topk), metric)
+        table = build_table(g["Name"].to_numpy(), g["Code"].to_numpy(), g["Close"].to_numpy(),
+                            g["prob"].to_numpy(), g["score"].to_numpy(), g["combo"].to_numpy())
+        out.append(ReportResult(day, table, rank_by, topk, engine=engine_path, db="prediction_cube"))
+    return out
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("batch", help="예측 큐브의 기간 날짜별 Top-K 리포트 일괄 작성")
+    b.add_argument("--engine", required=True)
+    b.add_argument("--start", default=None)
+    b.add_argument("--end", default=None)
+    b.add_argument("--k", type=int, default=10)
+    b.add_argument("--rank_by", default="combo", choices=list(SORT_KEYS))
+    b.add_argument("--out", default=None, help="출력 폴더 (기본: OUTPUT/BATCH_REPORT)")
+    b.add_argument("--formats", default="csv,txt,xlsx", help="날짜별 파일 형식 (빈 값이면 통합 XLSX 만)")
+    args = ap.parse_args()
+
+    if args.out is None:
+        try:
+            from MODELENGINE.UTIL.config_paths import get_path
+        except ImportError:
+            from config_paths import get_path
+        args.out = os.path.join(get_path("OUTPUT"), "BATCH_REPORT")
+    t0 = time.perf_counter()
+    res = results_from_cube(args.engine, args.start, args.end, args.k, args.rank_by)
+    t1 = time.perf_counter()
+    info = write_batch(res, args.out, formats=tuple(f for f in args.formats.split(",") if f))
+    t2 = time.perf_counter()
+    print(f"[REPORT] {len(res)}일 | 큐브 조회 {t1 - t0:.2f}s | 작성 {t2 - t1:.2f}s "
+          f"({'xlsxwriter' if xlsxwriter is not None else 'openpyxl write_only'})")
+    print(f"[REPORT] 통합: {info['combined']}")
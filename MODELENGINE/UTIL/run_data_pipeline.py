@@ -1,6 +1,6 @@
 # ============================================================
 # Data Pipeline Runner (Stage 1 Executor)
-#   - 순서: RAW 업데이트 -> 피처 생성 -> 통합 DB 생성
+#   - 순서: RAW 업데이트 -> 피처 생성 -> 통합 DB 생성 -> 예측 큐브 증분 갱신
 #   - 이 스크립트 하나로 데이터 준비 끝!
 # ============================================================
 
@@ -13,6 +13,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 import update_raw_data
 import build_features
 import build_unified_db
+import prediction_cube
 
 def run_pipeline():
     start_time = time.time()
@@ -20,7 +21,7 @@ def run_pipeline():
 
     # [Step 1] RAW 데이터 점검 및 백업
     try:
-        print("\n>>> [1/3] RAW Data Check & Backup")
+        print("\n>>> [1/4] RAW Data Check & Backup")
         update_raw_data.main()
     except Exception as e:
         print(f"❌ RAW 단계 실패: {e}")
@@ -28,7 +29,7 @@ def run_pipeline():
 
     # [Step 2] 피처 엔지니어링
     try:
-        print("\n>>> [2/3] Feature Engineering (V31)")
+        print("\n>>> [2/4] Feature Engineering (V31)")
         build_features.main()
     except Exception as e:
         print(f"❌ Feature 단계 실패: {e}")
@@ -36,12 +37,19 @@ def run_pipeline():
 
     # [Step 3] 통합 DB 빌드
     try:
-        print("\n>>> [3/3] Building Unified DB")
+        print("\n>>> [3/4] Building Unified DB")
         build_unified_db.build_unified_db()
     except Exception as e:
         print(f"❌ DB Build 단계 실패: {e}")
         return
 
+    # [Step 4] 예측 큐브 증분 갱신 (이미 만든 큐브만, 새 날짜만 예측)
+    try:
+        print("\n>>> [4/4] Prediction Cube Update")
+        prediction_cube.update_all()
+    except Exception as e:
+        print(f"⚠️ 큐브 갱신 실패 (데이터 준비는 완료): {e}")
+
     elapsed = time.time() - start_time
     print(f"\n✨ [Stage 1] 모든 데이터 준비 완료! ({elapsed:.1f}초 소요)")
     print("   이제 'Engine Manager'에서 학습(Train)을 시작할 수 있습니다.")
@@ -0,0 +1,290 @@
+# ============================================================
+# strategy_sweep.py
+#  - 매도 전략 / 포트폴리오 파라미터 스윕 (backtester 벡터 시뮬레이션 위)
+#    (기존: run_strategy_grid_search_V9.py / run_hybrid_test_V33.py 가 파라미터 1세트씩 실행)
+#  - 그리드: Top-K × 보유일 × 손절 × 익절 × 가중(equal/score) × 정렬 기준(combo/prob/ret) × HOJ/SLE 혼합 가중
+#      혼합 가중 b = HOJ 비중: 1 → HOJ 점수, 0 → SLE 점수, 그 사이 → 날짜별 백분위 순위의 가중 평균
+#  - 공유: 가격 행렬(P_raw / P), 엔진·기준별 점수 행렬, (혼합 시) 순위 행렬을 부모에서 1회 만들고
+#          공유 메모리(multiprocessing.shared_memory)로 워커에 읽기 전용 전달 (워커별 복사 없음)
+#  - 묶음 평가: (정렬 기준, 혼합 가중) 1그룹 = 워커 작업 1건
+#      최대 K 로 상위 종목 1회 선택 → K 별로 앞 열만 사용
+#      최대 보유일로 보유 배수 1회 계산 → 보유일/손절/익절/가중 조합이 같은 배열 재사용
+#  - 결과: 조합 1행씩 비교표 (CAGR / MDD / Sharpe / 승률 / 초과 CAGR ...) → OUTPUT/SWEEP/strategy_sweep_{ts}.csv + .xlsx
+#
+#  사용 예)
+#    python strategy_sweep.py run --hoj F:\...\HOJ_ENGINE_REAL_...hoj --sle F:\...\SLE_ENGINE_REAL_...hoj \
+#                                 --k 5,10,20 --hold 1,3,5,10 --stop 0,0.05 --take 0,0.1 --blend 1,0.7,0.5,0 --workers 4
+#    python strategy_sweep.py bench --years 10 --codes 2500 --workers 4
+# ============================================================
+
+import os
+import sys
+import time
+import argparse
+import itertools
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+modelengine_dir = os.path.dirname(current_dir)
+root_dir = os.path.dirname(modelengine_dir)
+sys.path.extend([root_dir, modelengine_dir])
+
+try:
+    from MODELENGINE.UTIL import train_engine_unified as T
+    from MODELENGINE.UTIL import backtester as B
+except ImportError:
+    import train_engine_unified as T
+    import backtester as B
+
+RANK_KEYS = {"combo": "combo", "prob": "prob", "ret": "score"}
+RESULT_METRICS = ["total_return", "cagr", "mdd", "vol", "sharpe", "hit_rate", "avg_net",
+                  "n_cohorts", "exposure", "excess_cagr"]
+PARAM_COLS = ["rank_by", "blend", "k", "hold", "weighting", "stop_loss", "take_profit"]
+
+
+# ------------------------------------------------------------
+# 1) 그리드
+# ------------------------------------------------------------
+def _float_list(text: str) -> list:
+    return [float(x) for x in str(text).split(",") if x.strip()]
+
+def _int_list(text: str) -> list:
+    return [int(x) for x in str(text).split(",") if x.strip()]
+
+def build_groups(ks: list, holds: list, stops: list, takes: list, rank_by: list, blends: list,
+                 weightings: list) -> list:
+    """(정렬 기준, 혼합 가중) 별 1그룹. 그룹 안의 조합은 선택/보유 배수를 공유."""
+    return [{"rank_by": r, "blend": float(b), "ks": sorted(set(ks)), "holds": sorted(set(holds)),
+             "stops": list(stops), "takes": list(takes), "weightings": list(weightings)}
+            for r, b in itertools.product(rank_by, blends)]
+
+def n_points(groups: list) -> int:
+    return sum(len(g["ks"]) * len(g["holds"]) * len(g["stops"]) * len(g["takes"]) * len(g["weightings"])
+               for g in groups)
+
+
+# ------------------------------------------------------------
+# 2) 공유 행렬 (부모 1회 생성 → 공유 메모리)
+# ------------------------------------------------------------
+def _rank_pct(S: np.ndarray) -> np.ndarray:
+    return pd.DataFrame(S).rank(axis=1, pct=True).to_numpy()
+
+def prepare_market(prices: pd.DataFrame, hoj_scores: pd.DataFrame, sle_scores: pd.DataFrame = None,
+                   rank_by: list = ("combo",), blends: list = (1.0,)) -> B.Market:
+    """
+    scores 이름 규칙: "HOJ:combo" / "SLE:prob" (원 점수), "HOJ:combo:rank" (날짜별 백분위, 혼합용).
+    """
+    market = B.Market.from_frames(prices)
+    blending = any(0.0 < b < 1.0 for b in blends)
+    for fam, frame in (("HOJ", hoj_scores), ("SLE", sle_scores)):
+        if frame is None:
+            continue
+        for r in rank_by:
+            col = RANK_KEYS[r]
+            name = f"{fam}:{col}"
+            if name not in market.scores:
+                S = market.add_scores(name, frame, col)
+                if blending:
+                    market.scores[f"{name}:rank"] = _rank_pct(S)
+    return market
+
+def blend_matrix(market: B.Market, col: str, blend: float) -> np.ndarray:
+    """HOJ 비중 blend. SLE 행렬이 없으면 HOJ 점수 그대로."""
+    hoj, sle = market.scores.get(f"HOJ:{col}"), market.scores.get(f"SLE:{col}")
+    if sle is None or blend >= 1.0:
+        return hoj
+    if hoj is None or blend <= 0.0:
+        return sle
+    rh, rs = market.scores[f"HOJ:{col}:rank"], market.scores[f"SLE:{col}:rank"]
+    wh = np.where(np.isnan(rh), 0.0, blend)
+    ws = np.where(np.isnan(rs), 0.0, 1.0 - blend)
+    tot = wh + ws
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(tot > 0, (np.nan_to_num(rh) * wh + np.nan_to_num(rs) * ws) / tot, np.nan)
+
+def share_market(market: B.Market):
+    """Market 배열 → 공유 메모리. 반환: (워커 initargs 용 spec, 부모가 정리할 SharedMemory 목록)."""
+    arrays = {"P_raw": market.P_raw, "P": market.P, "bench": market.bench}
+    arrays.update({f"S|{k}": v for k, v in market.scores.items()})
+    spec, handles = {}, []
+    for name, arr in arrays.items():
+        arr = np.ascontiguousarray(arr, dtype=np.float64)
+        shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+        np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+        spec[name] = (shm.name, arr.shape, arr.dtype.str)
+        handles.append(shm)
+    meta = {"dates": market.date_index.asi8.copy(), "codes": market.codes}
+    return (spec, meta), handles
+
+def _release(handles: list):
+    for shm in handles:
+        try:
+            shm.close()
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+# ------------------------------------------------------------
+# 3) 워커
+# ------------------------------------------------------------
+_MARKET = None
+_SHM = []
+
+def _init_worker(shared):
+    """공유 메모리 배열을 복사 없이 읽기 전용 Market 으로 재구성."""
+    global _MARKET
+    spec, meta = shared
+    arrays = {}
+    for name, (shm_name, shape, dtype) in spec.items():
+        shm = shared_memory.SharedMemory(name=shm_name)   # 정리(unlink)는 부모 담당
+        arr = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        arr.flags.writeable = False
+        arrays[name] = arr
+        _SHM.append(shm)
+    scores = {k[2:]: v for k, v in arrays.items() if k.startswith("S|")}
+    _MARKET = B.Market(pd.DatetimeIndex(meta["dates"]), meta["codes"], arrays["P_raw"], arrays["P"],
+                       arrays["bench"], scores)
+
+def _run_group(group: dict, costs: dict) -> list:
+    t0 = time.perf_counter()
+    market = _MARKET
+    col = RANK_KEYS[group["rank_by"]]
+    S = blend_matrix(market, col, group["blend"])
+    sel, s_sel, valid = B.pick_top(market, S, max(group["ks"]))
+    ratios = B.position_ratios(market, sel, max(group["holds"]))
+    t_shared = time.perf_counter() - t0
+
+    rows = []
+    for k, hold, wt, sl, tp in itertools.product(group["ks"], group["holds"], group["weightings"],
+                                                 group["stops"], group["takes"]):
+        t1 = time.perf_counter()
+        res = B.simulate(market, sel[:, :k], s_sel[:, :k], valid[:, :k], hold, wt,
+                         stop_loss=sl or None, take_profit=tp or None, ratios=ratios, detail=False, **costs)
+        row = {"rank_by": group["rank_by"], "blend": group["blend"], "k": k, "hold": hold, "weighting": wt,
+               "stop_loss": sl, "take_profit": tp}
+        row.update({m: res.metrics.get(m) for m in RESULT_METRICS})
+        row["t_sim"] = round(time.perf_counter() - t1, 4)
+        rows.append(row)
+    for r in rows:
+        r["t_group_shared"] = round(t_shared, 4)
+    return rows
+
+
+# ------------------------------------------------------------
+# 4) 메인
+# ------------------------------------------------------------
+def sweep(market: B.Market, groups: list, workers: int = 1, costs: dict = None,
+          sort_by: str = "sharpe") -> pd.DataFrame:
+    """준비된 Market 위에서 그룹 스윕 → 비교표 (sort_by 내림차순)."""
+    global _MARKET
+    costs = costs or {}
+    rows = []
+    t0 = time.perf_counter()
+    if workers <= 1:
+        _MARKET = market
+        for g in groups:
+            rows.extend(_run_group(g, costs))
+    else:
+        shared, handles = share_market(market)
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(shared,)) as ex:
+                futs = {ex.submit(_run_group, g, costs): g for g in groups}
+                for fut in as_completed(futs):
+                    g = futs[fut]
+                    part = fut.result()
+                    rows.extend(part)
+                    print(f"[SWEEP] rank_by={g['rank_by']} blend={g['blend']} → {len(part)}조합")
+        finally:
+            _release(handles)
+    table = pd.DataFrame(rows, columns=PARAM_COLS + RESULT_METRICS + ["t_sim", "t_group_shared"])
+    print(f"[SWEEP] {len(table)}조합 / {len(groups)}그룹 | workers={workers} | {time.perf_counter() - t0:.2f}s")
+    return table.sort_values(sort_by, ascending=False, kind="mergesort").reset_index(drop=True)
+
+def save_table(table: pd.DataFrame, out_dir: str = None) -> str:
+    if out_dir is None:
+        out_dir = os.path.join(T.get_path("OUTPUT"), "SWEEP")
+    T.ensure_dir(out_dir)
+    csv_path = os.path.join(out_dir, f"strategy_sweep_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv")
+    table.to_csv(csv_path, index=False, encoding="utf-8-sig")
+    try:
+        with pd.ExcelWriter(csv_path.replace(".csv", ".xlsx")) as writer:
+            table.to_excel(writer, sheet_name="비교표", index=False)
+    except Exception as e:
+        print(f"[SWEEP] 엑셀 저장 실패: {e}")
+    print(f"[SWEEP] 결과표 저장: {csv_path}")
+    return csv_path
+
+def run_sweep(hoj_engine: str, sle_engine: str = None, start=None, end=None, ks=(10,), holds=(5,),
+              stops=(0.0,), takes=(0.0,), rank_by=("combo",), blends=(1.0,), weightings=("equal",),
+              workers: int = 1, source: str = "auto", db_path: str = None, cube_root: str = None,
+              sort_by: str = "sharpe", out_dir: str = None, **costs) -> pd.DataFrame:
+    if not sle_engine:
+        blends = [1.0]
+    t0 = time.perf_counter()
+    cols = sorted({RANK_KEYS[r] for r in rank_by})
+    prices = B.load_prices(db_path, start, end)
+    hoj = B.load_scores(hoj_engine, start, end, cols, source, db_path, cube_root)
+    sle = B.load_scores(sle_engine, start, end, cols, "engine", db_path) if sle_engine else None
+    market = prepare_market(prices, hoj, sle, rank_by, blends)
+    groups = build_groups(ks, holds, stops, takes, rank_by, blends, weightings)
+    print("=== 🔎 Strategy Sweep ===")
+    print(f"[SWEEP] {len(market.date_index):,}일 × {len(market.codes):,}종목 | 행렬 {len(market.scores)}개 "
+          f"| 준비 {time.perf_counter() - t0:.2f}s | {n_points(groups)}조합 / {len(groups)}그룹")
+    table = sweep(market, groups, workers, costs, sort_by)
+    save_table(table, out_dir)
+    return table
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("run", help="엔진 점수로 스윕")
+    r.add_argument("--hoj", required=True, help="HOJ 엔진 경로")
+    r.add_argument("--sle", default=None, help="SLE 엔진 경로 (혼합 가중 스윕 시)")
+    r.add_argument("--start", default=None)
+    r.add_argument("--end", default=None)
+    r.add_argument("--source", default="auto", choices=list(B.SOURCES))
+    r.add_argument("--db", default=None)
+    r.add_argument("--out", default=None, help="결과 폴더 (기본 OUTPUT/SWEEP)")
+    b = sub.add_parser("bench", help="합성 데이터 스윕 지연시간")
+    b.add_argument("--years", type=int, default=10)
+    b.add_argument("--codes", type=int, default=2500)
+    for p in (r, b):
+        p.add_argument("--k", default="5,10,20")
+        p.add_argument("--hold", default="1,3,5,10")
+        p.add_argument("--stop", default="0,0.05", help="손절 비율 목록 (0 = 없음)")
+        p.add_argument("--take", default="0,0.1", help="익절 비율 목록 (0 = 없음)")
+        p.add_argument("--rank_by", default="combo,prob,ret")
+        p.add_argument("--blend", default="1", help="HOJ 비중 목록 (1 = HOJ 만, 0 = SLE 만)")
+        p.add_argument("--weighting", default="equal", help="equal,score")
+        p.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+        p.add_argument("--sort_by", default="sharpe", choices=RESULT_METRICS)
+    args = ap.parse_args()
+    grid = dict(ks=_int_list(args.k), holds=_int_list(args.hold), stops=_float_list(args.stop),
+                takes=_float_list(args.take), rank_by=args.rank_by.split(","), blends=_float_list(args.blend),
+                weightings=args.weighting.split(","))
+
+    if args.cmd == "run":
+        table = run_sweep(args.hoj, args.sle, args.start, args.end, workers=args.workers, source=args.source,
+                          db_path=args.db, sort_by=args.sort_by, out_dir=args.out, **grid)
+    else:
+        t0 = time.perf_counter()
+        scores, prices = B.synthetic(args.years, args.codes)
+        rng = np.random.default_rng(1)
+        hoj = scores.assign(score=scores["combo"] * 0.01, prob=rng.random(len(scores)))
+        sle = hoj.assign(combo=rng.normal(size=len(scores)), score=rng.normal(size=len(scores)) * 0.01,
+                         prob=rng.random(len(scores)))
+        market = prepare_market(prices, hoj, sle, grid["rank_by"], grid["blends"])
+        groups = build_groups(grid["ks"], grid["holds"], grid["stops"], grid["takes"], grid["rank_by"],
+                              grid["blends"], grid["weightings"])
+        print(f"[SWEEP] 합성 {args.years}년 × {args.codes:,}종목 준비 {time.perf_counter() - t0:.2f}s "
+              f"| {n_points(groups)}조합 / {len(groups)}그룹")
+        table = sweep(market, groups, args.workers, sort_by=args.sort_by)
+    with pd.option_context("display.width", 220, "display.max_columns", None):
+        print(table.head(20).round(4).to_string(index=False))
@@ -0,0 +1,46 @@
+# ============================================================
+# SLE ENGINE - TRAINER (V31)
+#  - 단독 스크립트(고정 경로 / 고정 15피처 / DB 전체 read_parquet) → train_engine_unified 의 SLE 계열로 통합
+#  - 마스크 캐시 / 바이닝 캐시 / SKIP / 엔진 색인 / 단계별 계측 / .hoj 저장을 HOJ 엔진과 공유
+#  - research → real 순서로 실행 (--early_stopping N 이면 REAL 트리 수 = research best_iteration)
+#
+#  사용 예)
+#    python train_SLE_ENGINE.py                       # SLE 만
+#    python train_SLE_ENGINE.py --with_hoj            # 같은 데이터셋으로 HOJ + SLE
+#    python train_SLE_ENGINE.py --sle_db F:\...\SLE_DB_REAL_V31.parquet
+# ============================================================
+
+import os
+import sys
+import argparse
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+modelengine_dir = os.path.dirname(current_dir)
+root_dir = os.path.dirname(modelengine_dir)
+sys.path.extend([root_dir, modelengine_dir])
+
+try:
+    from MODELENGINE.UTIL import train_engine_unified as T
+except ImportError:
+    import train_engine_unified as T
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--mode", default="all", choices=["real", "research", "all"])
+    ap.add_argument("--horizon", type=int, default=5)
+    ap.add_argument("--valid_days", type=int, default=365)
+    ap.add_argument("--n_estimators", type=int, default=2000)
+    ap.add_argument("--early_stopping", type=int, default=0, help="research 조기 종료 라운드 (0=끔)")
+    ap.add_argument("--sle_db", default=None, help="SLE DB 경로 (기본 SLE_DB/REAL 최신 SLE_DB*)")
+    ap.add_argument("--with_hoj", action="store_true", help="HOJ 엔진도 같은 prep 으로 학습")
+    args = ap.parse_args()
+
+    print("=== [SLE] 엔진 학습 시작 (train_engine_unified 통합) ===")
+    T.run_training_modes(
+        ["research", "real"] if args.mode == "all" else [args.mode],
+        horizon=args.horizon, input_window=0, valid_days=args.valid_days,
+        n_estimators=args.n_estimators, early_stopping_rounds=args.early_stopping,
+        families=("HOJ", "SLE") if args.with_hoj else ("SLE",), sle_path=args.sle_db,
+    )
+    print("=== [SLE] 엔진 학습 종료 ===")
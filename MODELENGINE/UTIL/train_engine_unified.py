@@ -6,15 +6,32 @@
 #  - input_window: 0이면 전체 피처 사용, >0이면 기간 초과 지표 제외
 #  - Close/ClosePrice 자동 인식으로 타겟 생성
 #  - meta 저장: feature_hash, data_date, horizon, input_window, valid_days 등
-#  - 저장 규칙: MODELENGINE/HOJ_ENGINE/{REAL|RESEARCH}/HOJ_ENGINE_{MODE}_{...}.pkl
+#  - 마스크: 1회 정렬 + cumcount 벡터 마스크, 결과는 HOJ_DB/CACHE/mask 에 캐시
+#  - 저장 규칙: MODELENGINE/HOJ_ENGINE/{REAL|RESEARCH}/HOJ_ENGINE_{MODE}_{...}.hoj (번들, --engine_format pkl 이면 .pkl)
 #  - [추가] 실행 시 Research -> Real 순차 자동 실행 지원
+#  - research 조기 종료(--early_stopping N, 기본 끔) → best_iteration 을 meta 기록, REAL 트리 수로 재사용
+#    (실제 트리 수는 meta["trees"], 시간 예산으로 멈춘 헤드는 검증 최적이 아니므로 재사용 안 함)
+#  - 체크포인트(HOJ_ENGINE/CHECKPOINT) 이어 학습, 벽시계 예산(--time_budget)
+#  - --mode all: 마스크 프레임/lgb.Dataset 1회 준비 → research/real 공유
+#  - --horizons 1,3,5,10: 타겟 행렬 1회 + 바이닝 1회로 horizon 별 엔진 생성
+#  - --sample_frac 0.2: research 고속 모드 (Date×Market 층화 샘플, 고정 seed, 엔진 저장 안 함)
+#  - 저장 시 엔진 색인(engine_registry) 등록: meta/피처/지표/파일 해시
+#  - 단계별 계측(profiling): 벽시계/CPU/최대 RSS/행 수 → meta["profile"] + LOG/PROFILE/profile_runs.jsonl
+#  - --prune gain|perm|both: research 적합 후 피처 순위 → 허용오차 안의 최소 피처 집합으로 재학습
+#    (엔진 features = 선택 목록, REAL 은 같은 설정 RESEARCH 엔진의 선택 목록 사용)
+#  - --families HOJ,SLE: SLE 엔진(PBR/PER/수급 스냅샷)도 같은 마스크 프레임/타겟/분할 위에서 학습
+#    (SLE_ENGINE/{REAL|RESEARCH}/SLE_ENGINE_{MODE}_{...}.hoj, 색인은 SLE_ENGINE/engine_registry.sqlite,
+#     설명파일은 SLE_ENGINE/SLE_ENGINE_INFO, 단독 진입점은 train_SLE_ENGINE.py)
 # ============================================================
 
 import os
 import sys
 import re
 INT_PAT = re.compile(r"\d+")
+import json
 import pickle
+import hashlib
+import time
 import argparse
 from datetime import datetime, timedelta
 
@@ -47,8 +64,8 @@ def _try_import_paths():
             base = os.path.join(root_dir, "MODELENGINE")
             if purpose == "HOJ_DB":
                 return os.path.join(base, "HOJ_DB")
-            if purpose == "HOJ_ENGINE":
-                return os.path.join(base, "HOJ_ENGINE")
+            if purpose in ("HOJ_ENGINE", "SLE_DB", "SLE_ENGINE"):
+                return os.path.join(base, purpose, *args)
             if purpose == "OUTPUT":
                 return os.path.join(base, "OUTPUT")
             return os.path.join(base, "HOJ_ENGINE", args[0]) if args else os.path.join(base, "HOJ_ENGINE")
@@ -63,6 +80,18 @@ def _try_import_paths():
 
 get_path, find_latest_file = _try_import_paths()
 
+try:
+    from MODELENGINE.UTIL.engine_models import BoosterRegressor, BoosterClassifier
+    from MODELENGINE.UTIL.lgb_cache import BIN_PARAMS, load_or_build_dataset, train_head
+    from MODELENGINE.UTIL import engine_registry, engine_bundle
+    from MODELENGINE.UTIL.profiling import RunProfiler
+except ImportError:
+    from engine_models import BoosterRegressor, BoosterClassifier
+    from lgb_cache import BIN_PARAMS, load_or_build_dataset, train_head
+    import engine_registry
+    import engine_bundle
+    from profiling import RunProfiler
+
 def ensure_dir(path: str):
     os.makedirs(path, exist_ok=True)
     return path
@@ -82,6 +111,33 @@ def single_line_logger(period=50):
     _callback.order = 10
     return _callback
 
+def checkpoint_saver(path: str, period: int = 100):
+    """period 반복마다 현재 부스터를 텍스트 모델로 저장 (중단 시 이어 학습용)."""
+    def _callback(env):
+        if period > 0 and (env.iteration + 1) % period == 0:
+            tmp = path + ".tmp"
+            env.model.save_model(tmp)
+            os.replace(tmp, path)
+    _callback.order = 40
+    return _callback
+
+def time_budget(seconds: float, state: dict):
+    """
+    벽시계 예산 초과 시 학습 중단.
+    검증 점수를 추적 중이면(state["best"]) 그때까지의 검증 최고 반복까지, 아니면 학습한 트리 전부 유지.
+    state["stopped_by"] = "budget" 로 표시.
+    """
+    deadline = time.perf_counter() + float(seconds)
+    def _callback(env):
+        if time.perf_counter() > deadline:
+            state["stopped_by"] = "budget"
+            best = state.get("best")
+            if best:
+                raise lgb.callback.EarlyStopException(best["iteration"], best["score"])
+            raise lgb.callback.EarlyStopException(env.iteration, env.evaluation_result_list or [])
+    _callback.order = 50
+    return _callback
+
 # ------------------------------------------------------------
 # 1) 데이터 로드
 # ------------------------------------------------------------
@@ -100,7 +156,7 @@ def pick_close_column(df: pd.DataFrame) -> str:
             return c
     raise KeyError("Close 컬럼 없음")
 
-def load_latest_db(version: str = "V31") -> pd.DataFrame:
+def find_latest_db_path(version: str = "V31") -> str:
     base_dir = get_path("HOJ_DB")
     if "REAL" in base_dir or "RESEARCH" in base_dir:
         base_dir = os.path.dirname(base_dir)
@@ -110,9 +166,26 @@ def load_latest_db(version: str = "V31") -> pd.DataFrame:
         cand = os.path.join(base_dir, f"HOJ_DB_{version}.parquet")
         if not os.path.exists(cand):
             raise FileNotFoundError(f"HOJ_DB 파일 없음: {base_dir}")
-        return pd.read_parquet(cand)
+        return cand
+    return str(latest)
 
-    return pd.read_parquet(latest)
+def load_latest_db(version: str = "V31") -> pd.DataFrame:
+    return pd.read_parquet(find_latest_db_path(version))
+
+def db_fingerprint(path: str) -> str:
+    """DB 파일 지문: 경로 + 크기 + 수정시각 (내용을 읽지 않음)."""
+    st = os.stat(path)
+    raw = f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+def db_max_date(path: str):
+    d = pd.read_parquet(path, columns=["Date"])["Date"]
+    return pd.to_datetime(d).max().date()
+
+def schema_frame(path: str) -> pd.DataFrame:
+    """parquet 스키마만 읽어 0행 DataFrame으로 반환 (dtype 판별용)."""
+    import pyarrow.parquet as pq
+    return pq.read_schema(path).empty_table().to_pandas()
 
 def select_feature_columns(df):
     drop_cols = [
@@ -132,81 +205,735 @@ def feature_period(col: str) -> int:
     m = [int(x) for x in INT_PAT.findall(col)]
     return max(m) if m else 0
 
-def apply_A_mask(df: pd.DataFrame, features: list, input_window: int, close_col: str, horizon: int):
+def window_features(features: list, input_window: int) -> list:
     if input_window and input_window > 0:
-        feats = []
-        for c in features:
-            p = feature_period(c)
-            if (p == 0) or (p <= input_window):
-                feats.append(c)
-        features = feats
+        return [c for c in features if feature_period(c) <= input_window]
+    return list(features)
+
+def group_positions(codes: np.ndarray):
+    """
+    Code 기준으로 정렬된 배열에서 (그룹번호, 종목 내 순번, 역순번) 계산.
+    groupby().cumcount() / cumcount(ascending=False)와 동일한 값을 벡터로 만든다.
+    """
+    n = len(codes)
+    if n == 0:
+        z = np.zeros(0, dtype=np.int64)
+        return z, z, z
+    is_start = np.empty(n, dtype=bool)
+    is_start[0] = True
+    np.not_equal(codes[1:], codes[:-1], out=is_start[1:])
+    starts = np.flatnonzero(is_start)
+    sizes = np.diff(np.append(starts, n))
+    grp = np.cumsum(is_start) - 1
+    pos = np.arange(n) - starts[grp]
+    rev = sizes[grp] - pos - 1
+    return grp, pos, rev
+
+def grouped_forward_return(close: np.ndarray, grp: np.ndarray, horizon: int) -> np.ndarray:
+    """연속 배열 위에서 groupby(grp).shift(-h) / close - 1 (그룹 경계 넘으면 NaN)."""
+    out = np.full(len(close), np.nan)
+    if horizon <= 0:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return close / close - 1.0
+    if len(close) > horizon:
+        same = grp[horizon:] == grp[:-horizon]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out[:-horizon] = np.where(same, close[horizon:] / close[:-horizon] - 1.0, np.nan)
+    return out
 
+def apply_A_mask(df: pd.DataFrame, features: list, input_window: int, close_col: str, horizon: int):
+    """
+    A안 마스크 (벡터화):
+      - Code/Date 1회 정렬 후 cumcount >= max_period (앞구간 제거)
+      - 역순번 >= horizon (뒤 h일 제거)
+      - 마스크된 연속 배열에서 종목 단위 shift(-h)로 TargetRet 생성
+    종목별 부분 프레임을 만들지 않는다.
+    """
+    features = window_features(features, input_window)
     max_period = max([feature_period(c) for c in features] + [0])
 
-    parts = []
-    for code, g in df.groupby("Code", sort=False):
-        g = g.sort_values("Date")
-        if max_period > 0:
-            g = g.iloc[max_period:].copy()
-        if horizon > 0:
-            g = g.iloc[:-horizon] if len(g) > horizon else g.iloc[0:0]
-        parts.append(g)
-
-    df_m = pd.concat(parts, ignore_index=True) if parts else df.iloc[0:0].copy()
-    df_m["TargetRet"] = df_m.groupby("Code")[close_col].shift(-horizon) / df_m[close_col] - 1.0
+    base_cols = list(dict.fromkeys(["Date", "Code", close_col] + features))
+    df_s = df[base_cols].sort_values(["Code", "Date"], kind="mergesort")
+
+    grp, pos, rev = group_positions(df_s["Code"].to_numpy())
+    keep = pos >= max_period
+    if horizon > 0:
+        keep &= rev >= horizon
+    idx = np.flatnonzero(keep)
+
+    df_m = df_s.iloc[idx].reset_index(drop=True)
+    close = df_m[close_col].to_numpy(dtype="float64")
+    df_m["TargetRet"] = grouped_forward_return(close, grp[idx], horizon)
     df_m["TargetUp"] = (df_m["TargetRet"] > 0).astype("int8")
 
     use_cols = ["Date","Code", close_col] + features + ["TargetRet","TargetUp"]
-    df_m = df_m[use_cols].dropna(subset=features + ["TargetRet"])
+    df_m = df_m[use_cols].dropna(subset=features + ["TargetRet"]).reset_index(drop=True)
     return df_m, features, max_period
 
 # ------------------------------------------------------------
-# 3) 스플릿 & 학습
+# 2-1) 마스크 결과 캐시 (DB 지문, 피처, input_window, horizon)
+#   - 같은 DB/설정이면 research/real/그리드 반복에서 마스크 재계산 생략
+#   - 위치: HOJ_DB/CACHE/mask/mask_{DB지문}_{키}.parquet (+ .json 메타)
 # ------------------------------------------------------------
-def split_train_valid(df: pd.DataFrame, valid_days: int) -> tuple:
-    max_day = df["Date"].max().normalize()
-    valid_start = max_day - timedelta(days=int(valid_days))
-    is_valid = df["Date"] >= valid_start
-    train = df.loc[~is_valid].copy()
-    valid = df.loc[ is_valid].copy()
-    return train, valid, valid_start.date(), max_day.date()
-
-def train_models(df_m: pd.DataFrame, features: list, n_estimators: int = 1000):
-    X_tr = df_m.loc[df_m["is_train"], features]
-    y_reg_tr = df_m.loc[df_m["is_train"], "TargetRet"]
-    y_cls_tr = df_m.loc[df_m["is_train"], "TargetUp"]
-
-    X_va = df_m.loc[~df_m["is_train"], features]
-    y_reg_va = df_m.loc[~df_m["is_train"], "TargetRet"]
-    y_cls_va = df_m.loc[~df_m["is_train"], "TargetUp"]
-
-    model_reg = lgb.LGBMRegressor(
-        n_estimators=n_estimators, max_depth=-1, learning_rate=0.03,
-        subsample=0.9, colsample_bytree=0.9, objective="regression",
-        n_jobs=-1
-    )
-    if len(X_va) > 0:
-        model_reg.fit(X_tr, y_reg_tr,
-            eval_set=[(X_va, y_reg_va)], eval_metric="rmse",
-            callbacks=[single_line_logger(period=50)]
-        )
+_MASK_MEMO = {}
+
+def mask_cache_key(db_fp: str, features: list, input_window: int, horizon: int, close_col: str) -> str:
+    raw = json.dumps([db_fp, list(features), int(input_window), int(horizon), close_col])
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+def _mask_cache_dir(db_path: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), "CACHE", "mask")
+
+def _prune_mask_cache(cache_dir: str, db_fp: str):
+    """DB가 바뀌면(지문 불일치) 이전 캐시 파일 정리."""
+    for fn in os.listdir(cache_dir):
+        if fn.startswith("mask_") and not fn.startswith(f"mask_{db_fp}_"):
+            try:
+                os.remove(os.path.join(cache_dir, fn))
+            except OSError:
+                pass
+
+def get_masked_frame(version: str = "V31", horizon: int = 5, input_window: int = 60,
+                     use_cache: bool = True, db_path: str = None,
+                     base_df: pd.DataFrame = None) -> dict:
+    """
+    마스크/타겟이 적용된 학습용 프레임을 반환 (캐시 우선).
+    base_df: 이미 로드한 DB 프레임(Date/Code/종가/후보 피처)이 있으면 재사용 (그리드 등).
+    반환 dict: df_m, features, max_period, close_col, max_date, db_rows, db_path, db_fp, cache_hit
+    df_m은 공유 객체이므로 읽기 전용으로 사용한다.
+    """
+    db_path = db_path or find_latest_db_path(version)
+    db_fp = db_fingerprint(db_path)
+
+    # 스키마만으로 피처/종가 컬럼 결정 (DB 미로드)
+    df0 = schema_frame(db_path)
+    close_col = pick_close_column(df0)
+    cand = [c for c in select_feature_columns(df0) if c != close_col]
+
+    key = mask_cache_key(db_fp, cand, input_window, horizon, close_col)
+    if use_cache and key in _MASK_MEMO:
+        return dict(_MASK_MEMO[key], cache_hit=True)
+
+    cache_dir = _mask_cache_dir(db_path)
+    pq_path = os.path.join(cache_dir, f"mask_{db_fp}_{key}.parquet")
+    meta_path = pq_path.replace(".parquet", ".json")
+
+    if use_cache and os.path.exists(pq_path) and os.path.exists(meta_path):
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                m = json.load(f)
+            df_m = pd.read_parquet(pq_path)
+            res = {
+                "df_m": df_m, "features": m["features"], "max_period": int(m["max_period"]),
+                "close_col": close_col, "max_date": datetime.strptime(m["max_date"], "%Y-%m-%d").date(),
+                "db_rows": int(m["db_rows"]), "db_path": db_path, "db_fp": db_fp,
+            }
+            _MASK_MEMO[key] = res
+            print(f"[CACHE] 마스크 캐시 사용: {os.path.basename(pq_path)}")
+            return dict(res, cache_hit=True)
+        except Exception as e:
+            print(f"[CACHE] 캐시 읽기 실패 → 재계산 ({e})")
+
+    # 필요한 컬럼만 로드 (base_df 가 있으면 재사용, 읽기 전용)
+    if base_df is not None:
+        df = base_df
     else:
-        model_reg.fit(X_tr, y_reg_tr)
+        df = pd.read_parquet(db_path, columns=list(dict.fromkeys(["Date", "Code", close_col] + cand)))
+    if not pd.api.types.is_datetime64_any_dtype(df["Date"]):
+        df["Date"] = pd.to_datetime(df["Date"])
+    max_date = df["Date"].max().date()
+    db_rows = len(df)
 
-    model_cls = lgb.LGBMClassifier(
-        n_estimators=n_estimators, max_depth=-1, learning_rate=0.03,
-        subsample=0.9, colsample_bytree=0.9, objective="binary",
-        n_jobs=-1
-    )
-    if len(X_va) > 0:
-        model_cls.fit(X_tr, y_cls_tr,
-            eval_set=[(X_va, y_cls_va)], eval_metric="auc",
-            callbacks=[single_line_logger(period=50)]
+    df_m, features, max_period = apply_A_mask(df, cand, input_window, close_col, horizon)
+    del df
+
+    res = {
+        "df_m": df_m, "features": features, "max_period": max_period,
+        "close_col": close_col, "max_date": max_date, "db_rows": db_rows,
+        "db_path": db_path, "db_fp": db_fp,
+    }
+    if use_cache:
+        try:
+            ensure_dir(cache_dir)
+            _prune_mask_cache(cache_dir, db_fp)
+            df_m.to_parquet(pq_path, index=False)
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump({
+                    "features": features, "max_period": max_period, "close_col": close_col,
+                    "max_date": str(max_date), "db_rows": db_rows, "db_path": db_path,
+                    "input_window": int(input_window), "horizon": int(horizon),
+                }, f, ensure_ascii=False, indent=2)
+            _MASK_MEMO[key] = res
+        except Exception as e:
+            print(f"[CACHE] 캐시 저장 실패: {e}")
+    return dict(res, cache_hit=False)
+
+# ------------------------------------------------------------
+# 2-2) 멀티 호라이즌: 1회 정렬/그룹 계산으로 모든 horizon 타겟 행렬 생성
+#   - 공통 행 = 앞구간(max_period) 제거 + 피처 결측 제거 → 바이닝 1회
+#   - horizon h 의 유효 행 = apply_A_mask 와 동일 (역순번 >= 2h, 타겟 존재)
+# ------------------------------------------------------------
+def build_target_matrix(close: np.ndarray, grp: np.ndarray, rev: np.ndarray, horizons: list) -> dict:
+    """정렬된 연속 배열에서 horizon 별 (TargetRet, 유효 마스크)."""
+    out = {}
+    for h in horizons:
+        ret = grouped_forward_return(close, grp, int(h))
+        valid = np.isfinite(ret)
+        if h > 0:
+            valid &= rev >= 2 * int(h)
+        out[int(h)] = (ret, valid)
+    return out
+
+def prepare_multi_horizon(horizons: list, input_window: int = 60, version: str = "V31",
+                          use_cache: bool = True, db_path: str = None) -> dict:
+    """
+    DB 1회 로드 + 1회 정렬로 여러 horizon 의 학습 데이터를 한 번에 준비.
+    반환 prep: df_m(공통 행), features, targets{h: (row_idx, y_reg, y_cls)} 등.
+    horizon_view(prep, h) 로 run_unified_training 에 넘길 단일 horizon prep 을 만든다.
+    """
+    horizons = sorted({int(h) for h in horizons})
+    db_path = db_path or find_latest_db_path(version)
+    db_fp = db_fingerprint(db_path)
+    df0 = schema_frame(db_path)
+    close_col = pick_close_column(df0)
+    cand = [c for c in select_feature_columns(df0) if c != close_col]
+    features = window_features(cand, input_window)
+    max_period = max([feature_period(c) for c in features] + [0])
+
+    df = pd.read_parquet(db_path, columns=list(dict.fromkeys(["Date", "Code", close_col] + features)))
+    if not pd.api.types.is_datetime64_any_dtype(df["Date"]):
+        df["Date"] = pd.to_datetime(df["Date"])
+    max_date = df["Date"].max().date()
+    db_rows = len(df)
+
+    df_s = df.sort_values(["Code", "Date"], kind="mergesort")
+    del df
+    grp, pos, rev = group_positions(df_s["Code"].to_numpy())
+    close = df_s[close_col].to_numpy(dtype="float64")
+    keep = (pos >= max_period) & df_s[features].notna().all(axis=1).to_numpy()
+    pos_h = [h for h in horizons if h > 0]
+    if pos_h:
+        keep &= rev >= min(pos_h)
+    rows = np.flatnonzero(keep)
+
+    tmat = build_target_matrix(close, grp, rev, horizons)
+    df_m = df_s.iloc[rows].reset_index(drop=True)
+    del df_s
+
+    targets = {}
+    for h, (ret, valid) in tmat.items():
+        r = ret[rows]
+        idx = np.flatnonzero(valid[rows])
+        targets[h] = (idx, r, (r > 0).astype("float64"))
+        print(f"[MULTI] h={h}: 유효 행 {len(idx):,}")
+
+    prep = {
+        "df_m": df_m, "features": features, "max_period": max_period,
+        "close_col": close_col, "max_date": max_date, "db_rows": db_rows,
+        "db_path": db_path, "db_fp": db_fp, "cache_hit": False,
+        "horizon": f"multi:{','.join(map(str, horizons))}", "input_window": int(input_window),
+        "horizons": horizons, "targets": targets,
+        # 공통 Dataset 기본 라벨 (헤드별 subset 에서 교체)
+        "y_reg": np.zeros(len(df_m)), "y_cls": np.zeros(len(df_m)),
+        "lgb_full": None, "use_cache": bool(use_cache), "family_data": {},
+    }
+    print(f"[FEAT] 피처 수 = {len(features)} | DB rows={db_rows:,}")
+    print(f"[MASK] MaxPeriod={max_period}d | 공통 rows={len(df_m):,} | horizons={horizons}")
+    return prep
+
+def horizon_view(prep: dict, horizon: int) -> dict:
+    """멀티 호라이즌 prep → 단일 horizon prep (df_m/바이닝 공유, 라벨/유효 행만 교체)."""
+    idx, y_reg, y_cls = prep["targets"][int(horizon)]
+    view = dict(prep, horizon=int(horizon), y_reg=y_reg, y_cls=y_cls, row_idx=idx,
+                multi_horizon=list(prep["horizons"]))
+    view.pop("targets", None)
+    return view
+
+# ------------------------------------------------------------
+# 3) 공유 학습 데이터셋 & 학습
+#   - prepare_training_set: 마스크/타겟 프레임 1회 준비 (research/real 공용)
+#   - build_lgb_dataset: lgb.Dataset 바이닝 1회 → 분할/헤드별로 subset 만 생성
+#   - 회귀/분류, research/real 모두 같은 bin 경계를 공유 (재바이닝 없음)
+#   - 바이닝 결과는 HOJ_DB/CACHE/lgb 에 save_binary 로 캐시 (lgb_cache.py)
+# ------------------------------------------------------------
+BASE_PARAMS = {
+    "boosting_type": "gbdt", "num_leaves": 31, "max_depth": -1,
+    "learning_rate": 0.03, "min_child_samples": 20,
+    "feature_fraction": 0.9, "bagging_fraction": 0.9, "bagging_freq": 0,
+    "num_threads": 0, "verbose": -1,
+}
+REG_PARAMS = dict(BASE_PARAMS, objective="regression", metric="rmse")
+CLS_PARAMS = dict(BASE_PARAMS, objective="binary", metric="auc")
+
+def prepare_training_set(version: str = "V31", horizon: int = 5, input_window: int = 60,
+                         use_cache: bool = True, db_path: str = None,
+                         base_df: pd.DataFrame = None) -> dict:
+    """
+    research/real 이 공유하는 학습 데이터 1회 준비.
+    get_masked_frame 결과 + 타겟 배열. lgb.Dataset 은 build_lgb_dataset 에서 지연 생성.
+    """
+    prep = get_masked_frame(version, horizon, input_window, use_cache=use_cache,
+                            db_path=db_path, base_df=base_df)
+    df_m, features = prep["df_m"], prep["features"]
+    prep["horizon"] = int(horizon)
+    prep["input_window"] = int(input_window)
+    prep["y_reg"] = df_m["TargetRet"].to_numpy(dtype="float64")
+    prep["y_cls"] = df_m["TargetUp"].to_numpy(dtype="float64")
+    prep["lgb_full"] = None
+    prep["use_cache"] = bool(use_cache)
+    prep["family_data"] = {}
+
+    print(f"[FEAT] 피처 수 = {len(features)} | DB rows={prep['db_rows']:,}")
+    mask_min = df_m["Date"].min().date() if len(df_m) else None
+    mask_max = df_m["Date"].max().date() if len(df_m) else None
+    print(f"[MASK] MaxPeriod={prep['max_period']}d | After rows={len(df_m):,} | Date: {mask_min}~{mask_max}")
+    print(f"[HASH] df_m = {df_hash(df_m)}")
+    return prep
+
+def build_lgb_dataset(prep: dict) -> lgb.Dataset:
+    """전체 마스크 프레임을 1회 바이닝 (디스크 캐시 우선, subset 생성 시 원본 복사 없음)."""
+    if prep.get("lgb_full") is None:
+        df_m, features = prep["df_m"], prep["features"]
+        mask_params = {
+            "horizon": prep["horizon"], "input_window": prep["input_window"],
+            "close_col": prep["close_col"], "rows": len(df_m),
+            **(prep.get("cache_extra") or {}),
+        }
+        ds, hit = load_or_build_dataset(
+            lambda: (df_m[features], np.nan_to_num(prep["y_reg"])),
+            features, prep["db_path"], prep["db_fp"], mask_params,
+            bin_params=BIN_PARAMS, use_cache=prep.get("use_cache", True),
         )
+        prep["lgb_full"] = ds
+        if prep.get("lgb_store") is not None:
+            prep["lgb_store"]["lgb_full"] = ds   # 계열 뷰: 같은 prep 의 다른 모드/horizon 이 재사용
+        state = "캐시 로드" if hit else "구성"
+        print(f"[BIN] lgb.Dataset {state} 완료 (rows={ds.num_data():,}, features={ds.num_feature()})")
+    return prep["lgb_full"]
+
+def split_indices(dates: pd.Series, valid_days: int) -> tuple:
+    max_day = dates.max().normalize()
+    valid_start = max_day - timedelta(days=int(valid_days))
+    is_valid = (dates >= valid_start).to_numpy()
+    return np.flatnonzero(~is_valid), np.flatnonzero(is_valid), valid_start.date(), max_day.date()
+
+# ------------------------------------------------------------
+# 3-1) 층화 서브샘플 (research 고속 모드)
+#   - 층 = Date × Market (옵션: × 타겟 부호), 층마다 같은 비율로 추출
+#   - 고정 seed → 같은 설정이면 같은 행 (피처 실험 간 비교 가능)
+#   - 층마다 최소 1행 유지 → 모든 거래일이 학습/검증에 남음
+# ------------------------------------------------------------
+def code_market_map(db_path: str) -> pd.Series:
+    """Code → Market (종목별 최신 행 기준). DB에 Market 컬럼이 없으면 빈 Series."""
+    if "Market" not in schema_frame(db_path).columns:
+        return pd.Series(dtype="object")
+    cm = pd.read_parquet(db_path, columns=["Date", "Code", "Market"])
+    return cm.sort_values("Date").drop_duplicates("Code", keep="last").set_index("Code")["Market"]
+
+def stratified_sample(prep: dict, idx: np.ndarray, frac: float, seed: int = 42,
+                      by_sign: bool = False) -> np.ndarray:
+    """
+    idx(행 인덱스) 중 Date × Market(× TargetRet 부호) 층별로 frac 비율 추출.
+    반환: 정렬된 행 인덱스 (lgb subset 에 그대로 사용)
+    """
+    idx = np.asarray(idx)
+    if frac >= 1.0 or len(idx) == 0:
+        return idx
+    df_m = prep["df_m"]
+
+    key = pd.factorize(df_m["Date"].to_numpy()[idx])[0].astype("int64")
+    if prep.get("market") is None:
+        prep["market"] = code_market_map(prep["db_path"])
+    if len(prep["market"]):
+        mk = pd.factorize(df_m["Code"].iloc[idx].map(prep["market"]).fillna("NA").to_numpy())[0]
+        key = key * (int(mk.max()) + 1) + mk
+    if by_sign:
+        key = key * 2 + (prep["y_reg"][idx] > 0)
+
+    rng = np.random.default_rng(seed)
+    order = np.lexsort((rng.random(len(idx)), key))
+    k_sorted = key[order]
+    starts = np.r_[0, np.flatnonzero(k_sorted[1:] != k_sorted[:-1]) + 1]
+    sizes = np.diff(np.r_[starts, len(order)])
+    rank = np.arange(len(order)) - np.repeat(starts, sizes)
+    quota = np.maximum(1, np.rint(sizes * frac)).astype("int64")
+    keep = rank < np.repeat(quota, sizes)
+    return np.sort(idx[order[keep]])
+
+def evaluate_heads(model_reg, model_cls, X: pd.DataFrame, y_reg: np.ndarray, y_cls: np.ndarray) -> tuple:
+    """검증셋 (AUC, RMSE). 한 클래스만 있으면 AUC 는 None."""
+    from sklearn.metrics import roc_auc_score
+    pred_reg = model_reg.predict(X)
+    pred_cls = model_cls.predict_proba(X)[:, 1]
+    rmse = float(np.sqrt(np.mean((pred_reg - y_reg) ** 2)))
+    auc = float(roc_auc_score(y_cls, pred_cls)) if len(np.unique(y_cls)) > 1 else None
+    return auc, rmse
+
+# ------------------------------------------------------------
+# 3-2) 피처 가지치기 (research 적합 후)
+#   - 순위: gain(두 헤드 정규화 gain 합) | perm(검증셋 순열 중요도) | both(두 순위 평균)
+#   - 상위 k개(prune_fracs 비율, 작은 집합부터)로 재학습 → 기준 대비 허용오차 안의 가장 작은 집합 선택
+#   - 선택 목록이 엔진 features → DB 읽기/예측 비용 감소. 트레이드오프는 meta["pruning"]
+# ------------------------------------------------------------
+PRUNE_METHODS = ("off", "gain", "perm", "both")
+PRUNE_FRACS = (0.25, 0.5, 0.75)
+PRUNE_RMSE_TOL = 0.01      # RMSE 상대 악화 허용 (1%)
+PERM_MAX_ROWS = 20000      # 순열 중요도 계산 행 상한 (검증셋 무작위 추출)
+
+def feature_subset_prep(prep: dict, features: list, use_cache: bool = None) -> dict:
+    """같은 마스크 프레임/타겟, 피처만 교체한 prep (바이닝은 피처 목록 기준으로 새로 생성)."""
+    sub = dict(prep, features=list(features), lgb_full=None)
+    if use_cache is not None:
+        sub["use_cache"] = bool(use_cache)
+    return sub
+
+def gain_ranking(model_reg, model_cls, features: list) -> pd.Series:
+    """헤드별 gain 을 합 1로 정규화해 더한 점수 (내림차순)."""
+    score = pd.Series(0.0, index=features)
+    for m in (model_reg, model_cls):
+        g = pd.Series(m.booster_.feature_importance("gain"), index=features)
+        if g.sum() > 0:
+            score += g / g.sum()
+    return score.sort_values(ascending=False)
+
+def perm_ranking(model_reg, model_cls, X: pd.DataFrame, y_reg: np.ndarray, y_cls: np.ndarray,
+                 seed: int = 42) -> pd.Series:
+    """검증셋 순열 중요도: 피처 1개씩 섞었을 때 AUC 하락 + RMSE 상대 증가 (내림차순)."""
+    rng = np.random.default_rng(seed)
+    if len(X) > PERM_MAX_ROWS:
+        take = np.sort(rng.choice(len(X), PERM_MAX_ROWS, replace=False))
+        X, y_reg, y_cls = X.iloc[take], y_reg[take], y_cls[take]
+    base_auc, base_rmse = evaluate_heads(model_reg, model_cls, X, y_reg, y_cls)
+    Xp = X.copy()
+    score = {}
+    for f in X.columns:
+        orig = Xp[f].to_numpy().copy()
+        Xp[f] = rng.permutation(orig)
+        auc, rmse = evaluate_heads(model_reg, model_cls, Xp, y_reg, y_cls)
+        drop = (base_auc - auc) if base_auc is not None and auc is not None else 0.0
+        score[f] = drop + (rmse - base_rmse) / max(base_rmse, 1e-12)
+        Xp[f] = orig
+    return pd.Series(score).sort_values(ascending=False)
+
+def rank_features(method: str, model_reg, model_cls, prep: dict, va_idx: np.ndarray) -> list:
+    features = prep["features"]
+    if method == "gain":
+        return list(gain_ranking(model_reg, model_cls, features).index)
+    X_va = prep["df_m"][features].iloc[va_idx]
+    perm = perm_ranking(model_reg, model_cls, X_va, prep["y_reg"][va_idx], prep["y_cls"][va_idx])
+    if method == "perm":
+        return list(perm.index)
+    gain = gain_ranking(model_reg, model_cls, features)
+    avg = (gain.rank(ascending=False) + perm.rank(ascending=False)) / 2
+    return list(avg.sort_values(kind="mergesort").index)
+
+def _predict_seconds(model_reg, model_cls, X: pd.DataFrame) -> float:
+    t = time.perf_counter()
+    model_reg.predict(X)
+    model_cls.predict_proba(X)
+    return time.perf_counter() - t
+
+def prune_features(prep: dict, tr_idx: np.ndarray, va_idx: np.ndarray, models: tuple,
+                   base: dict, method: str = "gain", tolerance: float = 0.002,
+                   fracs: tuple = PRUNE_FRACS, **fit_kw) -> tuple:
+    """
+    base: {"auc", "rmse"} (전체 피처 research 결과), models: (model_reg, model_cls)
+    fit_kw: train_models 인자 (n_estimators, num_threads, early_stopping_rounds, head_layout)
+    채택 조건: AUC >= 기준 - tolerance 그리고 RMSE <= 기준 × (1 + PRUNE_RMSE_TOL)
+    반환: (선택 {"features","model_reg","model_cls","auc","rmse","best_iteration"} 또는 None, meta["pruning"])
+    """
+    features = prep["features"]
+    ranking = rank_features(method, models[0], models[1], prep, va_idx)
+    X_full = prep["df_m"][features].iloc[va_idx]
+    y_reg, y_cls = prep["y_reg"][va_idx], prep["y_cls"][va_idx]
+    sec_full = _predict_seconds(models[0], models[1], X_full)
+
+    trials, chosen = [], None
+    for frac in sorted(fracs):
+        k = max(1, int(np.ceil(len(features) * frac)))
+        if k >= len(features):
+            continue
+        keep = [f for f in features if f in set(ranking[:k])]   # 원래 컬럼 순서 유지
+        t = time.perf_counter()
+        m_reg, m_cls, info = train_models(feature_subset_prep(prep, keep, use_cache=False),
+                                          tr_idx, va_idx, checkpoint_stem=None, **fit_kw)
+        auc, rmse = evaluate_heads(m_reg, m_cls, X_full[keep], y_reg, y_cls)
+        ok = (base["auc"] is None or (auc is not None and auc >= base["auc"] - tolerance)) and \
+            rmse <= base["rmse"] * (1 + PRUNE_RMSE_TOL)
+        trials.append({"frac": frac, "n_features": k, "auc": auc, "rmse": rmse, "accepted": bool(ok),
+                       "seconds": round(time.perf_counter() - t, 3)})
+        print(f"[PRUNE] top {k}/{len(features)} → AUC={auc} RMSE={rmse:.5f} {'채택' if ok else '기각'}")
+        if ok:
+            info.pop("layout", None)
+            chosen = {"features": keep, "model_reg": m_reg, "model_cls": m_cls, "auc": auc, "rmse": rmse,
+                      "best_iteration": _reusable_trees(info), "trees": {h: i["trees"] for h, i in info.items()}}
+            break
+
+    summary = {
+        "method": method, "tolerance": float(tolerance), "rmse_tolerance": PRUNE_RMSE_TOL,
+        "base": {"n_features": len(features), "auc": base["auc"], "rmse": base["rmse"]},
+        "selected": None, "trials": trials, "ranking": ranking,
+    }
+    if chosen:
+        sec_pruned = _predict_seconds(chosen["model_reg"], chosen["model_cls"], X_full[chosen["features"]])
+        summary["selected"] = {
+            "n_features": len(chosen["features"]), "auc": chosen["auc"], "rmse": chosen["rmse"],
+            "dropped": [f for f in features if f not in set(chosen["features"])],
+            "predict_speedup": round(sec_full / max(sec_pruned, 1e-9), 2),
+        }
+        print(f"[PRUNE] 선택: 피처 {len(features)} → {len(chosen['features'])}개 "
+              f"| 예측 {summary['selected']['predict_speedup']:.2f}x")
     else:
-        model_cls.fit(X_tr, y_cls_tr)
+        print(f"[PRUNE] 허용오차 {tolerance} 안의 축소 집합 없음 → 전체 피처 유지")
+    return chosen, summary
+
+# ------------------------------------------------------------
+# 3-3) 엔진 계열 (HOJ / SLE)
+#   - HOJ: DB 의 기술적 지표 피처 (select_feature_columns)
+#   - SLE: SLE_DB 스냅샷(PBR/PER/외국인·기관 순매수)을 마스크 프레임 (Date, Code) 에 붙여 학습
+#          종목별 ffill (스냅샷 사이 구간 유지), 스냅샷이 한 번도 없는 행은 제외
+#   - 타겟/분할/마스크는 HOJ 와 같은 prep 공유 → 한 작업에서 두 계열을 연속 학습
+# ------------------------------------------------------------
+ENGINE_FAMILIES = ("HOJ", "SLE")
+SLE_FEATURES = ["PBR", "PER", "FOR_NET_BUY", "INS_NET_BUY"]
+SLE_RENAME = {"date": "Date", "날짜": "Date", "ticker": "Code", "종목코드": "Code",
+              "외국인순매수": "FOR_NET_BUY", "기관순매수": "INS_NET_BUY"}
+SLE_FILL = {"PBR": 9999, "PER": 9999, "FOR_NET_BUY": 0, "INS_NET_BUY": 0}   # V30 학습 규칙 유지
+
+def engine_base(family: str = "HOJ") -> str:
+    """계열별 엔진 루트 (HOJ_ENGINE / SLE_ENGINE). 엔진 색인 sqlite 도 이 폴더."""
+    base = get_path(f"{family}_ENGINE")
+    if os.path.isfile(base):
+        base = os.path.dirname(base)
+    return base
 
-    return model_reg, model_cls
+def engine_filename(family: str, mode: str, horizon: int, input_window: int,
+                    n_estimators: int, tag: str) -> str:
+    return f"{family}_ENGINE_{mode.upper()}_V31_h{horizon}_w{input_window}_n{n_estimators}_{tag}.pkl"
+
+def find_latest_sle_db_path() -> str:
+    base_dir = get_path("SLE_DB", "REAL")
+    latest = find_latest_file(base_dir, "SLE_DB")
+    if latest is None:
+        raise FileNotFoundError(f"SLE_DB 파일 없음: {base_dir}")
+    return str(latest)
+
+def load_sle_frame(path: str) -> pd.DataFrame:
+    """SLE DB → (Date, Code, SLE_FEATURES) 표준 컬럼. 결측은 SLE_FILL 로 채움."""
+    cols = set(schema_frame(path).columns)
+    use = [c for c in cols if c in SLE_RENAME or c in ("Date", "Code", *SLE_FEATURES)]
+    sle = pd.read_parquet(path, columns=use).rename(columns=SLE_RENAME)
+    missing = [c for c in ["Date", "Code"] + SLE_FEATURES if c not in sle.columns]
+    if missing:
+        raise KeyError(f"SLE DB 컬럼 없음: {missing} ({os.path.basename(path)})")
+    sle["Date"] = pd.to_datetime(sle["Date"])
+    sle["Code"] = sle["Code"].astype(str).str.zfill(6)
+    sle = sle.fillna(SLE_FILL).drop_duplicates(["Date", "Code"], keep="last")
+    return sle[["Date", "Code"] + SLE_FEATURES]
+
+def _attach_sle(prep: dict, sle_path: str = None) -> dict:
+    """마스크 프레임 행 순서 그대로 SLE 피처 프레임 생성 (prep["family_data"]["SLE"] 에 1회 캐시)."""
+    store = prep.setdefault("family_data", {})
+    sle_path = sle_path or find_latest_sle_db_path()
+    sle_fp = db_fingerprint(sle_path)
+    if store.get("SLE", {}).get("sle_fp") == sle_fp:
+        return store["SLE"]
+
+    df_m = prep["df_m"]
+    key = pd.DataFrame({"Date": df_m["Date"].to_numpy(), "Code": df_m["Code"].astype(str).str.zfill(6).to_numpy()})
+    sle = load_sle_frame(sle_path)
+    frame = key.merge(sle, on=["Date", "Code"], how="left")     # left merge: 행 순서 유지
+    frame[SLE_FEATURES] = frame.groupby("Code", sort=False)[SLE_FEATURES].ffill()   # df_m 은 Code, Date 정렬
+    has = frame[SLE_FEATURES].notna().all(axis=1).to_numpy()
+    store["SLE"] = {"df_m": frame, "has": has, "sle_path": sle_path, "sle_fp": sle_fp}
+    print(f"[SLE] {os.path.basename(sle_path)} | 스냅샷 {len(sle):,}행 → 학습 가능 {int(has.sum()):,}/{len(frame):,}행")
+    return store["SLE"]
+
+def family_view(prep: dict, family: str = "HOJ", sle_path: str = None) -> dict:
+    """
+    공유 prep → 계열별 학습 prep. HOJ 는 그대로, SLE 는 피처 프레임/피처 목록/유효 행만 교체.
+    타겟(y_reg/y_cls), 행 순서, horizon/row_idx(멀티 호라이즌) 는 그대로 공유.
+    """
+    if family == "HOJ":
+        return prep
+    if family != "SLE":
+        raise ValueError(f"family: {ENGINE_FAMILIES}")
+    fam = _attach_sle(prep, sle_path)
+    rows = np.flatnonzero(fam["has"])
+    if prep.get("row_idx") is not None:
+        rows = np.intersect1d(prep["row_idx"], rows)
+    return dict(prep, df_m=fam["df_m"], features=list(SLE_FEATURES), row_idx=rows, family="SLE",
+                lgb_full=fam.get("lgb_full"), lgb_store=fam,
+                cache_extra={"family": "SLE", "sle_fp": fam["sle_fp"]})
+
+def checkpoint_dir() -> str:
+    base = get_path("HOJ_ENGINE")
+    if os.path.isfile(base):
+        base = os.path.dirname(base)
+    return ensure_dir(os.path.join(base, "CHECKPOINT"))
+
+def _fit_head(head: str, params: dict, prep: dict, label: np.ndarray, train_idx, valid_idx,
+              num_rounds: int, early_stopping_rounds: int = 0, budget: float = 0,
+              ckpt_path: str = None, checkpoint_every: int = 0, verbose: bool = True) -> tuple:
+    """
+    헤드 1개 학습 (조기 종료 / 체크포인트 / 시간 예산).
+    체크포인트가 있으면 이어서 학습 (이 경우에만 raw 행으로 Dataset 생성, bin 경계는 공유 Dataset 사용).
+    반환: (Booster(best_iteration 까지 잘라낸), info)
+      info["trees"]          : 실제 트리 수
+      info["best_iteration"] : 재사용 가능한 트리 수 (시간 예산으로 멈춘 경우 None — 검증 최적이 아님)
+    """
+    full = build_lgb_dataset(prep)
+    has_valid = valid_idx is not None and len(valid_idx) > 0
+    state = {"stopped_by": "full", "iters": 0}
+
+    def _track(env):
+        state["iters"] = env.iteration + 1
+        if env.evaluation_result_list:   # 첫 검증 지표 최고점 (조기 종료와 같은 기준)
+            _, _, score, higher = env.evaluation_result_list[0][:4]
+            best = state.get("best")
+            if best is None or (score > best["value"] if higher else score < best["value"]):
+                state["best"] = {"iteration": env.iteration, "value": score,
+                                 "score": list(env.evaluation_result_list)}
+    _track.order = 5
+
+    callbacks = [_track] + ([single_line_logger(period=50)] if verbose else [])
+    if has_valid and early_stopping_rounds > 0:
+        callbacks.append(lgb.early_stopping(early_stopping_rounds, first_metric_only=True, verbose=False))
+    if budget and budget > 0:
+        callbacks.append(time_budget(budget, state))
+    if ckpt_path and checkpoint_every > 0:
+        callbacks.append(checkpoint_saver(ckpt_path, checkpoint_every))
+
+    init_model, done = None, 0
+    if ckpt_path and os.path.exists(ckpt_path):
+        try:
+            init_model = lgb.Booster(model_file=ckpt_path)
+            done = init_model.current_iteration()
+            print(f"[CKPT] {head}: 체크포인트 {done}회에서 이어서 학습")
+        except Exception as e:
+            print(f"[CKPT] {head}: 체크포인트 읽기 실패 → 처음부터 ({e})")
+            init_model, done = None, 0
+
+    remaining = max(int(num_rounds) - done, 0)
+    if init_model is not None and remaining == 0:
+        booster = init_model
+    elif init_model is not None:
+        X = prep["df_m"][prep["features"]]
+        dtr = lgb.Dataset(X.iloc[train_idx], label=label[train_idx], reference=full, free_raw_data=False)
+        kw = {}
+        if has_valid:
+            dva = lgb.Dataset(X.iloc[valid_idx], label=label[valid_idx], reference=full, free_raw_data=False)
+            kw = {"valid_sets": [dva], "valid_names": ["valid"]}
+        booster = lgb.train(dict(params), dtr, num_boost_round=remaining,
+                            init_model=init_model, callbacks=callbacks, **kw)
+    else:
+        booster = train_head(params, full, label, train_idx, valid_idx, remaining,
+                             callbacks=callbacks)
+    if verbose:
+        print()
+
+    # lgb.train 은 조기 종료 시 best_iteration 까지 잘라 반환 → 실제 학습 반복 수는 state 로 확인
+    total = max(state["iters"], done)
+    best = int(booster.best_iteration or 0)
+    if 0 < best < booster.current_iteration():
+        booster = lgb.Booster(model_str=booster.model_to_string(num_iteration=best))
+    n_trees = booster.current_iteration()
+    if state["stopped_by"] == "full" and n_trees < int(num_rounds):
+        state["stopped_by"] = "early_stop"
+
+    if ckpt_path and os.path.exists(ckpt_path):
+        os.remove(ckpt_path)
+    print(f"[TRAIN] {head}: trees={n_trees} (학습 {total}회, {state['stopped_by']})")
+    return booster, {"trees": n_trees, "trained": total, "stopped_by": state["stopped_by"],
+                     "best_iteration": None if state["stopped_by"] == "budget" else n_trees}
+
+HEAD_LAYOUTS = ("sequential", "concurrent", "auto")
+
+def resolve_head_layout(layout: str, num_threads: int = 0) -> tuple:
+    """
+    헤드 배치 결정 → (layout, 헤드별 스레드 수).
+      sequential: 회귀 → 분류 순차, 각 헤드가 전체 코어 사용
+      concurrent: 두 헤드 동시 학습, 코어를 반씩 분할 (lgb.train 은 C 호출 중 GIL 해제)
+      auto      : 코어 8개 이상이면 concurrent (히스토그램 구성이 코어 수에 선형 확장되지 않음)
+    """
+    if layout not in HEAD_LAYOUTS:
+        raise ValueError(f"head_layout 은 {HEAD_LAYOUTS} 중 하나: {layout}")
+    total = int(num_threads) if num_threads and num_threads > 0 else (os.cpu_count() or 1)
+    if layout == "auto":
+        layout = "concurrent" if total >= 8 else "sequential"
+    if layout == "concurrent":
+        return layout, max(1, total // 2)
+    return layout, int(num_threads)
+
+REAL_TREES_WARN_FRAC = 0.1   # REAL 재사용 트리 수가 n_estimators 의 이 비율 미만이면 경고
+
+def _reusable_trees(info: dict) -> dict:
+    """헤드별 info → REAL 이 재사용할 트리 수 (시간 예산으로 멈춘 헤드 제외)."""
+    return {h: i["best_iteration"] for h, i in info.items()
+            if isinstance(i, dict) and i.get("best_iteration")}
+
+def train_models(prep: dict, train_idx: np.ndarray, valid_idx: np.ndarray = None,
+                 n_estimators: int = 1000, num_threads: int = 0,
+                 early_stopping_rounds: int = 0, tree_counts: dict = None,
+                 time_budget_sec: float = 0, checkpoint_stem: str = None,
+                 checkpoint_every: int = 0, head_layout: str = "auto"):
+    """
+    회귀/분류 헤드 학습.
+      num_threads          : 0이면 전체 코어, >0이면 고정 (병렬 그리드 워커용)
+      early_stopping_rounds: >0 이고 검증셋이 있으면 조기 종료, 모델은 best_iteration 까지 저장
+      tree_counts          : {"reg": n, "cls": n} 헤드별 트리 수 (REAL 이 research best_iteration 재사용)
+      time_budget_sec      : 전체 벽시계 예산(초). sequential 은 남은 예산을 남은 헤드 수로 배분,
+                             concurrent 는 두 헤드가 같은 예산을 동시에 사용
+      checkpoint_stem      : 체크포인트 파일 접두어 (HOJ_ENGINE/CHECKPOINT/{stem}_{head}.txt)
+      head_layout          : sequential | concurrent | auto (resolve_head_layout)
+    반환: (model_reg, model_cls, info{"reg": {...}, "cls": {...}, "layout": {...}})
+    """
+    t_start = time.perf_counter()
+    layout, head_threads = resolve_head_layout(head_layout, num_threads)
+    heads = [
+        ("reg", dict(REG_PARAMS, num_threads=head_threads), prep["y_reg"], BoosterRegressor),
+        ("cls", dict(CLS_PARAMS, num_threads=head_threads), prep["y_cls"], BoosterClassifier),
+    ]
+    build_lgb_dataset(prep)   # 공유 바이닝은 메인 스레드에서 1회
+    print(f"[LAYOUT] {layout} | 헤드별 num_threads={head_threads or 'all'}")
+
+    def _run(i, head, params, label, budget, verbose):
+        t = time.perf_counter()
+        ckpt = os.path.join(checkpoint_dir(), f"{checkpoint_stem}_{head}.txt") if checkpoint_stem else None
+        rounds = int((tree_counts or {}).get(head) or n_estimators)
+        booster, hinfo = _fit_head(
+            head, params, prep, label, train_idx, valid_idx, rounds,
+            early_stopping_rounds=early_stopping_rounds, budget=budget,
+            ckpt_path=ckpt, checkpoint_every=checkpoint_every, verbose=verbose,
+        )
+        hinfo["seconds"] = round(time.perf_counter() - t, 3)
+        return booster, hinfo
+
+    results = {}
+    if layout == "concurrent":
+        from concurrent.futures import ThreadPoolExecutor
+        budget = time_budget_sec if time_budget_sec and time_budget_sec > 0 else 0
+        with ThreadPoolExecutor(max_workers=len(heads)) as ex:
+            futs = {head: ex.submit(_run, i, head, params, label, budget, False)
+                    for i, (head, params, label, _) in enumerate(heads)}
+            results = {head: fut.result() for head, fut in futs.items()}
+    else:
+        for i, (head, params, label, _) in enumerate(heads):
+            budget = 0
+            if time_budget_sec and time_budget_sec > 0:
+                left = time_budget_sec - (time.perf_counter() - t_start)
+                budget = max(left, 1.0) / (len(heads) - i)
+            results[head] = _run(i, head, params, label, budget, True)
+
+    models, info = [], {}
+    for head, params, _, cls in heads:
+        booster, info[head] = results[head]
+        models.append(cls(booster, params=params))
+    info["layout"] = {
+        "layout": layout, "requested": head_layout, "num_threads": head_threads,
+        "seconds": round(time.perf_counter() - t_start, 3),
+    }
+    return models[0], models[1], info
 
 # ------------------------------------------------------------
 # 4) 저장
@@ -214,29 +941,66 @@ def train_models(df_m: pd.DataFrame, features: list, n_estimators: int = 1000):
 def _hash_list(lst: list) -> str:
     return str(abs(hash("|".join(map(str, lst)))))
 
-def save_engine(payload: dict, mode: str):
-    base = get_path("HOJ_ENGINE")
-    if os.path.isfile(base):
-        base = os.path.dirname(base)
+ENGINE_FORMATS = ("bundle", "pkl")
+ENGINE_FORMAT = "bundle"   # bundle: .hoj (header.json + 네이티브 모델), pkl: 기존 payload pickle
+
+def save_engine(payload: dict, mode: str, fmt: str = None):
+    fmt = fmt or ENGINE_FORMAT
+    meta = payload["meta"]
+    family = meta.get("family", "HOJ")
+    base = engine_base(family)
 
     out_dir = os.path.join(base, mode.upper())
     ensure_dir(out_dir)
 
-    tag = datetime.strptime(payload["meta"]["data_date"], "%Y-%m-%d").strftime("%y%m%d")
-
-    fname = (
-        f"HOJ_ENGINE_{mode.upper()}_V31"
-        f"_h{payload['meta']['horizon']}"
-        f"_w{payload['meta']['input_window']}"
-        f"_n{payload['meta']['n_estimators']}"
-        f"_{tag}.pkl"
-    )
+    tag = datetime.strptime(meta["data_date"], "%Y-%m-%d").strftime("%y%m%d")
+    fname = engine_filename(family, mode, meta["horizon"], meta["input_window"], meta["n_estimators"], tag)
 
     path = os.path.join(out_dir, fname)
-    with open(path, "wb") as f:
-        pickle.dump(payload, f)
+    if fmt == "bundle":
+        path = engine_bundle.save_bundle(engine_bundle.bundle_path_of(path), payload)
+    else:
+        with open(path, "wb") as f:
+            pickle.dump(payload, f)
 
     print(f"\n💾 엔진 저장 완료: {path}")
+    try:
+        engine_registry.register_engine(path, payload, metrics=payload["meta"].get("metrics"), base=base)
+    except Exception as e:
+        print(f"[REGISTRY] 등록 실패 (다음 조회 시 파일명으로 동기화): {e}")
+    return path
+
+def research_reference(horizon: int, input_window: int, n_estimators: int, tag: str, family: str = "HOJ"):
+    """
+    같은 설정의 RESEARCH 엔진 조회 (엔진 색인 사용): REAL 이 재사용할 best_iteration / 피처 목록.
+    같은 데이터 날짜(tag) 우선, 없으면 가장 최근 엔진. 없으면 None.
+    색인에 meta 가 없는 구버전 파일만 엔진 헤더를 열어 확인.
+    반환: {"name", "best_iteration", "features", "pruning"}
+    """
+    base = engine_base(family)
+    if not os.path.isdir(os.path.join(base, "RESEARCH")):
+        return None
+    data_date = datetime.strptime(tag, "%y%m%d").date()
+    cand = [
+        e for e in engine_registry.list_engines("RESEARCH", base=base)
+        if (e["horizon"], e["input_window"], e["n_estimators"]) == (horizon, input_window, n_estimators)
+        and not e["name"].startswith("@")
+    ]
+    cand.sort(key=lambda e: (e["data_date"] == data_date, e["data_date"] or datetime.min.date()), reverse=True)
+    for e in cand:
+        meta, feats = e["meta"] or {}, e.get("features") or []
+        if not meta.get("best_iteration") and e["source"] == "name":
+            try:
+                header = engine_bundle.read_header(e["path"])
+                meta, feats = header["meta"], header["features"]
+            except Exception as ex:
+                print(f"[TREES] RESEARCH 엔진 meta 읽기 실패: {e['name']} ({ex})")
+        stopped = meta.get("stopped_by") or {}
+        bi = {k: v for k, v in (meta.get("best_iteration") or {}).items() if v and stopped.get(k) != "budget"}
+        if bi:
+            return {"name": e["name"], "best_iteration": {k: int(v) for k, v in bi.items()},
+                    "features": list(feats), "pruning": meta.get("pruning")}
+    return None
 
 # ------------------------------------------------------------
 # 5) 메인 실행
@@ -248,112 +1012,228 @@ def run_unified_training(
     valid_days: int = 365,
     n_estimators: int = 1000,
     version: str = "V31",
-):
+    use_cache: bool = True,
+    prep: dict = None,
+    num_threads: int = 0,
+    early_stopping_rounds: int = 0,
+    tree_counts: dict = None,
+    time_budget_sec: float = 0,
+    checkpoint_every: int = 100,
+    head_layout: str = "auto",
+    sample_frac: float = 1.0,
+    sample_seed: int = 42,
+    sample_by_sign: bool = False,
+    prune: str = "off",
+    prune_tolerance: float = 0.002,
+    prune_fracs: tuple = PRUNE_FRACS,
+    feature_subset: list = None,
+    family: str = "HOJ",
+    sle_path: str = None,
+    save: bool = True,
+) -> dict:
+    """
+    단일 모드 학습. prep(prepare_training_set 결과)을 넘기면 마스크/바이닝을 재사용.
+    research: 검증셋 조기 종료(early_stopping_rounds, 기본 0=끔), best_iteration 을 meta 에 기록
+    real    : tree_counts 가 없으면 같은 설정 RESEARCH 엔진 meta 의 best_iteration 을 트리 수로 사용
+    sample_frac < 1 (research 전용): Date × Market(× 부호) 층화 샘플로 학습/검증, 엔진 저장 안 함
+    prune(research): gain|perm|both 순위로 피처 가지치기 (prune_feat 참고), off 면 전체 피처
+    feature_subset  : 이 피처 목록으로 학습 (real 은 prune 이 켜져 있으면 RESEARCH 엔진 선택 목록 자동 사용)
+    family          : HOJ | SLE (SLE 는 같은 prep 위에 SLE_DB 피처를 붙여 학습, family_view 참고)
+    save=False      : 동일 이름 SKIP 검사 / 엔진 저장 없이 학습·평가만 (그리드 등 평가용 실행)
+    SKIP 시 기존 엔진 헤더의 metrics / valid_days 를 함께 반환 (설정이 같은지 호출 측에서 확인)
+    반환: {"mode", "status"("done"|"skip"), "engine_path", "auc", "rmse",
+           "best_iteration", "features", "t_prepare", "t_train", "sample", "prep"}
+    """
     assert mode in ("real","research")
-
-    print(f"=== 🚀 Unified HOJ Trainer V31 ({mode.upper()}) ===")
+    assert prune in PRUNE_METHODS, f"prune: {PRUNE_METHODS}"
+    assert family in ENGINE_FAMILIES, f"family: {ENGINE_FAMILIES}"
+    t0 = time.perf_counter()
+    sampled = mode == "research" and 0 < sample_frac < 1
+    if mode == "real" and sample_frac < 1:
+        print("[SAMPLE] 서브샘플은 research 전용 → REAL 은 전체 행으로 학습")
+    sample = {"frac": float(sample_frac), "seed": int(sample_seed), "by_sign": bool(sample_by_sign)} \
+        if sampled else None
+
+    print(f"=== 🚀 Unified {family} Trainer V31 ({mode.upper()}) ===")
     print(f"[CFG] mode={mode}  horizon={horizon}  input_window={input_window}  valid_days={valid_days}  n_estimators={n_estimators}")
-
-    # 1) DB 로드
-    df = load_latest_db(version)
-    close_col = pick_close_column(df)
-
-    if not pd.api.types.is_datetime64_any_dtype(df["Date"]):
-        df["Date"] = pd.to_datetime(df["Date"])
-
-    max_date = df["Date"].max().date()
-    print(f"[DATA] DB max(Date) = {max_date} | rows={len(df):,}")
+    prof = RunProfiler("train_unified", tags={
+        "family": family, "mode": mode, "horizon": int(horizon), "input_window": int(input_window),
+        "n_estimators": int(n_estimators), "valid_days": int(valid_days), "sample_frac": float(sample_frac),
+    })
+
+    # 1) DB 확인 (Date 컬럼만 읽어 최신일 확인)
+    with prof.stage("load"):
+        db_path = find_latest_db_path(version)
+        db_fp = db_fingerprint(db_path)
+        if prep is not None and prep.get("db_fp") == db_fp:
+            max_date = prep["max_date"]
+        else:
+            max_date = db_max_date(db_path)
+    print(f"[DATA] DB max(Date) = {max_date} | {os.path.basename(db_path)}")
 
     # SKIP 체크
-    base = get_path("HOJ_ENGINE")
-    if os.path.isfile(base):
-        base = os.path.dirname(base)
-    out_dir = os.path.join(base, mode.upper())
-    ensure_dir(out_dir)
-
+    out_dir = ensure_dir(os.path.join(engine_base(family), mode.upper()))
     tag_chk = max_date.strftime("%y%m%d")
-
-    fname_chk = (
-        f"HOJ_ENGINE_{mode.upper()}_V31"
-        f"_h{horizon}"
-        f"_w{input_window}"
-        f"_n{n_estimators}"
-        f"_{tag_chk}.pkl"
-    )
+    fname_chk = engine_filename(family, mode, horizon, input_window, n_estimators, tag_chk)
     path_chk = os.path.join(out_dir, fname_chk)
+    existing = [p for p in (engine_bundle.bundle_path_of(path_chk), path_chk) if os.path.exists(p)]
 
-    if os.path.exists(path_chk):
-        print(f"\n[SKIP] 동일 설정/날짜 엔진 있음: {fname_chk}")
-        return
-
-    # 2) 피처 선택
-    features = select_feature_columns(df)
-    if close_col in features:
-        features = [c for c in features if c != close_col]
-    print(f"[FEAT] 후보 피처 수 = {len(features)}")
-
-    # 3) 마스크
-    df_m, features, max_period = apply_A_mask(df, features, input_window, close_col, horizon)
-    mask_min = df_m["Date"].min().date() if len(df_m) else None
-    mask_max = df_m["Date"].max().date() if len(df_m) else None
-    print(f"[MASK] MaxPeriod={max_period}d | After rows={len(df_m):,} | Date: {mask_min}~{mask_max}")
-
-    df_m = df_m.sort_values(["Code", "Date"], kind="mergesort").reset_index(drop=True)
-    
-    print(f"[HASH] df_m = {df_hash(df_m)}")   # ← 이 한 줄
-    # 4) 분할
+    if existing and save and not sampled:
+        path_chk = existing[0]
+        print(f"\n[SKIP] 동일 설정/날짜 엔진 있음: {os.path.basename(path_chk)}")
+        try:
+            old_meta = engine_bundle.read_header(path_chk).get("meta") or {}
+        except Exception as e:
+            print(f"[SKIP] 기존 엔진 meta 읽기 실패: {e}")
+            old_meta = {}
+        old_metrics = old_meta.get("metrics") or {}
+        return {"mode": mode, "status": "skip", "engine_path": path_chk,
+                "auc": old_metrics.get("auc"), "rmse": old_metrics.get("rmse"),
+                "valid_days": old_meta.get("valid_days"),
+                "best_iteration": old_meta.get("best_iteration"), "features": None,
+                "t_prepare": 0.0, "t_train": 0.0, "sample": None, "prep": prep}
+
+    # 2~3) 피처 선택 + 마스크 (캐시 우선, --mode all 이면 공유 데이터셋 재사용)
+    with prof.stage("prepare") as st:
+        if prep is None or (prep.get("db_fp"), prep.get("horizon"), prep.get("input_window")) != \
+                (db_fp, int(horizon), int(input_window)):
+            prep = prepare_training_set(version, horizon, input_window, use_cache=use_cache, db_path=db_path)
+        close_col = prep["close_col"]
+        fam_prep = family_view(prep, family, sle_path)   # HOJ 는 prep 그대로
+        df_m, features = fam_prep["df_m"], fam_prep["features"]
+        st["rows"] = len(df_m)
+    with prof.stage("bin") as st:
+        st["rows"] = build_lgb_dataset(fam_prep).num_data()
+
+    # 4) 분할 (행 인덱스만, 프레임 복사 없음)
+    #    row_idx: 멀티 호라이즌 prep 에서 이 horizon 의 타겟이 있는 행 (SLE 는 스냅샷이 있는 행)
+    rows = fam_prep.get("row_idx")
     if mode == "research":
-        tr, va, valid_start, valid_end = split_train_valid(df_m, valid_days)
-        tr["is_train"] = True
-        va["is_train"] = False
-        data = pd.concat([tr, va], ignore_index=True)
-        print(f"[SPLIT] Train={len(tr):,}, Valid={len(va):,}")
+        dates = df_m["Date"] if rows is None else df_m["Date"].iloc[rows]
+        tr_idx, va_idx, valid_start, valid_end = split_indices(dates, valid_days)
+        if rows is not None:
+            tr_idx, va_idx = rows[tr_idx], rows[va_idx]
+        print(f"[SPLIT] Train={len(tr_idx):,}, Valid={len(va_idx):,}")
+        if sampled:
+            tr_idx = stratified_sample(fam_prep, tr_idx, sample_frac, sample_seed, sample_by_sign)
+            va_idx = stratified_sample(fam_prep, va_idx, sample_frac, sample_seed + 1, sample_by_sign)
+            print(f"[SAMPLE] frac={sample_frac:g} seed={sample_seed} by_sign={sample_by_sign} "
+                  f"→ Train={len(tr_idx):,}, Valid={len(va_idx):,}")
     else:
-        data = df_m.copy()
-        data["is_train"] = True
-        print(f"[SPLIT] REAL: 전체 {len(data):,} 학습")
-
-    # 5) 학습
-    model_reg, model_cls = train_models(data, features, n_estimators=n_estimators)
-    print("[TRAIN] 모델 학습 완료")
+        tr_idx, va_idx = (np.arange(len(df_m)) if rows is None else rows), None
+        print(f"[SPLIT] REAL: 전체 {len(tr_idx):,} 학습")
+
+    # 5) 학습 (REAL 은 research best_iteration / 가지치기 피처 재사용)
+    tree_source = "n_estimators"
+    ref = None
+    if mode == "real" and ((early_stopping_rounds > 0 and tree_counts is None) or
+                           (prune != "off" and feature_subset is None)):
+        ref = research_reference(horizon, input_window, n_estimators, tag_chk, family)
+    if mode == "real" and early_stopping_rounds > 0:
+        if tree_counts is None and ref:
+            tree_counts = ref["best_iteration"]
+        if tree_counts:
+            tree_source = "research_best_iteration"
+            print(f"[TREES] REAL 트리 수 = research best_iteration {tree_counts}")
+    else:
+        tree_counts = None
+    if feature_subset is None and ref and (ref.get("pruning") or {}).get("selected"):
+        feature_subset = ref["features"]
+        print(f"[PRUNE] REAL 피처 = RESEARCH 선택 목록 {len(feature_subset)}개 ({ref['name']})")
+
+    fit_prep = fam_prep
+    if feature_subset:
+        missing = [f for f in feature_subset if f not in set(features)]
+        if missing:
+            print(f"[PRUNE] DB에 없는 피처 {missing[:5]} → 전체 피처로 학습")
+        elif list(feature_subset) != list(features):
+            features = [f for f in features if f in set(feature_subset)]
+            fit_prep = feature_subset_prep(fam_prep, features)
+
+    ckpt_stem = f"{os.path.splitext(fname_chk)[0]}_{prep['db_fp'][:8]}"
+    if sampled:
+        ckpt_stem += f"_s{sample_frac:g}_{sample_seed}{'_sign' if sample_by_sign else ''}"
+    if fit_prep is not fam_prep:
+        ckpt_stem += f"_f{hashlib.sha1('|'.join(features).encode('utf-8')).hexdigest()[:8]}"
+
+    t1 = time.perf_counter()
+    with prof.stage("train", rows=len(tr_idx)):
+        model_reg, model_cls, train_info = train_models(
+            fit_prep, tr_idx, va_idx, n_estimators=n_estimators, num_threads=num_threads,
+            early_stopping_rounds=early_stopping_rounds if mode == "research" else 0,
+            tree_counts=tree_counts, time_budget_sec=time_budget_sec,
+            checkpoint_stem=ckpt_stem,
+            checkpoint_every=checkpoint_every, head_layout=head_layout,
+        )
+    t2 = time.perf_counter()
+    layout_info = train_info.pop("layout")
+    best_iteration = _reusable_trees(train_info)
+    trees = {h: info["trees"] for h, info in train_info.items()}
+    print(f"[TRAIN] 모델 학습 완료 ({t2 - t1:.1f}s) | trees={trees}")
+    if tree_source == "research_best_iteration":
+        low = {h: n for h, n in trees.items() if n < n_estimators * REAL_TREES_WARN_FRAC}
+        if low:
+            print(f"[WARN] REAL 트리 수 {low} 가 n_estimators={n_estimators} 의 "
+                  f"{REAL_TREES_WARN_FRAC:.0%} 미만 (research 조기 종료 결과, 파일명 n 값과 다름)")
 
     # ============================================================
     # >>> ADD START — 4-1 연구 결과 자동 요약 생성
     # ============================================================
     auto_summary = None
+    auc, rmse = None, None
     if mode == "research":
         try:
-            va_mask = (data["is_train"] == False)
-            X_va = data.loc[va_mask, features]
-            y_va_reg = data.loc[va_mask, "TargetRet"]
-            y_va_cls = data.loc[va_mask, "TargetUp"]
+            X_va = df_m[features].iloc[va_idx]
 
             if len(X_va) > 0:
-                pred_reg = model_reg.predict(X_va)
-                pred_cls = model_cls.predict_proba(X_va)[:, 1]
-
-                rmse = float(np.sqrt(np.mean((pred_reg - y_va_reg)**2)))
-
-                from sklearn.metrics import roc_auc_score
-                auc = float(roc_auc_score(y_va_cls, pred_cls))
-
-                if auc >= 0.55:
-                    stability = "안정적입니다."
-                elif auc >= 0.50:
-                    stability = "보통 수준입니다."
+                with prof.stage("eval", rows=len(X_va)):
+                    auc, rmse = evaluate_heads(model_reg, model_cls, X_va,
+                                               prep["y_reg"][va_idx], prep["y_cls"][va_idx])
+
+                if auc is None:
+                    auto_summary = (
+                        f"단일 클래스 검증셋 → AUC 계산 불가, RMSE {rmse:.4f}.\n"
+                        f"Window={input_window}, Horizon={horizon} 설정은 안정성 판단 보류."
+                    )
                 else:
-                    stability = "불안정합니다."
-
-                auto_summary = (
-                    f"최근 검증 AUC {auc:.3f}, RMSE {rmse:.4f}.\n"
-                    f"Window={input_window}, Horizon={horizon} 설정은 {stability}"
-                )
+                    if auc >= 0.55:
+                        stability = "안정적입니다."
+                    elif auc >= 0.50:
+                        stability = "보통 수준입니다."
+                    else:
+                        stability = "불안정합니다."
+
+                    auto_summary = (
+                        f"최근 검증 AUC {auc:.3f}, RMSE {rmse:.4f}.\n"
+                        f"Window={input_window}, Horizon={horizon} 설정은 {stability}"
+                    )
             else:
                 auto_summary = "검증데이터 부족으로 요약 생성 불가."
 
         except Exception as e:
             auto_summary = f"요약 오류: {e}"
 
+    # 5-1) 피처 가지치기 (research: 전체 피처 결과 기준, real: 사용한 선택 목록 기록)
+    pruning = None
+    if mode == "research" and prune != "off" and fit_prep is fam_prep and rmse is not None:
+        with prof.stage("prune", rows=len(va_idx)):
+            chosen, pruning = prune_features(
+                fam_prep, tr_idx, va_idx, (model_reg, model_cls), {"auc": auc, "rmse": rmse},
+                method=prune, tolerance=prune_tolerance, fracs=prune_fracs,
+                n_estimators=n_estimators, num_threads=num_threads,
+                early_stopping_rounds=early_stopping_rounds, head_layout=head_layout,
+            )
+        if chosen:
+            model_reg, model_cls = chosen["model_reg"], chosen["model_cls"]
+            features, auc, rmse = chosen["features"], chosen["auc"], chosen["rmse"]
+            best_iteration, trees = chosen["best_iteration"], chosen["trees"]
+            auc_txt = f"{auc:.3f}" if auc is not None else "-"
+            auto_summary += (f"\n피처 가지치기({prune}): {len(fam_prep['features'])} → {len(features)}개, "
+                             f"AUC {auc_txt}, RMSE {rmse:.4f}")
+    elif fit_prep is not fam_prep:
+        pruning = {"source": ref["name"] if ref else "feature_subset", "selected": {"n_features": len(features)}}
+
+    if mode == "research":
         print("\n[SUMMARY] 연구 결과 자동 요약")
         print("----------------------------------------")
         print(auto_summary)
@@ -378,6 +1258,7 @@ def run_unified_training(
     # 6) 메타 구성
     meta = {
         "version": "V31",
+        "family": family,
         "data_date": str(max_date),
         "horizon": int(horizon),
         "input_window": int(input_window),
@@ -388,6 +1269,18 @@ def run_unified_training(
         "n_estimators": int(n_estimators),
         # >>> ADD — base_summary 메타 저장
         "base_summary": base_summary,
+        "best_iteration": best_iteration,
+        "trees": trees,
+        "early_stopping_rounds": int(early_stopping_rounds) if mode == "research" else 0,
+        "stopped_by": {h: info["stopped_by"] for h, info in train_info.items()},
+        "tree_source": tree_source,
+        "train_layout": dict(layout_info, head_seconds={h: i["seconds"] for h, i in train_info.items()}),
+        "multi_horizon": prep.get("multi_horizon"),
+        "sample": sample,
+        "metrics": {"auc": auc, "rmse": rmse},
+        "pruning": pruning,
+        # 저장 단계 이전까지의 계측 (저장 포함 전체는 실행 기록 JSONL)
+        "profile": prof.summary(),
     }
 
     payload = {
@@ -397,30 +1290,33 @@ def run_unified_training(
         "meta": meta,
     }
 
-    # 7) 저장
-    save_engine(payload, mode)
+    # 7) 저장 (서브샘플 / save=False 실행은 선별·평가용 → 엔진/설명파일 저장 안 함)
+    if sampled or not save:
+        print(f"[{'SAMPLE' if sampled else 'EVAL'}] 선별/평가용 실행 → 엔진 저장 생략 | AUC={auc} RMSE={rmse}")
+        prof.write({"status": "done", "engine_path": None, "metrics": meta["metrics"], "sample": sample})
+        print("=== 🏁 Done. ===")
+        return {"mode": mode, "status": "done", "engine_path": None,
+                "auc": auc, "rmse": rmse, "best_iteration": best_iteration, "features": features,
+                "t_prepare": round(t1 - t0, 3), "t_train": round(t2 - t1, 3),
+                "sample": sample, "prep": prep}
+
+    with prof.stage("save"):
+        engine_path = save_engine(payload, mode)
+    prof.write({"status": "done", "engine_path": engine_path, "metrics": meta["metrics"]})
 
     # ------------------------------------------------------------
-    # >>> ADD START — 8) HOJ_ENGINE_INFO 설명파일 저장
+    # >>> ADD START — 8) {HOJ|SLE}_ENGINE_INFO 설명파일 저장 (계열별 엔진 루트 아래)
     # ------------------------------------------------------------
     try:
         info_dir = os.path.join(
-            r"F:\autostockG\MODELENGINE\HOJ_ENGINE",
-            "HOJ_ENGINE_INFO"
+            engine_base(family),
+            f"{family}_ENGINE_INFO"
         )
         os.makedirs(info_dir, exist_ok=True)
 
-        engine_filename = (
-            f"HOJ_ENGINE_{mode.upper()}_V31"
-            f"_h{horizon}"
-            f"_w{input_window}"
-            f"_n{n_estimators}"
-            f"_{max_date.strftime('%y%m%d')}.pkl"
-        )
-
         info_path = os.path.join(
             info_dir,
-            engine_filename.replace(".pkl", ".txt")
+            fname_chk.replace(".pkl", ".txt")
         )
 
         with open(info_path, "w", encoding="utf-8") as f:
@@ -435,6 +1331,84 @@ def run_unified_training(
     # ============================================================
 
     print("=== 🏁 Done. ===")
+    return {"mode": mode, "status": "done", "engine_path": engine_path,
+            "auc": auc, "rmse": rmse, "best_iteration": best_iteration, "features": features,
+            "t_prepare": round(t1 - t0, 3),
+            "t_train": round(t2 - t1, 3), "sample": None, "prep": prep}
+
+def run_training_modes(modes: list, horizon: int = 5, input_window: int = 60,
+                       valid_days: int = 365, n_estimators: int = 1000,
+                       version: str = "V31", use_cache: bool = True,
+                       early_stopping_rounds: int = 0, time_budget_sec: float = 0,
+                       checkpoint_every: int = 100, head_layout: str = "auto",
+                       prep: dict = None, sample_frac: float = 1.0, sample_seed: int = 42,
+                       sample_by_sign: bool = False, prune: str = "off",
+                       prune_tolerance: float = 0.002, prune_fracs: tuple = PRUNE_FRACS,
+                       families: tuple = ("HOJ",), sle_path: str = None) -> list:
+    """
+    (계열별) research -> real 순차 실행. 데이터셋(마스크/타겟/바이닝)은 처음 필요할 때 1회만 준비되고
+    이후 모드/계열은 같은 prep 을 재사용한다. research 의 best_iteration 은 real 트리 수로 전달.
+    prune 이 켜져 있으면 research 가 고른 피처 목록도 real 에 전달.
+    sample_frac < 1 이면 research 만 실행 (샘플 best_iteration 은 REAL 에 쓰지 않음).
+    """
+    if sample_frac < 1 and "real" in modes:
+        print("[SAMPLE] 서브샘플 모드 → research 만 실행")
+        modes = [m for m in modes if m != "real"]
+    results = []
+    for family in families:
+        res_fam, prep = _run_family_modes(
+            family, modes, prep, sle_path=sle_path, horizon=horizon, input_window=input_window,
+            valid_days=valid_days, n_estimators=n_estimators, version=version, use_cache=use_cache,
+            early_stopping_rounds=early_stopping_rounds, time_budget_sec=time_budget_sec,
+            checkpoint_every=checkpoint_every, head_layout=head_layout, sample_frac=sample_frac,
+            sample_seed=sample_seed, sample_by_sign=sample_by_sign, prune=prune,
+            prune_tolerance=prune_tolerance, prune_fracs=prune_fracs,
+        )
+        results.extend(res_fam)
+    return results
+
+def _run_family_modes(family: str, modes: list, prep: dict, prune: str = "off", **kw) -> tuple:
+    """한 계열의 research → real. 반환: (결과 목록, 갱신된 공유 prep)"""
+    results, tree_counts, feature_subset = [], None, None
+    for m in modes:
+        res = run_unified_training(
+            mode=m, prep=prep, family=family, prune=prune,
+            tree_counts=tree_counts if m == "real" else None,
+            feature_subset=feature_subset if m == "real" else None, **kw,
+        )
+        if m == "research" and res.get("best_iteration"):
+            tree_counts = res["best_iteration"]
+        if m == "research" and prune != "off" and res.get("features"):
+            feature_subset = res["features"]
+        prep = res.pop("prep", None) or prep
+        results.append(dict(res, family=family))
+        print("-" * 60)
+    return results, prep
+
+def run_multi_horizon(horizons: list, modes: list, input_window: int = 60,
+                      valid_days: int = 365, n_estimators: int = 1000, version: str = "V31",
+                      use_cache: bool = True, **train_kw) -> list:
+    """
+    여러 horizon 엔진을 데이터 준비 1회 + 바이닝 1회로 학습 (horizon 마다 엔진 1개 저장).
+    train_kw: early_stopping_rounds, time_budget_sec, checkpoint_every, head_layout, sample_*, prune*,
+              families, sle_path (계열들이 같은 멀티 호라이즌 prep 공유)
+    """
+    t0 = time.perf_counter()
+    print(f"=== 🚀 Multi-Horizon HOJ Trainer V31 | horizons={horizons} modes={modes} ===")
+    prep = prepare_multi_horizon(horizons, input_window, version, use_cache=use_cache)
+    build_lgb_dataset(prep)
+    print(f"[MULTI] 데이터 준비 + 바이닝 {time.perf_counter() - t0:.1f}s")
+
+    results = []
+    for h in prep["horizons"]:
+        for res in run_training_modes(
+            modes, horizon=h, input_window=input_window, valid_days=valid_days,
+            n_estimators=n_estimators, version=version, use_cache=use_cache,
+            prep=horizon_view(prep, h), **train_kw,
+        ):
+            results.append(dict(res, horizon=h))
+    print(f"[MULTI] 전체 {time.perf_counter() - t0:.1f}s | 엔진 {sum(r['status'] == 'done' for r in results)}개 생성")
+    return results
 
 # ------------------------------------------------------------
 # 6) CLI
@@ -443,28 +1417,76 @@ if __name__ == "__main__":
     ap = argparse.ArgumentParser()
     ap.add_argument("--mode", default="all", choices=["real","research","all"])
     ap.add_argument("--horizon", type=int, default=5)
+    ap.add_argument("--horizons", default=None, help="멀티 호라이즌 (예: 1,3,5,10) → 데이터 준비/바이닝 1회")
     ap.add_argument("--input_window", type=int, default=60)
     ap.add_argument("--valid_days", type=int, default=365)
     ap.add_argument("--n_estimators", type=int, default=1000)
     ap.add_argument("--version", default="V31")
+    ap.add_argument("--no_cache", action="store_true", help="마스크 캐시 미사용 (항상 재계산)")
+    ap.add_argument("--early_stopping", type=int, default=0,
+                    help="research 조기 종료 라운드 (0=끔). 켜면 REAL 도 research best_iteration 트리 수 사용")
+    ap.add_argument("--time_budget", type=float, default=0, help="학습 벽시계 예산(초, 0=무제한)")
+    ap.add_argument("--checkpoint_every", type=int, default=100, help="체크포인트 저장 주기(반복, 0=끔)")
+    ap.add_argument("--sample_frac", type=float, default=1.0,
+                    help="research 고속 모드: Date×Market 층화 샘플 비율 (1=전체, 엔진 저장 안 함)")
+    ap.add_argument("--sample_seed", type=int, default=42)
+    ap.add_argument("--sample_by_sign", action="store_true", help="층에 타겟 부호(상승/하락) 추가")
+    ap.add_argument("--prune", default="off", choices=list(PRUNE_METHODS),
+                    help="research 후 피처 가지치기 순위 (gain | perm=검증셋 순열 | both)")
+    ap.add_argument("--prune_tolerance", type=float, default=0.002, help="가지치기 허용 AUC 하락")
+    ap.add_argument("--prune_fracs", default=",".join(map(str, PRUNE_FRACS)),
+                    help="시도할 상위 피처 비율 (작은 집합부터, 허용오차 안의 첫 집합 채택)")
+    ap.add_argument("--families", default="HOJ", help="엔진 계열 (예: HOJ,SLE → 같은 데이터셋으로 연속 학습)")
+    ap.add_argument("--sle_db", default=None, help="SLE DB 경로 (기본 SLE_DB/REAL 최신 SLE_DB*)")
+    ap.add_argument("--engine_format", default=ENGINE_FORMAT, choices=list(ENGINE_FORMATS),
+                    help="엔진 저장 형식 (bundle=.hoj 헤더+네이티브 모델, pkl=기존 pickle)")
+    ap.add_argument("--head_layout", default="auto", choices=list(HEAD_LAYOUTS),
+                    help="회귀/분류 헤드 배치 (concurrent: 코어 반씩 동시 학습)")
     args = ap.parse_args()
+    ENGINE_FORMAT = args.engine_format
 
     if args.mode == "all":
         modes_to_run = ["research", "real"]
     else:
         modes_to_run = [args.mode]
 
+    train_kw = dict(
+        early_stopping_rounds=args.early_stopping,
+        time_budget_sec=args.time_budget,
+        checkpoint_every=args.checkpoint_every,
+        head_layout=args.head_layout,
+        prune=args.prune,
+        prune_tolerance=args.prune_tolerance,
+        prune_fracs=tuple(float(x) for x in args.prune_fracs.split(",") if x.strip()),
+        families=tuple(x.strip().upper() for x in args.families.split(",") if x.strip()),
+        sle_path=args.sle_db,
+    )
+    sample_kw = dict(sample_frac=args.sample_frac, sample_seed=args.sample_seed,
+                     sample_by_sign=args.sample_by_sign)
+
     try:
-        for m in modes_to_run:
-            run_unified_training(
-                mode=m,
+        if args.horizons:
+            run_multi_horizon(
+                [int(x) for x in args.horizons.split(",") if x.strip()],
+                modes_to_run,
+                input_window=args.input_window,
+                valid_days=args.valid_days,
+                n_estimators=args.n_estimators,
+                version=args.version,
+                use_cache=not args.no_cache,
+                **train_kw, **sample_kw,
+            )
+        else:
+            run_training_modes(
+                modes_to_run,
                 horizon=args.horizon,
                 input_window=args.input_window,
                 valid_days=args.valid_days,
                 n_estimators=args.n_estimators,
                 version=args.version,
+                use_cache=not args.no_cache,
+                **train_kw, **sample_kw,
             )
-            print("-" * 60)
 
     except Exception as e:
         print(f"\n❌ [Error] {e}")
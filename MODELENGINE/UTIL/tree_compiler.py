@@ -0,0 +1,222 @@
+# ============================================================
+# tree_compiler.py
+#  - 엔진의 LightGBM 부스터 → 연속 NumPy 배열 (노드별 피처 번호 / 임계값 / 좌우 자식 / 리프 값)
+#    로 평탄화하고, 전체 트리를 행 방향으로 벡터 평가 (sklearn 래퍼 / pandas 호출 오버헤드 제거)
+#      cm = compile_model(payload["model_reg"])
+#      cm.predict(X)                          # X: ndarray (n, f) 또는 DataFrame (엔진 피처 순서로 선택)
+#      ce = compile_engine(payload)           # {"model_reg": CompiledModel, "model_cls": CompiledModel}
+#      ce["model_cls"].predict_proba(X)[:, 1]
+#  - 분기 규칙은 LightGBM NumericalDecision 과 동일
+#      missing_type None : NaN → 0.0 으로 보고 비교
+#      missing_type Zero : |x| <= 1e-35 (또는 NaN) 이면 default_left 방향
+#      missing_type NaN  : NaN 이면 default_left 방향
+#      그 외 x <= threshold → 왼쪽
+#  - 트리 수: best_iteration 이 있으면 그 수까지만 (래퍼 predict 와 같은 기본값)
+#  - 목적함수: regression 계열 = 원점수 합, binary = sigmoid(k × 합)
+#  - numba 가 있으면 행 × 트리 루프를 njit 으로 (engine="numba"), 없으면 NumPy 벡터 경로
+#    engine="auto": numba → 없으면 소배치(<= AUTO_NUMPY_MAX_ROWS)는 NumPy, 대배치는 LightGBM 원본(C++ 멀티스레드)
+#  - 범주형 분기 / 다중 클래스 / rf(average_output) 는 미지원 → NotImplementedError (호출 측은 기존 predict)
+#  - 검증/벤치: MODELENGINE/verify_tree_compiler.py
+# ============================================================
+
+import numpy as np
+import pandas as pd
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+MISSING_CODES = {"None": 0, "Zero": 1, "NaN": 2}
+ZERO_THRESHOLD = 1e-35
+AUTO_NUMPY_MAX_ROWS = 32
+
+# ------------------------------------------------------------
+# 1) 부스터 → 배열
+# ------------------------------------------------------------
+def _booster_and_iteration(model):
+    """엔진 모델(BoosterRegressor / sklearn LGBM* / lgb.Booster) → (Booster, 사용할 트리 수 or None)."""
+    booster = model.booster_ if hasattr(model, "booster_") else model
+    best = getattr(model, "best_iteration_", None)
+    return booster, (int(best) if best else None)
+
+def _flatten_tree(node: dict, out: dict) -> int:
+    """트리 1개를 전위 순회로 out 배열에 추가. 반환: 이 노드의 전역 번호."""
+    idx = len(out["feature"])
+    for k in ("feature", "threshold", "left", "right", "default_left", "missing", "value"):
+        out[k].append(0)
+    if "leaf_value" in node:
+        out["feature"][idx] = -1
+        out["value"][idx] = float(node["leaf_value"])
+        out["left"][idx] = out["right"][idx] = idx
+        return idx
+    if node.get("decision_type", "<=") != "<=":
+        raise NotImplementedError(f"범주형 분기 미지원 (decision_type={node.get('decision_type')})")
+    out["feature"][idx] = int(node["split_feature"])
+    out["threshold"][idx] = float(node["threshold"])
+    out["default_left"][idx] = bool(node["default_left"])
+    out["missing"][idx] = MISSING_CODES[node.get("missing_type", "None")]
+    out["left"][idx] = _flatten_tree(node["left_child"], out)
+    out["right"][idx] = _flatten_tree(node["right_child"], out)
+    return idx
+
+def _depth(node: dict) -> int:
+    if "leaf_value" in node:
+        return 0
+    return 1 + max(_depth(node["left_child"]), _depth(node["right_child"]))
+
+
+class CompiledModel:
+    """
+    평탄화된 트리 앙상블. 노드 배열은 모든 트리를 이어 붙인 것이고 roots[t] 가 트리 t 의 시작.
+    리프는 feature = -1, left = right = 자기 자신 (고정 깊이 반복 시 제자리).
+    """
+
+    def __init__(self, model):
+        booster, num_iteration = _booster_and_iteration(model)
+        self._booster, self._num_iteration = booster, num_iteration
+        dump = booster.dump_model(num_iteration=num_iteration)
+        if dump.get("num_class", 1) != 1 or dump.get("num_tree_per_iteration", 1) != 1:
+            raise NotImplementedError("다중 클래스 부스터 미지원")
+        if dump.get("average_output"):
+            raise NotImplementedError("rf(average_output) 부스터 미지원")
+        obj = str(dump.get("objective", "regression")).split()
+        self.objective = obj[0]
+        self.sigmoid = 1.0
+        for tok in obj[1:]:
+            if tok.startswith("sigmoid:"):
+                self.sigmoid = float(tok.split(":", 1)[1])
+        self.feature_names = list(dump.get("feature_names") or [])
+
+        out = {k: [] for k in ("feature", "threshold", "left", "right", "default_left", "missing", "value")}
+        roots, depth = [], 0
+        for t in dump["tree_info"]:
+            roots.append(_flatten_tree(t["tree_structure"], out))
+            depth = max(depth, _depth(t["tree_structure"]))
+        self.feature = np.asarray(out["feature"], dtype=np.int32)
+        self.threshold = np.asarray(out["threshold"], dtype=np.float64)
+        self.left = np.asarray(out["left"], dtype=np.int32)
+        self.right = np.asarray(out["right"], dtype=np.int32)
+        self.default_left = np.asarray(out["default_left"], dtype=np.bool_)
+        self.missing = np.asarray(out["missing"], dtype=np.int8)
+        self.value = np.asarray(out["value"], dtype=np.float64)
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.max_depth = depth
+        # NaN 입력의 방향은 노드마다 고정: NaN/Zero 는 default_left, None 은 0.0 으로 비교
+        self._nan_left = np.where(self.missing == 0, 0.0 <= self.threshold, self.default_left)
+        self._zero_node = self.missing == 1
+        self._has_zero = bool(self._zero_node.any())
+
+    # --- 정보 ---
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.feature)
+
+    def __repr__(self):
+        return (f"CompiledModel(objective={self.objective}, trees={self.n_trees}, "
+                f"nodes={self.n_nodes}, depth={self.max_depth}, features={len(self.feature_names)})")
+
+    # --- 입력 ---
+    def _matrix(self, X) -> np.ndarray:
+        if isinstance(X, pd.DataFrame):
+            cols = self.feature_names if set(self.feature_names) <= set(X.columns) else list(X.columns)
+            X = X[cols].to_numpy(dtype=np.float64)
+        X = np.asarray(X, dtype=np.float64)
+        return X.reshape(1, -1) if X.ndim == 1 else X
+
+    # --- 평가 ---
+    def raw_score(self, X, engine: str = "auto") -> np.ndarray:
+        """트리 출력 합 (변환 전). engine: auto | numpy | numba | lgb"""
+        X = self._matrix(X)
+        if engine == "auto":
+            engine = "numba" if numba is not None else ("numpy" if len(X) <= AUTO_NUMPY_MAX_ROWS else "lgb")
+        if engine == "lgb":
+            return self._booster.predict(X, num_iteration=self._num_iteration, raw_score=True)
+        if engine == "numba":
+            if numba is None:
+                raise ImportError("numba 미설치")
+            return _raw_score_numba(X, self.feature, self.threshold, self.left, self.right,
+                                    self.default_left, self.missing, self.value, self.roots)
+        return self._raw_score_numpy(X)
+
+    def _raw_score_numpy(self, X: np.ndarray) -> np.ndarray:
+        """
+        (행 × 트리) 위치를 1차원으로 펴고, 아직 리프에 닿지 않은 위치만 남겨 한 단계씩 내려감.
+        깊이가 깊어질수록 활성 위치가 줄어 얕은 경로가 많은 트리에서 연산량이 작다.
+        """
+        n, nf = X.shape
+        T = self.n_trees
+        node = np.tile(self.roots, n)
+        row_off = np.repeat(np.arange(n, dtype=np.int64) * nf, T)
+        Xf = np.ascontiguousarray(X).ravel()
+        active = np.flatnonzero(self.feature[node] >= 0)
+        while active.size:
+            nd = node[active]
+            x = Xf[row_off[active] + self.feature[nd]]
+            go_left = x <= self.threshold[nd]
+            nan = np.isnan(x)
+            if nan.any():
+                go_left[nan] = self._nan_left[nd[nan]]
+            if self._has_zero:
+                z = self._zero_node[nd] & (np.abs(x) <= ZERO_THRESHOLD)
+                if z.any():
+                    go_left[z] = self.default_left[nd[z]]
+            nxt = np.where(go_left, self.left[nd], self.right[nd])
+            node[active] = nxt
+            active = active[self.feature[nxt] >= 0]
+        return self.value[node].reshape(n, T).sum(axis=1)
+
+    def predict(self, X, engine: str = "auto") -> np.ndarray:
+        raw = self.raw_score(X, engine)
+        if self.objective in ("binary", "cross_entropy", "xentropy"):
+            return 1.0 / (1.0 + np.exp(-self.sigmoid * raw))
+        return raw
+
+    def predict_proba(self, X, engine: str = "auto") -> np.ndarray:
+        p = self.predict(X, engine)
+        return np.column_stack([1.0 - p, p])
+
+
+if numba is not None:
+    @numba.njit(cache=True, parallel=True)
+    def _raw_score_numba(X, feature, threshold, left, right, default_left, missing, value, roots):
+        n = X.shape[0]
+        out = np.zeros(n)
+        for i in numba.prange(n):
+            acc = 0.0
+            for t in range(roots.shape[0]):
+                node = roots[t]
+                while feature[node] >= 0:
+                    x = X[i, feature[node]]
+                    m = missing[node]
+                    if np.isnan(x) and m != 2:
+                        x = 0.0
+                    if (m == 1 and abs(x) <= ZERO_THRESHOLD) or (m == 2 and np.isnan(x)):
+                        node = left[node] if default_left[node] else right[node]
+                    elif x <= threshold[node]:
+                        node = left[node]
+                    else:
+                        node = right[node]
+                acc += value[node]
+            out[i] = acc
+        return out
+else:
+    _raw_score_numba = None
+
+# ------------------------------------------------------------
+# 2) 엔진 단위
+# ------------------------------------------------------------
+def compile_model(model) -> CompiledModel:
+    return CompiledModel(model)
+
+def compile_engine(payload) -> dict:
+    """엔진 payload → {"model_reg", "model_cls", "features"} (없는 모델은 None)."""
+    out = {"features": list(payload.get("features") or [])}
+    for key in ("model_reg", "model_cls"):
+        m = payload.get(key)
+        out[key] = CompiledModel(m) if m is not None else None
+    return out
@@ -0,0 +1,329 @@
+# ============================================================
+# walkforward.py
+#  - REAL 엔진 워크포워드 갱신: 전일 엔진에서 이어서 부스팅 (LightGBM init_model)
+#      append       : 기존 트리 유지 + 최근 window 로 new_trees 개 추가
+#      replace_tail : 마지막 new_trees 개 트리를 버리고 최근 window 로 다시 학습 (트리 수 유지)
+#  - 주기적 전체 재학습: 마지막 전체 학습 이후 full_every 회 갱신되면 run_unified_training(mode="real")
+#  - rolling-origin 평가: 과거 기준일마다 (전체 재학습 vs 워크포워드 갱신) AUC/RMSE/시간 비교
+#  - 엔진 파일명/폴더는 기존 REAL 규칙 그대로 (daily_recommender 등 기존 소비 측 변경 없음)
+#
+#  사용 예)
+#    python walkforward.py update --horizon 5 --input_window 60 --new_trees 50
+#    python walkforward.py eval   --horizon 5 --input_window 60 --origins 6 --step 20
+# ============================================================
+
+import os
+import sys
+import time
+import argparse
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import lightgbm as lgb
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+modelengine_dir = os.path.dirname(current_dir)
+root_dir = os.path.dirname(modelengine_dir)
+sys.path.extend([root_dir, modelengine_dir])
+
+try:
+    from MODELENGINE.UTIL import train_engine_unified as T
+    from MODELENGINE.UTIL.engine_models import BoosterRegressor, BoosterClassifier
+    from MODELENGINE.UTIL.lgb_cache import BIN_PARAMS, train_head
+    from MODELENGINE.UTIL.profiling import RunProfiler
+except ImportError:
+    import train_engine_unified as T
+    from engine_models import BoosterRegressor, BoosterClassifier
+    from lgb_cache import BIN_PARAMS, train_head
+    from profiling import RunProfiler
+
+STRATEGIES = ("append", "replace_tail")
+
+# ------------------------------------------------------------
+# 1) 부스터 유틸
+# ------------------------------------------------------------
+def booster_of(model) -> lgb.Booster:
+    """엔진 모델(BoosterRegressor / 구버전 sklearn LGBM*) → lgb.Booster."""
+    return model.booster_ if hasattr(model, "booster_") else model
+
+def params_of(model, default: dict) -> dict:
+    p = getattr(model, "params_", None)
+    return dict(p) if p else dict(default)
+
+def drop_tail_trees(booster: lgb.Booster, k: int) -> lgb.Booster:
+    """마지막 k 회 반복분 트리를 제거한 새 Booster."""
+    keep = max(booster.current_iteration() - int(k), 0)
+    return lgb.Booster(model_str=booster.model_to_string(num_iteration=keep))
+
+def warm_start_booster(prev: lgb.Booster, params: dict, X: pd.DataFrame, y: np.ndarray,
+                       new_trees: int, strategy: str = "append", num_threads: int = 0) -> lgb.Booster:
+    """
+    prev 에서 이어서 new_trees 회 부스팅.
+    init_model 은 window 행의 초기 점수를 prev 예측으로 채우므로 raw 데이터가 필요 → window 만 별도 Dataset.
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"strategy 는 {STRATEGIES} 중 하나: {strategy}")
+    init = drop_tail_trees(prev, new_trees) if strategy == "replace_tail" else prev
+    ds = lgb.Dataset(X, label=np.asarray(y, dtype="float64"), params=dict(BIN_PARAMS), free_raw_data=False)
+    return lgb.train(dict(params, num_threads=int(num_threads)), ds,
+                     num_boost_round=int(new_trees), init_model=init)
+
+def window_index(dates: pd.Series, end_date, window_days: int) -> np.ndarray:
+    """end_date 이하, 최근 window_days(달력일) 행 위치."""
+    end_date = pd.Timestamp(end_date)
+    start = end_date - timedelta(days=int(window_days))
+    d = dates.to_numpy()
+    return np.flatnonzero((d > np.datetime64(start)) & (d <= np.datetime64(end_date)))
+
+# ------------------------------------------------------------
+# 2) 엔진 탐색
+# ------------------------------------------------------------
+def real_engine_dir() -> str:
+    base = T.get_path("HOJ_ENGINE")
+    if os.path.isfile(base):
+        base = os.path.dirname(base)
+    return os.path.join(base, "REAL")
+
+def find_previous_engine(horizon: int, input_window: int, n_estimators: int, before_tag: str):
+    """before_tag(yymmdd) 이전의 같은 설정 REAL 엔진 중 최신 경로 (엔진 색인 조회)."""
+    out_dir = real_engine_dir()
+    if not os.path.isdir(out_dir):
+        return None
+    e = T.engine_registry.latest_engine(
+        "REAL", horizon, input_window, n_estimators,
+        before=datetime.strptime(before_tag, "%y%m%d").date(), base=os.path.dirname(out_dir),
+    )
+    return e["path"] if e else None
+
+# ------------------------------------------------------------
+# 3) 일일 갱신
+# ------------------------------------------------------------
+def walkforward_update(horizon: int = 5, input_window: int = 60, n_estimators: int = 1000,
+                       version: str = "V31", new_trees: int = 50, window_days: int = 120,
+                       strategy: str = "append", full_every: int = 20,
+                       force_full: bool = False, num_threads: int = 0) -> dict:
+    """
+    오늘자 REAL 엔진 생성. 전일 엔진이 있고 갱신 횟수가 full_every 미만이면 warm-start,
+    아니면 전체 재학습(run_unified_training). 반환: {"status", "kind", "engine_path", "elapsed"}
+    """
+    t0 = time.perf_counter()
+    print(f"=== 🔁 HOJ Walk-Forward (REAL) h={horizon} w={input_window} ===")
+
+    db_path = T.find_latest_db_path(version)
+    max_date = T.db_max_date(db_path)
+    tag = max_date.strftime("%y%m%d")
+    target = os.path.join(
+        real_engine_dir(), f"HOJ_ENGINE_REAL_V31_h{horizon}_w{input_window}_n{n_estimators}_{tag}.pkl"
+    )
+    existing = [p for p in (T.engine_bundle.bundle_path_of(target), target) if os.path.exists(p)]
+    if existing:
+        target = existing[0]
+        print(f"[SKIP] 오늘자 REAL 엔진 있음: {os.path.basename(target)}")
+        return {"status": "skip", "kind": None, "engine_path": target, "elapsed": 0.0}
+
+    prev_path = None if force_full else find_previous_engine(horizon, input_window, n_estimators, tag)
+    prev = None
+    if prev_path:
+        prev = T.engine_bundle.load_engine(prev_path)
+        wf = prev.get("meta", {}).get("walkforward", {})
+        if int(wf.get("updates", 0)) >= int(full_every):
+            print(f"[WF] 갱신 {wf.get('updates')}회 누적 → 전체 재학습 주기")
+            prev = None
+
+    if prev is None:
+        print("[WF] 전체 재학습 (run_unified_training)")
+        res = T.run_unified_training(
+            mode="real", horizon=horizon, input_window=input_window,
+            n_estimators=n_estimators, version=version, num_threads=num_threads,
+        )
+        res.pop("prep", None)
+        elapsed = round(time.perf_counter() - t0, 3)
+        print(f"[WF] 전체 재학습 완료 ({elapsed}s)")
+        return {"status": res["status"], "kind": "full", "engine_path": res["engine_path"], "elapsed": elapsed}
+
+    print(f"[WF] 이전 엔진: {os.path.basename(prev_path)} → {strategy} +{new_trees} trees (window {window_days}d)")
+    prof = RunProfiler("walkforward_update", tags={
+        "horizon": int(horizon), "input_window": int(input_window), "n_estimators": int(n_estimators),
+        "strategy": strategy, "new_trees": int(new_trees), "window_days": int(window_days),
+    })
+    with prof.stage("prepare") as st:
+        prep = T.prepare_training_set(version, horizon, input_window, db_path=db_path)
+        st["rows"] = len(prep["df_m"])
+    df_m, features = prep["df_m"], prep["features"]
+    if list(features) != list(prev["features"]):
+        print("[WF] 피처 구성이 이전 엔진과 다름 → 전체 재학습")
+        return walkforward_update(horizon, input_window, n_estimators, version, new_trees,
+                                  window_days, strategy, full_every, True, num_threads)
+
+    idx = window_index(df_m["Date"], df_m["Date"].max(), window_days)
+    X_win = df_m[features].iloc[idx]
+    print(f"[WF] window rows={len(idx):,}")
+
+    with prof.stage("train", rows=len(idx)):
+        b_reg = warm_start_booster(booster_of(prev["model_reg"]), params_of(prev["model_reg"], T.REG_PARAMS),
+                                   X_win, prep["y_reg"][idx], new_trees, strategy, num_threads)
+        b_cls = warm_start_booster(booster_of(prev["model_cls"]), params_of(prev["model_cls"], T.CLS_PARAMS),
+                                   X_win, prep["y_cls"][idx], new_trees, strategy, num_threads)
+
+    prev_meta = dict(prev.get("meta", {}))
+    wf = dict(prev_meta.get("walkforward", {}))
+    # 설정/피처 메타는 이전 엔진 그대로, 학습 결과 메타는 이번 갱신 기준으로 다시 씀
+    #  (트리 수 = 실제 부스터 반복 수, 검증 없는 갱신이라 best_iteration / metrics 없음)
+    meta = {k: v for k, v in prev_meta.items() if k != "train_layout"}
+    meta.update({
+        "data_date": str(max_date),
+        "trained_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "trees": {"reg": int(b_reg.current_iteration()), "cls": int(b_cls.current_iteration())},
+        "best_iteration": None,
+        "stopped_by": {"reg": "full", "cls": "full"},
+        "tree_source": "walkforward",
+        "metrics": {"auc": None, "rmse": None},
+        "profile": prof.summary(),
+        "walkforward": {
+            "base_full_date": wf.get("base_full_date", prev_meta.get("data_date")),
+            "updates": int(wf.get("updates", 0)) + 1,
+            "strategy": strategy,
+            "new_trees": int(new_trees),
+            "window_days": int(window_days),
+            "prev_engine": os.path.basename(prev_path),
+        },
+    })
+    payload = {
+        "model_reg": BoosterRegressor(b_reg, params=params_of(prev["model_reg"], T.REG_PARAMS)),
+        "model_cls": BoosterClassifier(b_cls, params=params_of(prev["model_cls"], T.CLS_PARAMS)),
+        "features": list(features),
+        "meta": meta,
+    }
+    with prof.stage("save"):
+        path = T.save_engine(payload, "real")
+    prof.write({"status": "done", "engine_path": path, "trees": meta["trees"]})
+    elapsed = round(time.perf_counter() - t0, 3)
+    print(f"[WF] warm-start 완료: trees={meta['trees']} | 갱신 {meta['walkforward']['updates']}회 ({elapsed}s)")
+    return {"status": "done", "kind": "warm", "engine_path": path, "elapsed": elapsed}
+
+# ------------------------------------------------------------
+# 4) rolling-origin 평가 (전체 재학습 vs 워크포워드)
+# ------------------------------------------------------------
+def _scores(b_reg, b_cls, X, y_reg, y_cls):
+    from sklearn.metrics import roc_auc_score
+    rmse = float(np.sqrt(np.mean((b_reg.predict(X) - y_reg) ** 2)))
+    try:
+        auc = float(roc_auc_score(y_cls, b_cls.predict(X)))
+    except ValueError:
+        auc = float("nan")
+    return auc, rmse
+
+def rolling_origin_eval(horizon: int = 5, input_window: int = 60, n_estimators: int = 1000,
+                        version: str = "V31", origins: int = 6, step: int = 20,
+                        new_trees: int = 50, window_days: int = 120, strategy: str = "append",
+                        num_threads: int = 0, save: bool = True) -> pd.DataFrame:
+    """
+    최근 origins 개 기준일(step 거래일 간격)마다
+      full: 기준일까지 알려진 타겟(기준일-h 거래일 이전)으로 처음부터 학습
+      warm: 첫 기준일은 full 과 동일, 이후는 직전 warm 모델에서 이어서 부스팅
+    다음 step 거래일 구간에서 두 모델의 AUC/RMSE 와 학습 시간을 비교.
+    """
+    prep = T.prepare_training_set(version, horizon, input_window)
+    full = T.build_lgb_dataset(prep)
+    df_m, features = prep["df_m"], prep["features"]
+    dates = df_m["Date"]
+    uniq = np.sort(dates.unique())
+    d = dates.to_numpy()
+
+    ks = [len(uniq) - (origins - i) * step for i in range(origins)]
+    if ks[0] <= horizon + 1:
+        raise ValueError("기준일 수/간격이 데이터 기간보다 큽니다.")
+
+    p_reg = dict(T.REG_PARAMS, num_threads=int(num_threads))
+    p_cls = dict(T.CLS_PARAMS, num_threads=int(num_threads))
+
+    rows, warm_reg, warm_cls = [], None, None
+    for i, k in enumerate(ks):
+        train_end = uniq[k - horizon - 1]
+        tr_idx = np.flatnonzero(d <= train_end)
+        ev_mask = d >= uniq[k]
+        if k + step < len(uniq):
+            ev_mask &= d < uniq[k + step]
+        ev_idx = np.flatnonzero(ev_mask)
+        if len(ev_idx) == 0:
+            continue
+        X_ev = df_m[features].iloc[ev_idx]
+        y_reg_ev, y_cls_ev = prep["y_reg"][ev_idx], prep["y_cls"][ev_idx]
+
+        t = time.perf_counter()
+        f_reg = train_head(p_reg, full, prep["y_reg"], tr_idx, num_boost_round=n_estimators)
+        f_cls = train_head(p_cls, full, prep["y_cls"], tr_idx, num_boost_round=n_estimators)
+        t_full = time.perf_counter() - t
+
+        t = time.perf_counter()
+        if warm_reg is None:
+            warm_reg, warm_cls = f_reg, f_cls
+            t_warm = t_full
+        else:
+            w_idx = window_index(dates, train_end, window_days)
+            X_w = df_m[features].iloc[w_idx]
+            warm_reg = warm_start_booster(warm_reg, p_reg, X_w, prep["y_reg"][w_idx], new_trees, strategy, num_threads)
+            warm_cls = warm_start_booster(warm_cls, p_cls, X_w, prep["y_cls"][w_idx], new_trees, strategy, num_threads)
+            t_warm = time.perf_counter() - t
+
+        auc_f, rmse_f = _scores(f_reg, f_cls, X_ev, y_reg_ev, y_cls_ev)
+        auc_w, rmse_w = _scores(warm_reg, warm_cls, X_ev, y_reg_ev, y_cls_ev)
+        rows.append({
+            "origin": pd.Timestamp(uniq[k]).date(), "train_end": pd.Timestamp(train_end).date(),
+            "n_eval": len(ev_idx), "auc_full": auc_f, "auc_warm": auc_w,
+            "rmse_full": rmse_f, "rmse_warm": rmse_w,
+            "t_full": round(t_full, 3), "t_warm": round(t_warm, 3),
+            "warm_trees": int(warm_reg.current_iteration()),
+        })
+        r = rows[-1]
+        print(f"[EVAL] {r['origin']} | AUC full={auc_f:.4f} warm={auc_w:.4f} | "
+              f"t full={r['t_full']}s warm={r['t_warm']}s")
+
+    res = pd.DataFrame(rows)
+    if not res.empty:
+        upd = res.iloc[1:] if len(res) > 1 else res
+        print("----------------------------------------")
+        print(f"[EVAL] 평균 AUC 차이(warm-full) = {(upd['auc_warm'] - upd['auc_full']).mean():+.4f}")
+        print(f"[EVAL] 평균 RMSE 차이(warm-full) = {(upd['rmse_warm'] - upd['rmse_full']).mean():+.5f}")
+        print(f"[EVAL] 학습 시간 full={upd['t_full'].mean():.2f}s / warm={upd['t_warm'].mean():.2f}s")
+        if save:
+            out_dir = T.ensure_dir(os.path.join(T.get_path("OUTPUT"), "WALKFORWARD"))
+            out = os.path.join(out_dir, f"rolling_eval_h{horizon}_w{input_window}_{strategy}_"
+                                        f"{prep['max_date'].strftime('%y%m%d')}.csv")
+            res.to_csv(out, index=False, encoding="utf-8-sig")
+            print(f"[EVAL] 저장: {out}")
+    return res
+
+# ------------------------------------------------------------
+# 5) CLI
+# ------------------------------------------------------------
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("cmd", nargs="?", default="update", choices=["update", "eval"])
+    ap.add_argument("--horizon", type=int, default=5)
+    ap.add_argument("--input_window", type=int, default=60)
+    ap.add_argument("--n_estimators", type=int, default=1000)
+    ap.add_argument("--version", default="V31")
+    ap.add_argument("--new_trees", type=int, default=50)
+    ap.add_argument("--window_days", type=int, default=120, help="warm-start 학습 구간(달력일)")
+    ap.add_argument("--strategy", default="append", choices=list(STRATEGIES))
+    ap.add_argument("--full_every", type=int, default=20, help="이 횟수만큼 갱신 후 전체 재학습")
+    ap.add_argument("--full", action="store_true", help="전체 재학습 강제")
+    ap.add_argument("--origins", type=int, default=6)
+    ap.add_argument("--step", type=int, default=20, help="기준일 간격(거래일)")
+    ap.add_argument("--num_threads", type=int, default=0)
+    args = ap.parse_args()
+
+    if args.cmd == "update":
+        walkforward_update(
+            args.horizon, args.input_window, args.n_estimators, args.version,
+            new_trees=args.new_trees, window_days=args.window_days, strategy=args.strategy,
+            full_every=args.full_every, force_full=args.full, num_threads=args.num_threads,
+        )
+    else:
+        rolling_origin_eval(
+            args.horizon, args.input_window, args.n_estimators, args.version,
+            origins=args.origins, step=args.step, new_trees=args.new_trees,
+            window_days=args.window_days, strategy=args.strategy, num_threads=args.num_threads,
+        )
@@ -1,7 +1,10 @@
-import pickle
 import sys
 import os
 
+# 엔진 pkl 의 모델 래퍼(MODELENGINE.UTIL.engine_models) unpickle 용
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from MODELENGINE.UTIL.engine_bundle import load_engine
+
 def inspect_engine(file_path):
     if not os.path.exists(file_path):
         print(f"❌ 오류: 파일을 찾을 수 없습니다 -> {file_path}")
@@ -11,8 +14,7 @@ def inspect_engine(file_path):
     print("="*60)
     
     try:
-        with open(file_path, 'rb') as f:
-            data = pickle.load(f)
+        data = load_engine(file_path)  # .pkl / .hoj 번들 모두
         
         # 1. 저장된 키(Keys) 확인
         keys = list(data.keys()) if isinstance(data, dict) else "Not a dict"
@@ -0,0 +1,178 @@
+# ============================================================
+# verify_tree_compiler.py
+#  - UTIL/tree_compiler.py 검증
+#    [Check 1] 정합성: 합성 데이터(NaN / 0 / 음수 포함)로 학습한 회귀·분류 부스터
+#              LightGBM 출력 vs 컴파일 출력 (허용 오차 1e-9)
+#              missing_type None / Zero / NaN, best_iteration 절단, sklearn 래퍼 포함
+#    [Check 2] 실제 엔진(--engine)이 있으면 DB 최신일 전 종목으로 같은 비교
+#    [Check 3] 지연시간: 배치 1 / 100 / 3,500 행 (래퍼 predict vs NumPy vs numba vs auto)
+#
+#  사용 예)
+#    python verify_tree_compiler.py
+#    python verify_tree_compiler.py --engine F:\...\HOJ_ENGINE_REAL_V31_h5_w60_n1000_251126.hoj
+# ============================================================
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+import lightgbm as lgb
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(current_dir)
+sys.path.extend([root_dir, current_dir])
+
+try:
+    from MODELENGINE.UTIL import tree_compiler as TC
+    from MODELENGINE.UTIL import engine_bundle
+    from MODELENGINE.UTIL.engine_models import BoosterRegressor, BoosterClassifier
+except ImportError:
+    from UTIL import tree_compiler as TC
+    from UTIL import engine_bundle
+    from UTIL.engine_models import BoosterRegressor, BoosterClassifier
+
+TOL = 1e-9
+BATCHES = (1, 100, 3500)
+FAILS = []
+
+
+def check(name: str, expected, got):
+    err = float(np.max(np.abs(np.asarray(expected) - np.asarray(got)))) if len(expected) else 0.0
+    ok = err <= TOL
+    print(f"   [{'Pass' if ok else 'FAIL'}] {name:<40} max|diff|={err:.2e}")
+    if not ok:
+        FAILS.append(name)
+
+
+def synthetic(n: int = 6000, f: int = 12, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, f))
+    X[rng.random((n, f)) < 0.05] = np.nan          # 결측
+    X[:, 1] = np.where(rng.random(n) < 0.3, 0.0, X[:, 1])   # 0 이 많은 컬럼 (Zero missing 유도)
+    X[:, 2] = np.round(X[:, 2], 1)
+    y = np.nan_to_num(X[:, 0]) * 0.02 + np.nan_to_num(X[:, 1]) * 0.01 + rng.normal(0, 0.02, n)
+    cols = [f"F{i}" for i in range(f)]
+    return pd.DataFrame(X, columns=cols), y
+
+
+def train_models(df: pd.DataFrame, y: np.ndarray, zero_as_missing: bool, use_missing: bool = True):
+    params = {"verbose": -1, "num_leaves": 31, "learning_rate": 0.05, "min_data_in_leaf": 20,
+              "zero_as_missing": zero_as_missing, "use_missing": use_missing, "seed": 0}
+    reg = lgb.train(dict(params, objective="regression"), lgb.Dataset(df, label=y), 150)
+    cls = lgb.train(dict(params, objective="binary"), lgb.Dataset(df, label=(y > 0).astype(int)), 150)
+    return reg, cls
+
+
+def check_parity():
+    print("\n[Check 1] 정합성 (합성 데이터)")
+    df, y = synthetic()
+    X = df.to_numpy()
+    for label, kw in (("missing=NaN", {"zero_as_missing": False}),
+                      ("missing=Zero", {"zero_as_missing": True}),
+                      ("missing=None", {"zero_as_missing": False, "use_missing": False})):
+        reg, cls = train_models(df, y, **kw)
+        for wrap_name, model, kind in (
+                ("BoosterRegressor", BoosterRegressor(reg), "reg"),
+                ("BoosterRegressor(best_iter=60)", BoosterRegressor(reg, best_iteration=60), "reg"),
+                ("BoosterClassifier", BoosterClassifier(cls), "cls"),
+                ("BoosterClassifier(best_iter=40)", BoosterClassifier(cls, best_iteration=40), "cls")):
+            cm = TC.compile_model(model)
+            if kind == "reg":
+                expected = model.predict(df)
+                check(f"{label} {wrap_name} numpy", expected, cm.predict(X, engine="numpy"))
+                if TC.numba is not None:
+                    check(f"{label} {wrap_name} numba", expected, cm.predict(X, engine="numba"))
+            else:
+                expected = model.predict_proba(df)[:, 1]
+                check(f"{label} {wrap_name} numpy", expected, cm.predict_proba(X, engine="numpy")[:, 1])
+                if TC.numba is not None:
+                    check(f"{label} {wrap_name} numba", expected, cm.predict_proba(X, engine="numba")[:, 1])
+    # sklearn 래퍼 (구버전 엔진 pkl 형식)
+    sk = lgb.LGBMRegressor(n_estimators=80, num_leaves=15, verbose=-1).fit(df, y)
+    check("LGBMRegressor (sklearn)", sk.predict(df), TC.compile_model(sk).predict(df, engine="numpy"))
+    # 단일 행 / DataFrame 열 순서가 달라도 엔진 피처 순서로 선택
+    cm = TC.compile_model(BoosterRegressor(reg))
+    check("DataFrame 열 순서 뒤섞기", reg.predict(df), cm.predict(df[df.columns[::-1]], engine="numpy"))
+    check("단일 행 (1차원 입력)", reg.predict(X[:1]), cm.predict(X[0], engine="numpy"))
+    check("engine=auto (대배치 → LightGBM)", reg.predict(df), cm.predict(df))
+    return df, BoosterRegressor(reg), BoosterClassifier(cls)
+
+
+def check_engine(engine_path: str, db_path: str = None):
+    print(f"\n[Check 2] 실제 엔진: {os.path.basename(engine_path)}")
+    try:
+        from MODELENGINE.UTIL import train_engine_unified as T
+    except ImportError:
+        from UTIL import train_engine_unified as T
+    payload = engine_bundle.load_engine(engine_path)
+    features = list(payload["features"])
+    db_path = db_path or T.find_latest_db_path()
+    df = pd.read_parquet(db_path, columns=["Date"] + features)
+    df["Date"] = pd.to_datetime(df["Date"])
+    day = df[df["Date"] == df["Date"].max()]
+    X = day[features].dropna()
+    print(f"   - DB: {os.path.basename(db_path)} | {day['Date'].iloc[0].date()} | {len(X):,}행")
+    ce = TC.compile_engine(payload)
+    check("model_reg", payload["model_reg"].predict(X), ce["model_reg"].predict(X, engine="numpy"))
+    check("model_cls", payload["model_cls"].predict_proba(X)[:, 1],
+          ce["model_cls"].predict_proba(X, engine="numpy")[:, 1])
+    return X, payload["model_reg"], payload["model_cls"]
+
+
+def _bench(fn, reps: int) -> float:
+    fn()   # 예열 (numba JIT 컴파일 포함)
+    ts = []
+    for _ in range(reps):
+        t0 = time.perf_counter()
+        fn()
+        ts.append(time.perf_counter() - t0)
+    return float(np.median(ts)) * 1000
+
+
+def bench(df: pd.DataFrame, model_reg, model_cls):
+    print("\n[Check 3] 지연시간 (중앙값 ms, reg + cls 1회씩)")
+    rng = np.random.default_rng(1)
+    cr, cc = TC.compile_model(model_reg), TC.compile_model(model_cls)
+    print(f"   - {cr}")
+    rows = []
+    for n in BATCHES:
+        sub = df.iloc[rng.integers(0, len(df), n)]
+        X = sub.to_numpy(dtype=np.float64)
+        reps = 200 if n <= 100 else 20
+        row = {"batch": n,
+               "lgb_wrapper": _bench(lambda: (model_reg.predict(sub), model_cls.predict_proba(sub)), reps),
+               "numpy": _bench(lambda: (cr.predict(X, engine="numpy"), cc.predict_proba(X, engine="numpy")), reps)}
+        if TC.numba is not None:
+            row["numba"] = _bench(lambda: (cr.predict(X, engine="numba"), cc.predict_proba(X, engine="numba")), reps)
+        row["auto"] = _bench(lambda: (cr.predict(X), cc.predict_proba(X)), reps)
+        rows.append(row)
+    out = pd.DataFrame(rows).set_index("batch")
+    for c in out.columns[1:]:
+        out[f"x_{c}"] = (out["lgb_wrapper"] / out[c]).round(1)
+    print(out.round(3).to_string())
+    if TC.numba is None:
+        print("   (numba 미설치 → numba 경로 생략)")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--engine", default=None, help="실제 엔진 경로 (.hoj / .pkl)")
+    ap.add_argument("--db", default=None)
+    args = ap.parse_args()
+
+    print("=" * 70)
+    print("[tree_compiler] 정합성 / 지연시간 검증")
+    print("=" * 70)
+    df, reg, cls = check_parity()
+    if args.engine:
+        X, reg, cls = check_engine(args.engine, args.db)
+        df = X
+    bench(df, reg, cls)
+
+    print("\n" + "=" * 70)
+    print("[Result] " + ("모든 정합성 검사 통과" if not FAILS else f"실패 {len(FAILS)}건: {FAILS}"))
+    print("=" * 70)
+    sys.exit(1 if FAILS else 0)
@@ -1,32 +1,35 @@
 # ===============================================
 #  check_nulls_in_V25_DB.py
 #  Hoj 엔진 학습 전 전체 결측률 자동 분석 스크립트
+#  - 전체 로드 대신 query_db 로 필요한 컬럼 집계만 조회 (키 컬럼 Date/Code 결측 포함)
 #  작성: 호봉이 (GPT-5), 2025-11-13
 # ===============================================
 
-import pandas as pd
+import os
+import sys
 from datetime import timedelta
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "MODELENGINE", "UTIL"))
+from query_db import describe, date_bounds, null_summary, first_complete_date, null_by_code
+
+DB_FILE = "new_Hoj_DB_V25.parquet"
+KEY_COLS = ["Date", "Code"]
+
 print("=================================================")
 print("[check_nulls_in_V25_DB.py] ▶️ 실행 시작...")
 print("=================================================")
 
-# 1) DB 로드
+# 1) DB 확인 (전체 로드 없이 parquet 메타데이터만)
 try:
-    df = pd.read_parquet("new_Hoj_DB_V25.parquet")
-    print(f"✅ DB 로드 완료: {len(df):,} 행")
+    info = describe(path=DB_FILE)
+    print(f"✅ DB 확인 완료: {info['rows']:,} 행")
 except Exception as e:
     print(f"❌ DB 로드 실패: {e}")
     exit()
 
-# 2) 날짜 정렬 및 기본 정보
-df["Date"] = pd.to_datetime(df["Date"])
-df = df.sort_values("Date")
-
-start_date = df["Date"].min().date()
-end_date = df["Date"].max().date()
-
-print(f"📅 데이터 기간: {start_date} ~ {end_date}")
+# 2) 기본 정보 (Date 컬럼만 집계)
+start_ts, end_ts = date_bounds(path=DB_FILE)
+print(f"📅 데이터 기간: {start_ts.date()} ~ {end_ts.date()}")
 
 # 3) 주요 피처 목록
 feature_cols = [
@@ -36,64 +39,58 @@ feature_cols = [
 ]
 
 target_cols = ["Expected_Return_5d", "Return_5d", "Label_5d"]
+check_cols = KEY_COLS + feature_cols + target_cols
 
-# 4) 전체 결측률 계산
-print("\n📊 전체 결측률:")
-print("-------------------------------------------")
-null_report = {}
 
-for col in feature_cols + target_cols:
-    if col in df.columns:
-        null_ratio = df[col].isna().mean() * 100
-        null_report[col] = null_ratio
-        print(f"{col:<18}: {null_ratio:6.2f}%")
-    else:
-        print(f"{col:<18}: ❌ 존재하지 않음")
+def print_nulls(summary):
+    """check_cols 순서대로 결측률 출력 (없는 컬럼 표시)."""
+    by_col = summary.set_index("column")
+    for col in check_cols:
+        if col in by_col.index:
+            r = by_col.loc[col]
+            print(f"{col:<18}: {r['null_pct']:6.2f}%  ({int(r['n_null']):,}건)")
+        else:
+            print(f"{col:<18}: ❌ 존재하지 않음")
+
 
+# 4) 전체 결측률 계산 (키 컬럼 Date/Code 포함, 파일 안에서 집계)
+print("\n📊 전체 결측률:")
+print("-------------------------------------------")
+null_all = null_summary(columns=check_cols, path=DB_FILE)
+print_nulls(null_all)
 print("-------------------------------------------")
 
 # 5) 최근 1년(검증구간) 결측률 분석
-cutoff = df["Date"].max() - timedelta(days=365)
-df_valid = df[df["Date"] >= cutoff]
+cutoff = end_ts - timedelta(days=365)
+valid_start, valid_end = date_bounds(start=cutoff, path=DB_FILE)
+null_valid = null_summary(columns=check_cols, start=cutoff, path=DB_FILE)
 
-print(f"\n📅 검증 구간: {df_valid['Date'].min().date()} ~ {df_valid['Date'].max().date()}")
-print(f"📌 검증 구간 행 수: {len(df_valid):,}")
+print(f"\n📅 검증 구간: {valid_start.date()} ~ {valid_end.date()}")
+print(f"📌 검증 구간 행 수: {int(null_valid['n_rows'].iloc[0]):,}")
 
 print("\n📊 검증 구간 결측률:")
 print("-------------------------------------------")
-valid_null_report = {}
-for col in feature_cols + target_cols:
-    if col in df_valid.columns:
-        null_ratio = df_valid[col].isna().mean() * 100
-        valid_null_report[col] = null_ratio
-        print(f"{col:<18}: {null_ratio:6.2f}%")
+print_nulls(null_valid)
 print("-------------------------------------------")
 
 # 6) 결측으로 인해 제거될 행 수 계산 (학습 기준)
-df_reg = df.dropna(subset=["Expected_Return_5d"] if "Expected_Return_5d" in df.columns else ["Return_5d"])
-removed_rows = len(df) - len(df_reg)
+target = "Expected_Return_5d" if "Expected_Return_5d" in info["columns"] else "Return_5d"
+removed_rows = int(null_all.set_index("column").loc[target, "n_null"])
 
 print(f"\n🧹 학습 시 결측으로 제거될 행 수: {removed_rows:,} 행")
 
 # 7) 결측이 없는 첫 날짜 감지 (검증구간 시작 검증)
-first_valid_date = None
-req_cols = feature_cols + ["Expected_Return_5d"] if "Expected_Return_5d" in df.columns else feature_cols + ["Return_5d"]
-
-for date in sorted(df_valid["Date"].unique()):
-    tmp = df_valid[df_valid["Date"] == date]
-    if not tmp[req_cols].isna().any().any():
-        first_valid_date = date
-        break
+req_cols = feature_cols + [target]
+first_valid_date = first_complete_date(req_cols, start=cutoff, path=DB_FILE)
 
-if first_valid_date:
+if first_valid_date is not None:
     print(f"📌 결측이 없는 검증 첫 날짜: {first_valid_date.date()}")
 else:
     print("⚠️ 검증 구간에서 결측이 없는 날짜를 찾지 못했습니다.")
 
 # 8) 종목별 결측률 Top 30
 print("\n🔍 종목별 결측률 TOP 30 (전체 기준):")
-code_nulls = df.groupby("Code")[feature_cols + target_cols].apply(lambda x: x.isna().mean().mean() * 100)
-code_nulls = code_nulls.sort_values(ascending=False).head(30)
+code_nulls = null_by_code(feature_cols + target_cols, top=30, path=DB_FILE)
 
 print(code_nulls.to_string())
 
@@ -8,6 +8,11 @@ import pykrx
 from datetime import datetime, timedelta
 import time
 import os 
+import sys
+
+# (전체 DB 로드 대신 query_db 로 해당 종목 행 / 필요한 컬럼만 읽음)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "MODELENGINE", "UTIL"))
+from query_db import describe, stock_history
 
 # --- 1. V28 설정 ---
 MODEL_FILE = "REAL_CHAMPION_MODEL_V25.pkl" # (V25 실전 10년 엔진)
@@ -29,10 +34,11 @@ except Exception as e:
     TICKER_NAME_MAP = {} 
 
 # --- 2. 헬퍼 함수 ---
-def get_single_stock_prediction(model, df_db, ticker_code):
+def get_single_stock_prediction(model, db_path, ticker_code):
     
-    # 1. DB에서 해당 종목 데이터만 추출
-    stock_data = df_db[df_db['종목코드'] == ticker_code].copy()
+    # 1. DB에서 해당 종목 데이터만 추출 (종목코드 조건 + 예측에 쓰는 컬럼만 읽음)
+    stock_data = stock_history(ticker_code, columns=feature_columns_v5 + ['종목명', '종가'],
+                               path=db_path, date_col='날짜', code_col='종목코드')
     
     if stock_data.empty:
         print(f"  > 오류: '{ticker_code}'에 대한 데이터를 DB에서 찾을 수 없습니다.")
@@ -58,12 +64,11 @@ def get_single_stock_prediction(model, df_db, ticker_code):
 # --- 3. 메인 실행 ---
 if __name__ == "__main__":
     
-    # 1. DB 로드
+    # 1. DB 확인 (메타데이터만, 종목 행은 예측 시점에 조회)
     try:
-        print(f"[1] Hoj 엔진 V25 데이터베이스('{FEATURE_FILE}') 로드 중...")
-        df_processed_v25 = pd.read_parquet(FEATURE_FILE)
-        df_processed_v25['날짜'] = pd.to_datetime(df_processed_v25['날짜'])
-        print(f"  > 로드 성공. (총 {len(df_processed_v25):,} 행)")
+        print(f"[1] Hoj 엔진 V25 데이터베이스('{FEATURE_FILE}') 확인 중...")
+        db_info = describe(path=FEATURE_FILE)
+        print(f"  > 확인 성공. (총 {db_info['rows']:,} 행)")
     except Exception as e:
         print(f"  > 오류: '{FEATURE_FILE}' 파일이 없습니다. ({e})"); exit()
 
@@ -85,7 +90,7 @@ if __name__ == "__main__":
         exit()
         
     # 4. 개별 종목 예측 실행
-    result = get_single_stock_prediction(model, df_processed_v25, ticker_input)
+    result = get_single_stock_prediction(model, FEATURE_FILE, ticker_input)
     
     if result:
         prediction, info = result
@@ -5,8 +5,19 @@ import sys
 import time
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
-from kiwoom.kiwoom_api import KiwoomRestApi
-from kakao_notifier import KakaoNotifier 
+# 리플레이(replay_trading.py)에서 키움/카카오 모듈 없이도 import 되도록 가드
+#  - 배포 클라이언트(kiwoom.kiwoom_api) 만 사용: 잔고 조회(get_account_balance_details) / 차트 응답 'chart' 키 기준
+#    (저장소의 kiwoom_rest/kiwoom_api.py 는 메서드명과 응답 형식이 달라 이 전략과 호환되지 않음)
+KIWOOM_IMPORT_ERROR = None
+try:
+    from kiwoom.kiwoom_api import KiwoomRestApi
+except ImportError as e:
+    KiwoomRestApi = None
+    KIWOOM_IMPORT_ERROR = e
+try:
+    from kakao_notifier import KakaoNotifier
+except ImportError:
+    KakaoNotifier = None
 
 # ... (read_config_for_api, calculate_moving_average 함수는 이전과 동일) ...
 # (코드가 길어 여기에 모든 유틸리티 함수를 반복하지 않습니다. 이전 단계의 로직을 유지합니다.)
@@ -44,7 +55,8 @@ def calculate_moving_average(data: List[Dict[str, str]], days: int) -> float:
 # 메인 전략 실행 함수 (호엔진)
 # ==========================================================
 
-def run_trading_strategy(api_client: KiwoomRestApi, notifier: KakaoNotifier): 
+def run_trading_strategy(api_client: "KiwoomRestApi", notifier: "KakaoNotifier", clock=datetime.now):
+    """clock: 현재 시각 함수 (기본 datetime.now, 리플레이에서는 시뮬레이션 시계 주입)"""
     
     # -----------------------------------------------
     # 🌟 [설정] 매매 대상 종목 및 KRX 구분 코드 🌟
@@ -59,7 +71,7 @@ def run_trading_strategy(api_client: KiwoomRestApi, notifier: KakaoNotifier):
     
     
     # 1. 장 운영 시간 확인 및 잔고/보유 종목 확인 
-    current_time = datetime.now()
+    current_time = clock()
     current_hour = current_time.hour
     is_market_open = (9 <= current_hour < 16)
     
@@ -95,7 +107,7 @@ def run_trading_strategy(api_client: KiwoomRestApi, notifier: KakaoNotifier):
 
         data_response = api_client.get_stock_daily_chart_continuous(
             stk_cd=stock_code, 
-            base_dt=datetime.now().strftime('%Y%m%d'), 
+            base_dt=current_time.strftime('%Y%m%d'), 
             upd_stkpc_tp="1", 
             target_days=TARGET_CHART_DAYS
         )
@@ -144,7 +156,8 @@ def run_trading_strategy(api_client: KiwoomRestApi, notifier: KakaoNotifier):
                            f"-----------------\n"
                            f"MA3: {ma5:.2f} (골든 크로스)")
                            
-                notifier.send_message(message)
+                if notifier is not None:
+                    notifier.send_message(message)
                 
             else:
                 print(f"⚠️ 매수 주문 실패: {order_response.get('return_msg')}")
@@ -159,8 +172,14 @@ if __name__ == '__main__':
     print(f"모드: {'모의투자' if IS_MOCK_MODE else '실전투자'}")
 
     try:
+        if KiwoomRestApi is None:
+            raise ImportError(f"kiwoom.kiwoom_api 를 불러올 수 없습니다: {KIWOOM_IMPORT_ERROR}")
         api_client = KiwoomRestApi()
-        notifier = KakaoNotifier() 
+        if "--record" in sys.argv:
+            # 차트 응답을 data/{종목}_chart_data.json 에 누적 기록 (replay_trading.py 입력)
+            from replay_trading import RecordingApi
+            api_client = RecordingApi(api_client)
+        notifier = KakaoNotifier() if KakaoNotifier is not None else None
         run_trading_strategy(api_client, notifier)
 
     except Exception as e:
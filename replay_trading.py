@@ -0,0 +1,531 @@
+# replay_trading.py - main_trading 전략 오프라인 리플레이 (기록 차트 → 시뮬레이션 주문/체결)
+# ============================================================
+#  - 입력: 기록된 키움 차트 응답 data/{종목}_chart_data.json ({"saved_at", "data": [dt/prc/open/high/low/vol ...]})
+#          분봉은 cntr_tm(YYYYMMDDHHMMSS), 일봉은 dt(YYYYMMDD). 키움 원 필드(cur_prc/open_pric/...)도 인식
+#          또는 HOJ DB(parquet) 의 Date/Code/Open/High/Low/Close/Volume 일봉
+#  - 기록: RecordingApi(KiwoomRestApi()) 로 감싸면 차트 조회 응답을 위 파일에 누적 (main_trading.py --record)
+#  - 실행: 같은 run_trading_strategy 코드를 ReplayKiwoomApi + 시뮬레이션 시계로 봉 단위 호출
+#      - 시계: 분봉 = 봉 시각, 일봉 = 해당일 DECIDE_AT(15:20) → 전략의 장 시간 판단이 그대로 동작
+#      - 차트 조회: 현재 봉까지만 반환 (미래 봉 없음), 최신순 / 페이지(600행) 단위
+#      - 주문: 다음 봉에서 체결 (시장가 = 시가 ± 슬리피지, 지정가 = 가격 도달 시 min/max(시가, 지정가))
+#              ORDER_TTL 봉 안에 미체결이면 취소, 매수 대금 부족 / 매도 수량 부족은 거부
+#  - 리포트: 결정→주문 지연(차트 응답 수신 ~ 주문 호출, ms), 봉당 전략 실행 시간, 장 시간(봉 수 × 봉 길이) 대비 배속,
+#            손익 / 수익률 / MDD, 주문·체결 목록
+#
+#  사용 예)
+#    python replay_trading.py run --data data --cash 10000000
+#    python replay_trading.py run --db F:\...\HOJ_DB_V31_251121.parquet --codes 005930,000660 --start 2024-01-01
+#    python replay_trading.py bench --days 20 --freq M
+# ============================================================
+
+import os
+import io
+import sys
+import glob
+import json
+import time
+import argparse
+import importlib
+import contextlib
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+import pandas as pd
+
+root_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.extend([root_dir, os.path.join(root_dir, "MODELENGINE")])
+
+DATA_DIR = os.path.join(root_dir, "data")
+CHART_SUFFIX = "_chart_data.json"
+PAGE_ROWS = 600                 # ka10081 1페이지 행 수 (연속 조회 단위)
+DECIDE_AT = (15, 20)            # 일봉 리플레이 결정 시각
+SESSION_SEC = 6.5 * 3600        # 정규장 09:00~15:30 (일봉 1봉 = 장 1회)
+ORDER_TTL = 1                   # 미체결 주문 유효 봉 수
+FEE = 0.00015                   # backtester 와 동일 (매수/매도 각각)
+TAX = 0.0018                    # 매도 거래세
+SLIPPAGE = 0.0005               # 시장가 체결 슬리피지
+
+TIME_KEYS = ("cntr_tm", "dt", "date")
+FIELD_KEYS = {
+    "close": ("prc", "cur_prc", "close"),
+    "open": ("open", "open_pric", "opn_prc"),
+    "high": ("high", "high_pric"),
+    "low": ("low", "low_pric"),
+    "volume": ("vol", "trde_qty", "volume"),
+}
+
+
+def _num(v) -> float:
+    """키움 가격 문자열 ('+60000', '-1,200') → 양수 float"""
+    try:
+        return abs(float(str(v).replace(",", "").strip() or 0))
+    except ValueError:
+        return 0.0
+
+def _pick(row: dict, keys) -> Any:
+    for k in keys:
+        if k in row and row[k] not in (None, ""):
+            return row[k]
+    return None
+
+def _row_time(row: dict) -> Optional[pd.Timestamp]:
+    v = _pick(row, TIME_KEYS)
+    if v is None:
+        return None
+    v = str(v).strip()
+    return pd.to_datetime(v, format="%Y%m%d%H%M%S" if len(v) == 14 else "%Y%m%d", errors="coerce")
+
+
+# ------------------------------------------------------------
+# 1) 기록 차트 저장소
+# ------------------------------------------------------------
+class BarStore:
+    """
+    종목별 봉 (시간 오름차순). rows = 기록 원본 dict (전략에 그대로 반환), ohlc = 체결 계산용 배열.
+    """
+
+    def __init__(self):
+        self.ts: Dict[str, np.ndarray] = {}        # 종목 → int64 ns (오름차순)
+        self.rows: Dict[str, list] = {}
+        self.ohlc: Dict[str, np.ndarray] = {}      # 종목 → (N, 4) open/high/low/close
+        self.freq = "D"
+
+    def add(self, code: str, records: List[dict]):
+        parsed = {}
+        for row in records:
+            t = _row_time(row)
+            if t is None or pd.isna(t):
+                continue
+            parsed[t.value] = row                  # 같은 시각 중복 기록은 나중 것 우선
+        if not parsed:
+            return
+        keys = np.array(sorted(parsed), dtype=np.int64)
+        rows = [parsed[k] for k in keys]
+        ohlc = np.array([[_num(_pick(r, FIELD_KEYS[f])) for f in ("open", "high", "low", "close")] for r in rows])
+        close = ohlc[:, 3:4]
+        ohlc = np.where(ohlc > 0, ohlc, close)     # 시/고/저 누락 → 종가
+        self.ts[code], self.rows[code], self.ohlc[code] = keys, rows, ohlc
+        if any(len(str(_pick(r, TIME_KEYS))) == 14 for r in rows[:5]):
+            self.freq = "M"
+
+    @classmethod
+    def load(cls, data_dir: str = DATA_DIR, codes: list = None) -> "BarStore":
+        store = cls()
+        for path in sorted(glob.glob(os.path.join(data_dir, "*" + CHART_SUFFIX))):
+            code = os.path.basename(path)[: -len(CHART_SUFFIX)]
+            if codes and code not in codes:
+                continue
+            with open(path, encoding="utf-8") as f:
+                obj = json.load(f)
+            records = obj.get("data") or obj.get("output") or obj.get("chart") or [] if isinstance(obj, dict) else obj
+            store.add(code, records)
+        if not store.ts:
+            raise FileNotFoundError(f"기록 차트가 없습니다: {data_dir}\\*{CHART_SUFFIX}")
+        return store
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "BarStore":
+        """Date/Code/Open/High/Low/Close/Volume (HOJ DB 등) → 기록 파일과 같은 필드의 봉."""
+        store = cls()
+        df = df.sort_values(["Code", "Date"])
+        intraday = (pd.to_datetime(df["Date"]).dt.normalize() != pd.to_datetime(df["Date"])).any()
+        fmt = "%Y%m%d%H%M%S" if intraday else "%Y%m%d"
+        key = "cntr_tm" if intraday else "dt"
+        for code, g in df.groupby("Code", sort=False):
+            dts = pd.to_datetime(g["Date"]).dt.strftime(fmt).to_numpy()
+            cols = [g[c].to_numpy() for c in ("Close", "Open", "High", "Low", "Volume")]
+            records = [{key: d, "prc": f"{c:.0f}", "open": f"{o:.0f}", "high": f"{h:.0f}", "low": f"{l:.0f}",
+                        "vol": f"{v:.0f}"} for d, c, o, h, l, v in zip(dts, *cols)]
+            store.add(str(code), records)
+        return store
+
+    @property
+    def codes(self) -> list:
+        return list(self.ts)
+
+    def timeline(self, start=None, end=None) -> np.ndarray:
+        t = np.unique(np.concatenate(list(self.ts.values())))
+        if start is not None:
+            t = t[t >= pd.Timestamp(start).value]
+        if end is not None:
+            end = pd.Timestamp(end)
+            t = t[t < (end + pd.Timedelta(days=1)).value] if end == end.normalize() else t[t <= end.value]
+        return t
+
+    def upto(self, code: str, t: int) -> int:
+        """t 시각까지 봉 개수 (해당 종목)."""
+        return int(np.searchsorted(self.ts[code], t, side="right")) if code in self.ts else 0
+
+
+# ------------------------------------------------------------
+# 2) 시계 / 알림
+# ------------------------------------------------------------
+class ReplayClock:
+    """run_trading_strategy(clock=...) 에 주입하는 시뮬레이션 시계."""
+
+    def __init__(self, now: datetime = None):
+        self.now = now or datetime(2000, 1, 1)
+
+    def __call__(self) -> datetime:
+        return self.now
+
+    def set(self, now):
+        self.now = pd.Timestamp(now).to_pydatetime()
+
+
+class ReplayNotifier:
+    """KakaoNotifier 대체: 메시지를 시각과 함께 보관."""
+
+    def __init__(self, clock: ReplayClock):
+        self.clock = clock
+        self.messages = []
+
+    def send_message(self, message: str) -> bool:
+        self.messages.append((self.clock(), message))
+        return True
+
+
+# ------------------------------------------------------------
+# 3) 시뮬레이션 API (main_trading 이 쓰는 kiwoom.kiwoom_api.KiwoomRestApi 와 같은 메서드/응답 형식)
+# ------------------------------------------------------------
+class ReplayKiwoomApi:
+    """
+    차트 조회는 시계 시점까지의 기록 봉만, 주문은 다음 봉 체결 대기열에 적재.
+    차트 응답은 배포 클라이언트와 같이 'chart' 키 하나에만 담는다 (리플레이/실거래 응답 형식 일치).
+    """
+
+    def __init__(self, store: BarStore, clock: ReplayClock, cash: float = 10_000_000,
+                 fee: float = FEE, tax: float = TAX, slippage: float = SLIPPAGE, ttl: int = ORDER_TTL):
+        self.store, self.clock = store, clock
+        self.cash = float(cash)
+        self.fee, self.tax, self.slippage, self.ttl = fee, tax, slippage, ttl
+        self.positions: Dict[str, int] = {}
+        self.pending: List[dict] = []
+        self.orders: List[dict] = []
+        self.bar_t = None                          # 현재 봉 시각 (ns)
+        self._seen: Dict[str, float] = {}          # 종목 → 마지막 차트 응답 수신 perf_counter
+        self._seq = 0
+
+    # --- 시세 ---
+    def get_stock_daily_chart_continuous(self, stk_cd: str, base_dt: str, upd_stkpc_tp: str,
+                                         target_days: int) -> Dict[str, Any]:
+        n = self.store.upto(stk_cd, self.bar_t)
+        pages = max(1, -(-int(target_days) // PAGE_ROWS))
+        rows = self.store.rows.get(stk_cd, [])[max(0, n - pages * PAGE_ROWS):n][::-1]
+        self._seen[stk_cd] = time.perf_counter()
+        return {"return_code": 0, "return_msg": f"성공 ({len(rows)}건)", "chart": rows}
+
+    # --- 계좌 ---
+    def _last_close(self, code: str) -> float:
+        n = self.store.upto(code, self.bar_t)
+        return float(self.store.ohlc[code][n - 1, 3]) if n else 0.0
+
+    def equity(self) -> float:
+        return self.cash + sum(q * self._last_close(c) for c, q in self.positions.items())
+
+    def get_account_balance_details(self, qry_tp: str = "2", dmst_stex_tp: str = "KRX") -> Dict[str, Any]:
+        return {"return_code": 0, "return_msg": "리플레이", "prsm_dpst_aset_amt": f"{self.equity():.0f}",
+                "d2_entra": f"{self.cash:.0f}",
+                "acnt_evlt_remn_indv_tot": [{"stk_cd": c, "rmnd_qty": str(q)} for c, q in self.positions.items()]}
+
+    get_account_balance = get_account_balance_details
+
+    def get_deposit_details(self, qry_tp: str = "2") -> Dict[str, Any]:
+        return {"return_code": 0, "return_msg": "리플레이", "entr": f"{self.cash:.0f}"}
+
+    # --- 주문 ---
+    def _order(self, side: str, stk_cd: str, ord_qty: str, ord_uv: str, trde_tp: str) -> Dict[str, Any]:
+        t_call = time.perf_counter()
+        self._seq += 1
+        qty = int(_num(ord_qty))
+        od = {"ord_no": f"R{self._seq:07d}", "ts": self.clock(), "code": stk_cd, "side": side, "qty": qty,
+              "type": "시장가" if str(trde_tp) == "3" else "지정가", "limit": _num(ord_uv) if ord_uv else np.nan,
+              "latency_ms": (t_call - self._seen[stk_cd]) * 1000 if stk_cd in self._seen else np.nan,
+              "status": "접수", "fill_ts": None, "fill_px": np.nan, "amount": 0.0, "ttl": self.ttl}
+        self.orders.append(od)
+        reason = None
+        if qty <= 0 or stk_cd not in self.store.ts:
+            reason = "주문 수량/종목 오류"
+        elif od["type"] == "지정가" and not od["limit"] > 0:
+            reason = "지정가 없음"
+        elif side == "매도" and qty > self.positions.get(stk_cd, 0) - self._pending_sell(stk_cd):
+            reason = "매도가능수량 부족"
+        if reason:
+            od["status"] = "거부"
+            return {"return_code": -1, "return_msg": reason}
+        self.pending.append(od)
+        return {"return_code": 0, "return_msg": "리플레이 주문 접수", "ord_no": od["ord_no"]}
+
+    def _pending_sell(self, code: str) -> int:
+        return sum(o["qty"] for o in self.pending if o["code"] == code and o["side"] == "매도")
+
+    def buy_order(self, dmst_stex_tp: str, stk_cd: str, ord_qty: str, ord_uv: str, trde_tp: str,
+                  cond_uv: str = "") -> Dict[str, Any]:
+        return self._order("매수", stk_cd, ord_qty, ord_uv, trde_tp)
+
+    def sell_order(self, dmst_stex_tp: str, stk_cd: str, ord_qty: str, ord_uv: str, trde_tp: str,
+                   cond_uv: str = "") -> Dict[str, Any]:
+        return self._order("매도", stk_cd, ord_qty, ord_uv, trde_tp)
+
+    # --- 체결 (새 봉 시작 시) ---
+    def fill(self, t: int):
+        keep = []
+        for od in self.pending:
+            code = od["code"]
+            n = self.store.upto(code, t)
+            if n == 0 or self.store.ts[code][n - 1] != t:
+                keep.append(od)                    # 이 종목 봉 없음 → 다음 봉까지 대기
+                continue
+            o, h, l, _ = self.store.ohlc[code][n - 1]
+            buy = od["side"] == "매수"
+            if od["type"] == "시장가":
+                px = o * (1 + self.slippage) if buy else o * (1 - self.slippage)
+            elif buy and l <= od["limit"]:
+                px = min(o, od["limit"])
+            elif not buy and h >= od["limit"]:
+                px = max(o, od["limit"])
+            else:
+                od["ttl"] -= 1
+                if od["ttl"] > 0:
+                    keep.append(od)
+                else:
+                    od["status"] = "미체결 취소"
+                continue
+            gross = px * od["qty"]
+            if buy:
+                cost = gross * (1 + self.fee)
+                if cost > self.cash:
+                    od["status"] = "거부(잔고 부족)"
+                    continue
+                self.cash -= cost
+                self.positions[code] = self.positions.get(code, 0) + od["qty"]
+                od["amount"] = -cost
+            else:
+                self.cash += gross * (1 - self.fee - self.tax)
+                self.positions[code] -= od["qty"]
+                if self.positions[code] == 0:
+                    del self.positions[code]
+                od["amount"] = gross * (1 - self.fee - self.tax)
+            od.update(status="체결", fill_ts=pd.Timestamp(t).to_pydatetime(), fill_px=px)
+        self.pending = keep
+
+
+class RecordingApi:
+    """
+    KiwoomRestApi 래퍼: 차트 조회(*chart*) 응답 행을 data/{종목}_chart_data.json 에 시각 기준으로 병합 저장.
+    나머지 메서드는 그대로 전달.
+    """
+
+    def __init__(self, api, data_dir: str = DATA_DIR):
+        self._api = api
+        self._data_dir = data_dir
+
+    def __getattr__(self, name):
+        attr = getattr(self._api, name)
+        if "chart" not in name or not callable(attr):
+            return attr
+
+        def recorded(*args, **kwargs):
+            resp = attr(*args, **kwargs)
+            code = kwargs.get("stk_cd", args[0] if args else None)
+            rows = resp.get("chart") or [] if isinstance(resp, dict) else []
+            if code and rows:
+                try:
+                    self._save(str(code), rows)
+                except Exception as e:
+                    print(f"[REPLAY] 차트 기록 실패 ({code}): {e}")
+            return resp
+        return recorded
+
+    def _save(self, code: str, rows: list):
+        os.makedirs(self._data_dir, exist_ok=True)
+        path = os.path.join(self._data_dir, code + CHART_SUFFIX)
+        merged = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for r in json.load(f).get("data", []):
+                    merged[str(_pick(r, TIME_KEYS))] = r
+        for r in rows:
+            merged[str(_pick(r, TIME_KEYS))] = r
+        data = [merged[k] for k in sorted(merged, reverse=True)]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"saved_at": datetime.now().strftime("%Y%m%d %H:%M:%S"), "data": data}, f,
+                      ensure_ascii=False, indent=4)
+
+
+# ------------------------------------------------------------
+# 4) 리플레이 실행 / 리포트
+# ------------------------------------------------------------
+class ReplayResult:
+    def __init__(self, equity: pd.DataFrame, orders: pd.DataFrame, messages: list, step_ms: np.ndarray,
+                 wall_sec: float, params: dict):
+        self.equity, self.orders, self.messages = equity, orders, messages
+        self.step_ms, self.wall_sec, self.params = step_ms, wall_sec, params
+
+    @property
+    def metrics(self) -> dict:
+        eq = self.equity["equity"].to_numpy()
+        cash0 = self.params["cash"]
+        lat = self.orders["latency_ms"].dropna().to_numpy() if len(self.orders) else np.array([])
+        filled = self.orders[self.orders["status"] == "체결"] if len(self.orders) else self.orders
+        market_sec = len(eq) * self.bar_sec
+        return {
+            "steps": len(eq),
+            "final_equity": float(eq[-1]) if len(eq) else cash0,
+            "pnl": float(eq[-1] - cash0) if len(eq) else 0.0,
+            "return": float(eq[-1] / cash0 - 1) if len(eq) else 0.0,
+            "mdd": float(np.min(eq / np.maximum.accumulate(eq) - 1)) if len(eq) else 0.0,
+            "orders": len(self.orders),
+            "fills": len(filled),
+            "rejects": int(self.orders["status"].str.startswith("거부").sum()) if len(self.orders) else 0,
+            "latency_p50_ms": float(np.percentile(lat, 50)) if len(lat) else np.nan,
+            "latency_p95_ms": float(np.percentile(lat, 95)) if len(lat) else np.nan,
+            "latency_max_ms": float(lat.max()) if len(lat) else np.nan,
+            "step_p50_ms": float(np.percentile(self.step_ms, 50)) if len(self.step_ms) else np.nan,
+            "step_p95_ms": float(np.percentile(self.step_ms, 95)) if len(self.step_ms) else np.nan,
+            "wall_sec": self.wall_sec,
+            "market_sec": market_sec,
+            "speedup": market_sec / self.wall_sec if self.wall_sec > 0 else np.nan,
+        }
+
+    @property
+    def bar_sec(self) -> float:
+        """봉 1개가 대표하는 장중 시간(초). 분봉은 같은 날 연속 봉 간격의 중앙값, 일봉은 정규장 1회.
+        (야간/주말 공백을 빼고 세기 위해 시각 차 대신 봉 수 × 봉 길이로 배속을 계산)"""
+        if self.params["freq"] == "D":
+            return SESSION_SEC
+        idx = pd.DatetimeIndex(self.equity.index)
+        gaps = np.diff(idx.asi8) / 1e9
+        same_day = idx.normalize()[1:] == idx.normalize()[:-1]
+        gaps = gaps[same_day & (gaps > 0)]
+        return float(np.median(gaps)) if len(gaps) else 60.0
+
+    def summary(self) -> str:
+        m, p = self.metrics, self.params
+        lines = [
+            f"=== 🔁 Replay: {p['strategy']} | {p['codes']}종목 × {m['steps']:,}봉 ({p['freq']}) ===",
+            f"기간        : {self.equity.index[0]:%Y-%m-%d %H:%M} ~ {self.equity.index[-1]:%Y-%m-%d %H:%M}"
+            if m["steps"] else "기간        : -",
+            f"손익        : {m['pnl']:+,.0f}원 ({m['return']:+.2%}) | 최종 {m['final_equity']:,.0f}원 | MDD {m['mdd']:.2%}",
+            f"주문        : {m['orders']}건 (체결 {m['fills']} / 거부 {m['rejects']})",
+            f"결정→주문    : p50 {m['latency_p50_ms']:.3f}ms | p95 {m['latency_p95_ms']:.3f}ms | max {m['latency_max_ms']:.3f}ms"
+            if m["orders"] else "결정→주문    : - (주문 없음)",
+            f"봉당 전략    : p50 {m['step_p50_ms']:.3f}ms | p95 {m['step_p95_ms']:.3f}ms",
+            f"실행 시간    : {m['wall_sec']:.2f}s (장 시간 {m['market_sec'] / 3600:,.1f}h 대비 {m['speedup']:,.0f}배)",
+        ]
+        return "\n".join(lines)
+
+
+def load_strategy(spec: str):
+    """'모듈:함수' → 호출 가능 객체 (기본 main_trading:run_trading_strategy)"""
+    mod, _, fn = spec.partition(":")
+    return getattr(importlib.import_module(mod), fn or "run_trading_strategy")
+
+
+def replay(store: BarStore, strategy=None, start=None, end=None, cash: float = 10_000_000,
+           quiet: bool = True, **api_kwargs) -> ReplayResult:
+    """
+    봉마다: ① 대기 주문 체결 (이 봉 시가/고가/저가) ② 시계 이동 후 전략 호출 ③ 종가 평가.
+    strategy(api_client, notifier, clock=clock) 형태 (run_trading_strategy 와 동일).
+    """
+    strategy = strategy or load_strategy("main_trading:run_trading_strategy")
+    clock = ReplayClock()
+    api = ReplayKiwoomApi(store, clock, cash, **api_kwargs)
+    notifier = ReplayNotifier(clock)
+    timeline = store.timeline(start, end)
+    decide = timedelta(hours=DECIDE_AT[0], minutes=DECIDE_AT[1]) if store.freq == "D" else timedelta(0)
+
+    step_ms = np.empty(len(timeline))
+    eq = np.empty((len(timeline), 2))
+    t0 = time.perf_counter()
+    for i, t in enumerate(timeline):
+        api.fill(t)
+        api.bar_t = t
+        clock.set(pd.Timestamp(t) + decide)
+        s0 = time.perf_counter()
+        if quiet:
+            with contextlib.redirect_stdout(io.StringIO()):
+                strategy(api, notifier, clock=clock)
+        else:
+            strategy(api, notifier, clock=clock)
+        step_ms[i] = (time.perf_counter() - s0) * 1000
+        eq[i] = (api.cash, api.equity())
+    wall = time.perf_counter() - t0
+
+    for od in api.pending:
+        od["status"] = "미체결(종료)"
+    equity = pd.DataFrame({"cash": eq[:, 0], "equity": eq[:, 1]}, index=pd.DatetimeIndex(timeline))
+    orders = pd.DataFrame(api.orders, columns=["ord_no", "ts", "code", "side", "qty", "type", "limit", "status",
+                                               "fill_ts", "fill_px", "amount", "latency_ms"])
+    params = {"strategy": getattr(strategy, "__name__", str(strategy)), "codes": len(store.codes),
+              "freq": store.freq, "cash": float(cash)}
+    return ReplayResult(equity, orders, notifier.messages, step_ms, wall, params)
+
+
+def synthetic_store(codes: list, days: int = 20, freq: str = "M", seed: int = 0) -> BarStore:
+    """랜덤워크 봉 (분봉 09:00~15:30 / 일봉 영업일)."""
+    rng = np.random.default_rng(seed)
+    if freq == "M":
+        bdays = pd.bdate_range("2024-01-02", periods=days)
+        minutes = pd.timedelta_range("09:00:00", "15:29:00", freq="1min")
+        stamps = (bdays.values[:, None] + minutes.values[None, :]).ravel()
+    else:
+        stamps = pd.bdate_range("2015-01-02", periods=days).values
+    n = len(stamps)
+    frames = []
+    for code in codes:
+        close = 10_000 * np.exp(np.cumsum(rng.normal(0, 0.002 if freq == "M" else 0.02, n)))
+        close = np.round(close)
+        opn = np.round(np.r_[close[0], close[:-1]] * (1 + rng.normal(0, 0.001, n)))
+        frames.append(pd.DataFrame({"Date": stamps, "Code": code, "Open": opn,
+                                    "High": np.maximum(opn, close) * 1.002, "Low": np.minimum(opn, close) * 0.998,
+                                    "Close": close, "Volume": rng.integers(1_000, 100_000, n)}))
+    return BarStore.from_frame(pd.concat(frames, ignore_index=True))
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("run", help="기록 차트 / HOJ DB 로 리플레이")
+    r.add_argument("--data", default=DATA_DIR, help="기록 차트 폴더 ({종목}_chart_data.json)")
+    r.add_argument("--db", default=None, help="HOJ DB parquet (지정 시 일봉 리플레이)")
+    r.add_argument("--codes", default=None, help="종목 제한 (쉼표 구분)")
+    r.add_argument("--start", default=None)
+    r.add_argument("--end", default=None)
+    b = sub.add_parser("bench", help="합성 봉 리플레이 속도")
+    b.add_argument("--codes", default="005930,000660", help="합성 종목 코드 (main_trading 대상 종목 기본)")
+    b.add_argument("--days", type=int, default=20)
+    b.add_argument("--freq", default="M", choices=["M", "D"])
+    for p in (r, b):
+        p.add_argument("--strategy", default="main_trading:run_trading_strategy", help="모듈:함수")
+        p.add_argument("--cash", type=float, default=10_000_000)
+        p.add_argument("--slippage", type=float, default=SLIPPAGE)
+        p.add_argument("--verbose", action="store_true", help="전략 출력 표시")
+        p.add_argument("--out", default=None, help="equity/orders CSV 저장 폴더")
+    args = ap.parse_args()
+
+    codes = args.codes.split(",") if args.codes else None
+    t0 = time.perf_counter()
+    if args.cmd == "bench":
+        store = synthetic_store(codes, args.days, args.freq)
+        start = end = None
+    elif args.db:
+        cols = ["Date", "Code", "Open", "High", "Low", "Close", "Volume"]
+        df = pd.read_parquet(args.db, columns=cols)
+        if codes:
+            df = df[df["Code"].astype(str).isin(codes)]
+        store, start, end = BarStore.from_frame(df), args.start, args.end
+    else:
+        store, start, end = BarStore.load(args.data, codes), args.start, args.end
+    print(f"[REPLAY] {len(store.codes)}종목 봉 로드 {time.perf_counter() - t0:.2f}s")
+
+    res = replay(store, load_strategy(args.strategy), start, end, args.cash, quiet=not args.verbose,
+                 slippage=args.slippage)
+    print(res.summary())
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        res.equity.to_csv(os.path.join(args.out, f"replay_equity_{stamp}.csv"), encoding="utf-8-sig")
+        res.orders.to_csv(os.path.join(args.out, f"replay_orders_{stamp}.csv"), index=False, encoding="utf-8-sig")
+        print(f"[REPLAY] 저장: {args.out}")
@@ -4,12 +4,17 @@ import sys
 import time
 import subprocess
 import datetime
-import pickle
 import glob
-import re
 import pandas as pd
 from PySide6.QtCore import QThread, Signal
 
+# 엔진 pkl 의 모델 래퍼(MODELENGINE.UTIL.engine_models) unpickle 용 프로젝트 루트
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.append(_PROJECT_ROOT)
+
+from MODELENGINE.UTIL import engine_registry, engine_bundle, prediction_service, prediction_cube, ensemble_scorer, backtester
+
 # ---------------------------------------------------------
 # 1. 데이터 업데이트 워커
 # ---------------------------------------------------------
@@ -208,8 +213,17 @@ class PredictionWorker(QThread):
             if not self.eng or not os.path.exists(self.eng):
                 raise FileNotFoundError(f"엔진 파일을 찾을 수 없습니다: {self.eng}")
 
-            with open(self.eng, "rb") as f:
-                data = pickle.load(f)
+            # 예측 상주 서비스(prediction_service)가 이 엔진을 올려두고 있으면 메모리 조회로 응답
+            served = self._query_service()
+            if served is None:
+                # 예측 큐브(prediction_cube)에 이 엔진/날짜가 있으면 월 파티션 조회
+                served = self._query_cube()
+            if served is not None:
+                self.finished_signal.emit(served)
+                return
+
+            # .hoj 번들은 헤더 + 예측 시점에 모델만 로드, .pkl 은 기존 payload
+            data = engine_bundle.load_engine(self.eng)
 
             if not isinstance(data, dict):
                 raise ValueError("엔진 포맷이 올바르지 않습니다.")
@@ -219,16 +233,17 @@ class PredictionWorker(QThread):
             model_reg = data.get("model_reg")
             model_cls = data.get("model_cls")
 
-            version = meta.get("version", "V31")
             base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "MODELENGINE", "HOJ_DB"))
 
-            # 엔진 파일명에서 YYMMDD 태그 추출 (예: ..._251126.pkl -> 251126)
+            # 엔진 색인에서 데이터 날짜/버전 조회 → 같은 날짜 DB 스냅샷 (예: data_date 2025-11-26 -> 251126)
             tag = None
+            version = meta.get("version", "V31")
             try:
-                fname = os.path.basename(self.eng)
-                tags = re.findall(r"(\d{6})", fname)
-                if tags:
-                    tag = tags[-1]
+                entry = engine_registry.get_entry(self.eng, do_sync=True)
+                if entry is not None:
+                    version = meta.get("version") or entry.get("version") or "V31"
+                    if entry.get("data_date"):
+                        tag = entry["data_date"].strftime("%y%m%d")
             except Exception:
                 tag = None
 
@@ -299,3 +314,93 @@ class PredictionWorker(QThread):
             self.finished_signal.emit(out)
         except Exception as e: 
             self.error_signal.emit(f"예측 실패: {str(e)}")
+
+    def _query_service(self):
+        """서비스 없음/미상주 엔진/해당 날짜 결과 없음 → None (아래 기존 경로로 예측)."""
+        if self.code:
+            df = prediction_service.query_code(self.code, self.date, engine=self.eng)
+        else:
+            df = prediction_service.query_topk(self.n, self.date, engine=self.eng, rank_by="score")
+        if df is None or df.empty:
+            return None
+        return df[["code", "name", "close", "score", "prob"]].reset_index(drop=True)
+
+    def _query_cube(self):
+        """큐브 없음/날짜 범위 밖/엔진 변경 → None."""
+        root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "MODELENGINE", "HOJ_DB", "CUBE"))
+        try:
+            df = prediction_cube.cube_topk(self.eng, self.date, self.n, rank_by="score", code=self.code, root=root)
+        except Exception:
+            return None
+        if df is None:
+            return None
+        out = df.rename(columns={"Code": "code", "Name": "name", "Close": "close"})
+        return out[["code", "name", "close", "score", "prob"]].reset_index(drop=True)
+
+
+# ---------------------------------------------------------
+# 5. 앙상블 예측 워커 (여러 엔진 → 피처 행렬 1회 → 혼합 점수)
+# ---------------------------------------------------------
+class EnsembleWorker(QThread):
+    finished_signal = Signal(object)
+    error_signal = Signal(str)
+    def __init__(self, engine_paths, target_date, top_n, specific_code=None, blend="rank"):
+        super().__init__()
+        self.engs = list(engine_paths)
+        self.date = target_date
+        self.n = top_n
+        self.code = specific_code
+        self.blend = blend
+    def run(self):
+        try:
+            missing = [p for p in self.engs if not os.path.exists(p)]
+            if missing:
+                raise FileNotFoundError(f"엔진 파일을 찾을 수 없습니다: {missing}")
+            base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "MODELENGINE", "HOJ_DB"))
+            dbs = sorted(glob.glob(os.path.join(base_dir, "HOJ_DB_V31_*.parquet")), reverse=True)
+            db_path = dbs[0] if dbs else os.path.join(base_dir, "HOJ_DB_V31.parquet")
+
+            es = ensemble_scorer.EnsembleScorer(self.engs)
+            df = es.topk(self.n, self.date, blend=self.blend, code=self.code, db_path=db_path)
+            if df.empty:
+                self.finished_signal.emit(None)
+                return
+            # 표의 '예측 점수' = 혼합 점수, '상승확률' = 엔진 평균
+            out = df.rename(columns={"Code": "code", "Name": "name", "Close": "close"})
+            out["score"] = out[f"blend_{self.blend}"]
+            per_engine = [c for c in out.columns if c.endswith(":combo")]
+            out = out[["code", "name", "close", "score", "prob", "n_engines"] + per_engine]
+            out.reset_index(drop=True, inplace=True)
+            self.finished_signal.emit(out)
+        except Exception as e:
+            self.error_signal.emit(f"앙상블 예측 실패: {str(e)}")
+
+
+# ---------------------------------------------------------
+# 6. 백테스트 워커 (예측 큐브/엔진 점수 → Top-K 보유 시뮬레이션)
+# ---------------------------------------------------------
+class BacktestWorker(QThread):
+    finished_signal = Signal(object)
+    error_signal = Signal(str)
+    def __init__(self, engine_path, start=None, end=None, k=10, hold=None, weighting="equal", costs=None):
+        super().__init__()
+        self.eng = engine_path
+        self.start_date = start
+        self.end_date = end
+        self.k = k
+        self.hold = hold
+        self.weighting = weighting
+        self.costs = costs or {}
+    def run(self):
+        try:
+            if not self.eng or not os.path.exists(self.eng):
+                raise FileNotFoundError(f"엔진 파일을 찾을 수 없습니다: {self.eng}")
+            base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "MODELENGINE", "HOJ_DB"))
+            dbs = sorted(glob.glob(os.path.join(base_dir, "HOJ_DB_V31_*.parquet")), reverse=True)
+            db_path = dbs[0] if dbs else os.path.join(base_dir, "HOJ_DB_V31.parquet")
+            res = backtester.backtest_engine(self.eng, self.start_date, self.end_date, self.k, self.hold,
+                                             self.weighting, db_path=db_path,
+                                             cube_root=os.path.join(base_dir, "CUBE"), **self.costs)
+            self.finished_signal.emit(res)
+        except Exception as e:
+            self.error_signal.emit(f"백테스트 실패: {str(e)}")
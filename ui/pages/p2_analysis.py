@@ -1,7 +1,6 @@
 # ui/pages/p2_analysis.py
-import glob
 import os
-import pickle
+import sys
 from datetime import datetime
 from PySide6.QtWidgets import (
     QWidget,
@@ -16,19 +15,34 @@ from PySide6.QtWidgets import (
     QTableWidgetItem,
     QHeaderView,
     QTabWidget,
+    QSpinBox,
+    QDoubleSpinBox,
+    QComboBox,
+    QLineEdit,
+    QMessageBox,
 )
 from PySide6.QtCore import Qt
+from common.workers import BacktestWorker
+
+# 엔진 pkl 의 모델 래퍼(MODELENGINE.UTIL.engine_models) unpickle 용 프로젝트 루트
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.append(_PROJECT_ROOT)
+
+from MODELENGINE.UTIL import engine_registry, engine_bundle, backtester
 
 
 class AnalysisPage(QWidget):
     """
     엔진 분석 페이지:
     - 좌측: REAL/RESEARCH 엔진 리스트
-    - 우측: 기본 정보, 요약/메모(HOJ_ENGINE_INFO), 피처 중요도
+    - 우측: 기본 정보, 요약/메모(HOJ_ENGINE_INFO), 피처 중요도, 백테스트
+    - 백테스트: 선택 엔진의 예측 큐브(없으면 엔진 예측) 점수로 Top-K / h일 보유 시뮬레이션 (backtester)
     """
 
     def __init__(self):
         super().__init__()
+        self.bt_worker = None
         self.init_ui()
 
     def init_ui(self):
@@ -68,29 +82,108 @@ class AnalysisPage(QWidget):
         self.table_feat.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.tabs.addTab(self.table_feat, "피처 중요도")
 
+        # 탭 4: 백테스트
+        self.tabs.addTab(self._build_backtest_tab(), "백테스트")
+
         splitter.addWidget(self.tabs)
         splitter.setSizes([280, 720])
 
         layout.addWidget(splitter)
         self.load_engines()
 
-    def _engine_dirs(self):
-        base = os.path.abspath(
+    def _build_backtest_tab(self):
+        tab = QWidget()
+        v = QVBoxLayout(tab)
+
+        row = QHBoxLayout()
+        self.ed_bt_start = QLineEdit()
+        self.ed_bt_start.setPlaceholderText("시작 YYYY-MM-DD")
+        self.ed_bt_end = QLineEdit()
+        self.ed_bt_end.setPlaceholderText("종료 YYYY-MM-DD")
+        self.sp_bt_k = QSpinBox()
+        self.sp_bt_k.setRange(1, 100)
+        self.sp_bt_k.setValue(10)
+        self.sp_bt_hold = QSpinBox()
+        self.sp_bt_hold.setRange(0, 60)
+        self.sp_bt_hold.setSpecialValueText("엔진 h")
+        self.cb_bt_weight = QComboBox()
+        self.cb_bt_weight.addItem("균등", "equal")
+        self.cb_bt_weight.addItem("점수 비례", "score")
+        self.sp_bt_cost = QDoubleSpinBox()
+        self.sp_bt_cost.setDecimals(3)
+        self.sp_bt_cost.setRange(0.0, 2.0)
+        self.sp_bt_cost.setSingleStep(0.01)
+        self.sp_bt_cost.setValue(backtester.SLIPPAGE * 100)
+        self.btn_bt_run = QPushButton("백테스트 실행")
+        self.btn_bt_run.clicked.connect(self.run_backtest)
+        for label, w in (("기간", self.ed_bt_start), ("~", self.ed_bt_end), ("Top-K", self.sp_bt_k),
+                         ("보유일", self.sp_bt_hold), ("가중", self.cb_bt_weight), ("슬리피지(%)", self.sp_bt_cost)):
+            row.addWidget(QLabel(label))
+            row.addWidget(w)
+        row.addWidget(self.btn_bt_run)
+        v.addLayout(row)
+
+        self.txt_bt = QTextEdit()
+        self.txt_bt.setReadOnly(True)
+        self.txt_bt.setPlaceholderText("엔진을 선택하고 '백테스트 실행' (예측 큐브가 있으면 큐브 점수 사용)")
+        v.addWidget(self.txt_bt)
+
+        self.table_bt = QTableWidget()
+        self.table_bt.setColumnCount(4)
+        self.table_bt.setHorizontalHeaderLabels(["연도", "전략", "KOSPI", "초과"])
+        self.table_bt.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        v.addWidget(self.table_bt)
+        return tab
+
+    def run_backtest(self):
+        item = self.list_engines.currentItem()
+        if item is None:
+            QMessageBox.warning(self, "알림", "엔진을 선택하세요.")
+            return
+        if self.bt_worker is not None and self.bt_worker.isRunning():
+            return
+        costs = {"fee": backtester.FEE, "tax": backtester.TAX, "slippage": self.sp_bt_cost.value() / 100}
+        self.bt_worker = BacktestWorker(item.text(), self.ed_bt_start.text().strip() or None,
+                                        self.ed_bt_end.text().strip() or None, self.sp_bt_k.value(),
+                                        self.sp_bt_hold.value() or None, self.cb_bt_weight.currentData(), costs)
+        self.bt_worker.finished_signal.connect(self._on_backtest_finished)
+        self.bt_worker.error_signal.connect(self._on_backtest_error)
+        self.btn_bt_run.setEnabled(False)
+        self.txt_bt.setText(f"백테스트 실행 중... ({os.path.basename(item.text())})")
+        self.table_bt.setRowCount(0)
+        self.bt_worker.start()
+
+    def _on_backtest_finished(self, res):
+        self.btn_bt_run.setEnabled(True)
+        self.txt_bt.setText(res.summary())
+        self.table_bt.setRowCount(0)
+        for _, r in res.yearly.iterrows():
+            i = self.table_bt.rowCount()
+            self.table_bt.insertRow(i)
+            self.table_bt.setItem(i, 0, QTableWidgetItem(str(int(r["year"]))))
+            for j, col in enumerate(("strategy", "benchmark", "excess"), 1):
+                val = r[col]
+                self.table_bt.setItem(i, j, QTableWidgetItem("-" if val != val else f"{val:.2%}"))
+
+    def _on_backtest_error(self, msg):
+        self.btn_bt_run.setEnabled(True)
+        self.txt_bt.setText(msg)
+
+    def _engine_base(self):
+        return os.path.abspath(
             os.path.join(os.path.dirname(__file__), "..", "..", "MODELENGINE", "HOJ_ENGINE")
         )
-        return [
-            os.path.join(base, "REAL"),
-            os.path.join(base, "RESEARCH"),
-        ]
 
     def load_engines(self):
-        """REAL/RESEARCH 엔진 목록을 불러온다."""
+        """REAL/RESEARCH 엔진 목록을 엔진 색인에서 불러온다 (pickle 미개봉)."""
         self.list_engines.clear()
-        files = []
-        for d in self._engine_dirs():
-            if os.path.exists(d):
-                files.extend(glob.glob(os.path.join(d, "*.pkl")))
-        for f in sorted(files, reverse=True):
+        try:
+            entries = engine_registry.list_engines(base=self._engine_base())
+        except Exception as e:
+            self.txt_info.setText(f"엔진 색인 조회 실패: {e}")
+            return
+        self._entries = {e["path"]: e for e in entries}
+        for f in sorted(self._entries, reverse=True):
             self.list_engines.addItem(f)
 
     def analyze_engine(self, item):
@@ -99,24 +192,19 @@ class AnalysisPage(QWidget):
         self.txt_notes.clear()
         self.table_feat.setRowCount(0)
 
+        # 번들(.hoj)은 header.json 만 읽음 (모델 파싱 없음), .pkl 은 호환 경로
         try:
-            with open(fname, "rb") as f:
-                data = pickle.load(f)
+            header = engine_bundle.read_header(fname)
         except Exception as e:
             self.txt_info.setText(f"엔진 로드 실패: {e}")
             return
 
         info_lines = [f"파일: {fname}"]
-        meta = {}
-        features = []
-        feat_importances = []
-
-        if isinstance(data, dict):
-            meta = data.get("meta", {})
-            features = data.get("features", [])
-            model_reg = data.get("model_reg")
-            if model_reg is not None and hasattr(model_reg, "feature_importances_"):
-                feat_importances = list(zip(features, model_reg.feature_importances_))
+        entry = getattr(self, "_entries", {}).get(fname) or {}
+        meta = entry.get("meta") or header.get("meta") or {}
+        features = header.get("features", [])
+        imp = header.get("importances", {}).get("model_reg", {}).get("split", {})
+        feat_importances = [(f, imp[f]) for f in features if f in imp]
 
         if meta:
             info_lines.append(f"버전: {meta.get('version')}")
@@ -127,6 +215,9 @@ class AnalysisPage(QWidget):
             info_lines.append(f"n_estimators: {meta.get('n_estimators')}")
             info_lines.append(f"trained_at: {meta.get('trained_at')}")
             info_lines.append(f"features: {len(features)}개")
+            metrics = entry.get("metrics") or meta.get("metrics") or {}
+            if metrics.get("auc") is not None:
+                info_lines.append(f"검증 AUC: {metrics['auc']:.4f} | RMSE: {metrics.get('rmse')}")
         else:
             info_lines.append("meta 정보 없음")
 
@@ -1,8 +1,6 @@
 # ui/pages/p3_prediction.py
-import glob
 import os
 import pickle
-import re
 import pandas as pd
 from pandas.tseries.offsets import BDay
 
@@ -11,11 +9,12 @@ from PySide6.QtWidgets import (
     QTableWidget, QTableWidgetItem, QHeaderView, QRadioButton, QLineEdit,
     QButtonGroup, QMessageBox, QComboBox, QSpinBox, QCalendarWidget, QSplitter,
     QListWidget, QListWidgetItem, QTextEdit, QScrollArea, QWidget as QtWidget,
-    QMenu, QWidgetAction, QToolButton, QSizePolicy, QApplication, QCheckBox
+    QMenu, QWidgetAction, QToolButton, QSizePolicy, QApplication, QCheckBox, QAbstractItemView
 )
 from PySide6.QtCore import QDate, Qt, QLocale, QRect
 from PySide6.QtGui import QColor, QFont, QPen, QBrush, QPainter
-from common.workers import PredictionWorker
+from common.workers import PredictionWorker, EnsembleWorker
+from MODELENGINE.UTIL import engine_registry  # common.workers 가 프로젝트 루트를 sys.path 에 추가
 
 # [커스텀 달력] (+N) 텍스트 및 범위 하이라이트
 class CustomCalendar(QCalendarWidget):
@@ -97,6 +96,7 @@ class PredictionPage(QWidget):
     2. 엔진 리스트 필터링: 달력 날짜 클릭 시 해당 날짜 엔진만 표시 (잠금 시)
     3. 잠금 버튼 이동: 하단 -> 우측 상단 엔진 목록 헤더 옆
     4. 테이블 UI 개선: 행 번호 삭제, 순위 폭 50%, 경계선 강화
+    5. 엔진 여러 개 선택(Ctrl/Shift) 시 앙상블 예측 (ensemble_scorer, 혼합 방식 선택)
     """
 
     def _open_topn_picker(self):
@@ -133,6 +133,7 @@ class PredictionPage(QWidget):
     def __init__(self):
         super().__init__()
         self.engine_paths = []
+        self.engine_infos = [] # engine_paths 와 같은 순서의 엔진 색인 행
         self.all_engine_files = [] # 전체 엔진 정보 캐싱 [{'path':.., 'target_date':..}, ...]
         self.meta_cache = {}
         self.db_cache = {}
@@ -216,6 +217,7 @@ class PredictionPage(QWidget):
                 background-color: #444444;
             }
         """)
+        self.engine_list.setSelectionMode(QAbstractItemView.ExtendedSelection)   # 여러 개 선택 → 앙상블
         self.engine_list.itemSelectionChanged.connect(self._on_engine_list_changed)
         eng_v.addWidget(self.engine_list)
         
@@ -296,6 +298,14 @@ class PredictionPage(QWidget):
         gb_target.setLayout(row_target)
         ctl_row.addWidget(gb_target, stretch=1)
 
+        # 3-1) 앙상블 혼합 방식 (엔진 2개 이상 선택 시 사용)
+        self.cb_blend = QComboBox()
+        self.cb_blend.addItem("앙상블: 순위평균", "rank")
+        self.cb_blend.addItem("앙상블: 평균", "mean")
+        self.cb_blend.addItem("앙상블: 가중", "weighted")
+        self.cb_blend.setToolTip("엔진 목록에서 Ctrl/Shift 로 2개 이상 선택하면 앙상블 예측")
+        ctl_row.addWidget(self.cb_blend)
+
         # 4) 예측 실행 버튼
         self.btn_run = QPushButton("예측 실행")
         self.btn_run.setStyleSheet("""
@@ -397,54 +407,33 @@ class PredictionPage(QWidget):
         if row >= 0 and row < self.cb_engine.count():
             self.cb_engine.setCurrentIndex(row)
 
-    def _parse_info_from_name(self, filename):
-        date_match = re.search(r"(\d{6})\.pkl$", filename)
-        max_d = None
-        target_d = None
-        if date_match:
-            try:
-                s = date_match.group(1)
-                max_d = pd.to_datetime("20" + s, format="%Y%m%d").date()
-                target_d = (pd.Timestamp(max_d) + BDay(1)).date()
-            except:
-                pass
-        
-        h_match = re.search(r"_h(\d+)_", filename)
-        h = int(h_match.group(1)) if h_match else 5 
-        w_match = re.search(r"_w(\d+)_", filename)
-        w = int(w_match.group(1)) if w_match else 0
-        v_match = re.search(r"(V\d+)", filename)
-        ver = v_match.group(1) if v_match else "Unknown"
-        return max_d, target_d, h, w, ver
+    def _engine_info(self, entry):
+        """엔진 색인 행 → (데이터 마지막 날, 예측 기준일, h, w, 버전)."""
+        h = entry.get('horizon') or 5
+        w = entry.get('input_window') or 0
+        ver = entry.get('version') or "Unknown"
+        return entry.get('data_date'), entry.get('target_date'), h, w, ver
 
     def load_engines(self):
-        # 1. 파일 스캔 및 정보 캐싱
-        real_files = []
-        research_files = []
+        # 1. 엔진 색인 조회 (pickle/파일명 파싱 없음) 및 정보 캐싱
         base = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "MODELENGINE", "HOJ_ENGINE"))
-        
-        if os.path.exists(os.path.join(base, "REAL")):
-            real_files = glob.glob(os.path.join(base, "REAL", "*.pkl"))
-        if os.path.exists(os.path.join(base, "RESEARCH")):
-            research_files = glob.glob(os.path.join(base, "RESEARCH", "*.pkl"))
-
-        def get_mtime(p):
-            try: return os.path.getmtime(p)
-            except: return 0
-
-        real_files.sort(key=get_mtime, reverse=True)
-        research_files.sort(key=get_mtime, reverse=True)
-        files = real_files + research_files
+        try:
+            entries = engine_registry.list_engines(base=base)
+        except Exception as e:
+            print(f"[REGISTRY] 엔진 색인 조회 실패: {e}")
+            entries = []
+
+        # REAL → RESEARCH, 각각 최근 생성 순
+        entries.sort(key=lambda e: (e['mode'] != "REAL", -(e['file_mtime'] or 0)))
         
         # 캐싱
         self.all_engine_files = []
         self._date_engine_counts = {}
         
-        for f in files:
-            fname = os.path.basename(f)
-            _, target_d, _, _, _ = self._parse_info_from_name(fname)
+        for e in entries:
+            target_d = e['target_date']
             
-            entry = {'path': f, 'name': fname, 'target_date': target_d}
+            entry = {'path': e['path'], 'name': e['name'], 'target_date': target_d, 'info': e}
             self.all_engine_files.append(entry)
             
             if target_d:
@@ -472,6 +461,7 @@ class PredictionPage(QWidget):
             filtered = self.all_engine_files
 
         self.engine_paths = [e['path'] for e in filtered]
+        self.engine_infos = [e['info'] for e in filtered]
         
         self._building_list = True
         try:
@@ -505,14 +495,7 @@ class PredictionPage(QWidget):
         if idx < 0 or idx >= len(self.engine_paths):
             return
             
-        path = self.engine_paths[idx]
-        filename = os.path.basename(path)
-        max_d, target_d, h, w, ver = self._parse_info_from_name(filename)
-        
-        # Fallback if needed (생략: 위에서 이미 파싱함)
-        if max_d is None:
-             # 안전장치: 실제 파일 읽기 (코드 생략, 기존 로직 유지)
-             pass
+        max_d, target_d, h, w, ver = self._engine_info(self.engine_infos[idx])
 
         self._current_engine_info["target_date"] = target_d
         self._current_engine_info["h"] = h
@@ -614,13 +597,23 @@ class PredictionPage(QWidget):
             self.worker.deleteLater()
             self.worker = None
 
+        selected = sorted({i.row() for i in self.engine_list.selectedIndexes()})
         try:
-            self.worker = PredictionWorker(
-                engine_path=engine_path,
-                target_date=target_date,
-                top_n=top_n,
-                specific_code=target_code,
-            )
+            if len(selected) >= 2:
+                self.worker = EnsembleWorker(
+                    engine_paths=[self.engine_paths[r] for r in selected],
+                    target_date=target_date,
+                    top_n=top_n,
+                    specific_code=target_code,
+                    blend=self.cb_blend.currentData(),
+                )
+            else:
+                self.worker = PredictionWorker(
+                    engine_path=engine_path,
+                    target_date=target_date,
+                    top_n=top_n,
+                    specific_code=target_code,
+                )
             self.worker.finished_signal.connect(self._on_worker_finished)
             self.worker.error_signal.connect(self._on_worker_error)
             self.worker.start()
@@ -639,6 +632,12 @@ class PredictionPage(QWidget):
                 msg = (f"분석 완료.\n"
                        f"가장 높은 점수: {best.get('name')} ({best.get('code')})\n"
                        f"예측 점수: {best.get('score', 0):.4f}")
+                per_engine = [c for c in df.columns if c.endswith(":combo")]
+                if per_engine:
+                    msg += f"\n\n[앙상블 {len(per_engine)}개 엔진 / {self.cb_blend.currentText()}]"
+                    for c in per_engine:
+                        v = best.get(c)
+                        msg += f"\n - {c.split(':')[0]}: " + ("-" if pd.isna(v) else f"{v:.4f}")
                 self.ai_panel.setText(msg)
             else:
                 self.ai_panel.setText("예측 결과가 없습니다.")